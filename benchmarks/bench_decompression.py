@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+壓縮日誌的串流解析速度
+把同一份計數器日誌分別存為未壓縮、.gz、.bz2、.xz，以 iter_counter_file_mmap 邊解壓邊解析，
+輸出每種格式的每秒處理行數、解壓後 MB/s 與壓縮檔 MB/s
+
+用法: python benchmarks/bench_decompression.py [--blocks 20000] [--ports 48]
+"""
+
+import argparse
+import bz2
+import gzip
+import lzma
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'parse_counter_tool'))
+
+from bench_counter_tokenizer import make_log  # noqa: E402
+from counter_io import iter_counter_file_mmap  # noqa: E402
+from phy_common.compression import detect_compression  # noqa: E402
+
+# 格式名稱 -> (副檔名, 開啟寫入用文件的函式)
+CODECS = (
+    ('plain', '', lambda path: open(path, 'wb')),
+    ('gzip', '.gz', lambda path: gzip.open(path, 'wb', compresslevel=6)),
+    ('bz2', '.bz2', lambda path: bz2.open(path, 'wb')),
+    ('xz', '.xz', lambda path: lzma.open(path, 'wb', preset=1)),
+)
+
+
+def parse_blocks(file_path):
+    """邊解壓邊解析，返回區塊數"""
+    count = 0
+    for _ in iter_counter_file_mmap(file_path):
+        count += 1
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="壓縮日誌的串流解析速度")
+    parser.add_argument('--blocks', type=int, default=20000, help="區塊數量")
+    parser.add_argument('--ports', type=int, default=48, help="介面數量")
+    parser.add_argument('--repeat', type=int, default=3, help="重複次數 (取最佳)")
+    args = parser.parse_args()
+
+    data = make_log(args.blocks, args.ports).encode('utf-8')
+    line_count = data.count(b'\n')
+    print(f"{args.blocks} 個區塊, {line_count:,} 行, {len(data) / 1e6:.1f} MB")
+
+    with tempfile.TemporaryDirectory() as directory:
+        for codec, suffix, open_output in CODECS:
+            path = os.path.join(directory, 'counter.log' + suffix)
+            with open_output(path) as f:
+                f.write(data)
+            assert (detect_compression(path) or 'plain') == codec
+            size = os.path.getsize(path)
+
+            best = None
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                blocks = parse_blocks(path)
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            if blocks != args.blocks:
+                print(f"錯誤: {codec} 解析出 {blocks} 個區塊")
+                return 1
+            print(f"{codec:<6} {size / 1e6:8.1f} MB  {best:7.3f} s  {line_count / best:12,.0f} lines/s  "
+                  f"{len(data) / best / 1e6:7.1f} MB/s (解壓後)  {size / best / 1e6:7.1f} MB/s (壓縮檔)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+接收伺服器的負載測試 (模擬多台裝置)
+在子進程啟動 counter_server 的 IngestServer，本進程以 asyncio 模擬大量裝置同時以 TCP (或 UDP) 送出
+loggen 產生的計數器區塊與寄存器轉儲，輸出伺服器端持續的訊息/秒與背壓造成的等待
+
+用法:
+  python benchmarks/bench_server.py --devices 200 --messages 200
+  python benchmarks/bench_server.py --devices 50 --messages 100 --udp
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import sys
+import time
+from multiprocessing import Pipe, get_context
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, os.path.join(ROOT_DIR, 'parse_counter_tool'))
+
+from loggen import counter_blocks, register_dumps  # noqa: E402
+
+# 每幾個計數器區塊送一份寄存器轉儲
+REGISTER_EVERY = 10
+
+# UDP 資料包的大小上限 (一個計數器區塊約 1.3KB)
+UDP_PAYLOAD = 8 * 1024
+
+
+def run_server(conn, queue_size):
+    """子進程: 啟動伺服器，回報埠號，收到預期的訊息數後回傳統計"""
+    from counter_server import IngestServer
+
+    async def serve():
+        server = IngestServer(queue_size, keep_stores=True)
+        conn.send(await server.start('127.0.0.1', 0, 0))
+        expected = None
+        idle_since = None
+        last_count = -1
+        while True:
+            await asyncio.sleep(0.05)
+            if expected is None and conn.poll():
+                expected = conn.recv()
+            if expected is None:
+                continue
+            stats = server.stats
+            if stats.messages >= expected:
+                break
+            # UDP 可能遺失資料包: 訊息數停止增加一秒後結束
+            if stats.messages != last_count:
+                last_count = stats.messages
+                idle_since = time.perf_counter()
+            elif time.perf_counter() - idle_since > 1.0:
+                break
+        stats = server.stats
+        conn.send({
+            'messages': stats.messages,
+            'blocks': stats.blocks,
+            'dumps': stats.dumps,
+            'bytes': stats.bytes,
+            'dropped': stats.dropped,
+            'connections': stats.connections,
+            'devices': len(server.stores) + len(set(server.registers) - set(server.stores)),
+            'snapshots': sum(len(store) for store in server.stores.values()),
+            'seconds': (stats.last_time - stats.first_time) if stats.first_time is not None else 0.0,
+            'rate': stats.sustained_rate(),
+        })
+
+    asyncio.run(serve())
+
+
+def device_payloads(device, messages, ports):
+    """返回裝置要送出的文字片段 (每個片段為一個完成的訊息)，以及訊息數"""
+    blocks = counter_blocks(ports, seed=device, timestamps=True)
+    dumps = register_dumps(seed=device)
+    chunks = [f"DEVICE dut-{device}\n"]
+    count = 0
+    while count < messages:
+        chunks.append(next(blocks))
+        count += 1
+        if count % REGISTER_EVERY == 0 and count < messages:
+            chunks.append(next(dumps))
+            count += 1
+    # 最後一個區塊在連線結束時完成；寄存器轉儲遇到下一行才完成，因此不以轉儲結尾
+    return chunks, count
+
+
+async def tcp_device(port, chunks, waits):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    for chunk in chunks:
+        writer.write(chunk.encode('utf-8'))
+        start = time.perf_counter()
+        # 伺服器處理不及時，drain 會等待 (背壓)
+        await writer.drain()
+        waits.append(time.perf_counter() - start)
+    writer.close()
+    await writer.wait_closed()
+
+
+async def udp_device(port, chunks, interval):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setblocking(False)
+    loop = asyncio.get_running_loop()
+    packet = ''
+    for chunk in chunks:
+        if packet and len(packet) + len(chunk) > UDP_PAYLOAD:
+            await loop.sock_sendto(sock, packet.encode('utf-8'), ('127.0.0.1', port))
+            packet = ''
+            # UDP 沒有背壓，以固定間隔送出
+            await asyncio.sleep(interval)
+        packet += chunk
+    # 結尾再送一個標頭，讓最後一個區塊完成 (UDP 沒有連線結束)
+    packet += "==========PHY[end] COUNTER===========\n"
+    await loop.sock_sendto(sock, packet.encode('utf-8'), ('127.0.0.1', port))
+    sock.close()
+
+
+async def run_clients(args, tcp_port, udp_port):
+    payloads = [device_payloads(device, args.messages, args.ports) for device in range(args.devices)]
+    waits = []
+    start = time.perf_counter()
+    if args.udp:
+        await asyncio.gather(*(udp_device(udp_port, chunks, args.udp_interval / 1000) for chunks, _ in payloads))
+    else:
+        await asyncio.gather(*(tcp_device(tcp_port, chunks, waits) for chunks, _ in payloads))
+    return sum(count for _, count in payloads), time.perf_counter() - start, waits
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="接收伺服器的負載測試")
+    parser.add_argument('--devices', type=int, default=100, help="同時連線的裝置數")
+    parser.add_argument('--messages', type=int, default=200, help="每台裝置送出的訊息數")
+    parser.add_argument('--ports', type=int, default=48, help="每台裝置的介面數 (決定計數器區塊的內容)")
+    parser.add_argument('--queue-size', type=int, default=4096, help="伺服器的佇列上限")
+    parser.add_argument('--udp', action='store_true', help="以 UDP 送出")
+    parser.add_argument('--udp-interval', type=float, default=2.0, help="每台裝置送出 UDP 資料包的間隔 (毫秒)")
+    args = parser.parse_args(argv)
+
+    conn, child = Pipe()
+    process = get_context('spawn').Process(target=run_server, args=(child, args.queue_size))
+    process.start()
+    tcp_port, udp_port = conn.recv()
+
+    sent, send_seconds, waits = asyncio.run(run_clients(args, tcp_port, udp_port))
+    conn.send(sent)
+    result = conn.recv()
+    process.join()
+
+    print(f"{args.devices} 台裝置 ({'UDP' if args.udp else 'TCP'}), 送出 {sent} 個訊息, {send_seconds:.2f} s")
+    print(f"伺服器: {result['messages']} 個訊息 ({result['blocks']} 個區塊, {result['dumps']} 份轉儲), "
+          f"{result['devices']} 台裝置, {result['bytes'] / 1e6:.1f} MB")
+    print(f"持續速率: {result['rate']:,.0f} 訊息/秒 ({result['seconds']:.2f} s), 丟棄 {result['dropped']}")
+    if waits:
+        waits.sort()
+        print(f"背壓等待: 中位數 {waits[len(waits) // 2] * 1000:.2f} ms, "
+              f"最大 {waits[-1] * 1000:.1f} ms, 總計 {sum(waits):.2f} s")
+    if args.udp:
+        # UDP 在核心緩衝區滿時遺失資料包，只回報遺失比例
+        print(f"遺失: {1 - result['messages'] / sent:.1%}")
+        return 0
+    return 0 if result['messages'] >= sent else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+解析器效能測試
+以 loggen 產生固定內容的日誌，對兩個工具的解析流程分階段計時，輸出 lines/s、MB/s 與峰值記憶體 (RSS)；
+每個情境在獨立的進程中執行，峰值記憶體互不影響。可與先前保存的結果比較以發現效能退化
+
+情境:
+  counter_text  與 GUI 的 parse_data 相同: 讀入全文 → 解析 → 存入 CounterTimeSeries → 驗證規則
+  counter_file  以 memory map 直接解析文件 (直接解析文件/批次處理使用的路徑)
+  register      reg.py 的 parse_register_dump 與 analyze_all_registers
+
+用法:
+  python benchmarks/bench_suite.py --size 50MB --json result.json
+  python benchmarks/bench_suite.py --size 50MB --baseline result.json --tolerance 0.2
+"""
+
+import argparse
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, os.path.join(ROOT_DIR, 'parse_counter_tool'))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'reg_parse'))
+
+from loggen import counter_blocks, parse_size, register_dumps, write_log  # noqa: E402
+
+SCENARIOS = ('counter_text', 'counter_file', 'register')
+
+# counter_text 需要把全文讀入記憶體，超過此大小時略過
+TEXT_SCENARIO_LIMIT = 512 * 1024 * 1024
+
+# 與 GUI 的背景解析相同，每次交給解析器的行數
+LINE_BATCH = 20000
+
+
+def peak_rss_mb():
+    """目前進程的峰值記憶體 (MB)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 以 KB 為單位，macOS 以位元組為單位
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def run_counter_text(path):
+    from counter_parser import CounterLogParser
+    from counter_rules import DEFAULT_RULES
+    from counter_store import CounterTimeSeries
+
+    stages = {}
+    start = time.perf_counter()
+    with open(path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    lines = content.splitlines()
+    stages['read'] = time.perf_counter() - start
+
+    parser = CounterLogParser()
+    store = CounterTimeSeries()
+    store_time = 0.0
+    validate_time = 0.0
+    violations = 0
+    start = time.perf_counter()
+
+    def handle(block):
+        nonlocal store_time, validate_time, violations
+        t0 = time.perf_counter()
+        store.add_block(block)
+        t1 = time.perf_counter()
+        violations += len(DEFAULT_RULES.evaluate(block.data))
+        validate_time += time.perf_counter() - t1
+        store_time += t1 - t0
+
+    for i in range(0, len(lines), LINE_BATCH):
+        for block in parser.feed(lines[i:i + LINE_BATCH]):
+            handle(block)
+    block = parser.close()
+    if block is not None:
+        handle(block)
+    total = time.perf_counter() - start
+    stages['parse'] = total - store_time - validate_time
+    stages['store'] = store_time
+    stages['validate'] = validate_time
+    return stages, len(lines), {'blocks': len(store), 'violations': violations,
+                                'unmatched': store.unmatched_count}
+
+
+def run_counter_file(path):
+    from counter_io import iter_counter_file_mmap
+
+    blocks = 0
+    lines = [0]
+
+    def progress(bytes_done, lines_done):
+        lines[0] = lines_done
+
+    start = time.perf_counter()
+    for _ in iter_counter_file_mmap(path, progress=progress):
+        blocks += 1
+    return {'parse': time.perf_counter() - start}, lines[0], {'blocks': blocks}
+
+
+def run_register(path, analyze_repeat=1000):
+    from reg import NetworkChipRegisterParserGUI
+
+    # 只使用解析與分析方法，不建立視窗
+    gui = object.__new__(NetworkChipRegisterParserGUI)
+    stages = {}
+    start = time.perf_counter()
+    with open(path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    stages['read'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    reg_count = gui.parse_register_dump(content)
+    stages['parse_register_dump'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(analyze_repeat):
+        report = gui.analyze_all_registers()
+    stages['analyze_all_registers'] = time.perf_counter() - start
+    return stages, content.count('\n'), {'registers': reg_count, 'analyze_calls': analyze_repeat,
+                                         'report_lines': report.count('\n') + 1}
+
+
+def run_scenario(name, path, analyze_repeat):
+    """在子進程中執行一個情境，返回結果字典"""
+    if name == 'counter_text':
+        stages, lines, details = run_counter_text(path)
+    elif name == 'counter_file':
+        stages, lines, details = run_counter_file(path)
+    else:
+        stages, lines, details = run_register(path, analyze_repeat)
+
+    size = os.path.getsize(path)
+    # 每秒處理量以讀取與解析階段計算 (analyze 與輸入大小無關，另以每次呼叫的時間表示)
+    parse_stages = [stage for stage in stages if stage != 'analyze_all_registers']
+    elapsed = sum(stages[stage] for stage in parse_stages)
+    result = {
+        'scenario': name,
+        'bytes': size,
+        'lines': lines,
+        'seconds': round(elapsed, 6),
+        'lines_per_sec': round(lines / elapsed, 1) if elapsed > 0 else None,
+        'mb_per_sec': round(size / elapsed / 1e6, 3) if elapsed > 0 else None,
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+        'stages': {stage: round(seconds, 6) for stage, seconds in stages.items()},
+    }
+    if 'analyze_all_registers' in stages:
+        result['analyze_ms_per_call'] = round(stages['analyze_all_registers'] * 1000 / analyze_repeat, 4)
+    result.update(details)
+    return result
+
+
+def compare(results, baseline, tolerance):
+    """與基準結果比較 lines/s，返回退化的情境說明"""
+    previous = {result['scenario']: result for result in baseline.get('results', [])}
+    regressions = []
+    for result in results:
+        old = previous.get(result['scenario'])
+        if not old or not old.get('lines_per_sec') or not result.get('lines_per_sec'):
+            continue
+        ratio = result['lines_per_sec'] / old['lines_per_sec']
+        if ratio < 1 - tolerance:
+            regressions.append(f"{result['scenario']}: {old['lines_per_sec']:,.0f} → "
+                               f"{result['lines_per_sec']:,.0f} lines/s ({ratio:.0%})")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="解析器效能測試")
+    parser.add_argument('--size', default='20MB', help="每個測試日誌的大小 (1MB 到 10GB)")
+    parser.add_argument('--ports', type=int, default=48, help="介面數量")
+    parser.add_argument('--error-rate', type=float, default=0.01, help="注入錯誤的區塊比例")
+    parser.add_argument('--seed', type=int, default=1, help="亂數種子")
+    parser.add_argument('--scenario', action='append', choices=SCENARIOS, dest='scenarios',
+                        help="只執行指定的情境 (可重複)")
+    parser.add_argument('--analyze-repeat', type=int, default=1000, help="analyze_all_registers 的呼叫次數")
+    parser.add_argument('--workdir', help="保存產生的日誌的目錄 (預設為暫存目錄，結束後刪除)")
+    parser.add_argument('--json', dest='json_path', help="輸出 JSON 結果")
+    parser.add_argument('--baseline', help="與先前輸出的 JSON 結果比較")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="允許的 lines/s 下降比例")
+    args = parser.parse_args(argv)
+
+    size = parse_size(args.size)
+    scenarios = args.scenarios or list(SCENARIOS)
+    if size > TEXT_SCENARIO_LIMIT and 'counter_text' in scenarios:
+        print(f"略過 counter_text (超過 {TEXT_SCENARIO_LIMIT // (1024 * 1024)} MB 時不讀入全文)")
+        scenarios.remove('counter_text')
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        workdir = args.workdir or temp_dir
+        os.makedirs(workdir, exist_ok=True)
+        counter_path = os.path.join(workdir, f'counter_{args.size}_{args.ports}p_{args.seed}.log')
+        register_path = os.path.join(workdir, f'register_{args.size}_{args.seed}.txt')
+
+        if any(name.startswith('counter') for name in scenarios) and not os.path.exists(counter_path):
+            write_log(counter_path, counter_blocks(args.ports, args.seed, args.error_rate, timestamps=True), size)
+        if 'register' in scenarios and not os.path.exists(register_path):
+            write_log(register_path, register_dumps(args.seed, args.error_rate), size)
+
+        results = []
+        for name in scenarios:
+            path = register_path if name == 'register' else counter_path
+            # 每個情境使用新的進程，峰值記憶體只包含該情境
+            with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as executor:
+                result = executor.submit(run_scenario, name, path, args.analyze_repeat).result()
+            results.append(result)
+            stages = ', '.join(f"{stage} {seconds:.3f}s" for stage, seconds in result['stages'].items())
+            print(f"{name:<13} {result['lines_per_sec']:>12,.0f} lines/s {result['mb_per_sec']:>8.1f} MB/s "
+                  f"峰值 {result['peak_rss_mb']:>7.1f} MB  [{stages}]")
+
+    output = {'size': args.size, 'ports': args.ports, 'seed': args.seed,
+              'error_rate': args.error_rate, 'results': results}
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump(output, f, ensure_ascii=False, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print("效能退化:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print("沒有效能退化")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
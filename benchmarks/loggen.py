@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+測試日誌產生器
+以固定的亂數種子產生與 load_example 相同格式的 PHY[ethX] COUNTER 區塊，
+以及與 load_default_data 相同格式的寄存器轉儲，大小可從 1MB 到 10GB (逐塊寫出，不佔用記憶體)
+
+用法:
+  python benchmarks/loggen.py counter out.log --size 100MB --ports 48 --error-rate 0.01
+  python benchmarks/loggen.py register dump.txt --size 10MB --error-rate 0.05
+"""
+
+import argparse
+import bz2
+import gzip
+import lzma
+import random
+import sys
+import time
+
+# 大小單位
+SIZE_UNITS = {'': 1, 'B': 1, 'KB': 1024, 'MB': 1024 ** 2, 'GB': 1024 ** 3}
+
+# 計數器以 9 位數字顯示，超過時回捲
+COUNTER_MODULUS = 10 ** 9
+
+# 計數器區塊的每一行: ('raw', 文字) 或 ('counter', 名稱, 值來源)
+# 值來源 'tx'/'rx' 為該介面的累計封包數，'zero' 為正常時應為 0 的計數器
+COUNTER_LAYOUT = (
+    ('raw', '| <<SS Counter>>'),
+    ('counter', 'Tx Start', 'rx'),
+    ('counter', 'Tx Terminal', 'rx'),
+    ('counter', 'Rx Start', 'tx'),
+    ('counter', 'Rx Terminal', 'tx'),
+    ('raw', '| <<FCM counter>>'),
+    ('counter', 'Rx from Line side_S', 'rx'),
+    ('counter', 'Rx from Line side_T', 'rx'),
+    ('counter', 'Tx to System side_S', 'rx'),
+    ('counter', 'Tx to System side_T', 'rx'),
+    ('counter', 'Rx from System side_S', 'tx'),
+    ('counter', 'Rx from System side_T', 'tx'),
+    ('counter', 'Tx to Line side_S', 'tx'),
+    ('counter', 'Tx to Line side_T', 'tx'),
+    ('counter', 'Pause from Line side', 'zero'),
+    ('counter', 'Pause to System side', 'zero'),
+    ('counter', 'Pause from System side', 'zero'),
+    ('counter', 'Pause to Line side', 'zero'),
+    ('raw', '| <<MAC Counter>>'),
+    ('counter', 'Tx Error from System side', 'zero'),
+    ('counter', 'Rx Error to System side', 'zero'),
+    ('counter', 'Tx from System side', 'tx'),
+    ('counter', 'Rx to System side', 'rx'),
+    ('raw', '| <<LS counter>>'),
+    ('raw', '| Before EF'),
+    ('counter', 'Tx to Line side_S', 'tx'),
+    ('counter', 'Tx to Line side_T', 'tx'),
+    ('counter', 'Tx ENC', 'tx'),
+    ('counter', 'Rx from Line side_S', 'rx'),
+    ('counter', 'Rx from Line side_T', 'rx'),
+    ('counter', 'Rx_DEC', 'rx'),
+    ('raw', '| After EF'),
+    ('counter', 'Tx to Line side_S', 'tx'),
+    ('counter', 'Tx to Line side_T', 'tx'),
+    ('counter', 'Rx from Line side_S', 'rx'),
+    ('counter', 'Rx from Line side_T', 'rx'),
+)
+
+# 可注入錯誤的計數器行 (COUNTER_LAYOUT 中的位置)
+COUNTER_LINES = [i for i, spec in enumerate(COUNTER_LAYOUT) if spec[0] == 'counter']
+
+# 寄存器名稱與預設值 (與 reg.py 的 load_default_data 相同)
+REGISTER_DEFAULTS = (
+    ('RG_MII_REG_00', 0x00001140),
+    ('RG_MII_REG_01', 0x00004169),
+    ('RG_MII_REG_02', 0x000003a2),
+    ('RG_MII_REG_03', 0x0000a411),
+    ('RG_MII_REG_04', 0x00001d01),
+    ('RG_MII_REG_05', 0x0000dd01),
+    ('RG_MII_REG_06', 0x0000000f),
+    ('RG_MII_REG_07', 0x00002801),
+    ('RG_MII_REG_08', 0x00004400),
+    ('RG_MII_REG_09', 0x00000200),
+    ('RG_MII_REG_0a', 0x000048ff),
+    ('RG_ABILITY_2G5', 0x00000081),
+    ('RG_LINK_PARTNER_2G5', 0x00000003),
+    ('RG_MII_REF_CLK', 0x0000000c),
+    ('RG_PHY_ANA', 0x01a01501),
+    ('RG_HW_STRAP1', 0x000f8000),
+    ('RG_HW_STRAP2', 0x00301105),
+    ('RG_SYS_LINK_MODE', 0x00000893),
+    ('RG_FCM_CTRL', 0x00000007),
+    ('RG_SS_PAUSE_TIME', 0x0000ff00),
+    ('RG_MIN_IPG_NUM', 0x05050505),
+    ('RG_CSR_AN0', 0x00000140),
+    ('RG_SS_LINK_STATUS', 0x0800b230),
+    ('RG_LINK_PARTNER_AN', 0x00000000),
+    ('RG_FN_PWR_CTRL_STATUS', 0x00030008),
+    ('RG_MD32_FW_READY', 0x00000002),
+    ('RG_RX_SYNC_CNT', 0x00000001),
+    ('RG_WHILE_LOOP_COUNT', 0x00b517a8),
+)
+
+# 寄存器名稱欄位的寬度 (與 load_default_data 對齊)
+REGISTER_NAME_WIDTH = 19
+
+# 寫出壓縮檔時使用的模組
+COMPRESSORS = {'gz': gzip, 'bz2': bz2, 'xz': lzma}
+
+
+def parse_size(text):
+    """把 '100MB'、'10GB'、'4096' 等轉換為位元組數"""
+    text = text.strip().upper()
+    number = text.rstrip('KMGB')
+    unit = text[len(number):]
+    if unit not in SIZE_UNITS:
+        raise ValueError(f"未知的大小單位: {text}")
+    return int(float(number) * SIZE_UNITS[unit])
+
+
+def counter_blocks(ports=48, seed=1, error_rate=0.0, timestamps=False, start_time=1704067200):
+    """無限產生計數器區塊文字
+
+    每個介面的 tx/rx 在每次快照時遞增，各階段的計數器在正常情況下相等 (符合驗證規則)；
+    error_rate 的區塊會注入一個錯誤: 下游計數器少算 (掉包)、應為 0 的計數器不為 0，或一行無法解析的內容。
+    timestamps 為 True 時每個區塊前加上時間戳，每輪所有介面後增加一秒。
+    """
+    rng = random.Random(seed)
+    tx = [rng.randrange(COUNTER_MODULUS) for _ in range(ports)]
+    rx = [rng.randrange(COUNTER_MODULUS) for _ in range(ports)]
+    round_no = 0
+    while True:
+        for port in range(ports):
+            tx[port] = (tx[port] + rng.randrange(1000, 100000)) % COUNTER_MODULUS
+            rx[port] = (rx[port] + rng.randrange(1000, 100000)) % COUNTER_MODULUS
+            values = {'tx': tx[port], 'rx': rx[port], 'zero': 0}
+
+            error_line = None
+            error_kind = None
+            if error_rate and rng.random() < error_rate:
+                error_line = rng.choice(COUNTER_LINES)
+                error_kind = rng.choice(('drop', 'drop', 'drop', 'garbage'))
+
+            lines = []
+            if timestamps:
+                lines.append(time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(start_time + round_no)))
+            lines.append(f"==========PHY[eth0.{port}] COUNTER===========")
+            for i, spec in enumerate(COUNTER_LAYOUT):
+                if spec[0] == 'raw':
+                    lines.append(spec[1])
+                    continue
+                name, source = spec[1], spec[2]
+                value = values[source]
+                if i == error_line:
+                    if error_kind == 'garbage':
+                        lines.append(f"| {name:<27}:  ???????? |")
+                        continue
+                    value = rng.randrange(1, 1000) if source == 'zero' else max(value - rng.randrange(1, 1000), 0)
+                lines.append(f"| {name:<27}:{value:09d} |")
+            yield '\n'.join(lines) + '\n'
+        round_no += 1
+
+
+def register_dumps(seed=1, error_rate=0.0):
+    """無限產生寄存器轉儲文字，每塊為一張板子的所有寄存器 (以 # board N 註解行分隔)
+
+    計數類的寄存器每次不同；error_rate 的轉儲會注入一個錯誤: 鏈路斷開、遠端故障，或無法解析的數值。
+    """
+    rng = random.Random(seed)
+    board = 0
+    while True:
+        registers = dict(REGISTER_DEFAULTS)
+        registers['RG_RX_SYNC_CNT'] = rng.randrange(1, 16)
+        registers['RG_WHILE_LOOP_COUNT'] = rng.randrange(1 << 24)
+        registers['RG_FN_PWR_CTRL_STATUS'] = 0x00030000 | rng.randrange(16)
+
+        garbage = None
+        if error_rate and rng.random() < error_rate:
+            error_kind = rng.choice(('link_down', 'remote_fault', 'garbage'))
+            if error_kind == 'link_down':
+                registers['RG_SS_LINK_STATUS'] &= ~1
+                registers['RG_MII_REG_01'] &= ~(1 << 3)
+            elif error_kind == 'remote_fault':
+                registers['RG_SS_LINK_STATUS'] |= 1 << 6
+                registers['RG_MII_REG_01'] |= 1 << 5
+            else:
+                garbage = rng.choice(REGISTER_DEFAULTS)[0]
+
+        lines = [f"# board {board}"]
+        for name, value in registers.items():
+            if name == garbage:
+                lines.append(f"{name:<{REGISTER_NAME_WIDTH}} : 0x????????")
+            else:
+                lines.append(f"{name:<{REGISTER_NAME_WIDTH}} : 0x{value:08x}")
+        yield '\n'.join(lines) + '\n'
+        board += 1
+
+
+def write_log(path, chunks, size, compress=None, buffer_size=1024 * 1024):
+    """把 chunks 寫到 path 直到 (未壓縮的) 大小達到 size，返回 (位元組數, 塊數)"""
+    opener = COMPRESSORS[compress].open if compress else open
+    written = 0
+    count = 0
+    buffer = []
+    buffered = 0
+    with opener(path, 'wb') as f:
+        for chunk in chunks:
+            data = chunk.encode('utf-8')
+            buffer.append(data)
+            buffered += len(data)
+            written += len(data)
+            count += 1
+            if buffered >= buffer_size or written >= size:
+                f.write(b''.join(buffer))
+                buffer = []
+                buffered = 0
+            if written >= size:
+                break
+    return written, count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="測試日誌產生器")
+    parser.add_argument('kind', choices=('counter', 'register'), help="日誌種類")
+    parser.add_argument('output', help="輸出文件")
+    parser.add_argument('--size', default='1MB', help="未壓縮大小，例如 1MB、500MB、10GB")
+    parser.add_argument('--ports', type=int, default=48, help="介面數量 (counter)")
+    parser.add_argument('--seed', type=int, default=1, help="亂數種子")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="注入錯誤的區塊比例")
+    parser.add_argument('--timestamps', action='store_true', help="區塊前加上時間戳 (counter)")
+    parser.add_argument('--compress', choices=sorted(COMPRESSORS), help="寫出壓縮檔")
+    args = parser.parse_args(argv)
+
+    size = parse_size(args.size)
+    if args.kind == 'counter':
+        chunks = counter_blocks(args.ports, args.seed, args.error_rate, args.timestamps)
+    else:
+        chunks = register_dumps(args.seed, args.error_rate)
+
+    start = time.perf_counter()
+    written, count = write_log(args.output, chunks, size, args.compress)
+    elapsed = time.perf_counter() - start
+    unit = '個區塊' if args.kind == 'counter' else '張板子'
+    print(f"{args.output}: {written / 1e6:.1f} MB, {count} {unit}, {elapsed:.2f} s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
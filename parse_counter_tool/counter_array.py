@@ -0,0 +1,162 @@
+"""
+以 NumPy 陣列存放的欄式計數器存儲
+每個 (介面, 計數器類型, 計數器名稱) 一欄、每個快照一列，差值、速率與計數器溢位回繞都以向量化計算
+可儲存為 .npy 文件並以 memory map 方式載入，不需要重新建立 Python 對象
+"""
+
+import json
+import os
+
+import numpy as np
+
+# 計數器位寬 (用於溢位回繞)
+COUNTER_BITS = (32, 36, 64)
+
+VALUES_FILE = 'values.npy'
+PRESENT_FILE = 'present.npy'
+TIMESTAMPS_FILE = 'timestamps.npy'
+COLUMNS_FILE = 'columns.json'
+
+
+def bits_for_peak(peak):
+    """依出現過的最大值 (uint64 純量或陣列) 推斷計數器位寬 (32 / 36 / 64)"""
+    peak = np.asarray(peak, dtype=np.uint64)
+    bits = np.full(peak.shape, COUNTER_BITS[-1], dtype=np.int64)
+    for width in reversed(COUNTER_BITS[:-1]):
+        bits[peak < np.uint64(1 << width)] = width
+    return bits
+
+
+def wrap_modulus(counter_bits, count):
+    """每欄溢位時要加上的 2**bits (uint64，64 位元的欄以 2**64 為模即為 0)"""
+    bits = np.broadcast_to(np.asarray(counter_bits, dtype=np.int64), (count,))
+    return np.array([0 if width >= 64 else 1 << int(width) for width in bits], dtype=np.uint64)
+
+
+class CounterArray:
+    """欄式計數器存儲
+
+    values:      uint64 陣列 (快照數, 欄數)，沒有值的位置為 0
+    present:     bool 陣列 (快照數, 欄數)，有值的位置為 True
+    timestamps:  float64 陣列 (快照數, 介面數)，沒有時間時為 NaN
+    第 r 列是每個介面的第 r 個快照
+    """
+
+    def __init__(self, values, present, timestamps, interfaces, columns):
+        self.values = values
+        self.present = present
+        self.timestamps = timestamps
+        self.interfaces = list(interfaces)       # 介面名稱
+        self.columns = [tuple(column) for column in columns]  # (interface, counter_type, counter_name)
+        self.column_lookup = {column: i for i, column in enumerate(self.columns)}
+
+        interface_lookup = {name: i for i, name in enumerate(self.interfaces)}
+        self.column_interface = np.array([interface_lookup[column[0]] for column in self.columns],
+                                         dtype=np.intp)
+
+    @classmethod
+    def from_time_series(cls, store):
+        """由 CounterTimeSeries 建立，每欄直接複製底層 array 緩衝區"""
+        interfaces = store.interface_names()
+        row_count = max((len(store.interfaces[name]) for name in interfaces), default=0)
+
+        columns = []
+        for name in interfaces:
+            for counter_type, counter_name in store.interfaces[name].columns:
+                columns.append((name, counter_type, counter_name))
+
+        values = np.zeros((row_count, len(columns)), dtype=np.uint64)
+        present = np.zeros((row_count, len(columns)), dtype=bool)
+        timestamps = np.full((row_count, len(interfaces)), np.nan, dtype=np.float64)
+
+        col = 0
+        for i, name in enumerate(interfaces):
+            series = store.interfaces[name]
+            rows = len(series)
+            if rows:
+                timestamps[:rows, i] = np.frombuffer(series.timestamps, dtype=np.float64)
+            for key, column in series.columns.items():
+                values[:rows, col] = np.frombuffer(column, dtype=np.uint64)
+                present[:rows, col] = np.frombuffer(series.present[key], dtype=bool)
+                col += 1
+
+        return cls(values, present, timestamps, interfaces, columns)
+
+    def __len__(self):
+        """快照 (列) 數"""
+        return self.values.shape[0]
+
+    def column_index(self, interface, counter_type, counter_name):
+        """返回欄位索引，不存在時返回 None"""
+        return self.column_lookup.get((interface, counter_type, counter_name))
+
+    def interface_columns(self, interface):
+        """返回某介面所有欄位的索引陣列"""
+        return np.flatnonzero(self.column_interface == self.interfaces.index(interface))
+
+    def column_bits(self):
+        """依每欄出現過的最大值推斷計數器位寬 (32 / 36 / 64)"""
+        if not len(self):
+            return np.full(len(self.columns), COUNTER_BITS[0], dtype=np.int64)
+        return bits_for_peak(self.values.max(axis=0))
+
+    def deltas(self, wrap=True, counter_bits=None):
+        """相鄰快照的差值，形狀 (快照數 - 1, 欄數)
+
+        wrap 為 True 時，數值變小視為計數器溢位並加上 2**bits；
+        counter_bits 可以是單一位寬或每欄位寬的陣列，預設由 column_bits 推斷。
+        任一側缺值的位置為 NaN。
+        """
+        previous = self.values[:-1]
+        current = self.values[1:]
+        wrapped = current < previous
+        # 無號相減以 2**64 為模，沒有變小的位置就是準確的差值
+        with np.errstate(over='ignore'):
+            forward = current - previous
+            if wrap:
+                if counter_bits is None:
+                    counter_bits = self.column_bits()
+                forward = np.where(wrapped, forward + wrap_modulus(counter_bits, len(self.columns)), forward)
+                result = forward.astype(np.float64)
+            else:
+                result = np.where(wrapped, -(previous - current).astype(np.float64), forward.astype(np.float64))
+
+        result[~(self.present[:-1] & self.present[1:])] = np.nan
+        return result
+
+    def intervals(self, default_interval=None):
+        """相鄰快照的時間間隔 (秒)，形狀 (快照數 - 1, 欄數)
+
+        沒有時間戳的位置使用 default_interval，仍未知時為 NaN。
+        """
+        elapsed = np.diff(self.timestamps, axis=0)[:, self.column_interface]
+        if default_interval is not None:
+            elapsed = np.where(np.isnan(elapsed), default_interval, elapsed)
+        return elapsed
+
+    def rates(self, wrap=True, counter_bits=None, default_interval=None):
+        """每秒速率 (例如 packets/sec)，形狀 (快照數 - 1, 欄數)"""
+        elapsed = self.intervals(default_interval)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            result = self.deltas(wrap, counter_bits) / elapsed
+        result[~(elapsed > 0)] = np.nan
+        return result
+
+    def save(self, directory):
+        """儲存為可 memory map 的 .npy 文件與欄位描述"""
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, VALUES_FILE), self.values)
+        np.save(os.path.join(directory, PRESENT_FILE), self.present)
+        np.save(os.path.join(directory, TIMESTAMPS_FILE), self.timestamps)
+        with open(os.path.join(directory, COLUMNS_FILE), 'w', encoding='utf-8') as f:
+            json.dump({'interfaces': self.interfaces, 'columns': self.columns}, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, directory, mmap_mode='r'):
+        """載入 save 產生的文件，預設以唯讀 memory map 方式開啟數值陣列"""
+        values = np.load(os.path.join(directory, VALUES_FILE), mmap_mode=mmap_mode)
+        present = np.load(os.path.join(directory, PRESENT_FILE), mmap_mode=mmap_mode)
+        timestamps = np.load(os.path.join(directory, TIMESTAMPS_FILE), mmap_mode=mmap_mode)
+        with open(os.path.join(directory, COLUMNS_FILE), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        return cls(values, present, timestamps, meta['interfaces'], meta['columns'])
@@ -0,0 +1,252 @@
+"""
+解析結果的磁碟快取
+以 路徑 + 大小 + 修改時間 + 開頭/結尾內容的雜湊 辨識文件，把 CounterTimeSeries 的陣列原樣寫成緊湊的二進位文件；
+重新開啟未變更的文件時直接載入，文件被追加時從最後一個區塊的標頭繼續解析，快取總大小超過上限時刪除最久未使用的項目
+
+用法: python counter_cache.py <日誌文件> [--cache-dir DIR] [--clear]
+"""
+
+import argparse
+import json
+import os
+import struct
+import sys
+import tempfile
+import time
+from array import array
+
+from counter_io import iter_counter_file_mmap
+from counter_parallel import MIN_PARALLEL_BYTES, parse_file_parallel
+from counter_parser import CounterLogParser
+from counter_store import VALUE_TYPECODE, CounterTimeSeries, InterfaceSeries
+from phy_common.compression import detect_compression
+from phy_common.file_cache import CacheDirectory, fingerprint, same_prefix
+
+# 快取文件的開頭與格式版本 (格式改變時遞增，舊的快取視為不存在)
+MAGIC = b'CTSCACHE'
+VERSION = 2
+HEADER_STRUCT = struct.Struct('<8sII')  # MAGIC, 版本, JSON 標頭長度
+
+# 快取目錄的預設總大小上限
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+
+CACHE_SUFFIX = '.ctc'
+
+
+def default_cache_dir():
+    """COUNTER_CACHE_DIR 環境變數，或 ~/.cache/parse_counter_tool"""
+    return os.environ.get('COUNTER_CACHE_DIR') or os.path.join(
+        os.path.expanduser('~'), '.cache', 'parse_counter_tool')
+
+
+def write_store(path, store, meta):
+    """把 store 與 meta (可 JSON 化的字典) 寫入快取文件 (先寫暫存檔再替換，避免留下不完整的文件)"""
+    interfaces = []
+    arrays = []
+    for name, series in store.interfaces.items():
+        keys = list(series.columns)
+        interfaces.append({'name': name, 'rows': len(series), 'columns': keys})
+        arrays.append(series.block_indexes)
+        arrays.append(series.timestamps)
+        arrays.append(series.offsets)
+        arrays.extend(series.columns[key] for key in keys)
+        arrays.extend(series.present[key] for key in keys)
+
+    header = dict(meta, byteorder=sys.byteorder, unmatched_count=store.unmatched_count,
+                  last_unmatched=store.last_unmatched, interfaces=interfaces)
+    header_bytes = json.dumps(header, ensure_ascii=False).encode('utf-8')
+
+    directory = os.path.dirname(path)
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(HEADER_STRUCT.pack(MAGIC, VERSION, len(header_bytes)))
+            f.write(header_bytes)
+            for values in arrays:
+                f.write(values)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def read_store(path):
+    """讀取快取文件，返回 (store, meta)；格式不符時拋出 ValueError"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    magic, version, header_len = HEADER_STRUCT.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("快取格式不符")
+    position = HEADER_STRUCT.size
+    header = json.loads(data[position:position + header_len].decode('utf-8'))
+    position += header_len
+    view = memoryview(data)
+    swap = header['byteorder'] != sys.byteorder
+
+    def take(typecode, rows):
+        nonlocal position
+        values = array(typecode)
+        end = position + rows * values.itemsize
+        values.frombytes(view[position:end])
+        position = end
+        if swap:
+            values.byteswap()
+        return values
+
+    store = CounterTimeSeries()
+    store.unmatched_count = header['unmatched_count']
+    store.last_unmatched = header['last_unmatched']
+    for item in header['interfaces']:
+        series = InterfaceSeries(item['name'])
+        rows = item['rows']
+        series.block_indexes = take('q', rows)
+        series.timestamps = take('d', rows)
+        series.offsets = take('q', rows)
+        keys = [tuple(key) for key in item['columns']]
+        for key in keys:
+            series.columns[key] = take(VALUE_TYPECODE, rows)
+            series.direction_index.add(*key)
+        for key in keys:
+            series.present[key] = bytearray(view[position:position + rows])
+            position += rows
+        store.interfaces[item['name']] = series
+    if position != len(data):
+        raise ValueError("快取文件長度不符")
+    return store, header
+
+
+class CounterCache(CacheDirectory):
+    """解析結果的快取目錄，每個 (文件路徑, 編碼) 一個快取文件
+
+    最近使用時間以快取文件的修改時間表示 (命中時更新)，寫入後依此刪除最久未使用的項目。
+    """
+
+    suffix = CACHE_SUFFIX
+
+    def __init__(self, directory=None, max_bytes=DEFAULT_MAX_BYTES):
+        super().__init__(directory or default_cache_dir(), max_bytes)
+
+    def entry_path(self, file_path, encoding='utf-8'):
+        return super().entry_path(f"{os.path.abspath(file_path)}\0{encoding}")
+
+    def load(self, file_path, encoding='utf-8'):
+        """返回 (store, 狀態, 繼續解析的位置)
+
+        狀態為 'hit' (文件未變更)、'append' (文件在快取之後被追加，需從位置繼續解析) 或 'miss' (store 為 None)。
+        'append' 時 store 已移除最後一個區塊，並返回該區塊的 (區塊順序, 標頭的位元組位置, 時間)。
+        """
+        path = self.entry_path(file_path, encoding)
+        try:
+            store, meta = read_store(path)
+            st = os.stat(file_path)
+            cached = meta['fingerprint']
+            if meta['path'] != os.path.abspath(file_path):
+                return None, 'miss', None
+            if st.st_size == cached['size'] and st.st_mtime_ns == cached['mtime_ns']:
+                if not same_prefix(file_path, cached):
+                    return None, 'miss', None
+                os.utime(path)
+                return store, 'hit', None
+            if (st.st_size <= cached['size'] or meta['codec'] is not None
+                    or not same_prefix(file_path, cached)):
+                return None, 'miss', None
+        except (OSError, ValueError, KeyError, struct.error):
+            return None, 'miss', None
+
+        # 追加: 最後一個區塊可能還有後續的行，從它的標頭重新解析
+        resume = store.pop_block()
+        if resume is None or resume[1] < 0:
+            return None, 'miss', None
+        os.utime(path)
+        return store, 'append', resume
+
+    def save(self, file_path, store, encoding='utf-8', file_fingerprint=None):
+        """保存 file_path 的解析結果並刪除超出大小上限的舊項目；無法寫入時返回 False
+
+        file_fingerprint 為解析前取得的指紋 (預設為目前的指紋)。
+        """
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            meta = {
+                'path': os.path.abspath(file_path),
+                'encoding': encoding,
+                'codec': detect_compression(file_path),
+                'fingerprint': file_fingerprint or fingerprint(file_path),
+                'created': time.time(),
+            }
+            write_store(self.entry_path(file_path, encoding), store, meta)
+        except OSError:
+            return False
+        self.evict()
+        return True
+
+
+def parse_appended(file_path, store, resume, encoding='utf-8', progress=None):
+    """從 CounterCache.load 返回的最後一個區塊的標頭繼續解析被追加的文件，區塊加入 store
+
+    完整解析時，標頭前的時間戳屬於該區塊；區塊還沒有時間時，標頭後的時間戳才屬於該區塊，否則留給下一個區塊。
+    從標頭開始解析時不帶入時間戳，重新解析的區塊沒有自己的時間戳時才使用快取中的時間 (來自標頭前)。
+    標頭前後都有時間戳時，標頭後的時間戳在完整解析中屬於下一個區塊，從標頭開始無法重現，
+    此時返回 False (store 未被修改)，由呼叫端重新解析整個文件。
+    """
+    index, offset, timestamp = resume
+    if timestamp != timestamp:  # NaN: 沒有時間
+        timestamp = None
+    blocks = iter_counter_file_mmap(file_path, encoding, start=offset, parser=CounterLogParser(index),
+                                    progress=progress)
+    for block in blocks:
+        if block.index == index:
+            if block.timestamp is None:
+                block.timestamp = timestamp
+            elif timestamp is not None and block.timestamp != timestamp:
+                blocks.close()
+                return False
+        store.add_block(block)
+    return True
+
+
+def parse_file_cached(file_path, cache, encoding='utf-8', min_parallel_bytes=MIN_PARALLEL_BYTES,
+                      progress=None):
+    """解析文件，可用時使用快取，返回 (store, 狀態)；狀態同 CounterCache.load
+
+    解析前先取得指紋；繼續解析的位置由 store 中最後一個區塊決定，因此解析期間文件再被追加也不會重複。
+    """
+    file_fingerprint = fingerprint(file_path)
+    store, status, resume = cache.load(file_path, encoding)
+    if status == 'hit':
+        if progress is not None:
+            progress(file_fingerprint['size'], 0)
+        return store, status
+
+    if status == 'append' and not parse_appended(file_path, store, resume, encoding, progress):
+        status = 'miss'
+    if status == 'miss':
+        store = parse_file_parallel(file_path, encoding=encoding, min_parallel_bytes=min_parallel_bytes,
+                                    progress=progress)
+    cache.save(file_path, store, encoding, file_fingerprint)
+    return store, status
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="以快取解析計數器日誌")
+    parser.add_argument('files', nargs='*', help="日誌文件")
+    parser.add_argument('--cache-dir', default=None, help="快取目錄")
+    parser.add_argument('--max-mb', type=float, default=DEFAULT_MAX_BYTES / 1024 / 1024,
+                        help="快取總大小上限 (MB)")
+    parser.add_argument('--clear', action='store_true', help="清除快取")
+    args = parser.parse_args(argv)
+
+    cache = CounterCache(args.cache_dir, int(args.max_mb * 1024 * 1024))
+    if args.clear:
+        cache.clear()
+    for file_path in args.files:
+        start = time.perf_counter()
+        store, status = parse_file_cached(file_path, cache)
+        print(f"{file_path}: {status}, {len(store)} 個快照, {time.perf_counter() - start:.3f} s")
+    entries = cache.entries()
+    print(f"快取: {len(entries)} 項, {sum(size for _, size, _ in entries) / 1e6:.1f} MB ({cache.directory})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,516 @@
+"""
+計數器流程圖 (retained-mode)
+Canvas 上的框、箭頭與文字只在第一次繪製或 Canvas 尺寸改變時建立，
+之後只以 itemconfig/coords 更新有變化的文字與顏色；多次重繪請求合併為每個幀間隔最多一次。
+TX 與 RX 之間的空間顯示所選計數器在整個執行期間的趨勢圖 (以 counter_downsample 降採樣到像素寬度)；
+趨勢圖需要 numpy，只在選擇了計數器時才匯入，沒有安裝 numpy 時流程圖仍可使用。
+"""
+
+import time
+import tkinter as tk
+
+from counter_rules import DATA_TYPES
+
+# 兩次重繪之間的最短間隔 (毫秒)
+FRAME_INTERVAL_MS = 16
+
+# 單次重繪的時間預算 (毫秒)，超過時下一次重繪延後，讓事件迴圈有時間處理輸入
+REDRAW_BUDGET_MS = 8
+
+# 每個框最多顯示的計數器行數
+MAX_LINES = 6
+
+BOX_WIDTH = 210
+BOX_HEIGHT = 120
+HOST_MAC_WIDTH = 120
+HOST_MAC_HEIGHT = 100  # 增加高度以容納兩行文字
+LINE_HEIGHT = 12
+
+COUNTER_TYPES = ('SS', 'FCM', 'ASIX MAC', 'LS')
+COLORS = ('#FFE5E5', '#E5F3FF', '#E5FFE5', '#FFF5E5')
+BORDER_COLORS = ('#FF6B6B', '#4ECDC4', '#45B7D1', '#FFA726')
+
+FAIL_COLOR = '#FF0000'
+TEXT_COLOR = '#000000'
+LINE_FONT = ('Arial', 7)
+EMPTY_FONT = ('Arial', 8)
+
+# 本模組建立的所有 Canvas 項目都帶有此標籤
+TAG = 'flow_chart'
+
+# 趨勢圖的項目標籤、同時顯示的計數器數與顏色
+SPARK_TAG = 'sparkline'
+SPARK_COLORS = ('#D62728', '#1F77B4', '#2CA02C', '#9467BD')
+SPARK_MIN_HEIGHT = 40
+SPARK_LEGEND_HEIGHT = 14
+ZOOM_STEP = 1.25
+MIN_SPAN = 8  # 縮放時最少顯示的快照數
+
+
+class FlowChart:
+    """在 Canvas 上維護流程圖的所有項目
+
+    get_state() 返回 (parsed_data, direction_index, rule_failures, host_tx_text, host_rx_text)，
+    於實際重繪時才呼叫，因此只會讀取最新的狀態。
+    """
+
+    def __init__(self, canvas, get_state, frame_interval_ms=FRAME_INTERVAL_MS,
+                 budget_ms=REDRAW_BUDGET_MS, profiler=None, get_series=None):
+        self.canvas = canvas
+        self.get_state = get_state
+        # get_series 返回 (InterfaceSeries 或 None, 目前的快照)，提供時顯示趨勢圖
+        self.sparklines = Sparklines(canvas, get_series, self.schedule) if get_series is not None else None
+        self.profiler = profiler  # StageProfiler，記錄 render 階段
+        self.frame_interval_ms = frame_interval_ms
+        self.budget_ms = budget_ms
+
+        self.size = None       # 建立項目時的 Canvas 尺寸
+        self.host_lines = {}   # 方向 -> [文字項目]
+        self.counter_lines = {}  # (流程圖區塊, 方向) -> [文字項目]
+        self.anchors = {}      # (流程圖區塊, 方向) -> 框的左上角
+        self.item_state = {}   # 文字項目 -> 最後設定的 (座標, 文字, 顏色, 字型)
+        self.line_keys = {}    # 文字項目 -> 顯示的 (計數器類型, 名稱)，點擊時加入趨勢圖
+        self.job = None
+        self.last_redraw = 0.0
+        self.delay_ms = frame_interval_ms
+
+        # 重繪統計 (毫秒)
+        self.requests = 0
+        self.redraws = 0
+        self.item_updates = 0
+        self.last_ms = 0.0
+        self.max_ms = 0.0
+        self.total_ms = 0.0
+        self.over_budget = 0
+
+        canvas.bind('<Configure>', lambda event: self.schedule(), add='+')
+
+    def schedule(self):
+        """請求重繪；距離上一次重繪不足一個幀間隔的請求會被合併"""
+        self.requests += 1
+        if self.job is not None:
+            return
+        elapsed_ms = (time.perf_counter() - self.last_redraw) * 1000
+        delay = max(int(self.delay_ms - elapsed_ms), 0)
+        self.job = self.canvas.after(delay, self.run_redraw)
+
+    def run_redraw(self):
+        if self.profiler is None:
+            self.redraw()
+        else:
+            self.profiler.run(self.redraw)
+
+    def cancel(self):
+        if self.job is not None:
+            self.canvas.after_cancel(self.job)
+            self.job = None
+
+    def stats(self):
+        """返回重繪統計"""
+        return {
+            'requests': self.requests,
+            'redraws': self.redraws,
+            'item_updates': self.item_updates,
+            'last_ms': round(self.last_ms, 3),
+            'max_ms': round(self.max_ms, 3),
+            'mean_ms': round(self.total_ms / self.redraws, 3) if self.redraws else 0.0,
+            'over_budget': self.over_budget,
+            'budget_ms': self.budget_ms,
+        }
+
+    def redraw(self):
+        """立即把目前狀態反映到 Canvas 上"""
+        self.job = None
+        width = self.canvas.winfo_width()
+        height = self.canvas.winfo_height()
+        if width <= 1:  # Canvas還未完全初始化，等待 <Configure>
+            return
+
+        start = time.perf_counter()
+        if self.size != (width, height):
+            self.build(width, height)
+
+        parsed_data, direction_index, rule_failures, host_tx, host_rx = self.get_state()
+        for direction, text in (('TX', host_tx), ('RX', host_rx)):
+            self.update_host(direction, text)
+        for counter_type in COUNTER_TYPES:
+            for direction in ('TX', 'RX'):
+                items = direction_index.items(parsed_data, counter_type, direction, limit=MAX_LINES)
+                self.update_box(counter_type, direction, items, rule_failures)
+        if self.sparklines is not None:
+            self.sparklines.render()
+
+        self.last_redraw = time.perf_counter()
+        elapsed_ms = (self.last_redraw - start) * 1000
+        if self.profiler is not None:
+            self.profiler.add('render', self.last_redraw - start, start)
+        self.redraws += 1
+        self.last_ms = elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.total_ms += elapsed_ms
+        if elapsed_ms > self.budget_ms:
+            self.over_budget += 1
+            self.delay_ms = max(self.frame_interval_ms, 2 * elapsed_ms)
+        else:
+            self.delay_ms = self.frame_interval_ms
+
+    def build(self, width, height):
+        """依 Canvas 尺寸建立所有靜態項目與空的文字項目"""
+        canvas = self.canvas
+        canvas.delete(TAG)
+        self.size = (width, height)
+        self.host_lines = {}
+        self.counter_lines = {}
+        self.anchors = {}
+        self.item_state = {}
+        self.line_keys = {}
+
+        # 計算水平間距
+        total_boxes_width = HOST_MAC_WIDTH + 4 * BOX_WIDTH
+        spacing = (width - total_boxes_width) // 6
+
+        # HOST MAC 位置
+        host_mac_x = spacing
+        host_mac_y = {'TX': height // 4 - HOST_MAC_HEIGHT // 2,
+                      'RX': 3 * height // 4 - HOST_MAC_HEIGHT // 2}
+        box_y = {'TX': height // 4 - BOX_HEIGHT // 2,
+                 'RX': 3 * height // 4 - BOX_HEIGHT // 2}
+        box_x = [host_mac_x + HOST_MAC_WIDTH + spacing + i * (BOX_WIDTH + spacing) for i in range(4)]
+
+        # 繪製 HOST MAC
+        for direction in ('TX', 'RX'):
+            y = host_mac_y[direction]
+            center = host_mac_x + HOST_MAC_WIDTH // 2
+            canvas.create_rectangle(host_mac_x, y, host_mac_x + HOST_MAC_WIDTH, y + HOST_MAC_HEIGHT,
+                                    fill='#F0F0F0', outline='#333333', width=3, tags=TAG)
+            canvas.create_text(center, y + 15, text="HOST MAC", font=('Arial', 10, 'bold'),
+                               fill='#333333', tags=TAG)
+            canvas.create_text(center, y + 30, text=direction, font=('Arial', 9, 'bold'),
+                               fill='#333333', tags=TAG)
+            # 16進位值分兩行顯示
+            self.host_lines[direction] = [
+                canvas.create_text(center, y + 45 + i * 12, text='', font=('Arial', 8),
+                                   fill='#333333', tags=TAG)
+                for i in range(2)
+            ]
+
+        # 繪製其他計數器框
+        for i, (counter_type, color, border_color) in enumerate(zip(COUNTER_TYPES, COLORS, BORDER_COLORS)):
+            for direction in ('TX', 'RX'):
+                x, y = box_x[i], box_y[direction]
+                canvas.create_rectangle(x, y, x + BOX_WIDTH, y + BOX_HEIGHT,
+                                        fill=color, outline=border_color, width=2, tags=TAG)
+                canvas.create_text(x + BOX_WIDTH // 2, y + 15, text=counter_type,
+                                   font=('Arial', 10, 'bold'), fill=border_color, tags=TAG)
+                self.anchors[(counter_type, direction)] = (x, y)
+                self.counter_lines[(counter_type, direction)] = [
+                    canvas.create_text(x + BOX_WIDTH // 2, y + BOX_HEIGHT // 2 + 5, text='',
+                                       font=LINE_FONT, anchor='center', tags=TAG)
+                    for _ in range(MAX_LINES)
+                ]
+                if self.sparklines is not None:
+                    for item in self.counter_lines[(counter_type, direction)]:
+                        canvas.tag_bind(item, '<Button-1>', lambda event, item=item: self.on_line_click(item))
+
+        # 繪製箭頭 - TX 方向 (從左到右)
+        tx_y = box_y['TX'] + BOX_HEIGHT // 2
+        canvas.create_line(host_mac_x + HOST_MAC_WIDTH + 5, host_mac_y['TX'] + HOST_MAC_HEIGHT // 2,
+                           box_x[0] - 5, tx_y, arrow=tk.LAST, width=2, fill='#FF4444', tags=TAG)
+        for i in range(3):
+            canvas.create_line(box_x[i] + BOX_WIDTH + 5, tx_y, box_x[i + 1] - 5, tx_y,
+                               arrow=tk.LAST, width=2, fill='#FF4444', tags=TAG)
+
+        # 繪製箭頭 - RX 方向 (從右到左)
+        rx_y = box_y['RX'] + BOX_HEIGHT // 2
+        for i in range(3, 0, -1):
+            canvas.create_line(box_x[i] - 5, rx_y, box_x[i - 1] + BOX_WIDTH + 5, rx_y,
+                               arrow=tk.LAST, width=2, fill='#4444FF', tags=TAG)
+        canvas.create_line(box_x[0] - 5, rx_y,
+                           host_mac_x + HOST_MAC_WIDTH + 5, host_mac_y['RX'] + HOST_MAC_HEIGHT // 2,
+                           arrow=tk.LAST, width=2, fill='#4444FF', tags=TAG)
+
+        # 添加方向標籤
+        canvas.create_text(width // 2 - 30, 20, text="TX 方向 (傳送)",
+                           font=('Arial', 12, 'bold'), fill='#FF4444', tags=TAG)
+        canvas.create_text(width // 2 - 30, height - 20, text="RX 方向 (接收)",
+                           font=('Arial', 12, 'bold'), fill='#4444FF', tags=TAG)
+
+        # 趨勢圖放在 TX 與 RX 兩排框之間
+        if self.sparklines is not None:
+            self.sparklines.build((box_x[0], box_y['TX'] + BOX_HEIGHT + 15,
+                                   box_x[3] + BOX_WIDTH, box_y['RX'] - 10))
+
+    def on_line_click(self, item):
+        key = self.line_keys.get(item)
+        if key is not None:
+            self.sparklines.toggle(*key)
+
+    def update_host(self, direction, display):
+        lines = display.split('\n')
+        for i, item in enumerate(self.host_lines[direction]):
+            self.set_text(item, None, lines[i] if i < len(lines) else '', '#333333', None)
+
+    def update_box(self, counter_type, direction, items, rule_failures):
+        x, y = self.anchors[(counter_type, direction)]
+        center = x + BOX_WIDTH // 2
+        y_offset = y + BOX_HEIGHT // 2 + 5
+        slots = self.counter_lines[(counter_type, direction)]
+
+        if not items:
+            self.set_text(slots[0], (center, y_offset), f"{direction}: 無數據", TEXT_COLOR, EMPTY_FONT)
+            for item in slots:
+                self.line_keys.pop(item, None)
+            for item in slots[1:]:
+                self.set_text(item, None, '', TEXT_COLOR, None)
+            return
+
+        top = y_offset - (len(items) - 1) * LINE_HEIGHT // 2
+        for j, item in enumerate(slots):
+            if j < len(items):
+                key, value = items[j]
+                color = FAIL_COLOR if (direction, counter_type, key) in rule_failures else TEXT_COLOR
+                self.set_text(item, (center, top + j * LINE_HEIGHT), f"{key}: {value}", color, LINE_FONT)
+                self.line_keys[item] = (DATA_TYPES[counter_type], key)
+            else:
+                self.set_text(item, None, '', TEXT_COLOR, None)
+                self.line_keys.pop(item, None)
+
+    def set_text(self, item, position, text, color, font):
+        """只在內容改變時更新文字項目；position/font 為 None 時保留原值"""
+        previous = self.item_state.get(item, (None, None, None, None))
+        if position is None:
+            position = previous[0]
+        if font is None:
+            font = previous[3]
+        state = (position, text, color, font)
+        if state == previous:
+            return
+        if position is not None and position != previous[0]:
+            self.canvas.coords(item, *position)
+        options = {}
+        if text != previous[1]:
+            options['text'] = text
+        if color != previous[2]:
+            options['fill'] = color
+        if font is not None and font != previous[3]:
+            options['font'] = font
+        if options:
+            self.canvas.itemconfigure(item, **options)
+        self.item_state[item] = state
+        self.item_updates += 1
+
+
+class Sparklines:
+    """流程圖中間的計數器趨勢圖
+
+    點擊框中的計數器加入或移除 (最多 len(SPARK_COLORS) 條)；滾輪縮放、拖曳平移、雙擊重設範圍、右鍵切換原始值/增量。
+    每條序列的 min-max 金字塔依 (欄位, 長度, 內容) 快取，重繪時只查詢可見範圍並降採樣到像素寬度；
+    項目只在 Canvas 尺寸改變時建立，之後以 coords/itemconfigure 更新。
+    """
+
+    def __init__(self, canvas, get_series, request_redraw, method=None):
+        self.canvas = canvas
+        self.get_series = get_series
+        self.request_redraw = request_redraw
+        self.method = method  # 降採樣方式 (counter_downsample 的 MINMAX / LTTB)，None 為 MINMAX
+        self.selected = []    # [(計數器類型, 名稱)]
+        self.show_delta = False  # 顯示增量 (False 為原始值)
+        self.view = None      # 顯示的快照範圍 (start, end)，None 為全部
+        self.length = 0       # 最後一次繪製時的序列長度
+        self.area = None      # (x0, y0, x1, y1)
+        self.pyramids = {}    # (計數器類型, 名稱, 內容) -> (欄位, 長度, SeriesPyramid)
+        self.drag_x = None
+        self.lines = []
+        self.legend = []
+        self.background = None
+        self.marker = None
+        self.hint = None
+        self.range_text = None
+
+    def build(self, area):
+        """在 area 建立趨勢圖的項目；空間不足時不顯示"""
+        canvas = self.canvas
+        canvas.delete(SPARK_TAG)
+        x0, y0, x1, y1 = area
+        if y1 - y0 < SPARK_MIN_HEIGHT or x1 - x0 < 100:
+            self.area = None
+            return
+        self.area = area
+        self.background = canvas.create_rectangle(x0, y0, x1, y1, fill='#FAFAFA', outline='#DDDDDD',
+                                                  tags=SPARK_TAG)
+        self.marker = canvas.create_line(x0, y0, x0, y1, fill='#BBBBBB', dash=(2, 2), state='hidden',
+                                         tags=SPARK_TAG)
+        self.lines = [canvas.create_line(x0, y1, x1, y1, fill=color, width=1, state='hidden', tags=SPARK_TAG)
+                      for color in SPARK_COLORS]
+        self.legend = [canvas.create_text(x0 + 4, y0 + 2, text='', anchor='nw', font=LINE_FONT, fill=color,
+                                          tags=SPARK_TAG)
+                       for color in SPARK_COLORS]
+        self.hint = canvas.create_text((x0 + x1) // 2, (y0 + y1) // 2, font=LINE_FONT, fill='#999999',
+                                       text="點擊框中的計數器顯示趨勢 (滾輪縮放、拖曳平移、雙擊重設、右鍵切換原始值/增量)",
+                                       tags=SPARK_TAG)
+        self.range_text = canvas.create_text(x1 - 4, y1 - 2, text='', anchor='se', font=LINE_FONT,
+                                             fill='#666666', tags=SPARK_TAG)
+
+        canvas.tag_bind(SPARK_TAG, '<MouseWheel>', lambda event: self.zoom(event.x, event.delta > 0))
+        canvas.tag_bind(SPARK_TAG, '<Button-4>', lambda event: self.zoom(event.x, True))
+        canvas.tag_bind(SPARK_TAG, '<Button-5>', lambda event: self.zoom(event.x, False))
+        canvas.tag_bind(SPARK_TAG, '<ButtonPress-1>', self.on_press)
+        canvas.tag_bind(SPARK_TAG, '<B1-Motion>', self.on_drag)
+        canvas.tag_bind(SPARK_TAG, '<Double-Button-1>', lambda event: self.reset())
+        canvas.tag_bind(SPARK_TAG, '<Button-3>', lambda event: self.toggle_kind())
+
+    def toggle(self, counter_type, counter_name):
+        key = (counter_type, counter_name)
+        if key in self.selected:
+            self.selected.remove(key)
+        else:
+            if len(self.selected) >= len(SPARK_COLORS):
+                self.selected.pop(0)
+            self.selected.append(key)
+        self.request_redraw()
+
+    def toggle_kind(self):
+        self.show_delta = not self.show_delta
+        self.view = None
+        self.request_redraw()
+
+    def reset(self):
+        self.view = None
+        self.request_redraw()
+
+    def visible(self):
+        """返回目前顯示的 (start, end)"""
+        if self.view is None:
+            return 0.0, float(self.length)
+        return self.view
+
+    def set_view(self, start, span):
+        if span >= self.length:
+            self.view = None
+        else:
+            start = min(max(start, 0.0), self.length - span)
+            self.view = (start, start + span)
+        self.request_redraw()
+
+    def zoom(self, x, zoom_in):
+        if self.area is None or self.length < 2:
+            return
+        x0, _, x1, _ = self.area
+        start, end = self.visible()
+        span = end - start
+        fraction = min(max((x - x0) / (x1 - x0), 0.0), 1.0)
+        center = start + fraction * span
+        span = span / ZOOM_STEP if zoom_in else span * ZOOM_STEP
+        span = min(max(span, min(MIN_SPAN, self.length)), self.length)
+        self.set_view(center - fraction * span, span)
+
+    def on_press(self, event):
+        self.drag_x = event.x
+
+    def on_drag(self, event):
+        if self.area is None or self.drag_x is None or self.view is None:
+            return
+        x0, _, x1, _ = self.area
+        start, end = self.view
+        shift = (self.drag_x - event.x) / (x1 - x0) * (end - start)
+        self.drag_x = event.x
+        self.set_view(start + shift, end - start)
+
+    def pyramid(self, series, counter_type, counter_name):
+        """返回欄位的 min-max 金字塔；欄位被替換或序列的快照改變 (series.version) 時重新建立"""
+        from counter_downsample import DELTA, VALUE, SeriesPyramid, series_values
+
+        column = series.columns[(counter_type, counter_name)]
+        key = (counter_type, counter_name, self.show_delta)
+        cached = self.pyramids.get(key)
+        if cached is None or cached[0] is not column or cached[1] != series.version:
+            kind = DELTA if self.show_delta else VALUE
+            present = series.present[(counter_type, counter_name)]
+            cached = (column, series.version, SeriesPyramid(series_values(column, present, kind)))
+            self.pyramids[key] = cached
+        return cached[2]
+
+    def line_coords(self, pyramid, start, end, plot):
+        """把金字塔在 [start, end) 的點降採樣為折線座標
+
+        plot 為繪圖區 (x0, 頂端, 寬度, 高度)；返回 (座標列表, 最小值, 最大值)，少於兩點時返回 (None, None, None)。
+        """
+        import numpy as np
+
+        from counter_downsample import MINMAX
+
+        x0, top, width, height = plot
+        index, values = pyramid.points(start, end, int(width), self.method or MINMAX)
+        if len(index) < 2:
+            return None, None, None
+        low = values.min()
+        high = values.max()
+        scale = height / (high - low) if high > low else 0.0
+        xs = x0 + (index - start) * (width / max(end - start, 1.0))
+        ys = top + height - (values - low) * scale if scale else np.full(len(values), top + height / 2)
+        return np.column_stack((xs, ys)).ravel().tolist(), low, high
+
+    def render(self):
+        if self.area is None:
+            return
+        canvas = self.canvas
+        x0, y0, x1, y1 = self.area
+        series, row = self.get_series()
+        # 不再顯示的計數器不保留金字塔
+        for key in list(self.pyramids):
+            if key[:2] not in self.selected or key[2] != self.show_delta:
+                del self.pyramids[key]
+
+        pyramids = []
+        for counter_type, counter_name in self.selected:
+            if series is None or (counter_type, counter_name) not in series.columns:
+                pyramids.append(None)
+            else:
+                pyramids.append(self.pyramid(series, counter_type, counter_name))
+        self.length = max((len(pyramid) for pyramid in pyramids if pyramid is not None), default=0)
+        if self.view is not None and self.view[1] > self.length:
+            self.view = None
+        start, end = self.visible()
+        span = max(end - start, 1.0)
+        width = x1 - x0
+        top = y0 + SPARK_LEGEND_HEIGHT
+        height = y1 - top - 4
+
+        legend_x = x0 + 4
+        for i, item in enumerate(self.lines):
+            pyramid = pyramids[i] if i < len(pyramids) else None
+            coords, low, high = (self.line_coords(pyramid, start, end, (x0, top, width, height))
+                                 if pyramid is not None else (None, None, None))
+            if coords is None:
+                canvas.itemconfigure(item, state='hidden')
+            else:
+                canvas.coords(item, *coords)
+                canvas.itemconfigure(item, state='normal')
+
+            legend = self.legend[i]
+            if i < len(self.selected):
+                counter_type, counter_name = self.selected[i]
+                text = f"{counter_type} {counter_name}"
+                if low is not None:
+                    text += f" [{low:,.0f} ~ {high:,.0f}]"
+                canvas.coords(legend, legend_x, y0 + 2)
+                canvas.itemconfigure(legend, text=text)
+                legend_x = canvas.bbox(legend)[2] + 12
+            else:
+                canvas.itemconfigure(legend, text='')
+
+        canvas.itemconfigure(self.hint, state='hidden' if self.selected else 'normal')
+        if self.selected and self.length:
+            label = "增量" if self.show_delta else "原始值"
+            canvas.itemconfigure(self.range_text,
+                                 text=f"{label} 快照 {int(start)}~{int(end) - 1} / {self.length}")
+        else:
+            canvas.itemconfigure(self.range_text, text='')
+
+        # 目前顯示的快照 (增量序列的第 i 點為快照 i 與 i + 1 之間)
+        if row is not None and self.selected and start <= row < end:
+            x = x0 + (row - start) * (width / span)
+            canvas.coords(self.marker, x, y0, x, y1)
+            canvas.itemconfigure(self.marker, state='normal')
+        else:
+            canvas.itemconfigure(self.marker, state='hidden')
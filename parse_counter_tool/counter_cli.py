@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+計數器日誌批次處理 (命令列，不需要 tkinter)
+對目錄或萬用字元匹配到的所有日誌，以進程池逐一解析並檢查驗證規則，輸出 JSON/CSV 摘要
+
+用法: python counter_cli.py logs/ "nightly/*.log" --json summary.json --csv summary.csv
+"""
+
+import argparse
+import csv
+import json
+import lzma
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from counter_io import iter_counter_file_mmap
+from counter_rules import find_violations
+from counter_store import DEFAULT_INTERFACE
+from phy_common.batch_files import DEFAULT_PATTERNS, PATTERN_HELP, collect_files
+from phy_common.compression import detect_compression
+
+CSV_FIELDS = ('file', 'codec', 'size', 'blocks', 'interfaces', 'unmatched', 'violations',
+              'failed_blocks', 'seconds', 'error')
+
+
+def summarize_file(file_path):
+    """解析單一日誌並對每個區塊檢查驗證規則，返回摘要字典"""
+    start = time.perf_counter()
+    summary = {
+        'file': file_path,
+        'codec': '',
+        'size': 0,
+        'blocks': 0,
+        'interfaces': 0,
+        'unmatched': 0,
+        'violations': 0,
+        'failed_blocks': 0,
+        'seconds': 0.0,
+        'error': '',
+        'failures': [],
+    }
+    interfaces = set()
+    try:
+        summary['size'] = os.path.getsize(file_path)
+        summary['codec'] = detect_compression(file_path) or 'plain'
+        for block in iter_counter_file_mmap(file_path):
+            summary['blocks'] += 1
+            summary['unmatched'] += len(block.unmatched)
+            interface = block.interface or DEFAULT_INTERFACE
+            interfaces.add(interface)
+
+            violations = find_violations(block.data)
+            if violations:
+                summary['failed_blocks'] += 1
+                summary['violations'] += len(violations)
+                for direction, counter_type, key, value in violations:
+                    summary['failures'].append({
+                        'interface': interface,
+                        'block': block.index,
+                        'direction': direction,
+                        'counter_type': counter_type,
+                        'counter': key,
+                        'value': value,
+                    })
+    except (OSError, ValueError, EOFError, lzma.LZMAError) as e:
+        summary['error'] = str(e)
+    except Exception as e:
+        # 任何單一文件的錯誤都只記錄在該文件的摘要中，不中斷整批處理
+        summary['error'] = f"{type(e).__name__}: {e}"
+
+    summary['interfaces'] = len(interfaces)
+    summary['seconds'] = round(time.perf_counter() - start, 6)
+    return summary
+
+
+def run_batch(files, workers=None):
+    """以進程池處理所有文件，依輸入順序返回摘要"""
+    if workers == 1 or len(files) <= 1:
+        return [summarize_file(path) for path in files]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(summarize_file, files, chunksize=4))
+
+
+def write_json(path, summaries, totals):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'totals': totals, 'files': summaries}, f, ensure_ascii=False, indent=2)
+
+
+def write_csv(path, summaries):
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(summaries)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="計數器日誌批次處理")
+    parser.add_argument('inputs', nargs='+', help="日誌文件、目錄或萬用字元")
+    parser.add_argument('--pattern', action='append', dest='patterns', help=PATTERN_HELP)
+    parser.add_argument('--workers', type=int, default=None, help="進程數 (預設為 CPU 數)")
+    parser.add_argument('--json', dest='json_path', help="輸出 JSON 摘要 (包含每個失敗的計數器)")
+    parser.add_argument('--csv', dest='csv_path', help="輸出每個文件一列的 CSV 摘要")
+    parser.add_argument('--fail-on-violation', action='store_true',
+                        help="有任何驗證失敗時以結束碼 1 結束")
+    args = parser.parse_args(argv)
+
+    files = collect_files(args.inputs, args.patterns or DEFAULT_PATTERNS)
+    if not files:
+        print("找不到任何日誌文件", file=sys.stderr)
+        return 2
+
+    start = time.perf_counter()
+    summaries = run_batch(files, args.workers)
+    elapsed = time.perf_counter() - start
+
+    total_bytes = sum(summary['size'] for summary in summaries)
+    totals = {
+        'files': len(summaries),
+        'bytes': total_bytes,
+        'blocks': sum(summary['blocks'] for summary in summaries),
+        'violations': sum(summary['violations'] for summary in summaries),
+        'failed_files': sum(1 for summary in summaries if summary['violations']),
+        'errors': sum(1 for summary in summaries if summary['error']),
+        'seconds': round(elapsed, 6),
+        'files_per_sec': round(len(summaries) / elapsed, 3) if elapsed > 0 else None,
+        'mb_per_sec': round(total_bytes / elapsed / 1e6, 3) if elapsed > 0 else None,
+    }
+
+    # 各壓縮格式的處理速度 (以文件大小與各文件的解析時間計算)
+    codecs = {}
+    for summary in summaries:
+        if summary['codec']:
+            stats = codecs.setdefault(summary['codec'], {'files': 0, 'bytes': 0, 'seconds': 0.0})
+            stats['files'] += 1
+            stats['bytes'] += summary['size']
+            stats['seconds'] += summary['seconds']
+    for stats in codecs.values():
+        stats['mb_per_sec'] = round(stats['bytes'] / stats['seconds'] / 1e6, 3) if stats['seconds'] > 0 else None
+    totals['codecs'] = codecs
+
+    if args.json_path:
+        write_json(args.json_path, summaries, totals)
+    if args.csv_path:
+        write_csv(args.csv_path, summaries)
+
+    for summary in summaries:
+        if summary['error']:
+            print(f"錯誤 {summary['file']}: {summary['error']}", file=sys.stderr)
+        elif summary['violations']:
+            print(f"失敗 {summary['file']}: {summary['violations']} 個計數器, "
+                  f"{summary['failed_blocks']}/{summary['blocks']} 個區塊")
+    print(f"{totals['files']} 個文件, {totals['blocks']} 個區塊, {totals['violations']} 個驗證失敗, "
+          f"{elapsed:.2f} s ({totals['files_per_sec']} files/s, {totals['mb_per_sec']} MB/s)")
+    if len(codecs) > 1 or 'plain' not in codecs:
+        for codec, stats in sorted(codecs.items()):
+            print(f"  {codec}: {stats['files']} 個文件, {stats['mb_per_sec']} MB/s")
+
+    if args.fail_on_violation and totals['violations']:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+兩個快照 (或兩次執行) 的計數器比較 (不依賴 tkinter)
+以介面與計數器 ID (counter_parser 的 CounterSchema) 對齊前後兩側，所有計數器的增量以一次向量化運算求得，
+再對增量套用 SS/FCM/MAC/LS 的驗證規則: 下游的增量必須等於上游的增量、應為 0 的計數器不得增加
+
+用法:
+  python counter_diff.py before.log after.log              兩個日誌各自最後一個快照
+  python counter_diff.py run.log --before-row 0            同一日誌的第一個與最後一個快照
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from counter_array import COUNTER_BITS
+from counter_parser import DEFAULT_SCHEMA, iter_counter_file
+from counter_rules import DEFAULT_RULES
+from counter_store import CounterTimeSeries
+
+# 排序方式
+SORT_NONE = None
+SORT_DELTA = 'delta'        # 增量絕對值由大到小
+SORT_INTERFACE = 'interface'
+SORT_COUNTER = 'counter'
+
+
+def column_ids(series, schema=DEFAULT_SCHEMA):
+    """返回 series 各欄位 (依 columns 的順序) 的計數器 ID 陣列"""
+    intern = schema.intern
+    return np.fromiter((intern(*key) for key in series.columns), dtype=np.intp, count=len(series.columns))
+
+
+def snapshot_matrix(store, interfaces, row, ids, width):
+    """返回形狀 (介面數, width) 的 (uint64 值, bool present) 矩陣，為每個介面第 row 個快照的值
+
+    ids 為 {介面名稱: column_ids}；介面不存在、快照數不足或沒有該計數器的位置 present 為 False。
+    """
+    matrix = np.zeros((len(interfaces), width), dtype=np.uint64)
+    present = np.zeros((len(interfaces), width), dtype=bool)
+    for i, name in enumerate(interfaces):
+        series = store.interfaces.get(name)
+        if series is None or not -len(series) <= row < len(series):
+            continue
+        columns = series.columns
+        matrix[i, ids[name]] = np.fromiter((column[row] for column in columns.values()), dtype=np.uint64,
+                                           count=len(columns))
+        present[i, ids[name]] = np.fromiter((mask[row] for mask in series.present.values()), dtype=bool,
+                                            count=len(columns))
+    return matrix, present
+
+
+class SnapshotDiff:
+    """前後兩側快照的比較結果
+
+    before / after / delta / broken 的形狀皆為 (介面數, 計數器 ID 數)；
+    present 為兩側都有值的位置，broken 為增量違反驗證規則的位置。
+    """
+
+    def __init__(self, before_store, after_store, before_row=-1, after_row=-1, wrap=True,
+                 rules=DEFAULT_RULES, schema=DEFAULT_SCHEMA):
+        self.schema = schema
+        # 先登記兩側所有的計數器，矩陣寬度才會一致 (同一存儲只計算一次)
+        sides = []
+        for store in (before_store, after_store):
+            if sides and store is sides[0][0]:
+                sides.append(sides[0])
+                continue
+            sides.append((store, {name: column_ids(series, schema) for name, series in store.interfaces.items()}))
+        interfaces = list(before_store.interfaces)
+        interfaces.extend(name for name in after_store.interfaces if name not in before_store.interfaces)
+        self.interfaces = interfaces
+        self.keys = list(schema.keys)  # 其他執行緒之後登記的計數器不在此次比較中
+
+        width = len(self.keys)
+        self.before, before_present = snapshot_matrix(before_store, interfaces, before_row, sides[0][1], width)
+        self.after, after_present = snapshot_matrix(after_store, interfaces, after_row, sides[1][1], width)
+        self.before_present = before_present
+        self.after_present = after_present
+        self.exists = before_present | after_present
+        self.present = before_present & after_present
+        self.delta = self.compute_delta(wrap)
+        self.broken = self.check_rules(rules)
+
+    def compute_delta(self, wrap):
+        """after - before (int64)；wrap 為 True 時數值變小視為計數器溢位 (依兩側的最大值推斷 32/36 位元)
+
+        無號相減以 2**64 為模再視為有號數，64 位元計數器的溢位因此不需要另外處理。
+        """
+        with np.errstate(over='ignore'):
+            delta = np.where(self.present, self.after - self.before, 0).view(np.int64)
+        if wrap:
+            peak = np.maximum(self.before, self.after)
+            wrapped = self.present & (self.after < self.before)
+            for width in COUNTER_BITS[:-1]:
+                fits = wrapped & (peak < np.uint64(1 << width))
+                delta[fits] += 1 << width
+                wrapped &= ~fits
+        return delta
+
+    def check_rules(self, rules):
+        """對所有介面同時檢查增量的守恆關係，返回違反規則的位置"""
+        broken = np.zeros(self.delta.shape, dtype=bool)
+        ids = self.schema.ids
+        for direction, flow_type, data_type, counter_name, ref_type, ref_name in rules.rules:
+            target = ids.get((data_type, counter_name))
+            if target is None:
+                continue
+            if ref_type is None:
+                expected = 0
+            else:
+                reference = ids.get((ref_type, ref_name))
+                # 參考計數器不存在時視為 0 (與 get_counter_value 相同)
+                expected = 0 if reference is None else np.where(self.present[:, reference],
+                                                                self.delta[:, reference], 0)
+            broken[:, target] |= self.present[:, target] & (self.delta[:, target] != expected)
+        return broken
+
+    def select(self, only_broken=False, only_changed=False, interface_filter='', counter_filter='',
+               counter_type=None, sort=SORT_NONE, reverse=False):
+        """返回符合條件的位置 (介面 index * 計數器數 + 計數器 ID) 陣列"""
+        mask = self.exists.copy()
+        if only_broken:
+            mask &= self.broken
+        if only_changed:
+            mask &= self.delta != 0
+        interface_filter = interface_filter.strip().lower()
+        if interface_filter:
+            mask &= np.array([interface_filter in name.lower() for name in self.interfaces],
+                             dtype=bool)[:, None]
+        counter_filter = counter_filter.strip().lower()
+        if counter_filter or counter_type:
+            mask &= np.array([(not counter_type or key[0] == counter_type) and counter_filter in key[1].lower()
+                              for key in self.keys], dtype=bool)[None, :]
+        positions = np.flatnonzero(mask)
+
+        if sort == SORT_DELTA:
+            order = np.argsort(-np.abs(self.delta.ravel()[positions]), kind='stable')
+            positions = positions[order]
+        elif sort == SORT_INTERFACE:
+            pass  # 已依介面順序排列
+        elif sort == SORT_COUNTER:
+            width = len(self.keys)
+            names = np.array([key[1] for key in self.keys], dtype=object)
+            order = np.argsort(names[positions % width], kind='stable')
+            positions = positions[order]
+        if reverse:
+            positions = positions[::-1]
+        return positions
+
+    def row(self, position):
+        """返回 (介面, 計數器類型, 名稱, 前值, 後值, 增量, 是否違反規則)；缺值為 None"""
+        interface, cid = divmod(int(position), len(self.keys))
+        before = int(self.before[interface, cid]) if self.before_present[interface, cid] else None
+        after = int(self.after[interface, cid]) if self.after_present[interface, cid] else None
+        present = self.present[interface, cid]
+        counter_type, counter_name = self.keys[cid]
+        return (self.interfaces[interface], counter_type, counter_name, before, after,
+                int(self.delta[interface, cid]) if present else None, bool(self.broken[interface, cid]))
+
+    def summary(self):
+        """返回 (比較的計數器數, 有變化的數量, 違反規則的數量, 有違反規則的介面數)"""
+        return (int(np.count_nonzero(self.present)), int(np.count_nonzero(self.delta)),
+                int(np.count_nonzero(self.broken)), int(np.count_nonzero(self.broken.any(axis=1))))
+
+
+def load_store(file_path):
+    store = CounterTimeSeries()
+    store.extend(iter_counter_file(file_path))
+    return store
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="比較兩個計數器快照")
+    parser.add_argument('before', help="之前的日誌")
+    parser.add_argument('after', nargs='?', help="之後的日誌 (省略時與之前相同)")
+    parser.add_argument('--before-row', type=int, default=-1, help="之前使用的快照 (預設最後一個)")
+    parser.add_argument('--after-row', type=int, default=-1, help="之後使用的快照 (預設最後一個)")
+    parser.add_argument('--no-wrap', action='store_true', help="數值變小時不視為計數器溢位")
+    parser.add_argument('--all', action='store_true', help="列出所有有變化的計數器 (預設只列出違反規則的)")
+    args = parser.parse_args(argv)
+
+    before = load_store(args.before)
+    after = load_store(args.after) if args.after else before
+    start = time.perf_counter()
+    diff = SnapshotDiff(before, after, args.before_row, args.after_row, wrap=not args.no_wrap)
+    positions = diff.select(only_broken=not args.all, only_changed=args.all, sort=SORT_DELTA)
+    elapsed = time.perf_counter() - start
+
+    def text(value, sign=''):
+        return '-' if value is None else format(value, sign)
+
+    for position in positions:
+        interface, counter_type, counter_name, before_value, after_value, delta, broken = diff.row(position)
+        mark = '!' if broken else ' '
+        print(f"{mark} {interface:<16} {counter_type:<4} {counter_name:<36} "
+              f"{text(before_value):>14} → {text(after_value):>14}  {text(delta, '+'):>14}")
+    compared, changed, broken, interfaces = diff.summary()
+    print(f"{len(diff.interfaces)} 個介面, {compared} 個計數器, {changed} 個有變化, "
+          f"{broken} 個違反規則 ({interfaces} 個介面), {elapsed * 1000:.0f} ms")
+    return 1 if broken else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,297 @@
+"""
+快照比較視窗
+左右兩側可各自選擇目前的解析結果或另一個日誌文件及其中的快照，以 counter_diff 對齊並計算增量，
+違反守恆規則的計數器以紅色顯示；表格只建立可見的列，篩選與排序以陣列運算完成
+counter_diff 需要 numpy，在開啟視窗時才匯入，沒有安裝 numpy 時主視窗仍可使用
+"""
+
+import queue
+import threading
+import time
+import tkinter as tk
+from tkinter import ttk, filedialog, messagebox
+
+from counter_cache import CounterCache, parse_file_cached
+from counter_table import VirtualCounterTable
+
+# 背景載入的輪詢間隔 (毫秒)
+LOAD_POLL_MS = 100
+
+CURRENT = 'current'  # 使用主視窗目前的解析結果
+FILE = 'file'
+
+
+class DiffTableModel:
+    """SnapshotDiff 篩選排序後的列 (view 為 SnapshotDiff.select 返回的位置陣列，沒有比較結果時為空)"""
+
+    def __init__(self):
+        self.diff = None
+        self.view = ()
+        self.interface_filter = ''
+        self.counter_filter = ''
+        self.only_broken = False
+        self.only_changed = False
+        self.sort_column = None
+        self.sort_reverse = False
+
+    def __len__(self):
+        return len(self.view)
+
+    def set_diff(self, diff):
+        self.diff = diff
+        self.apply()
+
+    def set_filter(self, interface_filter='', counter_filter=''):
+        self.interface_filter = interface_filter
+        self.counter_filter = counter_filter
+
+    def set_sort(self, column):
+        """依欄位排序，重複選擇同一欄位時反轉順序"""
+        if self.sort_column == column:
+            self.sort_reverse = not self.sort_reverse
+        else:
+            self.sort_column = column
+            self.sort_reverse = False
+
+    def apply(self, start=0):
+        if self.diff is None:
+            self.view = ()
+            return
+        self.view = self.diff.select(self.only_broken, self.only_changed, self.interface_filter,
+                                     self.counter_filter, sort=self.sort_column, reverse=self.sort_reverse)
+
+    def row(self, position):
+        return self.diff.row(self.view[position])
+
+
+class DiffTable(VirtualCounterTable):
+    """比較結果的表格: 計數器、介面、前值、後值、增量"""
+
+    def create_tree(self, parent):
+        from counter_diff import SORT_COUNTER, SORT_DELTA, SORT_INTERFACE
+
+        tree = ttk.Treeview(parent, columns=('Interface', 'Before', 'After', 'Delta'), show='tree headings')
+        tree.heading('#0', text='Counter Name', command=lambda: self.sort_by(SORT_COUNTER))
+        tree.heading('Interface', text='Interface', command=lambda: self.sort_by(SORT_INTERFACE))
+        tree.heading('Before', text='Before')
+        tree.heading('After', text='After')
+        tree.heading('Delta', text='Delta', command=lambda: self.sort_by(SORT_DELTA))
+        tree.column('#0', width=320)
+        for column in ('Interface', 'Before', 'After', 'Delta'):
+            tree.column(column, width=130)
+        tree.tag_configure('broken', foreground='red')
+        return tree
+
+    def row_values(self, position):
+        interface, counter_type, counter_name, before, after, delta, broken = self.model.row(position)
+        values = (interface, '' if before is None else before, '' if after is None else after,
+                  '' if delta is None else f"{delta:+}")
+        return f"{counter_type} {counter_name}", values, ('broken',) if broken else ()
+
+    def show(self, diff):
+        self.model.set_diff(diff)
+        self.first = 0
+        self.render()
+
+    def update_view(self):
+        """篩選條件改變時呼叫"""
+        self.model.apply()
+        self.first = 0
+        self.render()
+
+
+class DiffPanel:
+    """快照比較視窗
+
+    get_store() 返回主視窗目前的 CounterTimeSeries；文件在背景執行緒以快取解析，載入過的文件不會重新解析。
+    """
+
+    def __init__(self, parent, get_store):
+        self.get_store = get_store
+        self.window = tk.Toplevel(parent)
+        self.window.title("快照比較")
+        self.window.geometry("1000x650")
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+
+        self.sides = {}
+        for side, row in (('before', 0), ('after', -1)):
+            self.sides[side] = {
+                'source': tk.StringVar(value=CURRENT),
+                'path': tk.StringVar(),
+                'row': tk.StringVar(value=str(row)),
+            }
+        self.wrap = tk.BooleanVar(value=True)
+        self.only_broken = tk.BooleanVar(value=False)
+        self.only_changed = tk.BooleanVar(value=True)
+        self.interface_filter = tk.StringVar()
+        self.counter_filter = tk.StringVar()
+        self.info = tk.StringVar(value="選擇前後兩側的快照後按「比較」")
+
+        self.cache = CounterCache()
+        self.stores = {}  # 文件路徑 -> 已載入的 CounterTimeSeries
+        self.load_thread = None
+        self.load_messages = None
+        self.load_job = None
+        self.setup_ui()
+
+    def setup_ui(self):
+        frame = ttk.Frame(self.window, padding="10")
+        frame.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        self.window.columnconfigure(0, weight=1)
+        self.window.rowconfigure(0, weight=1)
+        frame.columnconfigure(0, weight=1)
+        frame.rowconfigure(3, weight=1)
+
+        # 前後兩側的來源與快照 (負數表示從最後一個往前數)
+        source_frame = ttk.Frame(frame)
+        source_frame.grid(row=0, column=0, sticky=(tk.W, tk.E), pady=(0, 5))
+        source_frame.columnconfigure(3, weight=1)
+        for i, (side, title) in enumerate((('before', "之前"), ('after', "之後"))):
+            variables = self.sides[side]
+            ttk.Label(source_frame, text=f"{title}:").grid(row=i, column=0, padx=(0, 5), pady=2)
+            ttk.Radiobutton(source_frame, text="目前的解析結果", variable=variables['source'],
+                            value=CURRENT).grid(row=i, column=1)
+            ttk.Radiobutton(source_frame, text="文件", variable=variables['source'],
+                            value=FILE).grid(row=i, column=2, padx=(10, 5))
+            ttk.Entry(source_frame, textvariable=variables['path']).grid(row=i, column=3, sticky=(tk.W, tk.E))
+            ttk.Button(source_frame, text="選擇",
+                       command=lambda side=side: self.choose_file(side)).grid(row=i, column=4, padx=(5, 10))
+            ttk.Label(source_frame, text="快照:").grid(row=i, column=5)
+            ttk.Entry(source_frame, textvariable=variables['row'], width=8).grid(row=i, column=6, padx=(5, 0))
+
+        # 比較選項
+        option_frame = ttk.Frame(frame)
+        option_frame.grid(row=1, column=0, sticky=(tk.W, tk.E), pady=(0, 5))
+        ttk.Checkbutton(option_frame, text="計數器溢位回繞", variable=self.wrap).grid(row=0, column=0)
+        self.compare_button = ttk.Button(option_frame, text="比較", command=self.compare)
+        self.compare_button.grid(row=0, column=1, padx=(10, 0))
+
+        # 篩選 (只重新選取列，不重新計算)
+        filter_frame = ttk.Frame(frame)
+        filter_frame.grid(row=2, column=0, sticky=(tk.W, tk.E), pady=(0, 5))
+        ttk.Checkbutton(filter_frame, text="只顯示違反守恆", variable=self.only_broken,
+                        command=self.apply_filter).grid(row=0, column=0)
+        ttk.Checkbutton(filter_frame, text="只顯示有變化", variable=self.only_changed,
+                        command=self.apply_filter).grid(row=0, column=1, padx=(10, 20))
+        ttk.Label(filter_frame, text="篩選介面:").grid(row=0, column=2, padx=(0, 5))
+        ttk.Entry(filter_frame, textvariable=self.interface_filter, width=20).grid(row=0, column=3, padx=(0, 20))
+        ttk.Label(filter_frame, text="篩選計數器:").grid(row=0, column=4, padx=(0, 5))
+        ttk.Entry(filter_frame, textvariable=self.counter_filter, width=30).grid(row=0, column=5)
+        self.interface_filter.trace('w', lambda *args: self.apply_filter())
+        self.counter_filter.trace('w', lambda *args: self.apply_filter())
+
+        table_frame = ttk.Frame(frame)
+        table_frame.grid(row=3, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        table_frame.columnconfigure(0, weight=1)
+        table_frame.rowconfigure(0, weight=1)
+        self.table = DiffTable(table_frame, DiffTableModel())
+        self.apply_filter(render=False)
+
+        ttk.Label(frame, textvariable=self.info, relief=tk.SUNKEN,
+                  anchor=tk.W).grid(row=4, column=0, sticky=(tk.W, tk.E), pady=(5, 0))
+
+    def choose_file(self, side):
+        path = filedialog.askopenfilename(title="選擇計數器日誌", parent=self.window,
+                                          filetypes=[("Log files", "*.txt *.log *.gz *.bz2 *.xz"),
+                                                     ("All files", "*.*")])
+        if path:
+            self.sides[side]['path'].set(path)
+            self.sides[side]['source'].set(FILE)
+
+    def apply_filter(self, render=True):
+        model = self.table.model
+        model.only_broken = self.only_broken.get()
+        model.only_changed = self.only_changed.get()
+        model.set_filter(self.interface_filter.get(), self.counter_filter.get())
+        if render:
+            self.table.update_view()
+
+    def compare(self):
+        """載入尚未解析的文件 (背景執行緒)，完成後計算比較結果"""
+        if self.load_thread is not None:
+            return
+        try:
+            rows = {side: int(variables['row'].get()) for side, variables in self.sides.items()}
+        except ValueError:
+            messagebox.showerror("錯誤", "快照必須是整數 (負數表示從最後一個往前數)", parent=self.window)
+            return
+        paths = []
+        for variables in self.sides.values():
+            if variables['source'].get() == FILE:
+                path = variables['path'].get()
+                if not path:
+                    messagebox.showwarning("警告", "請選擇文件", parent=self.window)
+                    return
+                if path not in self.stores and path not in paths:
+                    paths.append(path)
+        if not paths:
+            self.show_diff(rows)
+            return
+
+        self.load_messages = queue.Queue()
+        messages = self.load_messages
+        cache = self.cache
+
+        def work():
+            for path in paths:
+                try:
+                    messages.put(('loaded', (path, parse_file_cached(path, cache)[0])))
+                except Exception as e:
+                    messages.put(('error', f"{path}: {e}"))
+                    return
+            messages.put(('done', None))
+
+        self.info.set("載入中... " + ", ".join(paths))
+        self.compare_button.configure(state='disabled')
+        self.load_thread = threading.Thread(target=work, daemon=True)
+        self.load_thread.start()
+        self.load_job = self.window.after(LOAD_POLL_MS, lambda: self.poll_load(rows))
+
+    def poll_load(self, rows):
+        self.load_job = None
+        while True:
+            try:
+                kind, payload = self.load_messages.get_nowait()
+            except queue.Empty:
+                break
+            if kind == 'loaded':
+                path, store = payload
+                self.stores[path] = store
+                continue
+            self.load_thread = None
+            self.compare_button.configure(state='normal')
+            if kind == 'done':
+                self.show_diff(rows)
+            else:
+                messagebox.showerror("錯誤", f"載入文件失敗：{payload}", parent=self.window)
+            return
+        self.load_job = self.window.after(LOAD_POLL_MS, lambda: self.poll_load(rows))
+
+    def side_store(self, side):
+        variables = self.sides[side]
+        if variables['source'].get() == CURRENT:
+            return self.get_store()
+        return self.stores[variables['path'].get()]
+
+    def show_diff(self, rows):
+        from counter_diff import SnapshotDiff
+
+        before = self.side_store('before')
+        after = self.side_store('after')
+        if not len(before) or not len(after):
+            messagebox.showwarning("警告", "比較的兩側都必須有快照", parent=self.window)
+            return
+        start = time.perf_counter()
+        diff = SnapshotDiff(before, after, rows['before'], rows['after'], wrap=self.wrap.get())
+        self.table.show(diff)
+        elapsed = time.perf_counter() - start
+        compared, changed, broken, interfaces = diff.summary()
+        self.info.set(f"{len(diff.interfaces)} 個介面, {compared} 個計數器, {changed} 個有變化, "
+                      f"{broken} 個違反守恆 ({interfaces} 個介面), {elapsed * 1000:.0f} ms")
+
+    def close(self):
+        """關閉視窗 (進行中的載入在背景繼續完成)"""
+        if self.load_job is not None:
+            self.window.after_cancel(self.load_job)
+            self.load_job = None
+        self.window.destroy()
@@ -0,0 +1,152 @@
+"""
+計數器時間序列的降採樣 (不依賴 tkinter)
+min-max 金字塔: 每層的桶大小為上一層的兩倍，保存每桶最小值與最大值的位置；查詢任意範圍時選擇桶數剛好
+不少於像素數的一層，只需處理 O(像素數) 的資料，縮放與平移不必重新掃描原始序列。
+LTTB (Largest-Triangle-Three-Buckets) 在較細一層的 min-max 點上再為每個像素選一點，得到較平滑的折線。
+"""
+
+import math
+
+import numpy as np
+
+from counter_array import bits_for_peak, wrap_modulus
+
+# 降採樣方式
+MINMAX = 'minmax'
+LTTB = 'lttb'
+
+# 序列內容
+VALUE = 'value'  # 計數器的原始值
+DELTA = 'delta'  # 相鄰快照的增量 (已處理計數器溢位)
+
+# LTTB 的候選點為每個像素幾個 min-max 桶
+LTTB_OVERSAMPLE = 4
+
+
+def series_values(column, present, kind=VALUE):
+    """把存儲中的 array('Q') 欄位轉為 float64 (present 為 0 的位置為 NaN)；kind 為 DELTA 時返回相鄰快照的增量
+
+    增量的位寬與 CounterArray.column_bits 相同由出現過的最大值推斷。數值變小且前一個值已超過位寬上限的一半時
+    視為計數器溢位 (加上 2**bits)，否則視為計數器被清除，增量為清除後重新累計的值。
+    """
+    if not len(column):
+        return np.empty(0, dtype=np.float64)
+    values = np.frombuffer(column, dtype=np.uint64)
+    valid = np.frombuffer(present, dtype=bool)
+    if kind == DELTA:
+        previous = values[:-1]
+        current = values[1:]
+        bits = int(bits_for_peak(values[valid].max() if valid.any() else 0))
+        decreased = current < previous
+        wrapped = decreased & (previous >= np.uint64(1 << (bits - 1)))
+        # 無號相減以 2**64 為模，溢位的位置加上 2**bits 後即為準確的差值
+        with np.errstate(over='ignore'):
+            forward = current - previous
+            forward[wrapped] += wrap_modulus(bits, 1)[0]
+        delta = forward.astype(np.float64)
+        reset = decreased & ~wrapped
+        delta[reset] = current[reset]
+        delta[~(valid[1:] & valid[:-1])] = np.nan
+        return delta
+    result = values.astype(np.float64)
+    result[~valid] = np.nan
+    return result
+
+
+def _pick(values, first, second, smaller):
+    """逐對比較兩個位置陣列的值，返回較小 (或較大) 者的位置；NaN 視為不存在"""
+    a = values[first]
+    b = values[second]
+    take_second = np.isnan(a) | ((b < a) if smaller else (b > a))
+    return np.where(take_second, second, first)
+
+
+class SeriesPyramid:
+    """單一序列的 min-max 金字塔 (建立一次，之後任意範圍的查詢都只讀取一層)"""
+
+    def __init__(self, values):
+        self.values = values
+        self.levels = []  # 第 k 層: (最小值位置, 最大值位置)，每桶 2**(k+1) 個快照
+        mins = maxs = np.arange(len(values), dtype=np.intp)
+        while len(mins) > 1:
+            if len(mins) % 2:
+                mins = np.append(mins, mins[-1])
+                maxs = np.append(maxs, maxs[-1])
+            mins = _pick(values, mins[0::2], mins[1::2], True)
+            maxs = _pick(values, maxs[0::2], maxs[1::2], False)
+            self.levels.append((mins, maxs))
+
+    def __len__(self):
+        return len(self.values)
+
+    def minmax(self, start, end, buckets):
+        """返回 [start, end) 中不少於 buckets 個桶的 min/max 點的位置 (依位置排序，已去除重複)"""
+        start = max(int(start), 0)
+        end = min(int(math.ceil(end)), len(self.values))
+        if end <= start:
+            return np.empty(0, dtype=np.intp)
+        span = end - start
+        if span <= 2 * buckets:
+            return np.arange(start, end, dtype=np.intp)
+
+        # 每桶 2**(level+1) 個快照，選擇桶數不少於 buckets 的最粗一層
+        level = min(int(math.log2(span / buckets)) - 1, len(self.levels) - 1)
+        size = 1 << (level + 1)
+        mins, maxs = self.levels[level]
+        first = start // size
+        last = (end + size - 1) // size
+        # 兩端的桶可能只有部分在範圍內，加上範圍兩端的原始點讓折線涵蓋整個範圍
+        points = np.concatenate((mins[first:last], maxs[first:last], (start, end - 1)))
+        points = points[(points >= start) & (points < end)]
+        return np.unique(points)
+
+    def points(self, start, end, pixels, method=MINMAX):
+        """返回適合 pixels 寬度繪製的 (位置, 值)，NaN 的點已移除"""
+        if method == LTTB:
+            index = self.minmax(start, end, pixels * LTTB_OVERSAMPLE)
+        else:
+            index = self.minmax(start, end, pixels)
+        values = self.values[index]
+        valid = ~np.isnan(values)
+        index = index[valid]
+        values = values[valid]
+        if method == LTTB and len(index) > pixels:
+            return lttb(index, values, pixels)
+        return index, values
+
+
+def lttb(x, y, threshold):
+    """Largest-Triangle-Three-Buckets: 從 (x, y) 中選出 threshold 個點，保留視覺上的形狀
+
+    候選點通常只有像素數的數倍，以純 Python 迴圈處理比逐桶呼叫 NumPy 快。
+    """
+    count = len(x)
+    if threshold >= count or threshold < 3:
+        return x, y
+    xs = x.tolist()
+    ys = y.tolist()
+    selected = [0]
+    every = (count - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        # 下一桶的平均點
+        next_start = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, count)
+        span = next_end - next_start
+        avg_x = sum(xs[next_start:next_end]) / span
+        avg_y = sum(ys[next_start:next_end]) / span
+
+        # 目前這一桶中與前一個選擇點、下一桶平均點構成最大三角形的點
+        ax = xs[a]
+        ay = ys[a]
+        best = -1.0
+        best_index = a
+        for j in range(int(i * every) + 1, int((i + 1) * every) + 1):
+            area = abs((ax - avg_x) * (ys[j] - ay) - (ax - xs[j]) * (avg_y - ay))
+            if area > best:
+                best = area
+                best_index = j
+        selected.append(best_index)
+        a = best_index
+    selected.append(count - 1)
+    return x[selected], y[selected]
@@ -0,0 +1,156 @@
+"""
+計數器日誌的持續追蹤 (tail-follow)
+每次只讀取上次位置之後新增的位元組，處理日誌輪替與截斷，並可保存位元組偏移檢查點以便重新啟動後續讀
+"""
+
+import json
+import os
+
+from counter_io import HEADER_BYTES_PATTERN
+from counter_parser import CounterLogParser
+
+# 每次 poll 最多讀取的位元組數，避免一次處理過多內容
+DEFAULT_MAX_READ = 8 * 1024 * 1024
+
+
+class CounterLogFollower:
+    """追蹤持續寫入的計數器日誌
+
+    poll() 返回自上次呼叫以來新完成的區塊；日誌中最後一個區塊要等到下一個標頭出現才算完成。
+    檢查點記錄的是目前未完成區塊的標頭位置，重新啟動時從該處開始即可得到完整的區塊。
+    """
+
+    def __init__(self, file_path, offset=0, block_index=0, encoding='utf-8',
+                 max_read=DEFAULT_MAX_READ):
+        self.file_path = file_path
+        self.encoding = encoding
+        self.max_read = max_read
+        self.offset = offset                 # 已交給解析器的位元組位置 (總是在行首)
+        self.checkpoint_offset = offset      # 目前未完成區塊的起點
+        self.checkpoint_index = block_index  # 目前未完成區塊的順序
+        self.pending_bytes = 0               # 上次 poll 後尚未讀取的位元組數
+        self.parser = CounterLogParser(block_index)
+        self.file = None
+        self.file_id = None  # (st_dev, st_ino)，用於偵測輪替
+
+    @classmethod
+    def from_checkpoint(cls, checkpoint, **kwargs):
+        """由 checkpoint() 的結果建立；文件已被輪替或截斷時從頭開始"""
+        file_path = checkpoint['path']
+        offset = checkpoint.get('offset', 0)
+        block_index = checkpoint.get('block_index', 0)
+        try:
+            st = os.stat(file_path)
+            if ((st.st_dev, st.st_ino) != (checkpoint.get('device'), checkpoint.get('inode'))
+                    or st.st_size < offset):
+                offset = 0
+        except FileNotFoundError:
+            offset = 0
+        return cls(file_path, offset=offset, block_index=block_index, **kwargs)
+
+    @classmethod
+    def load_checkpoint(cls, checkpoint_path, **kwargs):
+        """由 save_checkpoint 寫出的 JSON 文件建立"""
+        with open(checkpoint_path, 'r', encoding='utf-8') as f:
+            return cls.from_checkpoint(json.load(f), **kwargs)
+
+    def checkpoint(self):
+        """返回可保存的檢查點"""
+        device, inode = self.file_id if self.file_id else (None, None)
+        return {
+            'path': self.file_path,
+            'offset': self.checkpoint_offset,
+            'block_index': self.checkpoint_index,
+            'device': device,
+            'inode': inode,
+        }
+
+    def save_checkpoint(self, checkpoint_path):
+        """將檢查點寫入 JSON 文件"""
+        with open(checkpoint_path, 'w', encoding='utf-8') as f:
+            json.dump(self.checkpoint(), f)
+
+    def poll(self):
+        """讀取新增的內容，返回新完成的區塊列表"""
+        blocks = []
+        try:
+            st = os.stat(self.file_path)
+        except FileNotFoundError:
+            # 輪替過程中文件可能暫時不存在
+            return blocks
+
+        if self.file is not None and (st.st_dev, st.st_ino) != self.file_id:
+            # 日誌被輪替: 讀完舊文件剩餘的內容，再從新文件開頭讀取
+            blocks.extend(self._read(drain=True))
+            blocks.extend(self._finish_file())
+            self.close()
+            self.offset = self.checkpoint_offset = 0
+
+        if self.file is None:
+            self.file = open(self.file_path, 'rb')
+            st = os.fstat(self.file.fileno())
+            self.file_id = (st.st_dev, st.st_ino)
+
+        if st.st_size < self.offset:
+            # 文件被截斷: 結束目前的區塊並從頭讀取
+            blocks.extend(self._finish_file())
+            self.offset = self.checkpoint_offset = 0
+
+        blocks.extend(self._read())
+        self.pending_bytes = max(st.st_size - self.offset, 0)
+        return blocks
+
+    def close(self):
+        """關閉文件 (解析狀態保留)"""
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def _read(self, drain=False):
+        """從 offset 讀取完整的行並交給解析器；drain 時讀到文件結尾 (包括最後不完整的行)"""
+        blocks = []
+        while True:
+            self.file.seek(self.offset)
+            data = self.file.read(self.max_read)
+            if not data:
+                break
+
+            end = data.rfind(b'\n') + 1
+            if end == 0 and (drain or len(data) == self.max_read):
+                end = len(data)  # 超長的行或舊文件最後一行
+            if end == 0:
+                break
+            chunk = data[:end]
+
+            header_offsets = [self.offset + match.start()
+                              for match in HEADER_BYTES_PATTERN.finditer(chunk)]
+            next_header = 0
+            open_block = self.parser.block
+            for block in self.parser.feed(chunk.decode(self.encoding, errors='replace').splitlines()):
+                if block.interface is not None:
+                    # 讀取前已開始的區塊，其標頭位置就是檢查點；其餘區塊的標頭都在本次讀取之中
+                    if block is open_block:
+                        block.offset = self.checkpoint_offset
+                    elif next_header < len(header_offsets):
+                        block.offset = header_offsets[next_header]
+                        next_header += 1
+                blocks.append(block)
+
+            last_header = header_offsets[-1] if header_offsets else None
+            if last_header is not None:
+                self.checkpoint_offset = last_header
+                self.checkpoint_index = self.parser.block.index
+            self.offset += end
+
+            if not drain:
+                break
+        return blocks
+
+    def _finish_file(self):
+        """目前的文件已結束，產出最後一個區塊"""
+        block = self.parser.close()
+        if block is not None and block.interface is not None and block.offset is None:
+            block.offset = self.checkpoint_offset
+        self.checkpoint_offset = self.offset
+        self.checkpoint_index = self.parser.index
+        return [block] if block is not None else []
@@ -0,0 +1,418 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+計數器與寄存器值的歷史資料庫 (SQLite，不需要 tkinter)
+把解析結果以分批的交易大量寫入，依 (裝置, 介面, 計數器, 時間) 建立索引，之後不需重新解析日誌即可做範圍查詢，
+例如「上週每天 02:00 到 04:00 之間 eth0.3 的 FCM Pause from Line side」
+
+用法:
+  python counter_history.py ingest history.db logs/*.log --device board1
+  python counter_history.py ingest-registers history.db dumps/*.txt --device board1
+  python counter_history.py query history.db --counter "Pause from Line side" --type FCM --interface eth0.3 \\
+      --start "2024-01-01 00:00:00" --end "2024-01-08 00:00:00" --daily 02:00-04:00
+"""
+
+import argparse
+import os
+import re
+import sqlite3
+import sys
+import time
+
+from counter_io import iter_counter_file_mmap
+from counter_parser import parse_timestamp
+from counter_store import CounterTimeSeries
+from phy_common.reg_dump import REGISTER_LINE, open_dump_file
+
+# 每個交易寫入的列數
+BATCH_ROWS = 50000
+
+# 查詢預設最多返回的列數
+DEFAULT_QUERY_LIMIT = 100000
+
+# 名稱表: 樣本只保存整數 id，資料庫較小，索引也較緊湊
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS devices (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS interfaces (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS counters (
+    id INTEGER PRIMARY KEY,
+    counter_type TEXT NOT NULL,
+    name TEXT NOT NULL,
+    UNIQUE (counter_type, name)
+);
+CREATE TABLE IF NOT EXISTS registers (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    device_id INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    source TEXT,
+    ingested REAL NOT NULL,
+    rows INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS counter_samples (
+    device_id INTEGER NOT NULL,
+    interface_id INTEGER NOT NULL,
+    counter_id INTEGER NOT NULL,
+    time REAL,
+    block_index INTEGER NOT NULL,
+    value INTEGER NOT NULL,
+    run_id INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS counter_samples_lookup
+    ON counter_samples (device_id, interface_id, counter_id, time);
+CREATE INDEX IF NOT EXISTS counter_samples_counter_time
+    ON counter_samples (counter_id, time);
+CREATE TABLE IF NOT EXISTS register_samples (
+    device_id INTEGER NOT NULL,
+    register_id INTEGER NOT NULL,
+    time REAL,
+    value INTEGER NOT NULL,
+    run_id INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS register_samples_lookup
+    ON register_samples (device_id, register_id, time);
+CREATE INDEX IF NOT EXISTS register_samples_register_time
+    ON register_samples (register_id, time);
+"""
+
+
+def parse_time(text):
+    """把 '2024-01-01 02:00:00' 轉換為 epoch 秒 (UTC，與日誌中的時間戳相同)，空字串返回 None"""
+    if not text:
+        return None
+    text = text.strip()
+    if len(text) == 10:
+        text += ' 00:00:00'  # 只有日期
+    elif len(text) == 16:
+        text += ':00'        # 沒有秒數
+    value = parse_timestamp(text)
+    if value is None:
+        raise ValueError(f"無法辨識的時間: {text}")
+    return value
+
+
+def parse_daily(text):
+    """把 '02:00-04:00' 轉換為 (開始秒數, 結束秒數) (一天之內)，空字串返回 None"""
+    if not text:
+        return None
+    match = re.fullmatch(r'\s*(\d{1,2}):(\d{2})\s*-\s*(\d{1,2}):(\d{2})\s*', text)
+    if not match:
+        raise ValueError(f"無法辨識的時段: {text}")
+    h1, m1, h2, m2 = (int(part) for part in match.groups())
+    return h1 * 3600 + m1 * 60, h2 * 3600 + m2 * 60
+
+
+def to_sqlite(value):
+    """SQLite 的 INTEGER 為有號 64 位元: 2**63 以上的無號值以二補數存放"""
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+def from_sqlite(value):
+    """to_sqlite 的反運算"""
+    return value + (1 << 64) if value is not None and value < 0 else value
+
+
+def format_time(value):
+    return '' if value is None else time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(value))
+
+
+class HistoryStore:
+    """歷史資料庫
+
+    連線只能在建立它的執行緒使用；背景寫入時在該執行緒另外開啟一個 HistoryStore。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+        self.name_ids = {}  # (表名, 名稱) -> id
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def name_id(self, table, *names):
+        """返回名稱表中的 id，不存在時新增"""
+        key = (table,) + names
+        row_id = self.name_ids.get(key)
+        if row_id is not None:
+            return row_id
+        if table == 'counters':
+            where, columns = 'counter_type = ? AND name = ?', '(counter_type, name)'
+        else:
+            where, columns = 'name = ?', '(name)'
+        row = self.conn.execute(f'SELECT id FROM {table} WHERE {where}', names).fetchone()
+        if row is None:
+            placeholders = ', '.join('?' * len(names))
+            row_id = self.conn.execute(f'INSERT INTO {table} {columns} VALUES ({placeholders})', names).lastrowid
+        else:
+            row_id = row[0]
+        self.name_ids[key] = row_id
+        return row_id
+
+    def find_id(self, table, *names):
+        """返回名稱表中的 id，不存在時返回 None (不新增)"""
+        if table == 'counters':
+            row = self.conn.execute('SELECT id FROM counters WHERE counter_type = ? AND name = ?', names).fetchone()
+        else:
+            row = self.conn.execute(f'SELECT id FROM {table} WHERE name = ?', names).fetchone()
+        return row[0] if row else None
+
+    def start_run(self, device, kind, source):
+        with self.conn:
+            device_id = self.name_id('devices', device)
+            run_id = self.conn.execute(
+                'INSERT INTO runs (device_id, kind, source, ingested) VALUES (?, ?, ?, ?)',
+                (device_id, kind, source, time.time())).lastrowid
+        return device_id, run_id
+
+    def insert_batches(self, sql, rows, run_id, progress=None):
+        """以每個交易 BATCH_ROWS 列寫入 rows (可迭代)，返回寫入的列數"""
+        total = 0
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= BATCH_ROWS:
+                with self.conn:
+                    self.conn.executemany(sql, batch)
+                total += len(batch)
+                batch = []
+                if progress is not None:
+                    progress(total)
+        with self.conn:
+            if batch:
+                self.conn.executemany(sql, batch)
+                total += len(batch)
+            self.conn.execute('UPDATE runs SET rows = rows + ? WHERE id = ?', (total, run_id))
+        if progress is not None:
+            progress(total)
+        return total
+
+    def ingest_store(self, store, device, source=None, progress=None, run=None):
+        """寫入 CounterTimeSeries 的所有快照 (快照中沒有的計數器不寫入)，返回 (run_id, 列數)
+
+        run 為 start_run 返回的 (device_id, run_id) 時追加到該次寫入 (例如接收伺服器分批寫入)，不另外建立。
+        """
+        device_id, run_id = run or self.start_run(device, 'counter', source)
+        with self.conn:
+            series_ids = [(series, self.name_id('interfaces', name),
+                           [(self.name_id('counters', *key), column, series.present[key])
+                            for key, column in series.columns.items()])
+                          for name, series in store.interfaces.items()]
+
+        def rows():
+            for series, interface_id, columns in series_ids:
+                times = [series.timestamp(row) for row in range(len(series))]
+                indexes = series.block_indexes
+                for counter_id, column, present in columns:
+                    for row, value in enumerate(column):
+                        if present[row]:
+                            yield (device_id, interface_id, counter_id, times[row], indexes[row],
+                                   to_sqlite(value), run_id)
+
+        count = self.insert_batches(
+            'INSERT INTO counter_samples (device_id, interface_id, counter_id, time, block_index, value, run_id) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)', rows(), run_id, progress)
+        return run_id, count
+
+    def ingest_registers(self, samples, device, source=None, progress=None, run=None):
+        """寫入寄存器值，samples 為 (名稱, 時間, 值) 的可迭代對象，返回 (run_id, 列數)；run 與 ingest_store 相同"""
+        device_id, run_id = run or self.start_run(device, 'register', source)
+        name_id = self.name_id
+
+        def rows():
+            for name, sample_time, value in samples:
+                yield (device_id, name_id('registers', name), sample_time, to_sqlite(value), run_id)
+
+        count = self.insert_batches(
+            'INSERT INTO register_samples (device_id, register_id, time, value, run_id) VALUES (?, ?, ?, ?, ?)',
+            rows(), run_id, progress)
+        return run_id, count
+
+    def names(self, table):
+        """返回名稱表的所有名稱 (counters 為 (類型, 名稱))，已排序"""
+        if table == 'counters':
+            return self.conn.execute('SELECT counter_type, name FROM counters ORDER BY counter_type, name').fetchall()
+        return [row[0] for row in self.conn.execute(f'SELECT name FROM {table} ORDER BY name')]
+
+    def build_query(self, kind, name, counter_type=None, interface=None, device=None,
+                    start=None, end=None, daily=None):
+        """返回 (FROM/WHERE 子句, 參數)；名稱不存在時返回 None"""
+        conditions = []
+        params = []
+        if kind == 'counter':
+            table = 'counter_samples'
+            if counter_type:
+                ids = [self.find_id('counters', counter_type, name)]
+            else:
+                ids = [row[0] for row in self.conn.execute('SELECT id FROM counters WHERE name = ?', (name,))]
+            ids = [row_id for row_id in ids if row_id is not None]
+            if not ids:
+                return None
+            conditions.append(f"counter_id IN ({', '.join('?' * len(ids))})")
+            params.extend(ids)
+            if interface:
+                interface_id = self.find_id('interfaces', interface)
+                if interface_id is None:
+                    return None
+                conditions.append('interface_id = ?')
+                params.append(interface_id)
+        else:
+            table = 'register_samples'
+            register_id = self.find_id('registers', name)
+            if register_id is None:
+                return None
+            conditions.append('register_id = ?')
+            params.append(register_id)
+        if device:
+            device_id = self.find_id('devices', device)
+            if device_id is None:
+                return None
+            conditions.append('device_id = ?')
+            params.append(device_id)
+        if start is not None:
+            conditions.append('time >= ?')
+            params.append(start)
+        if end is not None:
+            conditions.append('time < ?')
+            params.append(end)
+        if daily is not None:
+            # 每天的時段 (例如每晚 02:00-04:00)，可跨越午夜
+            daily_start, daily_end = daily
+            op = 'AND' if daily_start <= daily_end else 'OR'
+            conditions.append(f'(CAST(time AS INTEGER) % 86400 >= ? {op} CAST(time AS INTEGER) % 86400 < ?)')
+            params.extend((daily_start, daily_end))
+        return f"FROM {table} WHERE {' AND '.join(conditions)}", params
+
+    def query(self, kind, name, counter_type=None, interface=None, device=None,
+              start=None, end=None, daily=None, limit=DEFAULT_QUERY_LIMIT):
+        """返回符合條件的樣本 [(裝置, 介面, 計數器類型, 名稱, 時間, 值)]，依時間排序
+
+        kind 為 'counter' 或 'register' (寄存器的介面與類型為空字串)；時間為 epoch 秒 (UTC)。
+        """
+        clause = self.build_query(kind, name, counter_type, interface, device, start, end, daily)
+        if clause is None:
+            return []
+        where, params = clause
+        devices = dict(self.conn.execute('SELECT id, name FROM devices'))
+        if kind == 'counter':
+            sql = f'SELECT device_id, interface_id, counter_id, time, value {where} ORDER BY time, block_index'
+            interfaces = dict(self.conn.execute('SELECT id, name FROM interfaces'))
+            counters = {row[0]: row[1:] for row in self.conn.execute('SELECT id, counter_type, name FROM counters')}
+        else:
+            sql = f'SELECT device_id, register_id, time, value {where} ORDER BY time'
+        if limit:
+            sql += f' LIMIT {int(limit)}'
+
+        if kind == 'counter':
+            return [(devices[device_id], interfaces[interface_id]) + counters[counter_id]
+                    + (sample_time, from_sqlite(value))
+                    for device_id, interface_id, counter_id, sample_time, value in self.conn.execute(sql, params)]
+        return [(devices[device_id], '', '', name, sample_time, from_sqlite(value))
+                for device_id, _, sample_time, value in self.conn.execute(sql, params)]
+
+    def aggregate(self, kind, name, counter_type=None, interface=None, device=None,
+                  start=None, end=None, daily=None):
+        """返回符合條件的 (列數, 最小值, 最大值, 最早時間, 最晚時間)，不取出各列"""
+        clause = self.build_query(kind, name, counter_type, interface, device, start, end, daily)
+        if clause is None:
+            return 0, None, None, None, None
+        where, params = clause
+        # 以二補數存放的大數值為負數，兩部分分別取最小與最大值再還原
+        count, low, high, wrapped_low, wrapped_high, first, last = self.conn.execute(
+            'SELECT COUNT(*), MIN(CASE WHEN value >= 0 THEN value END), MAX(CASE WHEN value >= 0 THEN value END), '
+            'MIN(CASE WHEN value < 0 THEN value END), MAX(CASE WHEN value < 0 THEN value END), '
+            f'MIN(time), MAX(time) {where}', params).fetchone()
+        minimum = low if low is not None else from_sqlite(wrapped_low)
+        maximum = from_sqlite(wrapped_high) if wrapped_high is not None else high
+        return count, minimum, maximum, first, last
+
+
+def iter_register_samples(file_path, sample_time=None):
+    """逐行讀取寄存器轉儲 (壓縮的轉儲自動解壓)，產出 (名稱, 時間, 值)；sample_time 預設為文件的修改時間"""
+    if sample_time is None:
+        sample_time = os.path.getmtime(file_path)
+    stream, raw, _ = open_dump_file(file_path)
+    try:
+        for line in stream:
+            match = REGISTER_LINE.match(line)
+            if match:
+                yield match.group(1), sample_time, int(match.group(2), 16)
+    finally:
+        stream.close()
+        raw.close()
+
+
+def ingest_counter_file(history, file_path, device, progress=None):
+    """解析計數器日誌並寫入歷史資料庫，返回寫入的列數"""
+    store = CounterTimeSeries()
+    store.extend(iter_counter_file_mmap(file_path))
+    return history.ingest_store(store, device, os.path.abspath(file_path), progress)[1]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="計數器與寄存器值的歷史資料庫")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    ingest = commands.add_parser('ingest', help="寫入計數器日誌")
+    ingest.add_argument('database')
+    ingest.add_argument('files', nargs='+')
+    ingest.add_argument('--device', help="裝置名稱 (預設為文件名稱)")
+
+    registers = commands.add_parser('ingest-registers', help="寫入寄存器轉儲")
+    registers.add_argument('database')
+    registers.add_argument('files', nargs='+')
+    registers.add_argument('--device', help="裝置名稱 (預設為文件名稱)")
+    registers.add_argument('--time', help="轉儲的時間 (預設為文件的修改時間)")
+
+    query = commands.add_parser('query', help="查詢")
+    query.add_argument('database')
+    query.add_argument('--counter', help="計數器名稱")
+    query.add_argument('--register', help="寄存器名稱")
+    query.add_argument('--type', dest='counter_type', help="計數器類型 (SS/FCM/MAC/LS)")
+    query.add_argument('--interface')
+    query.add_argument('--device')
+    query.add_argument('--start', help="開始時間，例如 2024-01-01 02:00:00")
+    query.add_argument('--end', help="結束時間 (不包含)")
+    query.add_argument('--daily', help="每天的時段，例如 02:00-04:00")
+    query.add_argument('--limit', type=int, default=DEFAULT_QUERY_LIMIT)
+    args = parser.parse_args(argv)
+
+    with HistoryStore(args.database) as history:
+        if args.command in ('ingest', 'ingest-registers'):
+            for file_path in args.files:
+                device = args.device or os.path.splitext(os.path.basename(file_path))[0]
+                start = time.perf_counter()
+                if args.command == 'ingest':
+                    rows = ingest_counter_file(history, file_path, device)
+                else:
+                    samples = iter_register_samples(file_path, parse_time(args.time))
+                    rows = history.ingest_registers(samples, device, os.path.abspath(file_path))[1]
+                elapsed = time.perf_counter() - start
+                rate = rows / elapsed if elapsed > 0 else 0.0
+                print(f"{file_path}: {rows} 列, {elapsed:.2f} s ({rate:,.0f} 列/秒)")
+            return 0
+
+        if not args.counter and not args.register:
+            parser.error("需要 --counter 或 --register")
+        kind, name = ('counter', args.counter) if args.counter else ('register', args.register)
+        start = time.perf_counter()
+        rows = history.query(kind, name, args.counter_type, args.interface, args.device,
+                             parse_time(args.start), parse_time(args.end), parse_daily(args.daily), args.limit)
+        elapsed = time.perf_counter() - start
+        for device, interface, counter_type, counter, sample_time, value in rows:
+            print(f"{format_time(sample_time)}\t{device}\t{interface}\t{counter_type}\t{counter}\t{value}")
+        print(f"{len(rows)} 列, {elapsed * 1000:.1f} ms", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
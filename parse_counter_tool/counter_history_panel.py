@@ -0,0 +1,247 @@
+"""
+歷史資料庫的查詢視窗
+把目前的解析結果在背景執行緒寫入歷史資料庫，並依裝置/介面/計數器/時間範圍查詢過去的數據
+"""
+
+import os
+import queue
+import threading
+import time
+import tkinter as tk
+from tkinter import ttk, filedialog, messagebox
+
+from counter_history import HistoryStore, format_time, parse_daily, parse_time
+
+# 預設的資料庫位置
+DEFAULT_DATABASE = os.path.join(os.path.expanduser('~'), '.cache', 'parse_counter_tool', 'history.db')
+
+# 結果表格最多顯示的列數 (統計仍包含所有符合的列)
+DISPLAY_ROWS = 5000
+
+# 背景寫入的輪詢間隔 (毫秒)
+INGEST_POLL_MS = 100
+
+RESULT_COLUMNS = ('time', 'device', 'interface', 'type', 'name', 'value')
+RESULT_HEADINGS = ('時間', '裝置', '介面', '類型', '名稱', '值')
+
+
+class HistoryPanel:
+    """歷史查詢視窗
+
+    get_store() 返回目前的 (CounterTimeSeries, 來源文件路徑或 None)，用於「存入歷史」。
+    """
+
+    def __init__(self, parent, get_store, database=DEFAULT_DATABASE):
+        self.get_store = get_store
+        self.window = tk.Toplevel(parent)
+        self.window.title("歷史查詢")
+        self.window.geometry("900x600")
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+
+        self.database = tk.StringVar(value=database)
+        self.device = tk.StringVar(value='default')
+        self.kind = tk.StringVar(value='counter')
+        self.counter_type = tk.StringVar()
+        self.name = tk.StringVar()
+        self.interface = tk.StringVar()
+        self.query_device = tk.StringVar()
+        self.start = tk.StringVar()
+        self.end = tk.StringVar()
+        self.daily = tk.StringVar()
+        self.info = tk.StringVar(value="")
+
+        self.history = None
+        self.ingest_thread = None
+        self.ingest_messages = None
+        self.ingest_job = None
+        self.setup_ui()
+        self.open_database()
+
+    def setup_ui(self):
+        frame = ttk.Frame(self.window, padding="10")
+        frame.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        self.window.columnconfigure(0, weight=1)
+        self.window.rowconfigure(0, weight=1)
+        frame.columnconfigure(0, weight=1)
+        frame.rowconfigure(2, weight=1)
+
+        # 資料庫與寫入
+        db_frame = ttk.Frame(frame)
+        db_frame.grid(row=0, column=0, sticky=(tk.W, tk.E), pady=(0, 5))
+        db_frame.columnconfigure(1, weight=1)
+        ttk.Label(db_frame, text="資料庫:").grid(row=0, column=0, padx=(0, 5))
+        ttk.Entry(db_frame, textvariable=self.database).grid(row=0, column=1, sticky=(tk.W, tk.E))
+        ttk.Button(db_frame, text="選擇", command=self.choose_database).grid(row=0, column=2, padx=(5, 0))
+        ttk.Label(db_frame, text="裝置:").grid(row=0, column=3, padx=(15, 5))
+        ttk.Entry(db_frame, textvariable=self.device, width=15).grid(row=0, column=4)
+        self.ingest_button = ttk.Button(db_frame, text="存入目前的解析結果", command=self.ingest)
+        self.ingest_button.grid(row=0, column=5, padx=(5, 0))
+
+        # 查詢條件
+        query_frame = ttk.Frame(frame)
+        query_frame.grid(row=1, column=0, sticky=(tk.W, tk.E), pady=(0, 5))
+        ttk.Radiobutton(query_frame, text="計數器", variable=self.kind, value='counter',
+                        command=self.refresh_names).grid(row=0, column=0)
+        ttk.Radiobutton(query_frame, text="寄存器", variable=self.kind, value='register',
+                        command=self.refresh_names).grid(row=0, column=1, padx=(0, 10))
+        ttk.Label(query_frame, text="類型:").grid(row=0, column=2)
+        self.type_combo = ttk.Combobox(query_frame, textvariable=self.counter_type, width=6,
+                                       values=('', 'SS', 'FCM', 'MAC', 'LS'))
+        self.type_combo.grid(row=0, column=3, padx=(0, 10))
+        ttk.Label(query_frame, text="名稱:").grid(row=0, column=4)
+        self.name_combo = ttk.Combobox(query_frame, textvariable=self.name, width=28)
+        self.name_combo.grid(row=0, column=5, padx=(0, 10))
+        ttk.Label(query_frame, text="介面:").grid(row=0, column=6)
+        self.interface_combo = ttk.Combobox(query_frame, textvariable=self.interface, width=12)
+        self.interface_combo.grid(row=0, column=7, padx=(0, 10))
+        ttk.Label(query_frame, text="裝置:").grid(row=0, column=8)
+        self.device_combo = ttk.Combobox(query_frame, textvariable=self.query_device, width=12)
+        self.device_combo.grid(row=0, column=9)
+
+        ttk.Label(query_frame, text="開始:").grid(row=1, column=2, pady=(5, 0))
+        ttk.Entry(query_frame, textvariable=self.start, width=20).grid(row=1, column=3, columnspan=2,
+                                                                      sticky=tk.W, pady=(5, 0))
+        ttk.Label(query_frame, text="結束:").grid(row=1, column=4, sticky=tk.E, pady=(5, 0))
+        ttk.Entry(query_frame, textvariable=self.end, width=20).grid(row=1, column=5, sticky=tk.W, pady=(5, 0))
+        ttk.Label(query_frame, text="每天時段:").grid(row=1, column=6, pady=(5, 0))
+        ttk.Entry(query_frame, textvariable=self.daily, width=12).grid(row=1, column=7, pady=(5, 0))
+        ttk.Button(query_frame, text="查詢", command=self.run_query).grid(row=1, column=9, pady=(5, 0))
+
+        # 結果
+        result_frame = ttk.Frame(frame)
+        result_frame.grid(row=2, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        result_frame.columnconfigure(0, weight=1)
+        result_frame.rowconfigure(0, weight=1)
+        self.tree = ttk.Treeview(result_frame, columns=RESULT_COLUMNS, show='headings')
+        for column, heading in zip(RESULT_COLUMNS, RESULT_HEADINGS):
+            self.tree.heading(column, text=heading)
+            self.tree.column(column, width=160 if column in ('time', 'name') else 90)
+        scrollbar = ttk.Scrollbar(result_frame, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
+
+        ttk.Label(frame, textvariable=self.info, relief=tk.SUNKEN,
+                  anchor=tk.W).grid(row=3, column=0, sticky=(tk.W, tk.E), pady=(5, 0))
+
+    def choose_database(self):
+        path = filedialog.asksaveasfilename(title="選擇歷史資料庫", defaultextension=".db",
+                                            confirmoverwrite=False,
+                                            filetypes=[("SQLite", "*.db"), ("All files", "*.*")])
+        if path:
+            self.database.set(path)
+            self.open_database()
+
+    def open_database(self):
+        """開啟 (或建立) 資料庫並更新選單"""
+        if self.history is not None:
+            self.history.close()
+            self.history = None
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.database.get())), exist_ok=True)
+            self.history = HistoryStore(self.database.get())
+        except Exception as e:
+            messagebox.showerror("錯誤", f"無法開啟資料庫：{str(e)}", parent=self.window)
+            return
+        self.refresh_names()
+
+    def refresh_names(self):
+        if self.history is None:
+            return
+        if self.kind.get() == 'counter':
+            self.name_combo['values'] = sorted({name for _, name in self.history.names('counters')})
+        else:
+            self.name_combo['values'] = self.history.names('registers')
+        self.interface_combo['values'] = [''] + self.history.names('interfaces')
+        self.device_combo['values'] = [''] + self.history.names('devices')
+
+    def run_query(self):
+        if self.history is None or not self.name.get():
+            messagebox.showwarning("警告", "請選擇資料庫與名稱", parent=self.window)
+            return
+        try:
+            conditions = dict(counter_type=self.counter_type.get() or None,
+                              interface=self.interface.get() or None,
+                              device=self.query_device.get() or None,
+                              start=parse_time(self.start.get()), end=parse_time(self.end.get()),
+                              daily=parse_daily(self.daily.get()))
+        except ValueError as e:
+            messagebox.showerror("錯誤", str(e), parent=self.window)
+            return
+
+        start = time.perf_counter()
+        kind = self.kind.get()
+        rows = self.history.query(kind, self.name.get(), limit=DISPLAY_ROWS, **conditions)
+        count, minimum, maximum, first, last = self.history.aggregate(kind, self.name.get(), **conditions)
+        elapsed = time.perf_counter() - start
+
+        self.tree.delete(*self.tree.get_children())
+        for device, interface, counter_type, name, sample_time, value in rows:
+            self.tree.insert('', tk.END, values=(format_time(sample_time), device, interface,
+                                                 counter_type, name, value))
+        if count:
+            shown = f"顯示前 {len(rows)} 列，" if count > len(rows) else ""
+            self.info.set(f"{count} 列 ({shown}最小 {minimum}, 最大 {maximum}, "
+                          f"{format_time(first)} ~ {format_time(last)}), {elapsed * 1000:.0f} ms")
+        else:
+            self.info.set(f"沒有符合的數據, {elapsed * 1000:.0f} ms")
+
+    def ingest(self):
+        """在背景執行緒把目前的解析結果寫入資料庫 (該執行緒使用自己的連線)"""
+        store, source = self.get_store()
+        if not len(store):
+            messagebox.showwarning("警告", "目前沒有解析結果", parent=self.window)
+            return
+        if self.ingest_thread is not None:
+            return
+        database = self.database.get()
+        device = self.device.get() or 'default'
+        self.ingest_messages = queue.Queue()
+        messages = self.ingest_messages
+
+        def work():
+            start = time.perf_counter()
+            try:
+                with HistoryStore(database) as history:
+                    rows = history.ingest_store(store, device, source,
+                                                progress=lambda total: messages.put(('progress', total)))[1]
+                messages.put(('done', (rows, time.perf_counter() - start)))
+            except Exception as e:
+                messages.put(('error', str(e)))
+
+        self.ingest_thread = threading.Thread(target=work, daemon=True)
+        self.ingest_button.configure(state='disabled')
+        self.ingest_thread.start()
+        self.ingest_job = self.window.after(INGEST_POLL_MS, self.poll_ingest)
+
+    def poll_ingest(self):
+        self.ingest_job = None
+        while True:
+            try:
+                kind, payload = self.ingest_messages.get_nowait()
+            except queue.Empty:
+                break
+            if kind == 'progress':
+                self.info.set(f"寫入中... {payload} 列")
+                continue
+            self.ingest_thread = None
+            self.ingest_button.configure(state='normal')
+            if kind == 'done':
+                rows, elapsed = payload
+                rate = rows / elapsed if elapsed > 0 else 0.0
+                self.info.set(f"已寫入 {rows} 列, {elapsed:.2f} s ({rate:,.0f} 列/秒)")
+                self.refresh_names()
+            else:
+                messagebox.showerror("錯誤", f"寫入歷史資料庫失敗：{payload}", parent=self.window)
+            return
+        self.ingest_job = self.window.after(INGEST_POLL_MS, self.poll_ingest)
+
+    def close(self):
+        """關閉視窗 (進行中的寫入在背景繼續完成)"""
+        if self.ingest_job is not None:
+            self.window.after_cancel(self.ingest_job)
+            self.ingest_job = None
+        if self.history is not None:
+            self.history.close()
+            self.history = None
+        self.window.destroy()
@@ -0,0 +1,171 @@
+"""
+計數器日誌的文件讀取
+以 memory map 分塊讀取大型日誌直接交給解析器 (不經過 Text 元件)，並可讀取某個區塊附近的有限預覽；
+.gz/.bz2/.xz 壓縮的日誌依開頭的 magic bytes 辨識，邊解壓邊解析，不會產生完整的解壓內容
+"""
+
+import mmap
+import os
+import re
+
+from counter_parser import CounterLogParser
+from phy_common.compression import DECOMPRESSORS, detect_compression
+
+# 區塊標頭所在行的起點 (以位元組搜尋，與 counter_parser.HEADER_PATTERN 對應)
+HEADER_BYTES_PATTERN = re.compile(rb'^[ \t]*=+[ \t]*PHY\[[^\]\n]*\][ \t]*COUNTER', re.M)
+
+# 每次交給解析器的資料量
+DEFAULT_CHUNK_SIZE = 4 * 1024 * 1024
+
+# 預覽視窗的大小 (位元組)
+PREVIEW_BEFORE = 2 * 1024
+PREVIEW_AFTER = 62 * 1024
+
+def iter_compressed_chunks(file_path, codec, chunk_size=DEFAULT_CHUNK_SIZE):
+    """邊解壓邊逐塊讀取，每塊都在行尾結束；產出 (解壓後的起始偏移, bytes, 已讀取的壓縮位元組數)"""
+    with open(file_path, 'rb') as raw, DECOMPRESSORS[codec](raw) as stream:
+        offset = 0
+        rest = b''
+        while True:
+            data = stream.read(chunk_size)
+            if not data:
+                break
+            data = rest + data
+            newline = data.rfind(b'\n')
+            if newline < 0:
+                # 超長的行: 繼續讀到下一個換行
+                rest = data
+                continue
+            chunk, rest = data[:newline + 1], data[newline + 1:]
+            yield offset, chunk, raw.tell()
+            offset += len(chunk)
+        if rest:
+            yield offset, rest, raw.tell()
+
+
+def iter_file_chunks(file_path, chunk_size=DEFAULT_CHUNK_SIZE, start=0, end=None):
+    """逐塊讀取文件，壓縮文件自動解壓；產出 (起始偏移, bytes, 已讀取的文件位元組數)
+
+    偏移是解壓後內容中的位置；壓縮文件只能從頭讀到尾 (start 與 end 必須為預設值)。
+    """
+    codec = detect_compression(file_path)
+    if codec is None:
+        for chunk_start, chunk in iter_mmap_chunks(file_path, chunk_size, start, end):
+            yield chunk_start, chunk, chunk_start + len(chunk) - start
+        return
+    if start != 0 or end is not None:
+        raise ValueError(f"{codec} 壓縮的文件無法只讀取部分範圍")
+    yield from iter_compressed_chunks(file_path, codec, chunk_size)
+
+
+def iter_mmap_chunks(file_path, chunk_size=DEFAULT_CHUNK_SIZE, start=0, end=None):
+    """以 memory map 逐塊讀取文件的 [start, end) 範圍，每塊都在行尾結束；產出 (起始偏移, bytes)
+
+    start 應位於行首；end 為 None 時讀到文件結尾。
+    """
+    with open(file_path, 'rb') as f:
+        file_size = os.fstat(f.fileno()).st_size
+        size = file_size if end is None else min(end, file_size)
+        if size <= start:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            while start < size:
+                stop = min(start + chunk_size, size)
+                if stop < size:
+                    newline = mm.rfind(b'\n', start, stop)
+                    if newline >= 0:
+                        stop = newline + 1
+                    else:
+                        # 超長的行: 延伸到下一個換行
+                        newline = mm.find(b'\n', stop)
+                        stop = size if newline < 0 else newline + 1
+                yield start, mm[start:stop]
+                start = stop
+
+
+def iter_counter_file_mmap(file_path, encoding='utf-8', chunk_size=DEFAULT_CHUNK_SIZE,
+                           start=0, end=None, parser=None, progress=None):
+    """以 memory map 逐塊解析計數器日誌，區塊的 offset 記錄其標頭在文件中的位元組位置
+
+    可只解析 [start, end) 範圍；傳入 parser 時由呼叫端取得結束後的解析狀態。
+    progress(已讀取的位元組數, 已讀取的行數) 在每塊交給解析器前呼叫，可在其中拋出例外以中止解析；
+    壓縮文件的位元組數是已讀取的壓縮內容，offset 則是解壓後內容中的位置。
+    """
+    if parser is None:
+        parser = CounterLogParser()
+    header_offsets = []
+    next_header = 0
+    lines_done = 0
+
+    for chunk_start, chunk, bytes_done in iter_file_chunks(file_path, chunk_size, start, end):
+        if progress is not None:
+            lines_done += chunk.count(b'\n')
+            progress(bytes_done, lines_done)
+        header_offsets.extend(chunk_start + match.start() for match in HEADER_BYTES_PATTERN.finditer(chunk))
+        for block in parser.feed(chunk.decode(encoding, errors='replace').splitlines()):
+            if block.interface is not None and next_header < len(header_offsets):
+                block.offset = header_offsets[next_header]
+                next_header += 1
+            yield block
+        # 已對應的偏移不再需要
+        del header_offsets[:next_header]
+        next_header = 0
+
+    block = parser.close()
+    if block is not None:
+        if block.interface is not None and header_offsets:
+            block.offset = header_offsets[0]
+        yield block
+
+
+def find_block_boundaries(file_path, parts):
+    """把文件大致平均切成 parts 段，切點都移到區塊標頭的行首，返回 [(start, end), ...]
+
+    切點之後找不到標頭的部分併入前一段，因此任何區塊都不會被切開；壓縮文件無法切分，只返回一段。
+    """
+    if detect_compression(file_path) is not None:
+        return [(0, None)]
+    with open(file_path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return []
+        cuts = [0]
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for i in range(1, parts):
+                target = max(size * i // parts, cuts[-1] + 1)
+                if target >= size:
+                    break
+                header = HEADER_BYTES_PATTERN.search(mm, target)
+                if header is None:
+                    break
+                if header.start() > cuts[-1]:
+                    cuts.append(header.start())
+    cuts.append(size)
+    return list(zip(cuts[:-1], cuts[1:]))
+
+
+def read_preview(file_path, offset, encoding='utf-8', before=PREVIEW_BEFORE, after=PREVIEW_AFTER):
+    """讀取 offset 附近的原始文字 (只包含完整的行)，返回 (預覽文字, 預覽起點在文字中的行號)
+
+    壓縮文件的 offset 是解壓後的位置，需要從頭解壓到該處 (只保留預覽範圍)。
+    """
+    start = max(offset - before, 0)
+    codec = detect_compression(file_path)
+    with open(file_path, 'rb') as raw:
+        f = raw if codec is None else DECOMPRESSORS[codec](raw)
+        f.seek(start)
+        data = f.read(offset - start + after)
+
+    head = offset - start
+    if start > 0:
+        # 丟掉第一個不完整的行
+        first_newline = data.find(b'\n', 0, head)
+        cut = first_newline + 1 if first_newline >= 0 else head
+        data = data[cut:]
+        head -= cut
+    last_newline = data.rfind(b'\n')
+    if last_newline >= head:
+        data = data[:last_newline + 1]
+
+    line = data.count(b'\n', 0, head) + 1
+    return data.decode(encoding, errors='replace'), line
@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+全體裝置的封包遺失定位報告 (命令列，不需要 tkinter)
+驗證規則中「下游計數器 = 上游計數器」的關係即封包經過的階段 (例如 SS Rx Terminal → FCM Rx from System side_S、
+LS [Before EF] → [After EF])；日誌以每 STREAM_BLOCKS 個區塊為一個窗口逐段讀取，每個窗口以 CounterArray
+向量化計算每個介面、每個快照在各階段的遺失量 (上游 - 下游)，並以有上限的堆積保留遺失最多的前 K 個
+(裝置, 介面, 階段, 快照)；窗口之間只保留每個介面的上一個區塊 (delta 模式用於計算跨窗口的差值)，
+因此記憶體只與窗口大小、介面與階段數有關，不隨日誌的快照數增長
+
+用法: python counter_loss.py logs/ "nightly/*.log" --top 20 --json loss.json
+"""
+
+import argparse
+import heapq
+import json
+import lzma
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from counter_array import CounterArray
+from counter_io import iter_counter_file_mmap
+from counter_rules import DATA_TYPES, EQUALS, FLOW_TYPE_OF, VALIDATION_RULES
+from counter_store import CounterTimeSeries
+from phy_common.batch_files import DEFAULT_PATTERNS, PATTERN_HELP, collect_files
+
+# 預設保留的最差階段數
+DEFAULT_TOP = 20
+
+# 每次向量化計算的快照列數 (限制暫存陣列的大小)
+CHUNK_ROWS = 65536
+
+# 分析日誌文件時每個窗口的區塊數 (窗口的計數器存儲分析後即丟棄)
+STREAM_BLOCKS = 4096
+
+# 遺失量的計算方式
+SNAPSHOT = 'snapshot'  # 每個快照的 上游 - 下游 (累計的差距，與流程圖的紅色一致)
+DELTA = 'delta'        # 相鄰快照間新增的遺失 (上游增量 - 下游增量，已處理計數器溢位)
+
+# 驗證規則之外的階段: (方向, 上游 (類型, 名稱), 下游 (類型, 名稱))
+# TX 方向的 LS [Before EF] → [After EF] 不在驗證規則中 (流程圖不檢查)，但同樣是封包經過的階段
+EXTRA_STAGES = (
+    ('TX', ('LS', '[Before EF] Tx to Line side_S'), ('LS', '[After EF] Tx to Line side_S')),
+)
+
+
+def loss_stages(rules=VALIDATION_RULES, extra=EXTRA_STAGES):
+    """由驗證規則取出遺失階段: [(方向, 上游 (類型, 名稱), 下游 (類型, 名稱))]
+
+    只取參考計數器在其他位置的 EQUALS 規則；ZERO 規則 (錯誤、暫停計數器) 不是封包經過的階段。
+    extra 的階段接在後面 (已由規則產生的不重複加入)。
+    """
+    stages = []
+    for direction, flow_type, counter_name, relation, reference in rules:
+        if relation != EQUALS:
+            continue
+        stages.append((direction, reference, (DATA_TYPES[flow_type], counter_name)))
+    stages.extend(stage for stage in extra if stage not in stages)
+    return stages
+
+
+def stage_label(stage):
+    """階段的顯示名稱，例如 'TX SS Rx Terminal → FCM Rx from System side_S'"""
+    direction, (up_type, up_name), (down_type, down_name) = stage
+    return (f"{direction} {FLOW_TYPE_OF.get(up_type, up_type)} {up_name} → "
+            f"{FLOW_TYPE_OF.get(down_type, down_type)} {down_name}")
+
+
+LOSS_STAGES = loss_stages()
+
+
+class LossRanking:
+    """有上限的前 K 名 (遺失量最大者)
+
+    堆積頂端是目前第 K 名；新的候選先以門檻向量化過濾，再只對剩下的項目做 heappushpop，
+    因此大量快照中只有極少數需要建立 Python 對象。
+    """
+
+    def __init__(self, k=DEFAULT_TOP):
+        self.k = k
+        self.heap = []   # (遺失量, 順序, 項目)
+        self.count = 0   # 加入過的項目數 (也作為同分時的順序)
+
+    def threshold(self):
+        """進入前 K 名需要超過的遺失量 (未滿時為 0)"""
+        return self.heap[0][0] if len(self.heap) >= self.k else 0
+
+    def push(self, loss, item):
+        self.count += 1
+        entry = (loss, -self.count, item)  # 同分時保留先出現的
+        if len(self.heap) < self.k:
+            heapq.heappush(self.heap, entry)
+        elif entry > self.heap[0]:
+            heapq.heappushpop(self.heap, entry)
+
+    def push_array(self, losses, make_item):
+        """加入一個遺失量陣列中所有大於門檻的位置；make_item(flat_index) 建立項目"""
+        flat = losses.ravel()
+        candidates = np.flatnonzero(flat > self.threshold())
+        if len(candidates) > self.k:
+            # 只有最大的 k 個可能進入前 K 名
+            top = np.argpartition(flat[candidates], -self.k)[-self.k:]
+            candidates = np.sort(candidates[top])
+        for index in candidates:
+            loss = int(flat[index])
+            if len(self.heap) < self.k or loss > self.heap[0][0]:
+                self.push(loss, make_item(int(index)))
+
+    def merge(self, items):
+        """合併另一個 LossRanking 的 results()"""
+        for item in items:
+            self.push(item['loss'], item)
+
+    def results(self):
+        """依遺失量由大到小返回項目"""
+        return [item for _, _, item in sorted(self.heap, reverse=True)]
+
+
+def analyze_store(store, device, ranking, mode=SNAPSHOT, stages=LOSS_STAGES, totals=None):
+    """計算 store 中每個介面在各階段的遺失量，加入 ranking；返回每個 (介面, 階段) 的統計
+
+    統計為 {(裝置, 介面, 階段 index): [遺失量總和, 最大遺失量, 有遺失的快照數]}，可傳入 totals 累加。
+    """
+    if totals is None:
+        totals = {}
+    counter_array = CounterArray.from_time_series(store)
+
+    # 一次找出所有 (介面, 階段) 的上下游欄位
+    pairs = []  # (介面, 階段 index)
+    upstream = []
+    downstream = []
+    for interface in counter_array.interfaces:
+        for stage_index, (_, up, down) in enumerate(stages):
+            up_column = counter_array.column_index(interface, *up)
+            down_column = counter_array.column_index(interface, *down)
+            if up_column is None or down_column is None:
+                continue
+            pairs.append((interface, stage_index))
+            upstream.append(up_column)
+            downstream.append(down_column)
+    if not pairs:
+        return totals
+
+    upstream = np.array(upstream, dtype=np.intp)
+    downstream = np.array(downstream, dtype=np.intp)
+    if mode == DELTA:
+        deltas = counter_array.deltas()
+        up_values, down_values, row_offset = deltas[:, upstream], deltas[:, downstream], 1
+    else:
+        up_values = counter_array.values[:, upstream]
+        down_values = counter_array.values[:, downstream]
+        valid_rows = counter_array.present[:, upstream] & counter_array.present[:, downstream]
+        row_offset = 0
+
+    sums = np.zeros(len(pairs), dtype=np.float64)
+    peaks = np.zeros(len(pairs), dtype=np.float64)
+    counts = np.zeros(len(pairs), dtype=np.int64)
+    for chunk_start in range(0, len(up_values), CHUNK_ROWS):
+        up = up_values[chunk_start:chunk_start + CHUNK_ROWS]
+        down = down_values[chunk_start:chunk_start + CHUNK_ROWS]
+        if mode == DELTA:
+            losses = np.nan_to_num(up - down, nan=0.0)
+        else:
+            # 任一側缺值的快照不計算；無號值只在上游較大時相減
+            valid = valid_rows[chunk_start:chunk_start + CHUNK_ROWS] & (up > down)
+            losses = np.where(valid, up - down, 0)
+        losses = np.maximum(losses, 0)
+        sums += losses.sum(axis=0, dtype=np.float64)
+        np.maximum(peaks, losses.max(axis=0), out=peaks)
+        counts += np.count_nonzero(losses, axis=0)
+
+        width = len(pairs)
+
+        def make_item(flat_index, chunk_start=chunk_start):
+            row = chunk_start + flat_index // width + row_offset
+            interface, stage_index = pairs[flat_index % width]
+            series = store.interfaces[interface]
+            timestamp = series.timestamps[row]
+            return {
+                'device': device,
+                'interface': interface,
+                'stage': stage_label(stages[stage_index]),
+                'block': series.block_indexes[row],
+                'timestamp': None if timestamp != timestamp else timestamp,
+                'loss': int(losses.flat[flat_index]),
+            }
+
+        ranking.push_array(losses, make_item)
+
+    for i, pair in enumerate(pairs):
+        if not counts[i]:
+            continue
+        stats = totals.setdefault((device,) + pair, [0, 0, 0])
+        stats[0] += int(sums[i])
+        stats[1] = max(stats[1], int(peaks[i]))
+        stats[2] += int(counts[i])
+    return totals
+
+
+def analyze_file(file_path, top=DEFAULT_TOP, mode=SNAPSHOT, device=None, window=STREAM_BLOCKS):
+    """逐窗口解析單一日誌並計算遺失，返回 (前 K 名, 統計列表, 快照數, 秒數, 錯誤訊息)
+
+    每 window 個區塊分析一次後丟棄；delta 模式下一個窗口以每個介面的上一個區塊開頭，
+    跨窗口的差值與一次分析整個日誌相同。
+    """
+    start = time.perf_counter()
+    device = device or file_path
+    ranking = LossRanking(top)
+    totals = {}
+    previous = {}  # 介面 -> 上一個區塊
+    snapshots = 0
+    error = ''
+    try:
+        store = CounterTimeSeries()
+        pending = 0
+        for block in iter_counter_file_mmap(file_path):
+            store.add_block(block)
+            previous[block.interface] = block
+            snapshots += 1
+            pending += 1
+            if pending >= window:
+                analyze_store(store, device, ranking, mode, totals=totals)
+                store = CounterTimeSeries()
+                pending = 0
+                if mode == DELTA:
+                    store.extend(previous.values())
+        if pending:
+            analyze_store(store, device, ranking, mode, totals=totals)
+    except (OSError, ValueError, EOFError, lzma.LZMAError) as e:
+        error = str(e)
+    return ranking.results(), list(totals.items()), snapshots, time.perf_counter() - start, error
+
+
+def _analyze_job(job):
+    return analyze_file(*job)
+
+
+def run_report(files, top=DEFAULT_TOP, mode=SNAPSHOT, workers=None):
+    """以進程池分析所有文件，合併為全體的前 K 名
+
+    每個文件只返回自己的前 K 名，合併後即為全體的前 K 名。
+    返回 (前 K 名, 每個 (裝置, 介面, 階段) 的統計, 快照數, 錯誤列表)。
+    """
+    jobs = [(path, top, mode) for path in files]
+    if workers == 1 or len(files) <= 1:
+        results = map(_analyze_job, jobs)
+        executor = None
+    else:
+        executor = ProcessPoolExecutor(max_workers=workers)
+        results = executor.map(_analyze_job, jobs)
+
+    ranking = LossRanking(top)
+    totals = {}
+    snapshots = 0
+    errors = []
+    try:
+        for path, (items, stats, rows, _, error) in zip(files, results):
+            if error:
+                errors.append((path, error))
+            ranking.merge(items)
+            totals.update(stats)
+            snapshots += rows
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return ranking.results(), totals, snapshots, errors
+
+
+def worst_stages(totals, stages=LOSS_STAGES, limit=DEFAULT_TOP):
+    """依遺失量總和排序的 (裝置, 介面, 階段)，返回字典列表"""
+    worst = heapq.nlargest(limit, totals.items(), key=lambda item: item[1][0])
+    return [{'device': device, 'interface': interface, 'stage': stage_label(stages[stage_index]),
+             'total_loss': total, 'max_loss': peak, 'snapshots': count}
+            for (device, interface, stage_index), (total, peak, count) in worst]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="全體裝置的封包遺失定位報告")
+    parser.add_argument('inputs', nargs='+', help="日誌文件、目錄或萬用字元 (每個文件視為一台裝置)")
+    parser.add_argument('--pattern', action='append', dest='patterns', help=PATTERN_HELP)
+    parser.add_argument('--top', type=int, default=DEFAULT_TOP, help="保留的最差項目數")
+    parser.add_argument('--mode', choices=(SNAPSHOT, DELTA), default=SNAPSHOT,
+                        help="snapshot: 每個快照的累計差距; delta: 相鄰快照間新增的遺失")
+    parser.add_argument('--workers', type=int, default=None, help="進程數 (預設為 CPU 數)")
+    parser.add_argument('--json', dest='json_path', help="輸出 JSON 報告")
+    args = parser.parse_args(argv)
+
+    files = collect_files(args.inputs, args.patterns or DEFAULT_PATTERNS)
+    if not files:
+        print("找不到任何日誌文件", file=sys.stderr)
+        return 2
+
+    start = time.perf_counter()
+    items, totals, snapshots, errors = run_report(files, args.top, args.mode, args.workers)
+    elapsed = time.perf_counter() - start
+    stages = worst_stages(totals, limit=args.top)
+
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump({'mode': args.mode, 'files': len(files), 'snapshots': snapshots,
+                       'seconds': round(elapsed, 6), 'worst_snapshots': items, 'worst_stages': stages,
+                       'errors': [{'file': path, 'error': error} for path, error in errors]},
+                      f, ensure_ascii=False, indent=2)
+
+    for path, error in errors:
+        print(f"錯誤 {path}: {error}", file=sys.stderr)
+    print(f"遺失最多的階段 (共 {len(totals)} 個有遺失的 介面/階段):")
+    for item in stages:
+        print(f"  {item['total_loss']:>14,}  最大 {item['max_loss']:>12,}  {item['snapshots']:>7} 快照  "
+              f"{item['device']} {item['interface']}  {item['stage']}")
+    print("遺失最多的快照:")
+    for item in items:
+        print(f"  {item['loss']:>14,}  {item['device']} {item['interface']} 區塊 {item['block']}  {item['stage']}")
+    print(f"{len(files)} 個文件, {snapshots} 個快照, {elapsed:.2f} s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+"""
+多進程平行解析單一大型計數器日誌
+在 PHY[...] COUNTER 區塊標頭處切分文件，各段在進程池中解析，再依原本的順序合併到同一個 CounterTimeSeries
+
+用法: python counter_parallel.py <日誌文件> [--workers N]
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+from counter_io import find_block_boundaries, iter_counter_file_mmap
+from counter_parser import CounterLogParser
+from counter_store import CounterTimeSeries
+
+# 小於此大小的文件直接在目前進程解析
+MIN_PARALLEL_BYTES = 32 * 1024 * 1024
+
+# 每個進程分到的段數 (多切幾段讓負載平均)
+PARTS_PER_WORKER = 4
+
+
+def parse_range(file_path, start, end, encoding='utf-8', progress=None):
+    """解析文件的 [start, end) 範圍
+
+    返回 (存儲, 區塊數, 第一個區塊的介面, 最後一個區塊之後的時間戳, 行數)，
+    第三、四項用於把段落結尾的時間戳交給下一段的第一個區塊。
+    """
+    parser = CounterLogParser()
+    store = CounterTimeSeries()
+    first_interface = None
+    lines = [0]
+
+    def count_lines(bytes_done, lines_done):
+        lines[0] = lines_done
+        if progress is not None:
+            progress(bytes_done, lines_done)
+
+    for block in iter_counter_file_mmap(file_path, encoding, start=start, end=end, parser=parser,
+                                        progress=count_lines):
+        series = store.add_block(block)
+        if first_interface is None:
+            first_interface = series.name
+    return store, parser.index, first_interface, parser.pending_timestamp, lines[0]
+
+
+def parse_file_parallel(file_path, workers=None, encoding='utf-8',
+                        min_parallel_bytes=MIN_PARALLEL_BYTES, progress=None):
+    """平行解析整個日誌文件，結果與依序解析相同
+
+    progress(已處理的位元組數, 已處理的行數) 在解析過程中呼叫 (平行時為每段合併後)；
+    在其中拋出例外即可中止解析，尚未開始的段落會被取消。
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or os.path.getsize(file_path) < min_parallel_bytes:
+        ranges = [(0, None)]
+    else:
+        ranges = find_block_boundaries(file_path, workers * PARTS_PER_WORKER)
+
+    store = CounterTimeSeries()
+    state = {'index_offset': 0, 'carry_timestamp': None, 'bytes': 0, 'lines': 0}
+
+    def merge(result):
+        part, block_count, first_interface, trailing_timestamp, lines = result
+        if state['carry_timestamp'] is not None and first_interface is not None:
+            # 上一段結尾的時間戳屬於本段的第一個區塊
+            part.interfaces[first_interface].timestamps[0] = state['carry_timestamp']
+        store.merge(part, state['index_offset'])
+        state['index_offset'] += block_count
+        state['carry_timestamp'] = trailing_timestamp
+        state['lines'] += lines
+
+    if len(ranges) <= 1:
+        for start, end in ranges:
+            merge(parse_range(file_path, start, end, encoding, progress))
+        return store
+
+    starts, ends = zip(*ranges)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        try:
+            for (start, end), result in zip(ranges, executor.map(parse_range, repeat(file_path),
+                                                                 starts, ends, repeat(encoding))):
+                merge(result)
+                state['bytes'] += end - start
+                if progress is not None:
+                    progress(state['bytes'], state['lines'])
+        except BaseException:
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+    return store
+
+
+def main():
+    parser = argparse.ArgumentParser(description="平行解析計數器日誌")
+    parser.add_argument('file', help="日誌文件")
+    parser.add_argument('--workers', type=int, default=None, help="進程數 (預設為 CPU 數)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    store = parse_file_parallel(args.file, args.workers, min_parallel_bytes=0)
+    elapsed = time.perf_counter() - start
+    size = os.path.getsize(args.file)
+    print(f"{len(store.interfaces)} 個介面, {len(store)} 個快照, "
+          f"{elapsed:.2f} s ({size / elapsed / 1e6:.1f} MB/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,364 @@
+"""
+網絡計數器日誌的串流解析器 (不依賴 tkinter)
+可從任意文件對象或行迭代器逐塊解析 PHY COUNTER 區塊，記憶體佔用與文件大小無關
+"""
+
+import io
+import re
+import threading
+from array import array
+from datetime import datetime, timezone
+
+# 計數器類型 (與 GUI 的 parsed_data 鍵一致)
+COUNTER_TYPES = ('SS', 'FCM', 'MAC', 'LS')
+
+# 區塊標頭: ==========PHY[eth0.6] COUNTER===========
+HEADER_PATTERN = re.compile(r'^=+\s*PHY\[([^\]]*)\]\s*COUNTER')
+
+# 快照時間戳: 2024-01-31 02:00:00 / 2024/01/31T02:00:00 (出現在區塊標頭附近的非數據行)
+TIMESTAMP_PATTERN = re.compile(r'(\d{4})[-/](\d{2})[-/](\d{2})[ T](\d{2}):(\d{2}):(\d{2})')
+
+# 標準格式的快速路徑，一次匹配即可辨識以下三種行:
+#   | <<SS Counter>>                 計數器類型
+#   | Before EF / | After EF         LS 子區段
+#   | Tx Start        :000667583 |   計數器數據
+# 數據行的名稱包含結尾空白 (避免回溯)，由 counter_key 去除並快取
+# 其他格式的行交給 VALUE_PATTERNS 的相容路徑處理
+TOKEN_PATTERN = re.compile(
+    r'\|\s*(?:'
+    r'([^:<>|\s][^:<>|]*):\s*(\d+)\s*\|?'
+    r'|<<\s*(SS Counter|FCM counter|MAC Counter|LS counter)\s*>>'
+    r'|(Before EF|After EF)'
+    r')$'
+)
+
+# 快速路徑的類型標記 -> 計數器類型
+SECTION_TYPES = {
+    'SS Counter': 'SS',
+    'FCM counter': 'FCM',
+    'MAC Counter': 'MAC',
+    'LS counter': 'LS',
+}
+
+# 計數器數據行的匹配模式 (相容路徑，依序嘗試)
+VALUE_PATTERNS = [
+    re.compile(r'\|\s*([^:]+?)\s*:\s*(\d+)\s*\|'),  # 原始模式: | name :value |
+    re.compile(r'\|\s*([^:]+?)\s*:\s*(\d+)'),       # 簡化模式: | name :value
+    re.compile(r'([^:]+?)\s*:\s*(\d+)'),            # 最簡模式: name :value
+]
+
+
+class CounterSchema:
+    """計數器名稱的登記表
+
+    每個 (計數器類型, parsed_data 的鍵) 第一次出現時分配一個小整數 ID，之後的區塊只記錄 ID 與值，
+    不再為每個快照建立字串鍵與字典。ID 只在同一個登記表 (同一進程) 內有效。
+    """
+
+    def __init__(self):
+        self.keys = []  # ID -> (counter_type, 鍵)
+        self.ids = {}   # (counter_type, 鍵) -> ID
+        self.lock = threading.Lock()  # 解析執行緒與 GUI 可能同時登記新名稱
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __getstate__(self):
+        return {'keys': self.keys, 'ids': self.ids}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+    def intern(self, counter_type, key):
+        """返回計數器的 ID，第一次出現時登記"""
+        cid = self.ids.get((counter_type, key))
+        if cid is None:
+            with self.lock:
+                cid = self.ids.get((counter_type, key))
+                if cid is None:
+                    cid = len(self.keys)
+                    self.keys.append((counter_type, key))
+                    self.ids[(counter_type, key)] = cid
+        return cid
+
+
+# 同一進程的解析器預設共用的登記表
+DEFAULT_SCHEMA = CounterSchema()
+
+
+class CounterBlock:
+    """單個 PHY COUNTER 區塊的解析結果
+
+    計數器依出現順序存為 (ids, values) 兩個陣列，ID 由 schema 登記；data 依需要組合成 parsed_data 的格式。
+    """
+
+    __slots__ = ('interface', 'index', 'timestamp', 'offset', 'schema', 'ids', 'values', 'unmatched')
+
+    def __init__(self, interface=None, index=0, timestamp=None, schema=DEFAULT_SCHEMA):
+        self.interface = interface  # 介面名稱，例如 eth0.6；沒有標頭時為 None
+        self.index = index          # 區塊在日誌中的順序
+        self.timestamp = timestamp  # 快照時間 (epoch 秒，UTC)；日誌中沒有時間時為 None
+        self.offset = None          # 標頭在文件中的位元組位置；由文件讀取端填入
+        self.schema = schema
+        self.ids = array('I')       # 計數器 ID (同一名稱重複出現時以最後一個值為準)
+        self.values = array('Q')    # 計數器值 (無號 64 位元)
+        self.unmatched = []         # 無法解析的行 (counter_type, line)
+
+    @property
+    def data(self):
+        """{'SS': {...}, 'FCM': {...}, 'MAC': {...}, 'LS': {...}} 格式的計數器 (每次呼叫重新組合)"""
+        data = {counter_type: {} for counter_type in COUNTER_TYPES}
+        keys = self.schema.keys
+        for cid, value in zip(self.ids, self.values):
+            counter_type, key = keys[cid]
+            data[counter_type][key] = value
+        return data
+
+    def is_empty(self):
+        """區塊內是否沒有任何計數器"""
+        return not self.ids
+
+    def has_content(self):
+        """區塊是否值得產出 (有計數器、無法解析的行或標頭)"""
+        return bool(self.ids) or bool(self.unmatched) or self.interface is not None
+
+    def counter_count(self):
+        """區塊內計數器總數"""
+        return len(set(self.ids))
+
+
+def parse_timestamp(line):
+    """從行中取出時間戳並轉換為 epoch 秒 (視為 UTC)，沒有時返回 None"""
+    match = TIMESTAMP_PATTERN.search(line)
+    if not match:
+        return None
+    try:
+        moment = datetime(*(int(part) for part in match.groups()), tzinfo=timezone.utc)
+    except ValueError:
+        return None
+    return moment.timestamp()
+
+
+def counter_key(counter_type, section, counter_name):
+    """返回計數器在 parsed_data 中的鍵
+
+    名稱中含有類型/子區段標記時返回空字串，表示這一行必須交給相容路徑處理
+    (相容路徑會把它當作標記行)。
+    """
+    counter_name = counter_name.strip()
+    if any(marker in counter_name for marker in SECTION_TYPES):
+        return ''
+    if counter_type == 'LS' and ('Before EF' in counter_name or 'After EF' in counter_name):
+        return ''
+    # 對於LS counter，如果有section，加上前綴
+    if counter_type == 'LS' and section:
+        return f"[{section}] {counter_name}"
+    return counter_name
+
+
+class CounterLogParser:
+    """增量計數器日誌解析器
+
+    可分多次以 feed 餵入行，解析狀態 (目前區塊、計數器類型、LS 子區段) 在兩次呼叫之間保留，
+    供 iter_counter_blocks 與持續追蹤的日誌 (tail-follow) 共用。
+    """
+
+    def __init__(self, first_index=0, schema=None):
+        self.schema = schema or DEFAULT_SCHEMA
+        self.index = first_index  # 下一個產出區塊的順序
+        self.block = CounterBlock(index=first_index, schema=self.schema)
+        self.current_counter_type = None
+        self.current_section = None  # 用於LS counter的Before EF/After EF
+        self.pending_timestamp = None  # 上一個區塊結束後出現的時間戳，屬於下一個區塊
+        # (counter_type, section) -> {原始名稱: ID}，避免每行重新組合字串；
+        # ID 為 -1 表示這一行必須交給相容路徑
+        self.key_caches = {}
+        self.key_cache = self.key_caches.setdefault((None, None), {})
+
+    def _save_state(self, block, current_counter_type, current_section,
+                    pending_timestamp, key_cache):
+        self.block = block
+        self.current_counter_type = current_counter_type
+        self.current_section = current_section
+        self.pending_timestamp = pending_timestamp
+        self.key_cache = key_cache
+
+    def feed(self, lines):
+        """解析一批行，逐個產出已完成的區塊 (遇到下一個標頭才算完成)"""
+        token_match = TOKEN_PATTERN.match
+        schema = self.schema
+        key_caches = self.key_caches
+        key_cache = self.key_cache
+        block = self.block
+        ids_append = block.ids.append
+        values_append = block.values.append
+        current_counter_type = self.current_counter_type
+        current_section = self.current_section
+        pending_timestamp = self.pending_timestamp
+
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+
+            # 快速路徑: 標準格式的數據行與標記行
+            if line[0] == '|':
+                token = token_match(line)
+                if token is not None:
+                    counter_name, value, section_type, ef_section = token.groups()
+                    if counter_name is not None:
+                        cid = key_cache.get(counter_name)
+                        if cid is None:
+                            key = counter_key(current_counter_type, current_section, counter_name)
+                            if not key:
+                                cid = -1
+                            elif current_counter_type is None:
+                                # 尚未出現計數器類型的數據行不記錄
+                                cid = -2
+                            else:
+                                cid = schema.intern(current_counter_type, key)
+                            key_cache[counter_name] = cid
+                        if cid >= 0:
+                            try:
+                                values_append(int(value))
+                            except OverflowError:
+                                # 超出 64 位元的值不是計數器
+                                block.unmatched.append((current_counter_type, line))
+                                continue
+                            ids_append(cid)
+                            continue
+                        if cid == -2:
+                            continue
+                    elif section_type is not None:
+                        current_counter_type = SECTION_TYPES[section_type]
+                        current_section = None
+                        key_cache = key_caches.setdefault((current_counter_type, None), {})
+                        continue
+                    else:
+                        if current_counter_type == 'LS':
+                            current_section = ef_section
+                            key_cache = key_caches.setdefault(('LS', ef_section), {})
+                        continue
+
+            elif line[0] == '=':
+                header = HEADER_PATTERN.match(line)
+                if header:
+                    if block.has_content():
+                        self._save_state(block, current_counter_type,
+                                         current_section, pending_timestamp, key_cache)
+                        yield block
+                        self.index += 1
+                    elif pending_timestamp is None:
+                        # 日誌開頭、第一個標頭之前的時間戳
+                        pending_timestamp = block.timestamp
+                    block = CounterBlock(header.group(1).strip(), self.index, pending_timestamp, schema)
+                    ids_append = block.ids.append
+                    values_append = block.values.append
+                    pending_timestamp = None
+                    current_counter_type = None
+                    current_section = None
+                    key_cache = key_caches[(None, None)]
+                continue
+
+            # 時間戳行 (計數器數據行以豎線開頭，不需要檢查)
+            else:
+                timestamp = parse_timestamp(line)
+                if timestamp is not None:
+                    if block.is_empty() and block.timestamp is None:
+                        block.timestamp = timestamp
+                    else:
+                        pending_timestamp = timestamp
+                    continue
+
+            # 相容路徑: 檢測計數器類型 - 更寬鬆的匹配
+            if 'SS Counter' in line:
+                current_counter_type = 'SS'
+            elif 'FCM counter' in line:
+                current_counter_type = 'FCM'
+            elif 'MAC Counter' in line:
+                current_counter_type = 'MAC'
+            elif 'LS counter' in line:
+                current_counter_type = 'LS'
+            elif current_counter_type == 'LS' and 'Before EF' in line:
+                current_section = 'Before EF'
+                key_cache = key_caches.setdefault(('LS', current_section), {})
+                continue
+            elif current_counter_type == 'LS' and 'After EF' in line:
+                current_section = 'After EF'
+                key_cache = key_caches.setdefault(('LS', current_section), {})
+                continue
+            else:
+                # 解析計數器數據 - 更靈活的模式匹配
+                if current_counter_type and ':' in line:
+                    matched = False
+                    for pattern in VALUE_PATTERNS:
+                        match = pattern.search(line)
+                        if match:
+                            counter_name = match.group(1).strip()
+                            # 移除可能的前導豎線
+                            counter_name = counter_name.lstrip('|').strip()
+                            value = int(match.group(2))
+
+                            # 跳過空的計數器名稱或只包含特殊字符的名稱
+                            if not counter_name or counter_name in ['<<', '>>', '|']:
+                                break
+
+                            # 對於LS counter，如果有section，加上前綴
+                            if current_counter_type == 'LS' and current_section:
+                                counter_name = f"[{current_section}] {counter_name}"
+
+                            try:
+                                values_append(value)
+                            except OverflowError:
+                                break
+                            ids_append(schema.intern(current_counter_type, counter_name))
+                            matched = True
+                            break
+
+                    if not matched:
+                        block.unmatched.append((current_counter_type, line))
+                continue
+
+            # 切換了計數器類型
+            current_section = None
+            key_cache = key_caches.setdefault((current_counter_type, None), {})
+
+        self._save_state(block, current_counter_type, current_section,
+                         pending_timestamp, key_cache)
+
+    def close(self):
+        """結束解析，返回最後一個區塊 (沒有內容時返回 None)
+
+        最後一個區塊之後出現的時間戳保留在 pending_timestamp。
+        """
+        block = self.block
+        if block.has_content():
+            self.index += 1
+        else:
+            block = None
+        self._save_state(CounterBlock(index=self.index, schema=self.schema), None, None,
+                         self.pending_timestamp, self.key_caches[(None, None)])
+        return block
+
+
+def iter_counter_blocks(source):
+    """逐塊解析計數器日誌
+
+    source 可以是文件對象、行迭代器或字串；每遇到新的 PHY[...] COUNTER 標頭
+    就產出上一個區塊，因此整個日誌不需要同時存在於記憶體中。
+    """
+    if isinstance(source, str):
+        source = io.StringIO(source)
+
+    parser = CounterLogParser()
+    yield from parser.feed(source)
+    block = parser.close()
+    if block is not None:
+        yield block
+
+
+def iter_counter_file(file_path, encoding='utf-8'):
+    """逐塊解析磁碟上的計數器日誌文件"""
+    with open(file_path, 'r', encoding=encoding, errors='replace') as f:
+        yield from iter_counter_blocks(f)
@@ -0,0 +1,94 @@
+"""
+裝置寄存器視窗
+顯示接收伺服器收到的各裝置最新寄存器值，並以與寄存器解析器共用的寄存器表 (phy_common/reg_schema.py) 解碼位元欄位
+"""
+
+import tkinter as tk
+from tkinter import ttk
+
+from phy_common.reg_schema import REGISTER_SCHEMA
+
+
+class RegisterPanel:
+    """裝置寄存器視窗
+
+    get_registers() 返回 {裝置: {寄存器名稱: 值}}；收到新的轉儲時由主視窗呼叫 refresh()。
+    """
+
+    def __init__(self, parent, get_registers):
+        self.get_registers = get_registers
+        self.window = tk.Toplevel(parent)
+        self.window.title("裝置寄存器")
+        self.window.geometry("800x600")
+        self.device = tk.StringVar()
+        self.info = tk.StringVar()
+        self.setup_ui()
+        self.refresh()
+
+    def setup_ui(self):
+        frame = ttk.Frame(self.window, padding="10")
+        frame.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        self.window.columnconfigure(0, weight=1)
+        self.window.rowconfigure(0, weight=1)
+        frame.columnconfigure(0, weight=1)
+        frame.rowconfigure(1, weight=1)
+
+        device_frame = ttk.Frame(frame)
+        device_frame.grid(row=0, column=0, sticky=(tk.W, tk.E), pady=(0, 5))
+        ttk.Label(device_frame, text="裝置:").grid(row=0, column=0, padx=(0, 5))
+        self.device_combo = ttk.Combobox(device_frame, textvariable=self.device, state='readonly', width=30)
+        self.device_combo.grid(row=0, column=1)
+        self.device_combo.bind('<<ComboboxSelected>>', lambda event: self.show_device())
+        ttk.Label(device_frame, textvariable=self.info).grid(row=0, column=2, padx=(10, 0))
+
+        tree_frame = ttk.Frame(frame)
+        tree_frame.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        tree_frame.columnconfigure(0, weight=1)
+        tree_frame.rowconfigure(0, weight=1)
+        self.tree = ttk.Treeview(tree_frame, columns=('Value', 'Decoded'), show='tree headings')
+        self.tree.heading('#0', text='Register')
+        self.tree.heading('Value', text='Value')
+        self.tree.heading('Decoded', text='Decoded')
+        self.tree.column('#0', width=280)
+        self.tree.column('Value', width=150)
+        self.tree.column('Decoded', width=300)
+        scrollbar = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
+
+    def is_open(self):
+        try:
+            return bool(self.window.winfo_exists())
+        except tk.TclError:
+            return False
+
+    def refresh(self):
+        """更新裝置選單並重新顯示目前的裝置"""
+        devices = sorted(self.get_registers())
+        self.device_combo['values'] = devices
+        if self.device.get() not in devices:
+            self.device.set(devices[0] if devices else "")
+        self.info.set(f"{len(devices)} 台裝置")
+        self.show_device()
+
+    def show_device(self):
+        """顯示目前裝置的寄存器；寄存器表中有欄位的寄存器可展開查看各欄位 (保留已展開的項目)"""
+        expanded = {item for item in self.tree.get_children() if self.tree.item(item, 'open')}
+        self.tree.delete(*self.tree.get_children())
+        registers = self.get_registers().get(self.device.get(), {})
+
+        # 依寄存器表的順序，不在表中的寄存器排在最後
+        names = [name for name in REGISTER_SCHEMA.registers if name in registers]
+        names += sorted(name for name in registers if name not in REGISTER_SCHEMA.registers)
+        for name in names:
+            value = registers[name]
+            decoded = REGISTER_SCHEMA.decode(name, value)
+            description = decoded.description if decoded is not None else ''
+            self.tree.insert('', tk.END, iid=name, text=name, open=name in expanded,
+                             values=(f"0x{value:08x}", description))
+            if decoded is None:
+                continue
+            for field_name, label, raw, text in decoded.fields:
+                self.tree.insert(name, tk.END, text=f"{label} {field_name}" if label else field_name,
+                                 values=(raw, text))
@@ -0,0 +1,252 @@
+"""
+計數器方向分類與驗證規則 (不依賴 tkinter)
+parsed_data 的格式為 {'SS': {...}, 'FCM': {...}, 'MAC': {...}, 'LS': {...}}
+"""
+
+# 流程圖上的計數器區塊 (ASIX MAC 對應 parsed_data 的 'MAC')
+FLOW_TYPES = ('SS', 'FCM', 'ASIX MAC', 'LS')
+DATA_TYPES = {'SS': 'SS', 'FCM': 'FCM', 'ASIX MAC': 'MAC', 'LS': 'LS'}
+FLOW_TYPE_OF = {data_type: flow_type for flow_type, data_type in DATA_TYPES.items()}
+
+FCM_RX_KEYS = {
+    'Tx to System side_S', 'Tx to System side_T',
+    'Pause to System side', 'Pause from Line side',
+    'Rx from Line side_S', 'Rx from Line side_T'
+}
+LS_RX_KEYS = {
+    'Rx_DEC', 'Rx from Line side_S', 'Rx from Line side_T'
+}
+
+
+# 驗證關係
+EQUALS = 'equals'  # 必須等於參考計數器 (參考計數器不存在時視為 0)
+ZERO = 'zero'      # 必須為 0
+
+# 驗證規則表: (方向, 流程圖區塊, 計數器名稱, 關係, 參考計數器 (parsed_data 類型, 名稱))
+# 不符合規則的計數器在流程圖上顯示為紅色
+VALIDATION_RULES = (
+    ('TX', 'SS', 'Rx Terminal', EQUALS, ('SS', 'Rx Start')),
+    ('TX', 'FCM', 'Tx to Line side_S', EQUALS, ('FCM', 'Rx from System side_T')),
+    ('TX', 'FCM', 'Tx to Line side_T', EQUALS, ('FCM', 'Tx to Line side_S')),
+    ('TX', 'FCM', 'Rx from System side_S', EQUALS, ('SS', 'Rx Terminal')),
+    ('TX', 'FCM', 'Rx from System side_T', EQUALS, ('FCM', 'Rx from System side_S')),
+    ('TX', 'FCM', 'Pause to Line side', ZERO, None),
+    ('TX', 'FCM', 'Pause from System side', ZERO, None),
+    ('TX', 'ASIX MAC', 'Tx Error from System side', ZERO, None),
+    ('TX', 'LS', '[Before EF] Tx to Line side_S', EQUALS, ('MAC', 'Tx from System side')),
+
+    ('RX', 'SS', 'Tx Start', EQUALS, ('FCM', 'Tx to System side_T')),
+    ('RX', 'SS', 'Tx Terminal', EQUALS, ('SS', 'Tx Start')),
+    ('RX', 'FCM', 'Rx from Line side_T', EQUALS, ('FCM', 'Rx from Line side_S')),
+    ('RX', 'FCM', 'Tx to System side_S', EQUALS, ('FCM', 'Rx from Line side_T')),
+    ('RX', 'FCM', 'Tx to System side_T', EQUALS, ('FCM', 'Tx to System side_S')),
+    ('RX', 'FCM', 'Pause from Line side', ZERO, None),
+    ('RX', 'FCM', 'Pause to System side', ZERO, None),
+    ('RX', 'ASIX MAC', 'Rx Error to System side', ZERO, None),
+    ('RX', 'LS', '[After EF] Rx from Line side_S', EQUALS, ('LS', '[Before EF] Rx from Line side_S')),
+)
+
+
+class CompiledRules:
+    """預先編譯的驗證規則
+
+    規則在建立時展開為 (parsed_data 類型, 名稱) 的直接查找；
+    evaluate 對單一快照求值一次，evaluate_array 對 CounterArray 的所有快照與介面向量化求值。
+    """
+
+    def __init__(self, rules=VALIDATION_RULES):
+        self.rules = []   # (方向, 流程圖區塊, 類型, 名稱, 參考類型, 參考名稱)
+        self.lookup = {}  # (方向, 流程圖區塊, 名稱) -> 規則在 self.rules 中的位置
+        for direction, flow_type, counter_name, relation, reference in rules:
+            if relation == EQUALS:
+                ref_type, ref_name = reference
+            elif relation == ZERO:
+                ref_type = ref_name = None
+            else:
+                raise ValueError(f"未知的驗證關係: {relation}")
+            self.lookup[(direction, flow_type, counter_name)] = len(self.rules)
+            self.rules.append((direction, flow_type, DATA_TYPES[flow_type], counter_name,
+                               ref_type, ref_name))
+
+    def check(self, parsed_data, direction, flow_type, key, value):
+        """檢查單一計數器，返回是否違反規則"""
+        index = self.lookup.get((direction, flow_type, key))
+        if index is None:
+            return False
+        ref_type, ref_name = self.rules[index][4:]
+        expected = 0 if ref_type is None else parsed_data.get(ref_type, {}).get(ref_name, 0)
+        return value != expected
+
+    def evaluate(self, parsed_data):
+        """對一個快照求值，返回違反規則的 {(方向, 流程圖區塊, 名稱): 值}"""
+        failures = {}
+        for direction, flow_type, data_type, counter_name, ref_type, ref_name in self.rules:
+            value = parsed_data.get(data_type, {}).get(counter_name)
+            if value is None:
+                continue
+            expected = 0 if ref_type is None else parsed_data.get(ref_type, {}).get(ref_name, 0)
+            if value != expected:
+                failures[(direction, flow_type, counter_name)] = value
+        return failures
+
+    def evaluate_array(self, counter_array):
+        """對 CounterArray 的所有快照與介面向量化求值
+
+        返回 (labels, failed)：labels 為 [(介面, 方向, 流程圖區塊, 名稱), ...]，
+        failed 為形狀 (快照數, len(labels)) 的布林陣列；計數器不存在的位置為 False。
+        """
+        import numpy as np
+
+        labels = []
+        targets = []
+        references = []  # -1 表示與 0 比較
+        for interface in counter_array.interfaces:
+            for direction, flow_type, data_type, counter_name, ref_type, ref_name in self.rules:
+                target = counter_array.column_index(interface, data_type, counter_name)
+                if target is None:
+                    continue
+                reference = -1
+                if ref_type is not None:
+                    column = counter_array.column_index(interface, ref_type, ref_name)
+                    reference = -1 if column is None else column
+                labels.append((interface, direction, flow_type, counter_name))
+                targets.append(target)
+                references.append(reference)
+
+        if not labels:
+            return labels, np.zeros((len(counter_array), 0), dtype=bool)
+
+        targets = np.array(targets, dtype=np.intp)
+        references = np.array(references, dtype=np.intp)
+        values = counter_array.values[:, targets]
+        reference_columns = np.where(references < 0, 0, references)
+        expected = counter_array.values[:, reference_columns]
+        # 沒有參考計數器或該快照缺值時以 0 比較 (與 get_counter_value 相同)
+        expected = np.where((references < 0) | ~counter_array.present[:, reference_columns], 0, expected)
+        failed = counter_array.present[:, targets] & (values != expected)
+        return labels, failed
+
+
+DEFAULT_RULES = CompiledRules()
+
+
+def get_counter_value(parsed_data, counter_type, counter_name):
+    """獲取特定計數器的值"""
+    return parsed_data.get(counter_type, {}).get(counter_name, 0)
+
+
+def check_tx_validation_rules(parsed_data, counter_type, key, value):
+    """檢查TX方向的驗證規則，返回是否應該顯示為紅色"""
+    return DEFAULT_RULES.check(parsed_data, 'TX', counter_type, key, value)
+
+
+def check_rx_validation_rules(parsed_data, counter_type, key, value):
+    """檢查RX方向的驗證規則，返回是否應該顯示為紅色"""
+    return DEFAULT_RULES.check(parsed_data, 'RX', counter_type, key, value)
+
+
+def is_tx_counter(counter_type, key):
+    """計數器是否屬於TX方向"""
+    if counter_type == 'SS':
+        # SS Counter TX: Rx Start, Rx Terminal
+        return 'Rx Start' in key or 'Rx Terminal' in key
+    elif counter_type == 'FCM':
+        # FCM Counter TX: 除了RX方向的計數器以外的所有計數器
+        return not any(rx_key in key for rx_key in FCM_RX_KEYS)
+    elif counter_type == 'ASIX MAC':
+        # MAC Counter TX: Tx Error from System side, Tx from System side
+        return 'Tx Error from System side' in key or 'Tx from System side' in key
+    elif counter_type == 'LS':
+        # LS Counter TX: 除了RX方向的計數器以外的所有計數器
+        return not any(rx_key in key for rx_key in LS_RX_KEYS)
+    return False
+
+
+def is_rx_counter(counter_type, key):
+    """計數器是否屬於RX方向"""
+    if counter_type == 'SS':
+        # SS Counter RX: Tx Start, Tx Terminal
+        return 'Tx Start' in key or 'Tx Terminal' in key
+    elif counter_type == 'FCM':
+        # FCM Counter RX: Tx to System side_S/T, Pause to System side, Pause from Line side,
+        # Rx from Line side_S/T
+        return any(rx_key in key for rx_key in FCM_RX_KEYS)
+    elif counter_type == 'ASIX MAC':
+        # MAC Counter RX: Rx Error to System side, Rx to System side
+        return 'Rx Error to System side' in key or 'Rx to System side' in key
+    elif counter_type == 'LS':
+        # LS Counter RX: Before EF_Rx_DEC, Before EF_Rx from Line side_S/T,
+        # After EF_Rx from Line side_S/T
+        return any(rx_key in key for rx_key in LS_RX_KEYS)
+    return False
+
+
+# (流程圖區塊, 名稱) -> 所屬方向，分類只需做一次
+_direction_cache = {}
+
+
+def counter_directions(counter_type, key):
+    """返回計數器所屬的方向 ('TX', 'RX' 或兩者皆無)，結果會快取"""
+    directions = _direction_cache.get((counter_type, key))
+    if directions is None:
+        directions = tuple(direction for direction, test in (('TX', is_tx_counter), ('RX', is_rx_counter))
+                           if test(counter_type, key))
+        _direction_cache[(counter_type, key)] = directions
+    return directions
+
+
+def get_tx_data(counter_type, counter_data):
+    """提取TX相關的計數器數據"""
+    return {key: value for key, value in counter_data.items()
+            if 'TX' in counter_directions(counter_type, key)}
+
+
+def get_rx_data(counter_type, counter_data):
+    """提取RX相關的計數器數據"""
+    return {key: value for key, value in counter_data.items()
+            if 'RX' in counter_directions(counter_type, key)}
+
+
+class DirectionIndex:
+    """每個流程圖區塊在 TX/RX 方向包含的計數器名稱 (依首次出現的順序)
+
+    在解析時隨新計數器出現而建立，繪圖與驗證直接讀取，不需要再比對字串。
+    """
+
+    def __init__(self):
+        self.keys = {(flow_type, direction): []
+                     for flow_type in FLOW_TYPES for direction in ('TX', 'RX')}
+
+    @classmethod
+    def from_data(cls, parsed_data):
+        """由 parsed_data 建立"""
+        index = cls()
+        for data_type, counters in parsed_data.items():
+            for counter_name in counters:
+                index.add(data_type, counter_name)
+        return index
+
+    def add(self, data_type, counter_name):
+        """登記一個新出現的計數器"""
+        flow_type = FLOW_TYPE_OF.get(data_type)
+        if flow_type is None:
+            return
+        for direction in counter_directions(flow_type, counter_name):
+            self.keys[(flow_type, direction)].append(counter_name)
+
+    def items(self, parsed_data, flow_type, direction, limit=None):
+        """返回該區塊/方向在 parsed_data 中存在的 (名稱, 值)，最多 limit 項"""
+        counter_data = parsed_data.get(DATA_TYPES[flow_type], {})
+        result = []
+        for key in self.keys[(flow_type, direction)]:
+            value = counter_data.get(key)
+            if value is not None:
+                result.append((key, value))
+                if len(result) == limit:
+                    break
+        return result
+
+
+def find_violations(parsed_data, rules=DEFAULT_RULES):
+    """返回所有違反驗證規則 (流程圖上顯示為紅色) 的計數器: [(方向, 區塊, 名稱, 值), ...]"""
+    return [key + (value,) for key, value in rules.evaluate(parsed_data).items()]
@@ -0,0 +1,495 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+計數器與寄存器轉儲的接收伺服器 (asyncio，不需要 tkinter)
+同時接受多台裝置以 TCP/UDP 送來的 PHY[...] COUNTER 區塊與 RG_* 寄存器轉儲，逐塊解析後存入各裝置的 CounterTimeSeries，
+或交給 GUI 顯示。解析結果放入有上限的佇列，處理不及時暫停讀取該連線 (由 TCP 流量控制讓裝置端等待)；
+UDP 無法要求裝置端等待，佇列已滿時丟棄並計數
+
+每個連線 (或 UDP 來源位址) 的第一行可以是 "DEVICE <名稱>"，否則以對方位址作為裝置名稱
+命令列模式以 --history 把接收到的區塊與轉儲分批寫入歷史資料庫 (不在記憶體中累積)，否則只輸出統計
+
+用法: python counter_server.py --tcp 9000 --udp 9001 --history history.db
+"""
+
+import argparse
+import asyncio
+import queue
+import socket
+import sys
+import threading
+import time
+
+from counter_history import HistoryStore
+from counter_parser import CounterLogParser
+from counter_store import CounterTimeSeries
+from phy_common.reg_dump import REGISTER_LINE
+
+# 每次從連線讀取的位元組數
+READ_SIZE = 64 * 1024
+
+# 解析結果佇列的長度上限 (訊息數)
+QUEUE_SIZE = 4096
+
+# 指定裝置名稱的第一行
+DEVICE_PREFIX = 'DEVICE '
+
+# UDP 接收緩衝區大小 (資料包在伺服器忙碌時先存放在核心中)
+UDP_RECV_BUFFER = 8 * 1024 * 1024
+
+# 統計訊息速率的時間窗 (秒)
+RATE_WINDOW = 5.0
+
+# 寫入歷史資料庫: 累積的訊息數或經過的時間達到上限時寫入一次
+FLUSH_MESSAGES = 2048
+FLUSH_SECONDS = 5.0
+
+
+class IngestStats:
+    """接收統計；訊息為一個完成的計數器區塊或一份寄存器轉儲"""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.messages = 0
+        self.blocks = 0
+        self.dumps = 0
+        self.bytes = 0
+        self.dropped = 0
+        self.errors = 0         # 因無法處理的資料而結束的連線 (或丟棄的 UDP 資料包、訊息)
+        self.last_error = None
+        self.connections = 0
+        self.active = 0
+        self.first_time = None  # 第一個與最後一個訊息完成處理的時間
+        self.last_time = None
+        self.samples = [(self.start, 0)]  # (時間, 訊息數)，用於計算最近的速率
+
+    def rate(self):
+        """最近 RATE_WINDOW 秒的訊息/秒"""
+        now = time.perf_counter()
+        self.samples.append((now, self.messages))
+        while len(self.samples) > 2 and now - self.samples[1][0] >= RATE_WINDOW:
+            self.samples.pop(0)
+        then, count = self.samples[0]
+        return (self.messages - count) / (now - then) if now > then else 0.0
+
+    def sustained_rate(self):
+        """從第一個到最後一個訊息的平均訊息/秒"""
+        if self.first_time is None or self.last_time <= self.first_time:
+            return 0.0
+        return (self.messages - 1) / (self.last_time - self.first_time)
+
+    def describe(self):
+        elapsed = time.perf_counter() - self.start
+        return (f"{self.active}/{self.connections} 個連線, {self.messages} 個訊息 "
+                f"({self.blocks} 個區塊, {self.dumps} 份轉儲), {self.rate():,.0f} 訊息/秒, "
+                f"{self.bytes / 1e6 / elapsed if elapsed > 0 else 0.0:.1f} MB/s, 丟棄 {self.dropped}, "
+                f"錯誤 {self.errors}")
+
+    def add_error(self, source, error):
+        self.errors += 1
+        self.last_error = f"{source}: {type(error).__name__}: {error}"
+
+
+class DeviceStream:
+    """單一連線 (或 UDP 來源) 的解析狀態
+
+    計數器行交給 CounterLogParser；寄存器行收集為一份轉儲，遇到非寄存器行、重複的寄存器名稱或連線結束時完成。
+    """
+
+    def __init__(self, device):
+        self.device = device
+        self.named = False  # 是否已由 DEVICE 行指定名稱
+        self.parser = CounterLogParser()
+        self.registers = {}
+        self.pending = b''  # 上一次讀取中不完整的最後一行
+
+    def feed(self, data, encoding='utf-8'):
+        """解析一段位元組，返回完成的訊息 [('counter', 裝置, CounterBlock) / ('register', 裝置, {名稱: 值})]"""
+        data = self.pending + data
+        end = data.rfind(b'\n') + 1
+        self.pending = data[end:]
+        lines = data[:end].decode(encoding, errors='replace').splitlines()
+        if self.named and not self.registers and b'0x' not in data:
+            # 只有計數器行 (常見情況): 直接交給解析器，不逐行檢查寄存器
+            return [('counter', self.device, block) for block in self.parser.feed(lines)]
+        return self.feed_lines(lines)
+
+    def feed_lines(self, lines):
+        messages = []
+        counter_lines = []
+        match_register = REGISTER_LINE.match
+        for line in lines:
+            if not self.named and line.startswith(DEVICE_PREFIX):
+                self.device = line[len(DEVICE_PREFIX):].strip() or self.device
+                self.named = True
+                continue
+            self.named = True
+            # 寄存器值都是 0x 開頭，先以子字串檢查避免對每一行執行正規表達式
+            register = match_register(line) if '0x' in line else None
+            if register is not None:
+                if counter_lines:
+                    # 先完成轉儲之前的計數器行，保持訊息的順序
+                    messages.extend(('counter', self.device, block) for block in self.parser.feed(counter_lines))
+                    counter_lines = []
+                name = register.group(1)
+                if name in self.registers:
+                    messages.append(self.take_registers())
+                self.registers[name] = int(register.group(2), 16)
+                continue
+            if self.registers and line.strip():
+                messages.append(self.take_registers())
+            counter_lines.append(line)
+            if len(counter_lines) >= 1024:
+                messages.extend(('counter', self.device, block) for block in self.parser.feed(counter_lines))
+                counter_lines = []
+        if counter_lines:
+            messages.extend(('counter', self.device, block) for block in self.parser.feed(counter_lines))
+        return messages
+
+    def take_registers(self):
+        registers = self.registers
+        self.registers = {}
+        return ('register', self.device, registers)
+
+    def close(self):
+        """連線結束，返回剩餘的訊息"""
+        messages = []
+        if self.pending:
+            messages.extend(self.feed_lines([self.pending.decode('utf-8', errors='replace')]))
+            self.pending = b''
+        if self.registers:
+            messages.append(self.take_registers())
+        block = self.parser.close()
+        if block is not None:
+            messages.append(('counter', self.device, block))
+        return messages
+
+
+class UDPProtocol(asyncio.DatagramProtocol):
+    """UDP: 每個來源位址一個 DeviceStream；佇列已滿時丟棄並計數"""
+
+    def __init__(self, server):
+        self.server = server
+        self.streams = {}
+
+    def connection_made(self, transport):
+        sock = transport.get_extra_info('socket')
+        if sock is not None:
+            try:
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, UDP_RECV_BUFFER)
+            except OSError:
+                pass
+
+    def datagram_received(self, data, addr):
+        server = self.server
+        stream = self.streams.get(addr)
+        if stream is None:
+            stream = DeviceStream(f"{addr[0]}:{addr[1]}")
+            self.streams[addr] = stream
+            server.stats.connections += 1
+        server.stats.bytes += len(data)
+        if not data.endswith(b'\n'):
+            data += b'\n'  # 每個資料包都以完整的行結束
+        try:
+            messages = stream.feed(data)
+        except Exception as e:
+            # 無法處理的資料包只丟棄該來源的解析狀態
+            server.stats.add_error(stream.device, e)
+            del self.streams[addr]
+            return
+        for message in messages:
+            try:
+                server.messages.put_nowait(message)
+            except asyncio.QueueFull:
+                server.stats.dropped += 1
+
+
+class IngestServer:
+    """接收伺服器
+
+    keep_stores 為 True 時每台裝置的區塊存入 self.stores[裝置]，寄存器轉儲的最新值存入 self.registers[裝置]
+    (不會釋放，只適合測試與短時間的接收)；sink 為 queue.Queue 時訊息轉交給它 (例如 GUI 執行緒或 HistoryWriter)，
+    sink 已滿時暫停處理，讓背壓傳回各連線。
+    """
+
+    def __init__(self, queue_size=QUEUE_SIZE, keep_stores=False, sink=None):
+        self.queue_size = queue_size
+        self.keep_stores = keep_stores
+        self.sink = sink
+        self.stores = {}     # 裝置 -> CounterTimeSeries
+        self.registers = {}  # 裝置 -> {寄存器: 值}
+        self.stats = IngestStats()
+        self.messages = None
+        self.servers = []
+        self.consumer = None
+
+    async def start(self, host='127.0.0.1', tcp_port=None, udp_port=None):
+        """開始接收，返回實際使用的 (TCP 埠, UDP 埠) (埠為 0 時由系統分配)"""
+        self.messages = asyncio.Queue(self.queue_size)
+        self.consumer = asyncio.ensure_future(self.consume())
+        ports = [None, None]
+        if tcp_port is not None:
+            server = await asyncio.start_server(self.handle_connection, host, tcp_port, limit=READ_SIZE)
+            self.servers.append(server)
+            ports[0] = server.sockets[0].getsockname()[1]
+        if udp_port is not None:
+            transport, _ = await asyncio.get_running_loop().create_datagram_endpoint(
+                lambda: UDPProtocol(self), local_addr=(host, udp_port))
+            self.servers.append(transport)
+            ports[1] = transport.get_extra_info('sockname')[1]
+        return tuple(ports)
+
+    async def stop(self):
+        """停止接收並處理完佇列中的訊息"""
+        for server in self.servers:
+            server.close()
+        self.servers = []
+        if self.messages is not None:
+            await self.messages.join()
+        if self.consumer is not None:
+            self.consumer.cancel()
+            self.consumer = None
+
+    async def handle_connection(self, reader, writer):
+        peer = writer.get_extra_info('peername')
+        stream = DeviceStream(f"{peer[0]}:{peer[1]}" if peer else 'tcp')
+        self.stats.connections += 1
+        self.stats.active += 1
+        try:
+            while True:
+                data = await reader.read(READ_SIZE)
+                if not data:
+                    break
+                self.stats.bytes += len(data)
+                for message in stream.feed(data):
+                    # 佇列已滿時在此等待，期間不再讀取這個連線
+                    await self.messages.put(message)
+            for message in stream.close():
+                await self.messages.put(message)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as e:
+            # 單一連線的資料無法處理時只結束該連線，其他連線繼續接收
+            self.stats.add_error(stream.device, e)
+        finally:
+            self.stats.active -= 1
+            writer.close()
+
+    async def consume(self):
+        while True:
+            message = await self.messages.get()
+            try:
+                try:
+                    self.apply(message)
+                except Exception as e:
+                    self.stats.add_error(message[1], e)
+                    continue
+                if self.sink is not None:
+                    while True:
+                        try:
+                            self.sink.put_nowait(message)
+                            break
+                        except queue.Full:
+                            await asyncio.sleep(0.01)
+            finally:
+                self.messages.task_done()
+
+    def apply(self, message):
+        kind, device, payload = message
+        stats = self.stats
+        stats.last_time = time.perf_counter()
+        if stats.first_time is None:
+            stats.first_time = stats.last_time
+        stats.messages += 1
+        if kind == 'counter':
+            self.stats.blocks += 1
+            if self.keep_stores:
+                store = self.stores.get(device)
+                if store is None:
+                    store = CounterTimeSeries()
+                    self.stores[device] = store
+                store.add_block(payload)
+        else:
+            self.stats.dumps += 1
+            if self.keep_stores:
+                self.registers.setdefault(device, {}).update(payload)
+
+
+class ServerThread(threading.Thread):
+    """在背景執行緒執行 IngestServer (供 GUI 使用)；訊息放入 self.sink，由 GUI 以 root.after 取出"""
+
+    def __init__(self, host='127.0.0.1', tcp_port=9000, udp_port=None, sink_size=QUEUE_SIZE):
+        super().__init__(daemon=True)
+        self.host = host
+        self.tcp_port = tcp_port
+        self.udp_port = udp_port
+        self.sink = queue.Queue(sink_size)
+        self.server = IngestServer(keep_stores=False, sink=self.sink)
+        self.loop = None
+        self.ports = None
+        self.error = None
+        self.ready = threading.Event()
+
+    def run(self):
+        self.loop = asyncio.new_event_loop()
+        try:
+            self.ports = self.loop.run_until_complete(
+                self.server.start(self.host, self.tcp_port, self.udp_port))
+        except Exception as e:
+            self.error = e
+            self.ready.set()
+            self.loop.close()
+            return
+        self.ready.set()
+        try:
+            self.loop.run_forever()
+        finally:
+            self.loop.close()
+
+    def stop(self):
+        if self.loop is None or self.loop.is_closed():
+            return
+
+        async def shutdown():
+            for server in self.server.servers:
+                server.close()
+            self.server.servers = []
+            consumer = self.server.consumer
+            if consumer is not None:
+                consumer.cancel()
+                await asyncio.gather(consumer, return_exceptions=True)
+            asyncio.get_running_loop().stop()
+
+        asyncio.run_coroutine_threadsafe(shutdown(), self.loop)
+
+
+class HistoryWriter(threading.Thread):
+    """把接收到的訊息分批寫入歷史資料庫 (HistoryStore 在此執行緒開啟)
+
+    計數器區塊依裝置暫存於 CounterTimeSeries，寄存器轉儲以收到的時間記錄；累積 FLUSH_MESSAGES 個訊息或
+    經過 FLUSH_SECONDS 秒時寫入並丟棄，記憶體不隨接收時間增長。每台裝置的所有寫入屬於同一個 run。
+    sink 有上限，寫入不及時 IngestServer 暫停處理。寫入失敗後記錄錯誤，之後的訊息丟棄並計數。
+    """
+
+    STOP = None
+
+    def __init__(self, path, sink_size=QUEUE_SIZE):
+        super().__init__(daemon=True)
+        self.path = path
+        self.sink = queue.Queue(sink_size)
+        self.rows = 0
+        self.dropped = 0
+        self.error = None
+
+    def run(self):
+        try:
+            history = HistoryStore(self.path)
+        except Exception as e:
+            self.error = e
+            self.discard()
+            return
+        runs = {}      # (裝置, 種類) -> (device_id, run_id)
+        blocks = {}    # 裝置 -> CounterTimeSeries
+        registers = {}  # 裝置 -> [(名稱, 時間, 值)]
+        pending = 0
+        last_flush = time.monotonic()
+
+        def flush():
+            for device, store in blocks.items():
+                run = runs.get((device, 'counter')) or history.start_run(device, 'counter', 'counter_server')
+                runs[(device, 'counter')] = run
+                self.rows += history.ingest_store(store, device, run=run)[1]
+            for device, samples in registers.items():
+                run = runs.get((device, 'register')) or history.start_run(device, 'register', 'counter_server')
+                runs[(device, 'register')] = run
+                self.rows += history.ingest_registers(samples, device, run=run)[1]
+            blocks.clear()
+            registers.clear()
+
+        try:
+            while True:
+                try:
+                    message = self.sink.get(timeout=FLUSH_SECONDS)
+                except queue.Empty:
+                    message = False
+                if message is self.STOP:
+                    break
+                if message:
+                    kind, device, payload = message
+                    if kind == 'counter':
+                        store = blocks.get(device)
+                        if store is None:
+                            store = blocks[device] = CounterTimeSeries()
+                        store.add_block(payload)
+                    else:
+                        now = time.time()
+                        registers.setdefault(device, []).extend(
+                            (name, now, value) for name, value in payload.items())
+                    pending += 1
+                if pending >= FLUSH_MESSAGES or time.monotonic() - last_flush >= FLUSH_SECONDS:
+                    flush()
+                    pending = 0
+                    last_flush = time.monotonic()
+            flush()
+        except Exception as e:
+            self.error = e
+            self.discard()
+        finally:
+            history.close()
+
+    def discard(self):
+        """寫入失敗後繼續取出訊息 (丟棄)，避免伺服器因 sink 已滿而停止"""
+        while self.sink.get() is not self.STOP:
+            self.dropped += 1
+
+    def stop(self):
+        """寫入剩餘的訊息後結束"""
+        self.sink.put(self.STOP)
+        self.join()
+
+    def describe(self):
+        if self.error is not None:
+            return f"寫入失敗: {self.error} (丟棄 {self.dropped})"
+        return f"已寫入 {self.rows} 列"
+
+
+async def serve(args):
+    writer = None
+    if args.history:
+        writer = HistoryWriter(args.history)
+        writer.start()
+    server = IngestServer(sink=writer.sink if writer is not None else None)
+    tcp_port, udp_port = await server.start(args.host, args.tcp, args.udp)
+    print(f"接收中: TCP {tcp_port}, UDP {udp_port}", flush=True)
+    try:
+        while True:
+            await asyncio.sleep(args.report_interval)
+            status = server.stats.describe()
+            if writer is not None:
+                status += f", {writer.describe()}"
+            print(status, flush=True)
+    finally:
+        await server.stop()
+        if writer is not None:
+            # 寫入剩餘的訊息 (在執行緒中等待，不阻塞事件迴圈)
+            await asyncio.get_running_loop().run_in_executor(None, writer.stop)
+            print(writer.describe(), flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="計數器與寄存器轉儲的接收伺服器")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--tcp', type=int, default=9000, help="TCP 埠")
+    parser.add_argument('--udp', type=int, default=None, help="UDP 埠 (預設不接收 UDP)")
+    parser.add_argument('--report-interval', type=float, default=5.0, help="輸出統計的間隔 (秒)")
+    parser.add_argument('--history', help="寫入接收到的區塊與轉儲的歷史資料庫 (預設只輸出統計，不保存)")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
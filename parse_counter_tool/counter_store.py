@@ -0,0 +1,234 @@
+"""
+計數器時間序列存儲
+以介面名稱為鍵，每個 PHY COUNTER 區塊存為一個快照，同一計數器的所有快照值存放在一個緊湊的陣列中
+"""
+
+from array import array
+
+from counter_parser import COUNTER_TYPES, iter_counter_blocks
+from counter_rules import DirectionIndex
+
+# 沒有 PHY[...] 標頭的區塊歸入此介面
+DEFAULT_INTERFACE = 'default'
+
+# 計數器值為無號 64 位元；某快照中沒有出現的計數器在 present 中為 0，值以 0 填充
+VALUE_TYPECODE = 'Q'
+
+
+class InterfaceSeries:
+    """單一介面的所有快照"""
+
+    def __init__(self, name):
+        self.name = name
+        self.block_indexes = array('q')  # 快照對應的區塊在日誌中的順序
+        self.timestamps = array('d')     # 快照時間 (epoch 秒)，沒有時間時為 NaN
+        self.offsets = array('q')        # 區塊標頭在文件中的位元組位置，未知時為 -1
+        self.columns = {}                # (counter_type, counter_name) -> array('Q')
+        self.present = {}                # (counter_type, counter_name) -> bytearray，快照有此計數器時為 1
+        self.direction_index = DirectionIndex()  # 新欄位出現時登記其流程圖方向
+        self.version = 0                 # 每次加入或移除快照時遞增，供圖表與表格判斷衍生資料是否過期
+        # 區塊的計數器 ID -> 欄位 (依 schema 的 ID 直接索引，不需要每個值查一次字典)
+        self.schema = None
+        self.slots = []
+
+    def __len__(self):
+        return len(self.block_indexes)
+
+    def append(self, block):
+        """加入一個解析後的區塊作為新快照"""
+        self.version += 1
+        row = len(self.block_indexes)
+        self.block_indexes.append(block.index)
+        self.timestamps.append(float('nan') if block.timestamp is None else block.timestamp)
+        self.offsets.append(-1 if block.offset is None else block.offset)
+
+        schema = block.schema
+        if schema is not self.schema:
+            self.schema = schema
+            self.slots = []
+        slots = self.slots
+        if len(slots) < len(schema):
+            slots.extend([None] * (len(schema) - len(slots)))
+
+        for cid, value in zip(block.ids, block.values):
+            slot = slots[cid]
+            if slot is None:
+                key = schema.keys[cid]
+                column = self.columns.get(key)
+                if column is None:
+                    column = array(VALUE_TYPECODE, [0]) * row
+                    self.columns[key] = column
+                    self.present[key] = bytearray(row)
+                    self.direction_index.add(*key)
+                slot = slots[cid] = (column, self.present[key])
+            column, mask = slot
+            if len(column) > row:
+                # 同一區塊中重複的名稱以最後一個值為準
+                column[row] = value
+            else:
+                column.append(value)
+                mask.append(1)
+
+        # 本快照沒有出現的計數器補上缺值，保持所有列等長
+        for key, column in self.columns.items():
+            if len(column) == row:
+                column.append(0)
+                self.present[key].append(0)
+
+    def extend_series(self, other, index_offset=0):
+        """把同一介面在日誌後段的快照接在後面，區塊順序加上 index_offset"""
+        self.version += 1
+        rows = len(self)
+        added = len(other)
+        self.block_indexes.extend(index + index_offset for index in other.block_indexes)
+        self.timestamps.extend(other.timestamps)
+        self.offsets.extend(other.offsets)
+
+        for key, column in self.columns.items():
+            other_column = other.columns.get(key)
+            if other_column is not None:
+                column.extend(other_column)
+                self.present[key].extend(other.present[key])
+            else:
+                column.extend(array(VALUE_TYPECODE, [0]) * added)
+                self.present[key].extend(bytes(added))
+        for key, other_column in other.columns.items():
+            if key not in self.columns:
+                self.columns[key] = array(VALUE_TYPECODE, [0]) * rows + other_column
+                self.present[key] = bytearray(rows) + other.present[key]
+                self.direction_index.add(*key)
+
+    def pop(self):
+        """移除最後一個快照，返回其時間 (沒有時為 None)
+
+        只在該快照出現過的計數器欄位一併移除。
+        """
+        self.version += 1
+        self.block_indexes.pop()
+        self.offsets.pop()
+        value = self.timestamps.pop()
+        removed = False
+        for key, column in list(self.columns.items()):
+            column.pop()
+            mask = self.present[key]
+            if mask.pop() and 1 not in mask:
+                del self.columns[key]
+                del self.present[key]
+                removed = True
+        if removed:
+            self.slots = []
+            self.direction_index = DirectionIndex()
+            for key in self.columns:
+                self.direction_index.add(*key)
+        return None if value != value else value
+
+    def snapshot(self, row=-1):
+        """返回指定快照的計數器，格式與 GUI 的 parsed_data 相同"""
+        data = {counter_type: {} for counter_type in COUNTER_TYPES}
+        if not len(self):
+            return data
+        present = self.present
+        for key, column in self.columns.items():
+            if present[key][row]:
+                data[key[0]][key[1]] = column[row]
+        return data
+
+    def series(self, counter_type, counter_name):
+        """返回某計數器在所有快照中的 (值, present)；沒有出現的快照值為 0、present 為 0"""
+        key = (counter_type, counter_name)
+        if key not in self.columns:
+            return array(VALUE_TYPECODE, [0]) * len(self), bytearray(len(self))
+        return self.columns[key], self.present[key]
+
+    def timestamp(self, row=-1):
+        """返回快照時間，沒有時返回 None"""
+        value = self.timestamps[row]
+        return None if value != value else value
+
+
+class CounterTimeSeries:
+    """按介面與快照存放整個日誌的計數器"""
+
+    def __init__(self):
+        self.interfaces = {}  # 介面名稱 -> InterfaceSeries
+        self.unmatched_count = 0
+        self.last_unmatched = 0  # 最後一個區塊中無法解析的行數 (移除最後一個區塊時使用)
+
+    def __len__(self):
+        """快照總數"""
+        return sum(len(series) for series in self.interfaces.values())
+
+    def add_block(self, block):
+        """加入一個區塊，返回所屬的 InterfaceSeries"""
+        name = block.interface or DEFAULT_INTERFACE
+        series = self.interfaces.get(name)
+        if series is None:
+            series = InterfaceSeries(name)
+            self.interfaces[name] = series
+        series.append(block)
+        self.unmatched_count += len(block.unmatched)
+        self.last_unmatched = len(block.unmatched)
+        return series
+
+    def extend(self, blocks):
+        """加入多個區塊，返回加入的數量"""
+        count = 0
+        for block in blocks:
+            self.add_block(block)
+            count += 1
+        return count
+
+    def merge(self, other, index_offset=0):
+        """把日誌後段的解析結果依順序接在後面，區塊順序加上 index_offset"""
+        for name, other_series in other.interfaces.items():
+            series = self.interfaces.get(name)
+            if series is None:
+                series = InterfaceSeries(name)
+                self.interfaces[name] = series
+            series.extend_series(other_series, index_offset)
+        self.unmatched_count += other.unmatched_count
+        if len(other):
+            self.last_unmatched = other.last_unmatched
+
+    def last_block(self):
+        """返回日誌中最後一個區塊所在的 (InterfaceSeries, 列)，沒有快照時返回 (None, None)"""
+        last = None
+        for series in self.interfaces.values():
+            if len(series) and (last is None or series.block_indexes[-1] > last.block_indexes[-1]):
+                last = series
+        return (last, len(last) - 1) if last is not None else (None, None)
+
+    def pop_block(self):
+        """移除日誌中最後一個區塊，返回 (區塊順序, 標頭的位元組位置, 時間)；沒有快照時返回 None
+
+        用於從最後一個區塊的標頭重新解析 (該區塊在文件被追加後可能還有後續的行)。
+        """
+        series, row = self.last_block()
+        if series is None:
+            return None
+        index = series.block_indexes[row]
+        offset = series.offsets[row]
+        timestamp = series.pop()
+        if not len(series):
+            del self.interfaces[series.name]
+        self.unmatched_count -= self.last_unmatched
+        self.last_unmatched = 0
+        return index, offset, timestamp
+
+    def interface_names(self):
+        """按首次出現的順序返回介面名稱"""
+        return list(self.interfaces)
+
+    def snapshot(self, interface, row=-1):
+        """返回某介面指定快照的計數器，介面不存在時返回空數據"""
+        series = self.interfaces.get(interface)
+        if series is None:
+            return {counter_type: {} for counter_type in COUNTER_TYPES}
+        return series.snapshot(row)
+
+
+def build_time_series(source):
+    """一次掃描整個日誌並建立時間序列"""
+    store = CounterTimeSeries()
+    store.extend(iter_counter_blocks(source))
+    return store
@@ -0,0 +1,257 @@
+"""
+虛擬化的計數器表格
+表格的資料列直接來自 CounterTimeSeries (所有介面 × 計數器)，Treeview 只保留可見範圍的列，
+捲動、排序與篩選時只更新這些列的文字；新的快照到達時只追加新出現的計數器並更新有變化的列。
+"""
+
+import tkinter as tk
+from itertools import islice
+from tkinter import ttk
+
+# 排序欄位
+SORT_INTERFACE = 'interface'
+SORT_COUNTER = 'counter'
+SORT_VALUE = 'value'
+
+# Treeview 預設的列高 (像素)，無法從樣式取得時使用
+DEFAULT_ROW_HEIGHT = 20
+
+
+class CounterTableModel:
+    """某一計數器類型在所有介面中的資料列
+
+    每列為 (介面, 計數器名稱)，值在顯示時才從存儲的陣列讀取：
+    current_rows 中有指定的介面顯示該快照，其餘介面顯示最新的快照。
+    """
+
+    def __init__(self, counter_type):
+        self.counter_type = counter_type
+        self.store = None
+        self.keys = []          # [(InterfaceSeries, 計數器名稱, 陣列, present)]
+        self.known = {}         # 介面名稱 -> (InterfaceSeries, 已掃描的欄位數, 最後一個已掃描的欄位)
+        self.current_rows = {}  # 介面名稱 -> 顯示的快照
+        self.interface_filter = ''
+        self.counter_filter = ''
+        self.sort_column = None
+        self.sort_reverse = False
+        self.view = []          # 篩選與排序後的 self.keys 位置
+
+    def __len__(self):
+        return len(self.view)
+
+    def set_store(self, store):
+        """切換到另一個存儲 (重新解析或清除時)"""
+        if store is not self.store:
+            self.store = store
+            self.keys = []
+            self.known = {}
+            self.view = []
+
+    def sync(self):
+        """追加存儲中新出現的介面與計數器，返回第一個新增列在 self.keys 中的位置
+
+        已掃描的介面或欄位被移除時 (重新解析最後一個區塊時 InterfaceSeries.pop 會移除只在該快照出現的欄位)
+        重新建立所有列並返回 0。
+        """
+        if self.store is None:
+            return 0
+        if self.stale():
+            self.keys = []
+            self.known = {}
+        start = len(self.keys)
+        for name, series in self.store.interfaces.items():
+            scanned = self.known[name][1] if name in self.known else 0
+            if scanned == len(series.columns):
+                continue
+            for (counter_type, counter_name), column in islice(series.columns.items(), scanned, None):
+                if counter_type == self.counter_type:
+                    self.keys.append((series, counter_name, column, series.present[(counter_type, counter_name)]))
+            self.known[name] = (series, len(series.columns), column)
+        return start
+
+    def stale(self):
+        """已掃描的介面或欄位是否被移除或替換
+
+        欄位只會從字典中移除或追加在最後，因此已掃描的欄位都還在時，第 scanned 個欄位仍是上次掃描的最後一個。
+        """
+        interfaces = self.store.interfaces
+        for name, (series, scanned, last) in self.known.items():
+            if interfaces.get(name) is not series or len(series.columns) < scanned:
+                return True
+            if next(islice(series.columns.values(), scanned - 1, None)) is not last:
+                return True
+        return False
+
+    def value(self, index):
+        """返回第 index 列目前顯示的值，該快照沒有此計數器時返回 None"""
+        series, counter_name, column, mask = self.keys[index]
+        if not len(column):
+            return None
+        row = self.current_rows.get(series.name, -1)
+        return column[row] if mask[row] else None
+
+    def matches(self, index):
+        series, counter_name = self.keys[index][:2]
+        return (self.interface_filter in series.name.lower()
+                and self.counter_filter in counter_name.lower())
+
+    def set_filter(self, interface_filter='', counter_filter=''):
+        self.interface_filter = interface_filter.strip().lower()
+        self.counter_filter = counter_filter.strip().lower()
+
+    def set_sort(self, column):
+        """依欄位排序，重複選擇同一欄位時反轉順序"""
+        if self.sort_column == column:
+            self.sort_reverse = not self.sort_reverse
+        else:
+            self.sort_column = column
+            self.sort_reverse = False
+
+    def apply(self, start=0):
+        """重新計算 self.view；沒有排序時只處理 start 之後新增的列"""
+        if self.sort_column is None:
+            if start == 0:
+                self.view = []
+            self.view.extend(index for index in range(start, len(self.keys)) if self.matches(index))
+            return
+
+        view = [index for index in range(len(self.keys)) if self.matches(index)]
+        if self.sort_column == SORT_INTERFACE:
+            # 同一介面內保持計數器出現的順序
+            view.sort(key=lambda index: self.keys[index][0].name, reverse=self.sort_reverse)
+        elif self.sort_column == SORT_COUNTER:
+            view.sort(key=lambda index: (self.keys[index][1], self.keys[index][0].name),
+                      reverse=self.sort_reverse)
+        else:
+            def value_key(index):
+                # 缺值排在所有值之前
+                value = self.value(index)
+                return -1 if value is None else value
+            view.sort(key=value_key, reverse=self.sort_reverse)
+        self.view = view
+
+    def row(self, position):
+        """返回篩選排序後第 position 列的 (介面, 計數器名稱, 值)"""
+        index = self.view[position]
+        series, counter_name = self.keys[index][:2]
+        return series.name, counter_name, self.value(index)
+
+
+class VirtualCounterTable:
+    """只建立可見列的 Treeview 表格"""
+
+    def __init__(self, parent, model):
+        self.model = model
+        self.first = 0        # 第一個可見列在 model.view 中的位置
+        self.row_items = []   # Treeview 中固定的列
+        self.row_state = {}   # 列 -> 最後設定的 (文字, 值, 標籤)
+        self.row_height = self.lookup_row_height()
+
+        self.tree = self.create_tree(parent)
+        self.scrollbar = ttk.Scrollbar(parent, orient=tk.VERTICAL, command=self.on_scrollbar)
+
+        self.tree.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        self.scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
+
+        self.tree.bind('<Configure>', self.on_configure)
+        self.tree.bind('<MouseWheel>', self.on_mousewheel)
+        self.tree.bind('<Button-4>', lambda event: self.scroll(-3))
+        self.tree.bind('<Button-5>', lambda event: self.scroll(3))
+
+    def create_tree(self, parent):
+        tree = ttk.Treeview(parent, columns=('Interface', 'Value'), show='tree headings')
+        tree.heading('#0', text='Counter Name', command=lambda: self.sort_by(SORT_COUNTER))
+        tree.heading('Interface', text='Interface', command=lambda: self.sort_by(SORT_INTERFACE))
+        tree.heading('Value', text='Value', command=lambda: self.sort_by(SORT_VALUE))
+        tree.column('#0', width=400)
+        tree.column('Interface', width=150)
+        tree.column('Value', width=150)
+        return tree
+
+    def row_values(self, position):
+        """返回第 position 列的 (文字, 欄位值, 標籤)"""
+        interface, counter_name, value = self.model.row(position)
+        return counter_name, (interface, '' if value is None else value), ()
+
+    def lookup_row_height(self):
+        try:
+            return int(ttk.Style().lookup('Treeview', 'rowheight')) or DEFAULT_ROW_HEIGHT
+        except (tk.TclError, ValueError):
+            return DEFAULT_ROW_HEIGHT
+
+    def on_configure(self, event):
+        # 標題列約佔一列的高度
+        rows = max(event.height // self.row_height - 1, 1)
+        if rows != len(self.row_items):
+            self.resize(rows)
+            self.render()
+
+    def resize(self, rows):
+        """調整 Treeview 中固定列的數量"""
+        while len(self.row_items) < rows:
+            self.row_items.append(self.tree.insert('', 'end', text=''))
+        while len(self.row_items) > rows:
+            item = self.row_items.pop()
+            self.row_state.pop(item, None)
+            self.tree.delete(item)
+        self.tree.configure(height=rows)
+
+    def on_scrollbar(self, action, amount, unit=None):
+        if action == 'moveto':
+            self.first = int(float(amount) * len(self.model))
+            self.render()
+        elif action == 'scroll':
+            step = len(self.row_items) if unit == 'pages' else 1
+            self.scroll(int(amount) * step)
+
+    def on_mousewheel(self, event):
+        self.scroll(-3 if event.delta > 0 else 3)
+        return 'break'
+
+    def scroll(self, rows):
+        self.first += rows
+        self.render()
+
+    def sort_by(self, column):
+        self.model.set_sort(column)
+        self.model.apply()
+        self.render()
+
+    def set_filter(self, interface_filter, counter_filter):
+        self.model.set_filter(interface_filter, counter_filter)
+        self.model.apply()
+        self.first = 0
+        self.render()
+
+    def refresh(self, store, current_rows):
+        """存儲有新快照或顯示的快照改變時呼叫，只更新有變化的可見列"""
+        model = self.model
+        if store is not model.store:
+            model.set_store(store)
+            self.first = 0
+        model.current_rows = current_rows
+        start = model.sync()
+        if model.sort_column is None:
+            model.apply(start)
+        else:
+            model.apply()
+        self.render()
+
+    def render(self):
+        """把可見範圍的列寫入 Treeview，內容沒有改變的列不更新"""
+        total = len(self.model)
+        visible = len(self.row_items)
+        self.first = max(min(self.first, total - visible), 0)
+        for i, item in enumerate(self.row_items):
+            position = self.first + i
+            if position < total:
+                state = self.row_values(position)
+            else:
+                state = ('', (), ())
+            if self.row_state.get(item) != state:
+                self.tree.item(item, text=state[0], values=state[1], tags=state[2])
+                self.row_state[item] = state
+        if total:
+            self.scrollbar.set(self.first / total, min(self.first + visible, total) / total)
+        else:
+            self.scrollbar.set(0, 1)
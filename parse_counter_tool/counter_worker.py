@@ -0,0 +1,177 @@
+"""
+背景解析
+在工作執行緒中解析文本或文件，GUI 以 root.after 定期取出進度與分批的結果，解析期間視窗保持回應，並可隨時取消
+"""
+
+import os
+import queue
+import threading
+import time
+
+from counter_cache import parse_file_cached
+from counter_io import iter_counter_file_mmap
+from counter_parallel import MIN_PARALLEL_BYTES, parse_file_parallel
+from counter_parser import CounterLogParser
+
+# 每批交給 GUI 的區塊數
+BLOCK_BATCH = 256
+
+# 文本每次交給解析器的行數
+LINE_BATCH = 20000
+
+# 兩次進度訊息之間的最短間隔 (秒)
+PROGRESS_INTERVAL = 0.1
+
+
+class ParseCancelled(Exception):
+    """使用者取消了解析"""
+
+
+class ParseProgress:
+    """解析進度 (文本以字元數代替位元組數)"""
+
+    def __init__(self, total_bytes):
+        self.total_bytes = total_bytes
+        self.bytes_done = 0
+        self.lines = 0
+        self.start = time.perf_counter()
+
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+    def lines_per_sec(self):
+        elapsed = self.elapsed()
+        return self.lines / elapsed if elapsed > 0 else 0.0
+
+    def fraction(self):
+        return self.bytes_done / self.total_bytes if self.total_bytes else 1.0
+
+    def describe(self):
+        """狀態列顯示的文字"""
+        return (f"{self.bytes_done / 1e6:.1f}/{self.total_bytes / 1e6:.1f} MB "
+                f"({self.fraction():.0%}), {self.lines} 行, {self.lines_per_sec():,.0f} 行/秒")
+
+
+class ParseWorker(threading.Thread):
+    """在背景執行緒解析計數器日誌
+
+    訊息依序放入 self.messages：
+      ('progress', ParseProgress)  解析進度
+      ('blocks', [CounterBlock])   依序完成的區塊 (每批最多 BLOCK_BATCH 個)
+      ('store', CounterTimeSeries) 大型文件以多進程解析 (或由快取載入) 完成的整個存儲
+      ('done', ParseProgress)      解析完成
+      ('cancelled', None) / ('error', 錯誤訊息)
+    """
+
+    def __init__(self, content=None, file_path=None, encoding='utf-8',
+                 min_parallel_bytes=MIN_PARALLEL_BYTES, profiler=None, cache=None):
+        super().__init__(daemon=True)
+        self.content = content
+        self.file_path = file_path
+        self.encoding = encoding
+        self.min_parallel_bytes = min_parallel_bytes
+        self.messages = queue.Queue()
+        self.cancel_event = threading.Event()
+        self.progress = None
+        self.last_report = 0.0
+        self.profiler = profiler  # StageProfiler，記錄 parse 階段與匹配/未匹配的行數
+        self.cache = cache        # CounterCache，解析文件時使用
+        self.cache_status = None  # 'hit' / 'append' / 'miss'
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def run(self):
+        start = time.perf_counter()
+        try:
+            if self.profiler is None:
+                self.parse()
+            else:
+                self.profiler.run(self.parse)
+                self.profiler.add('parse', time.perf_counter() - start, start)
+            self.messages.put(('done', self.progress))
+        except ParseCancelled:
+            self.messages.put(('cancelled', None))
+        except Exception as e:
+            self.messages.put(('error', str(e)))
+
+    def report(self, bytes_done, lines, force=False):
+        """更新進度，並在取消時中止解析"""
+        if self.cancel_event.is_set():
+            raise ParseCancelled()
+        self.progress.bytes_done = bytes_done
+        self.progress.lines = lines
+        now = time.perf_counter()
+        if force or now - self.last_report >= PROGRESS_INTERVAL:
+            self.last_report = now
+            self.messages.put(('progress', self.progress))
+
+    def parse(self):
+        if self.file_path is not None:
+            self.parse_file()
+        else:
+            self.parse_text()
+
+    def emit_blocks(self, blocks):
+        batch = []
+        for block in blocks:
+            if self.profiler is not None:
+                self.profiler.count('lines_matched', len(block.ids))
+                self.profiler.count('lines_unmatched', len(block.unmatched))
+            batch.append(block)
+            if len(batch) >= BLOCK_BATCH:
+                self.messages.put(('blocks', batch))
+                batch = []
+        if batch:
+            self.messages.put(('blocks', batch))
+
+    def parse_text(self):
+        lines = self.content.splitlines()
+        self.progress = ParseProgress(len(self.content))
+        parser = CounterLogParser()
+
+        def blocks():
+            chars = 0
+            for start in range(0, len(lines), LINE_BATCH):
+                chunk = lines[start:start + LINE_BATCH]
+                chars += sum(len(line) for line in chunk) + len(chunk)
+                self.report(min(chars, self.progress.total_bytes), start + len(chunk))
+                yield from parser.feed(chunk)
+            block = parser.close()
+            if block is not None:
+                yield block
+
+        self.emit_blocks(blocks())
+        self.report(self.progress.total_bytes, len(lines), force=True)
+
+    def parse_file(self):
+        size = os.path.getsize(self.file_path)
+        self.progress = ParseProgress(size)
+        if self.cache is not None or size >= self.min_parallel_bytes:
+            if self.cache is not None:
+                store, self.cache_status = parse_file_cached(
+                    self.file_path, self.cache, encoding=self.encoding,
+                    min_parallel_bytes=self.min_parallel_bytes, progress=self.report)
+            else:
+                store = parse_file_parallel(self.file_path, encoding=self.encoding,
+                                            min_parallel_bytes=self.min_parallel_bytes, progress=self.report)
+            if self.profiler is not None:
+                # 存儲只保留每個快照的值，同一區塊中重複的計數器行只算一次
+                self.profiler.count('lines_matched', sum(mask.count(1)
+                                                   for series in store.interfaces.values()
+                                                   for mask in series.present.values()))
+                self.profiler.count('lines_unmatched', store.unmatched_count)
+            self.messages.put(('store', store))
+        else:
+            self.emit_blocks(iter_counter_file_mmap(self.file_path, self.encoding, progress=self.report))
+        self.report(size, self.progress.lines, force=True)
+
+    def drain(self, limit=None):
+        """取出目前所有 (最多 limit 個) 訊息，不等待"""
+        messages = []
+        while limit is None or len(messages) < limit:
+            try:
+                messages.append(self.messages.get_nowait())
+            except queue.Empty:
+                break
+        return messages
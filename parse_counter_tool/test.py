@@ -1,6 +1,44 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext
-import re
+import os
+import queue
+import time
+
+import counter_rules
+from counter_cache import CounterCache
+from counter_chart import FlowChart
+from counter_diff_panel import DiffPanel
+from counter_follow import CounterLogFollower
+from counter_history_panel import HistoryPanel
+from counter_io import read_preview
+from counter_register_panel import RegisterPanel
+from counter_server import ServerThread
+from counter_store import DEFAULT_INTERFACE, CounterTimeSeries
+from counter_table import CounterTableModel, VirtualCounterTable
+from counter_worker import ParseWorker
+from phy_common.compression import detect_compression
+from phy_common.profiler import StageProfiler
+
+# 狀態列摘要中各階段的顯示順序
+STAGE_ORDER = ('load', 'text_insert', 'parse', 'store', 'validate', 'render', 'table')
+
+# 跟隨模式的輪詢間隔 (毫秒)
+FOLLOW_INTERVAL_MS = 1000
+
+# 超過此大小的文件不載入文本框，改為直接解析
+TEXT_WIDGET_LIMIT = 16 * 1024 * 1024
+
+# 背景解析的輪詢間隔，以及每次在主執行緒處理結果的時間上限 (毫秒)
+PARSE_POLL_MS = 50
+PARSE_BATCH_MS = 30
+
+# 接收伺服器的埠 (UDP 為 None 時不接收) 與輪詢間隔 (毫秒)
+SERVER_TCP_PORT = 9000
+SERVER_UDP_PORT = 9001
+SERVER_POLL_MS = 100
+
+# 解析快取的結果在狀態列的說明
+CACHE_STATUS_TEXT = {'hit': '命中', 'append': '命中，只解析追加的內容', 'miss': '未命中，已保存'}
 
 class NetworkCounterParser:
     def __init__(self, root):
@@ -16,6 +54,49 @@ class NetworkCounterParser:
             'LS': {}
         }
         
+        # 目前快照違反驗證規則的計數器 (每次數據改變時計算一次)
+        self.rule_failures = {}
+        
+        # 目前快照所屬介面的 TX/RX 計數器分類 (解析時建立)
+        self.direction_index = counter_rules.DirectionIndex()
+        
+        # 按介面/快照存放的完整時間序列
+        self.counter_store = CounterTimeSeries()
+        self.selected_interface = tk.StringVar()
+        self.selected_snapshot = tk.IntVar(value=0)
+        self.snapshot_info = tk.StringVar()
+        
+        # 直接解析的文件路徑，文本框只顯示目前快照附近的預覽
+        self.source_path = None
+        
+        # 載入到文本框的文件；文本未被編輯時 parse_data 改為解析該文件，可使用解析快取
+        self.loaded_path = None
+        self.parse_cache = CounterCache()
+        
+        # 背景解析
+        self.parse_worker = None
+        self.parse_job = None
+        self.parse_source = None
+        self.status_var = tk.StringVar(value="就緒")
+        
+        # 分階段計時 (狀態列摘要、JSON trace 匯出、可選的 cProfile)
+        self.profiler = StageProfiler(STAGE_ORDER)
+        self.cprofile_var = tk.BooleanVar(value=False)
+        
+        # 跟隨模式 (tail-follow)
+        self.follower = None
+        self.follow_job = None
+        
+        # 接收伺服器 (裝置以 TCP/UDP 送來的計數器區塊與寄存器轉儲)
+        self.server = None
+        self.server_job = None
+        self.device_registers = {}  # 裝置 -> 最新的寄存器值 (顯示於裝置寄存器視窗)
+        self.register_panel = None
+        
+        # 詳細數據表格的篩選條件
+        self.interface_filter = tk.StringVar()
+        self.counter_filter = tk.StringVar()
+        
         # HOST MAC 輸入框的變數
         self.host_mac_tx = tk.StringVar()
         self.host_mac_rx = tk.StringVar()
@@ -74,7 +155,26 @@ class NetworkCounterParser:
         ttk.Button(button_frame, text="載入文件", command=self.load_file).grid(row=0, column=0, padx=(0, 5))
         ttk.Button(button_frame, text="解析數據", command=self.parse_data).grid(row=0, column=1, padx=(0, 5))
         ttk.Button(button_frame, text="清除數據", command=self.clear_data).grid(row=0, column=2, padx=(0, 5))
-        ttk.Button(button_frame, text="載入範例", command=self.load_example).grid(row=0, column=3)
+        ttk.Button(button_frame, text="載入範例", command=self.load_example).grid(row=0, column=3, padx=(0, 5))
+        self.follow_button = ttk.Button(button_frame, text="跟隨文件", command=self.toggle_follow)
+        self.follow_button.grid(row=0, column=4, padx=(0, 5))
+        ttk.Button(button_frame, text="直接解析文件", command=self.parse_file).grid(row=0, column=5, padx=(0, 5))
+        self.server_button = ttk.Button(button_frame, text="接收伺服器", command=self.toggle_server)
+        self.server_button.grid(row=0, column=6)
+        
+        # 介面與快照選擇
+        ttk.Label(button_frame, text="介面:").grid(row=0, column=7, padx=(20, 5))
+        self.interface_combo = ttk.Combobox(button_frame, textvariable=self.selected_interface,
+                                            state='readonly', width=15)
+        self.interface_combo.grid(row=0, column=8, padx=(0, 5))
+        self.interface_combo.bind('<<ComboboxSelected>>', lambda event: self.on_interface_selected())
+        
+        ttk.Label(button_frame, text="快照:").grid(row=0, column=9, padx=(10, 5))
+        self.snapshot_spin = ttk.Spinbox(button_frame, textvariable=self.selected_snapshot,
+                                         from_=0, to=0, width=8, command=self.show_snapshot)
+        self.snapshot_spin.grid(row=0, column=10, padx=(0, 5))
+        self.snapshot_spin.bind('<Return>', lambda event: self.show_snapshot())
+        ttk.Label(button_frame, textvariable=self.snapshot_info).grid(row=0, column=11, padx=(5, 0))
         
         # 文本輸入區域
         self.text_input = scrolledtext.ScrolledText(input_frame, height=8, width=100)
@@ -90,30 +190,46 @@ class NetworkCounterParser:
         detail_frame = ttk.LabelFrame(main_frame, text="詳細計數器數據", padding="5")
         detail_frame.grid(row=2, column=0, columnspan=2, sticky=(tk.W, tk.E, tk.N, tk.S))
         
+        # 介面與計數器名稱篩選 (套用到所有標籤頁)
+        filter_frame = ttk.Frame(detail_frame)
+        filter_frame.grid(row=0, column=0, sticky=(tk.W, tk.E), pady=(0, 5))
+        ttk.Label(filter_frame, text="篩選介面:").grid(row=0, column=0, padx=(0, 5))
+        ttk.Entry(filter_frame, textvariable=self.interface_filter, width=20).grid(row=0, column=1, padx=(0, 20))
+        ttk.Label(filter_frame, text="篩選計數器:").grid(row=0, column=2, padx=(0, 5))
+        ttk.Entry(filter_frame, textvariable=self.counter_filter, width=30).grid(row=0, column=3)
+        self.interface_filter.trace('w', lambda *args: self.apply_table_filter())
+        self.counter_filter.trace('w', lambda *args: self.apply_table_filter())
+        
         # 創建筆記本控件用於標籤頁
         self.notebook = ttk.Notebook(detail_frame)
-        self.notebook.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        self.notebook.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
         
-        # 為每個計數器類型創建標籤頁
+        # 為每個計數器類型創建標籤頁 (只建立可見的列，點擊標題排序)
         self.counter_frames = {}
         for counter_type in ['SS', 'FCM', 'MAC', 'LS']:
             frame = ttk.Frame(self.notebook)
             self.notebook.add(frame, text=f"{counter_type} Counter")
             
-            # 創建樹狀視圖
-            tree = ttk.Treeview(frame, columns=('Value',), show='tree headings')
-            tree.heading('#0', text='Counter Name')
-            tree.heading('Value', text='Value')
-            tree.column('#0', width=400)
-            tree.column('Value', width=150)
-            
-            scrollbar = ttk.Scrollbar(frame, orient=tk.VERTICAL, command=tree.yview)
-            tree.configure(yscrollcommand=scrollbar.set)
-            
-            tree.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
-            scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
-            
-            self.counter_frames[counter_type] = tree
+            self.counter_frames[counter_type] = VirtualCounterTable(frame, CounterTableModel(counter_type))
+        
+        # 底部狀態列 (解析進度) 與取消按鈕
+        status_frame = ttk.Frame(main_frame)
+        status_frame.grid(row=3, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(5, 0))
+        ttk.Label(status_frame, textvariable=self.status_var,
+                  relief=tk.SUNKEN, anchor=tk.W).grid(row=0, column=0, sticky=(tk.W, tk.E))
+        self.cancel_button = ttk.Button(status_frame, text="取消解析", command=self.cancel_parse,
+                                        state='disabled')
+        self.cancel_button.grid(row=0, column=1, padx=(5, 0))
+        ttk.Checkbutton(status_frame, text="cProfile", variable=self.cprofile_var,
+                        command=self.toggle_cprofile).grid(row=0, column=2, padx=(5, 0))
+        ttk.Button(status_frame, text="匯出效能記錄",
+                   command=self.export_profile).grid(row=0, column=3, padx=(5, 0))
+        ttk.Button(status_frame, text="歷史查詢",
+                   command=self.open_history).grid(row=0, column=4, padx=(5, 0))
+        ttk.Button(status_frame, text="快照比較",
+                   command=self.open_diff).grid(row=0, column=5, padx=(5, 0))
+        ttk.Button(status_frame, text="裝置寄存器",
+                   command=self.open_registers).grid(row=0, column=6, padx=(5, 0))
         
         # 配置權重
         self.root.columnconfigure(0, weight=1)
@@ -121,21 +237,24 @@ class NetworkCounterParser:
         main_frame.columnconfigure(0, weight=1)
         main_frame.rowconfigure(1, weight=2)  # 給流程圖更多空間
         main_frame.rowconfigure(2, weight=1)
+        status_frame.columnconfigure(0, weight=1)
         input_frame.columnconfigure(0, weight=1)
         flow_frame.columnconfigure(0, weight=1)
         flow_frame.rowconfigure(0, weight=1)
         detail_frame.columnconfigure(0, weight=1)
-        detail_frame.rowconfigure(0, weight=1)
+        detail_frame.rowconfigure(1, weight=1)
         
         for counter_type in self.counter_frames:
-            parent = self.counter_frames[counter_type].master
+            parent = self.counter_frames[counter_type].tree.master
             parent.columnconfigure(0, weight=1)
             parent.rowconfigure(0, weight=1)
     
     def create_flow_chart(self, parent):
         # 創建Canvas來繪製流程圖
-        self.canvas = tk.Canvas(parent, height=400, bg='white')
+        self.canvas = tk.Canvas(parent, height=460, bg='white')
         self.canvas.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        self.flow_chart = FlowChart(self.canvas, self.flow_chart_state, profiler=self.profiler,
+                                    get_series=self.sparkline_series)
         
         # HOST MAC 輸入區域
         input_frame = ttk.Frame(parent)
@@ -155,348 +274,77 @@ class NetworkCounterParser:
         self.host_mac_tx.trace('w', lambda *args: self.draw_flow_chart())
         self.host_mac_rx.trace('w', lambda *args: self.draw_flow_chart())
         
-        # 繪製流程圖
-        self.root.after(100, self.draw_flow_chart)  # 延遲繪製以確保canvas已初始化
+        # 繪製流程圖 (Canvas 尚未顯示時會在 <Configure> 後繪製)
+        self.draw_flow_chart()
     
     def get_counter_value(self, counter_type, counter_name):
         """獲取特定計數器的值"""
-        return self.parsed_data.get(counter_type, {}).get(counter_name, 0)
+        return counter_rules.get_counter_value(self.parsed_data, counter_type, counter_name)
     
     def check_tx_validation_rules(self, counter_type, key, value):
         """檢查TX方向的驗證規則，返回是否應該顯示為紅色"""
-        if counter_type == 'SS':
-            if 'Rx Terminal' in key:
-                fcm_value = self.get_counter_value('SS', 'Rx Start')
-                return value != fcm_value
-                
-        elif counter_type == 'FCM':
-            if 'Tx to Line side_S' in key:
-                rx_system_t = self.get_counter_value('FCM', 'Rx from System side_T')
-                return value != rx_system_t
-            elif 'Tx to Line side_T' in key:
-                tx_line_s = self.get_counter_value('FCM', 'Tx to Line side_S')
-                return value != tx_line_s
-            elif 'Rx from System side_S' in key:
-                ss_rx_terminal = self.get_counter_value('SS', 'Rx Terminal')
-                return value != ss_rx_terminal
-            elif 'Rx from System side_T' in key:
-                rx_system_s = self.get_counter_value('FCM', 'Rx from System side_S')
-                return value != rx_system_s
-            elif 'Pause to Line side' in key:
-                return value != 0
-            elif 'Pause from System side' in key:
-                return value != 0
-                
-        elif counter_type == 'ASIX MAC':
-            if 'Tx Error from System side' in key:
-                return value != 0
-                
-        #elif counter_type == 'LS':
-            #if '[Before EF] Tx to Line side_S' in key:
-
-        
-        return False
+        return counter_rules.check_tx_validation_rules(self.parsed_data, counter_type, key, value)
     
     def check_rx_validation_rules(self, counter_type, key, value):
         """檢查RX方向的驗證規則，返回是否應該顯示為紅色"""
-        if counter_type == 'SS':
-            if 'Tx Start' in key:
-                tx_system_t = self.get_counter_value('FCM', 'Tx to System side_T')
-                return value != tx_system_t
-            elif 'Tx Terminal' in key:
-                tx_start = self.get_counter_value('SS', 'Tx Start')
-                return value != tx_start
-                
-        elif counter_type == 'FCM':
-            if 'Rx from Line side_T' in key:
-                rx_line_s = self.get_counter_value('FCM', 'Rx from Line side_S')
-                return value != rx_line_s
-            elif 'Tx to System side_S' in key:
-                rx_line_t = self.get_counter_value('FCM', 'Rx from Line side_T')
-                return value != rx_line_t
-            elif 'Tx to System side_T' in key:
-                tx_system_s = self.get_counter_value('FCM', 'Tx to System side_S')
-                return value != tx_system_s
-            elif 'Pause from Line side' in key:
-                return value != 0
-            elif 'Pause to System side' in key:
-                return value != 0
-                
-        elif counter_type == 'ASIX MAC':
-            if 'Rx Error to System side' in key:
-                return value != 0
-                
-        #elif counter_type == 'LS':
-            #if '[After EF] Rx from Line side_S' in key:
-
-        
-        return False
+        return counter_rules.check_rx_validation_rules(self.parsed_data, counter_type, key, value)
     
     def draw_flow_chart(self):
-        self.canvas.delete("all")
-        
-        # 獲取Canvas實際尺寸
-        self.canvas.update_idletasks()
-        canvas_width = self.canvas.winfo_width()
-        canvas_height = self.canvas.winfo_height()
-        
-        if canvas_width <= 1:  # Canvas還未完全初始化
-            self.root.after(100, self.draw_flow_chart)
-            return
-        
-        # 計算位置
-        box_width = 210
-        box_height = 120
-        host_mac_width = 120
-        host_mac_height = 100  # 增加高度以容納兩行文字
-        
-        # 計算水平間距
-        total_boxes_width = host_mac_width + 4 * box_width
-        spacing = (canvas_width - total_boxes_width) // 6
-        
-        # HOST MAC 位置
-        host_mac_x = spacing
-        host_mac_y_tx = canvas_height // 4 - host_mac_height // 2
-        host_mac_y_rx = 3 * canvas_height // 4 - host_mac_height // 2
-        
-        # 其他盒子的位置
-        positions_tx = []
-        positions_rx = []
-        
-        for i in range(4):
-            x = host_mac_x + host_mac_width + spacing + i * (box_width + spacing)
-            y_tx = canvas_height // 4 - box_height // 2
-            y_rx = 3 * canvas_height // 4 - box_height // 2
-            positions_tx.append((x, y_tx))
-            positions_rx.append((x, y_rx))
-        
-        counter_types = ['SS', 'FCM', 'ASIX MAC', 'LS']
-        colors = ['#FFE5E5', '#E5F3FF', '#E5FFE5', '#FFF5E5']
-        border_colors = ['#FF6B6B', '#4ECDC4', '#45B7D1', '#FFA726']
-        
-        # 繪製 HOST MAC
-        # TX 方向
-        self.canvas.create_rectangle(host_mac_x, host_mac_y_tx, 
-                                   host_mac_x + host_mac_width, host_mac_y_tx + host_mac_height,
-                                   fill='#F0F0F0', outline='#333333', width=3)
-        self.canvas.create_text(host_mac_x + host_mac_width // 2, host_mac_y_tx + 15,
-                              text="HOST MAC", font=('Arial', 10, 'bold'), fill='#333333')
-        self.canvas.create_text(host_mac_x + host_mac_width // 2, host_mac_y_tx + 30,
-                              text="TX", font=('Arial', 9, 'bold'), fill='#333333')
-        
-        # 顯示轉換後的TX值
-        tx_display = self.format_display_value(self.host_mac_tx.get())
-        # 分行顯示
-        tx_lines = tx_display.split('\n')
-        for i, line in enumerate(tx_lines):
-            self.canvas.create_text(host_mac_x + host_mac_width // 2, host_mac_y_tx + 45 + i * 12,
-                                  text=line, font=('Arial', 8), fill='#333333')
-        
-        # RX 方向
-        self.canvas.create_rectangle(host_mac_x, host_mac_y_rx, 
-                                   host_mac_x + host_mac_width, host_mac_y_rx + host_mac_height,
-                                   fill='#F0F0F0', outline='#333333', width=3)
-        self.canvas.create_text(host_mac_x + host_mac_width // 2, host_mac_y_rx + 15,
-                              text="HOST MAC", font=('Arial', 10, 'bold'), fill='#333333')
-        self.canvas.create_text(host_mac_x + host_mac_width // 2, host_mac_y_rx + 30,
-                              text="RX", font=('Arial', 9, 'bold'), fill='#333333')
-        
-        # 顯示轉換後的RX值
-        rx_display = self.format_display_value(self.host_mac_rx.get())
-        # 分行顯示
-        rx_lines = rx_display.split('\n')
-        for i, line in enumerate(rx_lines):
-            self.canvas.create_text(host_mac_x + host_mac_width // 2, host_mac_y_rx + 45 + i * 12,
-                                  text=line, font=('Arial', 8), fill='#333333')
-        
-        # 繪製其他計數器框
-        for i, (counter_type, color, border_color) in enumerate(zip(counter_types, colors, border_colors)):
-            # TX 方向的框
-            x_tx, y_tx = positions_tx[i]
-            self.canvas.create_rectangle(x_tx, y_tx, x_tx + box_width, y_tx + box_height, 
-                                       fill=color, outline=border_color, width=2)
-            
-            # RX 方向的框
-            x_rx, y_rx = positions_rx[i]
-            self.canvas.create_rectangle(x_rx, y_rx, x_rx + box_width, y_rx + box_height, 
-                                       fill=color, outline=border_color, width=2)
-            
-            # 標題
-            self.canvas.create_text(x_tx + box_width // 2, y_tx + 15, 
-                                  text=counter_type, font=('Arial', 10, 'bold'), 
-                                  fill=border_color)
-            self.canvas.create_text(x_rx + box_width // 2, y_rx + 15, 
-                                  text=counter_type, font=('Arial', 10, 'bold'), 
-                                  fill=border_color)
-            
-            # 獲取對應的計數器數據
-            if counter_type == 'ASIX MAC':
-                counter_data = self.parsed_data.get('MAC', {})
-            else:
-                counter_data = self.parsed_data.get(counter_type, {})
-            
-            # TX 數據
-            tx_data = self.get_tx_data(counter_type, counter_data)
-            if tx_data:
-                text_lines = []
-                y_offset = y_tx + box_height // 2 + 5
-                line_height = 12
-                for j, (key, value) in enumerate(list(tx_data.items())[:6]):  # 限制顯示行數
-                    text_color = '#FF0000' if self.check_tx_validation_rules(counter_type, key, value) else '#000000'
-                    line_text = f"{key}: {value}"
-                    
-                    self.canvas.create_text(x_tx + box_width // 2, 
-                                          y_offset - (len(list(tx_data.items())[:6]) - 1) * line_height // 2 + j * line_height,
-                                          text=line_text, font=('Arial', 7), 
-                                          anchor='center', fill=text_color)
-            else:
-                self.canvas.create_text(x_tx + box_width // 2, y_tx + box_height // 2 + 5, 
-                                      text="TX: 無數據", font=('Arial', 8), anchor='center')
-            
-            # RX 數據
-            rx_data = self.get_rx_data(counter_type, counter_data)
-            if rx_data:
-                text_lines = []
-                y_offset = y_rx + box_height // 2 + 5
-                line_height = 12
-                for j, (key, value) in enumerate(list(rx_data.items())[:6]):  # 限制顯示行數
-                    text_color = '#FF0000' if self.check_rx_validation_rules(counter_type, key, value) else '#000000'
-                    line_text = f"{key}: {value}"
-                    
-                    self.canvas.create_text(x_rx + box_width // 2, 
-                                          y_offset - (len(list(rx_data.items())[:6]) - 1) * line_height // 2 + j * line_height,
-                                          text=line_text, font=('Arial', 7), 
-                                          anchor='center', fill=text_color)
-            else:
-                self.canvas.create_text(x_rx + box_width // 2, y_rx + box_height // 2 + 5, 
-                                      text="RX: 無數據", font=('Arial', 8), anchor='center')
-        
-        # 繪製箭頭 - TX 方向 (從左到右)
-        # 從 HOST MAC TX 到第一個計數器
-        self.canvas.create_line(host_mac_x + host_mac_width + 5, host_mac_y_tx + host_mac_height // 2,
-                              positions_tx[0][0] - 5, positions_tx[0][1] + box_height // 2,
-                              arrow=tk.LAST, width=2, fill='#FF4444')
-        
-        # 計數器之間的箭頭
-        for i in range(3):
-            start_x = positions_tx[i][0] + box_width + 5
-            end_x = positions_tx[i + 1][0] - 5
-            y = positions_tx[i][1] + box_height // 2
-            self.canvas.create_line(start_x, y, end_x, y,
-                                  arrow=tk.LAST, width=2, fill='#FF4444')
-        
-        # 繪製箭頭 - RX 方向 (從右到左) - 修改為與TX類似的格式
-        # 從最後一個計數器到倒數第二個計數器
-        for i in range(3, 0, -1):
-            start_x = positions_rx[i][0] - 5
-            end_x = positions_rx[i-1][0] + box_width + 5
-            y = positions_rx[i][1] + box_height // 2
-            self.canvas.create_line(start_x, y, end_x, y,
-                                  arrow=tk.LAST, width=2, fill='#4444FF')
-        
-        # 最後一段箭頭從第一個計數器到HOST MAC RX
-        self.canvas.create_line(positions_rx[0][0] - 5, positions_rx[0][1] + box_height // 2,
-                              host_mac_x + host_mac_width + 5, host_mac_y_rx + host_mac_height // 2,
-                              arrow=tk.LAST, width=2, fill='#4444FF')
-        
-        # 添加方向標籤
-        self.canvas.create_text(canvas_width // 2-30, 20, text="TX 方向 (傳送)", 
-                              font=('Arial', 12, 'bold'), fill='#FF4444')
-        self.canvas.create_text(canvas_width // 2-30, canvas_height - 20, text="RX 方向 (接收)", 
-                              font=('Arial', 12, 'bold'), fill='#4444FF')
+        """請求重繪流程圖 (多次請求合併為每個幀間隔最多一次)"""
+        self.flow_chart.schedule()
+    
+    def flow_chart_state(self):
+        """流程圖重繪時讀取的目前狀態"""
+        return (self.parsed_data, self.direction_index, self.rule_failures,
+                self.format_display_value(self.host_mac_tx.get()),
+                self.format_display_value(self.host_mac_rx.get()))
+    
+    def sparkline_series(self):
+        """趨勢圖顯示的介面與目前的快照"""
+        series = self.counter_store.interfaces.get(self.selected_interface.get())
+        if not series:
+            return None, None
+        try:
+            row = int(self.selected_snapshot.get())
+        except (tk.TclError, ValueError):
+            row = None
+        return series, row
     
     def get_tx_data(self, counter_type, counter_data):
         """提取TX相關的計數器數據"""
-        tx_data = {}
-        
-        if counter_type == 'SS':
-            # SS Counter TX: Rx Start, Rx Terminal
-            for key, value in counter_data.items():
-                if 'Rx Start' in key or 'Rx Terminal' in key:
-                    tx_data[key] = value
-                    
-        elif counter_type == 'FCM':
-            # FCM Counter TX: 除了RX方向的計數器以外的所有計數器
-            rx_keys = {
-                'Tx to System side_S', 'Tx to System side_T', 
-                'Pause to System side', 'Pause from Line side',
-                'Rx from Line side_S', 'Rx from Line side_T'
-            }
-            for key, value in counter_data.items():
-                if not any(rx_key in key for rx_key in rx_keys):
-                    tx_data[key] = value
-                    
-        elif counter_type == 'ASIX MAC':
-            # MAC Counter TX: Tx Error from System side, Tx from System side
-            for key, value in counter_data.items():
-                if ('Tx Error from System side' in key or 
-                    'Tx from System side' in key):
-                    tx_data[key] = value
-                    
-        elif counter_type == 'LS':
-            # LS Counter TX: 除了RX方向的計數器以外的所有計數器
-            rx_keys = {
-                'Rx_DEC', 'Rx from Line side_S', 'Rx from Line side_T'
-            }
-            for key, value in counter_data.items():
-                if not any(rx_key in key for rx_key in rx_keys):
-                    tx_data[key] = value
-        
-        return tx_data
+        return counter_rules.get_tx_data(counter_type, counter_data)
     
     def get_rx_data(self, counter_type, counter_data):
         """提取RX相關的計數器數據"""
-        rx_data = {}
-        
-        if counter_type == 'SS':
-            # SS Counter RX: Tx Start, Tx Terminal
-            for key, value in counter_data.items():
-                if 'Tx Start' in key or 'Tx Terminal' in key:
-                    rx_data[key] = value
-                    
-        elif counter_type == 'FCM':
-            # FCM Counter RX: Tx to System side_S/T, Pause to System side, Pause from Line side,
-            # Rx from Line side_S/T
-            rx_keys = {
-                'Tx to System side_S', 'Tx to System side_T', 
-                'Pause to System side', 'Pause from Line side',
-                'Rx from Line side_S', 'Rx from Line side_T'
-            }
-            for key, value in counter_data.items():
-                if any(rx_key in key for rx_key in rx_keys):
-                    rx_data[key] = value
-                    
-        elif counter_type == 'ASIX MAC':
-            # MAC Counter RX: Rx Error to System side, Rx to System side
-            for key, value in counter_data.items():
-                if ('Rx Error to System side' in key or 
-                    'Rx to System side' in key):
-                    rx_data[key] = value
-                    
-        elif counter_type == 'LS':
-            # LS Counter RX: Before EF_Rx_DEC, Before EF_Rx from Line side_S/T,
-            # After EF_Rx from Line side_S/T
-            rx_keys = {
-                'Rx_DEC', 'Rx from Line side_S', 'Rx from Line side_T'
-            }
-            for key, value in counter_data.items():
-                if any(rx_key in key for rx_key in rx_keys):
-                    rx_data[key] = value
-        
-        return rx_data
+        return counter_rules.get_rx_data(counter_type, counter_data)
     
     def load_file(self):
         file_path = filedialog.askopenfilename(
             title="選擇日誌文件",
-            filetypes=[("Text files", "*.txt"), ("Log files", "*.log"), ("All files", "*.*")]
+            filetypes=[("Text files", "*.txt"), ("Log files", "*.log"), ("Compressed logs", "*.gz *.bz2 *.xz"), ("All files", "*.*")]
         )
         
         if file_path:
             try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                self.text_input.delete(1.0, tk.END)
-                self.text_input.insert(1.0, content)
+                if detect_compression(file_path):
+                    # 壓縮的日誌邊解壓邊解析，不載入文本框
+                    self.parse_file(file_path)
+                    return
+                if os.path.getsize(file_path) > TEXT_WIDGET_LIMIT:
+                    if messagebox.askyesno("文件較大", "文件過大，載入文本框會很慢。\n是否直接解析文件？"):
+                        self.parse_file(file_path)
+                        return
+                self.profiler.reset()
+                with self.profiler.stage('load'):
+                    with open(file_path, 'r', encoding='utf-8') as f:
+                        content = f.read()
+                self.source_path = None
+                with self.profiler.stage('text_insert'):
+                    self.text_input.delete(1.0, tk.END)
+                    self.text_input.insert(1.0, content)
+                self.loaded_path = file_path
+                self.text_input.edit_modified(False)
+                self.show_profile("文件載入成功")
                 messagebox.showinfo("成功", "文件載入成功！")
             except Exception as e:
                 messagebox.showerror("錯誤", f"載入文件失敗：{str(e)}")
@@ -540,6 +388,8 @@ class NetworkCounterParser:
 | Rx from Line side_S        :000667583 |
 | Rx from Line side_T        :000667583 |"""
         
+        self.source_path = None
+        self.loaded_path = None
         self.text_input.delete(1.0, tk.END)
         self.text_input.insert(1.0, example_data)
         messagebox.showinfo("成功", "範例數據已載入！")
@@ -550,112 +400,393 @@ class NetworkCounterParser:
             messagebox.showwarning("警告", "請先輸入或載入日誌數據！")
             return
         
+        if self.loaded_path and not self.text_input.edit_modified():
+            # 文本與載入的文件相同: 從文件解析，未變更的文件直接由快取載入
+            self.start_parse(ParseWorker(file_path=self.loaded_path, cache=self.parse_cache), None)
+            return
+        self.start_parse(ParseWorker(content=content), None)
+    
+    def parse_file(self, file_path=None):
+        """以 memory map 直接解析文件 (大型文件使用多進程)，不載入到文本框"""
+        if not file_path:
+            file_path = filedialog.askopenfilename(
+                title="選擇日誌文件",
+                filetypes=[("Text files", "*.txt"), ("Log files", "*.log"), ("Compressed logs", "*.gz *.bz2 *.xz"), ("All files", "*.*")]
+            )
+            if not file_path:
+                return
+        
+        self.loaded_path = None
+        self.start_parse(ParseWorker(file_path=file_path, cache=self.parse_cache), file_path)
+    
+    def start_parse(self, worker, source_path):
+        """在背景執行緒解析，結果由 poll_parse 分批取回"""
+        self.stop_follow()
+        self.stop_server()
+        self.cancel_parse()
+        self.parsed_data = {
+            'SS': {},
+            'FCM': {},
+            'MAC': {},
+            'LS': {}
+        }
+        self.counter_store = CounterTimeSeries()
+        self.parse_worker = worker
+        self.parse_source = source_path
+        self.profiler.reset()
+        self.profiler.cprofile_enabled = self.cprofile_var.get()
+        worker.profiler = self.profiler
+        self.cancel_button.configure(state='normal')
+        self.status_var.set("解析中...")
+        worker.start()
+        self.parse_job = self.root.after(PARSE_POLL_MS, self.poll_parse)
+    
+    def cancel_parse(self):
+        """取消進行中的背景解析"""
+        if self.parse_worker is None:
+            return
+        self.parse_worker.cancel()
+        self.parse_worker = None
+        if self.parse_job is not None:
+            self.root.after_cancel(self.parse_job)
+            self.parse_job = None
+        self.cancel_button.configure(state='disabled')
+        self.counter_store = CounterTimeSeries()
+        self.status_var.set("解析已取消")
+    
+    def poll_parse(self):
+        """取出背景解析的訊息，每次最多處理 PARSE_BATCH_MS 毫秒以保持視窗回應"""
+        self.parse_job = None
+        worker = self.parse_worker
+        if worker is None:
+            return
+        
+        deadline = time.perf_counter() + PARSE_BATCH_MS / 1000
+        while time.perf_counter() < deadline:
+            messages = worker.drain(limit=16)
+            if not messages:
+                break
+            for kind, payload in messages:
+                if kind == 'blocks':
+                    with self.profiler.stage('store'):
+                        for block in payload:
+                            self.counter_store.add_block(block)
+                elif kind == 'store':
+                    self.counter_store = payload
+                elif kind == 'progress':
+                    self.status_var.set(f"解析中... {payload.describe()}")
+                elif kind == 'done':
+                    self.finish_parse(payload)
+                    return
+                elif kind == 'error':
+                    self.parse_worker = None
+                    self.cancel_button.configure(state='disabled')
+                    self.counter_store = CounterTimeSeries()
+                    self.status_var.set("解析失敗")
+                    messagebox.showerror("錯誤", f"解析數據失敗：{payload}")
+                    return
+                elif kind == 'cancelled':
+                    return
+        
+        self.parse_job = self.root.after(PARSE_POLL_MS, self.poll_parse)
+    
+    def finish_parse(self, progress):
+        cache_status = self.parse_worker.cache_status
+        self.parse_worker = None
+        self.cancel_button.configure(state='disabled')
+        self.source_path = self.parse_source
+        self.status_var.set(f"解析完成: {len(self.counter_store)} 個快照, {progress.lines} 行, "
+                            f"{progress.elapsed():.2f} s ({progress.lines_per_sec():,.0f} 行/秒)")
+        self.show_parse_result()
+        if cache_status is None:
+            self.show_profile("解析完成")
+        else:
+            self.show_profile(f"解析完成 (快取{CACHE_STATUS_TEXT[cache_status]})")
+    
+    def show_profile(self, title):
+        """在狀態列顯示各階段的耗時與匹配/未匹配行數，以及流程圖的重繪統計"""
+        chart = self.flow_chart.stats()
+        parts = [self.profiler.summary(),
+                 f"流程圖 {chart['redraws']}/{chart['requests']} 次重繪, 平均 {chart['mean_ms']}ms, "
+                 f"最長 {chart['max_ms']}ms, 超過預算 {chart['over_budget']}"]
+        self.status_var.set(f"{title}: " + " | ".join(part for part in parts if part))
+    
+    def toggle_cprofile(self):
+        self.profiler.cprofile_enabled = self.cprofile_var.get()
+    
+    def export_profile(self):
+        """把各階段的計時匯出為 JSON trace (可用 chrome://tracing 或 Perfetto 開啟)"""
+        file_path = filedialog.asksaveasfilename(
+            title="匯出效能記錄",
+            defaultextension=".json",
+            filetypes=[("JSON trace", "*.json"), ("All files", "*.*")]
+        )
+        if not file_path:
+            return
         try:
-            self.parsed_data = {
-                'SS': {},
-                'FCM': {},
-                'MAC': {},
-                'LS': {}
-            }
-            
-            lines = content.split('\n')
-            current_counter_type = None
-            current_section = None  # 用於LS counter的Before EF/After EF
-            
-            for line in lines:
-                line = line.strip()
-                if not line or line.startswith('='):
-                    continue
-                
-                # 檢測計數器類型 - 更寬鬆的匹配
-                if 'SS Counter' in line:
-                    current_counter_type = 'SS'
-                    current_section = None
-                    continue
-                elif 'FCM counter' in line:
-                    current_counter_type = 'FCM'
-                    current_section = None
-                    continue
-                elif 'MAC Counter' in line:
-                    current_counter_type = 'MAC'
-                    current_section = None
-                    continue
-                elif 'LS counter' in line:
-                    current_counter_type = 'LS'
-                    current_section = None
-                    continue
-                elif current_counter_type == 'LS' and 'Before EF' in line:
-                    current_section = 'Before EF'
-                    continue
-                elif current_counter_type == 'LS' and 'After EF' in line:
-                    current_section = 'After EF'
-                    continue
-                
-                # 解析計數器數據 - 更靈活的模式匹配
-                if current_counter_type and ':' in line:
-                    # 嘗試多種匹配模式
-                    patterns = [
-                        r'\|\s*([^:]+?)\s*:\s*(\d+)\s*\|',  # 原始模式: | name :value |
-                        r'\|\s*([^:]+?)\s*:\s*(\d+)',       # 簡化模式: | name :value
-                        r'([^:]+?)\s*:\s*(\d+)',            # 最簡模式: name :value
-                    ]
-                    
-                    matched = False
-                    for pattern in patterns:
-                        match = re.search(pattern, line)
-                        if match:
-                            counter_name = match.group(1).strip()
-                            # 移除可能的前導豎線
-                            counter_name = counter_name.lstrip('|').strip()
-                            value = int(match.group(2))
-                            
-                            # 跳過空的計數器名稱或只包含特殊字符的名稱
-                            if not counter_name or counter_name in ['<<', '>>', '|']:
-                                break
-                            
-                            # 對於LS counter，如果有section，加上前綴
-                            if current_counter_type == 'LS' and current_section:
-                                counter_name = f"[{current_section}] {counter_name}"
-                            
-                            self.parsed_data[current_counter_type][counter_name] = value
-                            matched = True
-                            break
-                    
-                    # 如果沒有匹配到，輸出調試信息
-                    if not matched and current_counter_type:
-                        print(f"未匹配的行 ({current_counter_type}): {line}")
-            
-            self.update_display()
-            
-            # 顯示解析結果統計
-            total_counters = sum(len(data) for data in self.parsed_data.values())
-            messagebox.showinfo("解析完成", 
-                              f"數據解析完成！\n"
-                              f"SS Counter: {len(self.parsed_data['SS'])} 項\n"
-                              f"FCM Counter: {len(self.parsed_data['FCM'])} 項\n"
-                              f"MAC Counter: {len(self.parsed_data['MAC'])} 項\n"
-                              f"LS Counter: {len(self.parsed_data['LS'])} 項\n"
-                              f"總計: {total_counters} 項")
-            
+            written = self.profiler.export_trace(file_path, {'flow_chart': self.flow_chart.stats()})
+            messagebox.showinfo("成功", "效能記錄已匯出：\n" + "\n".join(written))
         except Exception as e:
-            messagebox.showerror("錯誤", f"解析數據失敗：{str(e)}")
+            messagebox.showerror("錯誤", f"匯出效能記錄失敗：{str(e)}")
+    
+    def open_history(self):
+        """開啟歷史查詢視窗，可把目前的解析結果存入歷史資料庫"""
+        HistoryPanel(self.root, lambda: (self.counter_store, self.source_path or self.loaded_path))
+    
+    def open_diff(self):
+        """開啟快照比較視窗 (目前的解析結果或其他日誌的兩個快照)"""
+        DiffPanel(self.root, lambda: self.counter_store)
+    
+    def open_registers(self):
+        """開啟 (或切換到) 裝置寄存器視窗，顯示接收伺服器收到的寄存器轉儲"""
+        if self.register_panel is not None and self.register_panel.is_open():
+            self.register_panel.window.lift()
+            return
+        self.register_panel = RegisterPanel(self.root, lambda: self.device_registers)
+    
+    def refresh_registers(self):
+        """寄存器改變時更新已開啟的裝置寄存器視窗"""
+        if self.register_panel is not None and self.register_panel.is_open():
+            self.register_panel.refresh()
+    
+    def show_parse_result(self):
+        """解析完成後更新介面選單並顯示統計"""
+        # 預設顯示第一個介面的最後一個快照
+        interfaces = self.counter_store.interface_names()
+        self.interface_combo['values'] = interfaces
+        self.selected_interface.set(interfaces[0] if interfaces else "")
+        self.on_interface_selected()
+        
+        # 顯示解析結果統計
+        total_counters = sum(len(data) for data in self.parsed_data.values())
+        messagebox.showinfo("解析完成", 
+                          f"數據解析完成！\n"
+                          f"介面: {len(interfaces)} 個，快照: {len(self.counter_store)} 個\n"
+                          f"SS Counter: {len(self.parsed_data['SS'])} 項\n"
+                          f"FCM Counter: {len(self.parsed_data['FCM'])} 項\n"
+                          f"MAC Counter: {len(self.parsed_data['MAC'])} 項\n"
+                          f"LS Counter: {len(self.parsed_data['LS'])} 項\n"
+                          f"總計: {total_counters} 項")
+    
+    def on_interface_selected(self):
+        """切換介面時跳到該介面的最後一個快照"""
+        series = self.counter_store.interfaces.get(self.selected_interface.get())
+        last_row = max(len(series) - 1, 0) if series else 0
+        self.snapshot_spin.configure(to=last_row)
+        self.selected_snapshot.set(last_row)
+        self.show_snapshot()
+    
+    def show_snapshot(self):
+        """顯示目前選擇的介面與快照"""
+        series = self.counter_store.interfaces.get(self.selected_interface.get())
+        if not series:
+            self.parsed_data = self.counter_store.snapshot(None)
+            self.direction_index = counter_rules.DirectionIndex()
+            self.snapshot_info.set("")
+            self.update_display()
+            return
+        
+        try:
+            row = int(self.selected_snapshot.get())
+        except (tk.TclError, ValueError):
+            row = len(series) - 1
+        row = min(max(row, 0), len(series) - 1)
+        self.selected_snapshot.set(row)
+        
+        self.parsed_data = series.snapshot(row)
+        self.direction_index = series.direction_index
+        timestamp = series.timestamp(row)
+        info = f"{row + 1}/{len(series)} (區塊 #{series.block_indexes[row]})"
+        if timestamp is not None:
+            info += " " + time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(timestamp))
+        self.snapshot_info.set(info)
+        self.update_preview(series, row)
+        self.update_display()
+    
+    def update_preview(self, series, row):
+        """直接解析文件時，在文本框顯示該快照附近的原始文字"""
+        if not self.source_path or series.offsets[row] < 0:
+            return
+        try:
+            preview, line = read_preview(self.source_path, series.offsets[row])
+        except OSError:
+            return
+        self.text_input.delete(1.0, tk.END)
+        self.text_input.insert(1.0, preview)
+        self.text_input.tag_remove('snapshot', 1.0, tk.END)
+        self.text_input.tag_add('snapshot', f"{line}.0", f"{line}.end")
+        self.text_input.tag_configure('snapshot', background='#FFF5CC')
+        self.text_input.see(f"{line}.0")
+    
+    def toggle_follow(self):
+        """開始或停止跟隨持續寫入的日誌文件"""
+        if self.follower is not None:
+            self.stop_follow()
+            return
+        
+        file_path = filedialog.askopenfilename(
+            title="選擇要跟隨的日誌文件",
+            filetypes=[("Text files", "*.txt"), ("Log files", "*.log"), ("All files", "*.*")]
+        )
+        if not file_path:
+            return
+        if detect_compression(file_path):
+            messagebox.showerror("錯誤", "壓縮的日誌無法跟隨，請使用「直接解析文件」")
+            return
+        
+        self.cancel_parse()
+        self.stop_server()
+        self.counter_store = CounterTimeSeries()
+        self.interface_combo['values'] = ()
+        self.selected_interface.set("")
+        self.follower = CounterLogFollower(file_path)
+        self.follow_button.configure(text="停止跟隨")
+        self.poll_follow()
+    
+    def stop_follow(self):
+        """停止跟隨模式"""
+        if self.follow_job is not None:
+            self.root.after_cancel(self.follow_job)
+            self.follow_job = None
+        if self.follower is not None:
+            self.follower.close()
+            self.follower = None
+        self.follow_button.configure(text="跟隨文件")
+    
+    def poll_follow(self):
+        """讀取日誌新增的部分，只在顯示中的快照改變時更新畫面"""
+        self.follow_job = None
+        try:
+            blocks = self.follower.poll()
+        except OSError as e:
+            self.stop_follow()
+            messagebox.showerror("錯誤", f"跟隨文件失敗：{str(e)}")
+            return
+        
+        if blocks:
+            self.add_live_blocks(blocks)
+        
+        # 還有未讀完的內容時立即繼續，否則等待下一次輪詢
+        delay = 1 if self.follower.pending_bytes else FOLLOW_INTERVAL_MS
+        self.follow_job = self.root.after(delay, self.poll_follow)
+    
+    def add_live_blocks(self, blocks):
+        """加入跟隨/接收到的新區塊，只在顯示中的快照改變時更新畫面"""
+        selected = self.selected_interface.get()
+        series = self.counter_store.interfaces.get(selected)
+        try:
+            at_latest = series is None or self.selected_snapshot.get() >= len(series) - 1
+        except tk.TclError:
+            at_latest = True
+        
+        known = len(self.counter_store.interfaces)
+        updated = set()
+        for block in blocks:
+            updated.add(self.counter_store.add_block(block).name)
+        
+        if len(self.counter_store.interfaces) != known:
+            self.interface_combo['values'] = self.counter_store.interface_names()
+        if not selected:
+            self.selected_interface.set(self.counter_store.interface_names()[0])
+            self.on_interface_selected()
+        elif selected in updated:
+            series = self.counter_store.interfaces[selected]
+            self.snapshot_spin.configure(to=len(series) - 1)
+            if at_latest:
+                self.selected_snapshot.set(len(series) - 1)
+                self.show_snapshot()
+    
+    def toggle_server(self):
+        """開始或停止接收裝置以 TCP/UDP 送來的計數器區塊 (介面名稱前加上裝置名稱)"""
+        if self.server is not None:
+            self.stop_server()
+            return
+        
+        self.stop_follow()
+        self.cancel_parse()
+        server = ServerThread(tcp_port=SERVER_TCP_PORT, udp_port=SERVER_UDP_PORT)
+        server.start()
+        server.ready.wait(timeout=5.0)
+        if server.error is not None or server.ports is None:
+            messagebox.showerror("錯誤", f"無法啟動接收伺服器：{server.error}")
+            return
+        self.counter_store = CounterTimeSeries()
+        self.interface_combo['values'] = ()
+        self.selected_interface.set("")
+        self.server = server
+        self.server_button.configure(text="停止接收")
+        self.status_var.set(f"接收中: TCP {server.ports[0]}, UDP {server.ports[1]}")
+        self.server_job = self.root.after(SERVER_POLL_MS, self.poll_server)
+    
+    def stop_server(self):
+        if self.server_job is not None:
+            self.root.after_cancel(self.server_job)
+            self.server_job = None
+        if self.server is not None:
+            self.server.stop()
+            self.server = None
+        self.server_button.configure(text="接收伺服器")
+    
+    def poll_server(self):
+        """取出接收到的訊息，每次最多處理 PARSE_BATCH_MS 毫秒；處理不及時伺服器會暫停讀取各連線"""
+        self.server_job = None
+        server = self.server
+        blocks = []
+        dumps = 0
+        deadline = time.perf_counter() + PARSE_BATCH_MS / 1000
+        while time.perf_counter() < deadline:
+            try:
+                kind, device, payload = server.sink.get_nowait()
+            except queue.Empty:
+                break
+            if kind == 'counter':
+                payload.interface = f"{device}/{payload.interface or DEFAULT_INTERFACE}"
+                blocks.append(payload)
+            else:
+                self.device_registers.setdefault(device, {}).update(payload)
+                dumps += 1
+        if blocks:
+            self.add_live_blocks(blocks)
+        if dumps:
+            self.refresh_registers()
+        self.status_var.set(f"接收中: {server.server.stats.describe()}")
+        delay = 1 if not server.sink.empty() else SERVER_POLL_MS
+        self.server_job = self.root.after(delay, self.poll_server)
     
     def update_display(self):
+        # 驗證規則只在數據改變時求值一次，重繪流程圖時直接使用結果
+        with self.profiler.stage('validate'):
+            self.rule_failures = self.profiler.run(counter_rules.DEFAULT_RULES.evaluate, self.parsed_data)
+        
         # 更新流程圖
         self.draw_flow_chart()
         
-        # 更新詳細數據表格
-        for counter_type, tree in self.counter_frames.items():
-            # 清除現有數據
-            for item in tree.get_children():
-                tree.delete(item)
-            
-            # 添加新數據
-            counter_data = self.parsed_data.get(counter_type, {})
-            for counter_name, value in counter_data.items():
-                tree.insert('', 'end', text=counter_name, values=(value,))
+        # 更新詳細數據表格 (所有介面；選擇的介面顯示目前快照，其餘介面顯示最新快照)
+        current_rows = {}
+        if self.selected_interface.get() in self.counter_store.interfaces:
+            try:
+                current_rows[self.selected_interface.get()] = self.selected_snapshot.get()
+            except tk.TclError:
+                # 快照欄位正在編輯 (空白或非數字) 時顯示最新的快照
+                pass
+        with self.profiler.stage('table'):
+            for table in self.counter_frames.values():
+                self.profiler.run(table.refresh, self.counter_store, current_rows)
+    
+    def apply_table_filter(self):
+        """依介面/計數器名稱篩選詳細數據表格"""
+        for table in self.counter_frames.values():
+            table.set_filter(self.interface_filter.get(), self.counter_filter.get())
     
     def clear_data(self):
+        self.stop_follow()
+        self.stop_server()
+        self.device_registers = {}
+        self.refresh_registers()
+        self.cancel_parse()
+        self.status_var.set("已清除")
+        self.source_path = None
+        self.loaded_path = None
         self.text_input.delete(1.0, tk.END)
         self.parsed_data = {
             'SS': {},
@@ -663,6 +794,12 @@ class NetworkCounterParser:
             'MAC': {},
             'LS': {}
         }
+        self.counter_store = CounterTimeSeries()
+        self.direction_index = counter_rules.DirectionIndex()
+        self.interface_combo['values'] = ()
+        self.selected_interface.set("")
+        self.selected_snapshot.set(0)
+        self.snapshot_info.set("")
         self.host_mac_tx.set("")
         self.host_mac_rx.set("")
         self.update_display()
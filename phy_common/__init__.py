@@ -0,0 +1,11 @@
+"""
+計數器解析器 (parse_counter_tool) 與寄存器解析器 (reg_parse) 共用的模組 (不依賴 tkinter)
+
+兩個工具都以 phy_common.<模組> 匯入；在儲存庫根目錄執行 pip install -e . 後即可直接執行兩個工具的腳本。
+  batch_files  批次命令列的目錄/萬用字元展開與預設的文件名稱
+  compression  壓縮格式的 magic bytes 表與串流解壓
+  file_cache   解析結果快取的文件指紋與最近使用時間的淘汰
+  profiler     GUI 的分階段計時與 JSON trace 匯出
+  reg_dump     寄存器轉儲的讀取、逐行解析與多張板子的切分
+  reg_schema   寄存器位元欄位的定義與解碼
+"""
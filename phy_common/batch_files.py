@@ -0,0 +1,39 @@
+"""
+批次命令列 (counter_cli 與 reg_batch) 的輸入展開: 目錄遞迴掃描與萬用字元
+"""
+
+import fnmatch
+import glob
+import os
+
+# 掃描目錄時預設包含的文件 (與 GUI 的文件對話框一致，包含壓縮的文件)
+DEFAULT_PATTERNS = tuple(pattern + suffix for pattern in ('*.txt', '*.log')
+                         for suffix in ('', '.gz', '.bz2', '.xz'))
+
+# 命令列 --pattern 的說明
+PATTERN_HELP = "掃描目錄時包含的文件名稱 (可重複，預設 *.txt 與 *.log 及其 .gz/.bz2/.xz 壓縮檔)"
+
+
+def collect_files(inputs, patterns=DEFAULT_PATTERNS):
+    """展開目錄 (遞迴) 與萬用字元，返回去除重複後的文件列表"""
+    files = []
+    seen = set()
+
+    def add(path):
+        key = os.path.abspath(path)
+        if key not in seen:
+            seen.add(key)
+            files.append(path)
+
+    for item in inputs:
+        paths = glob.glob(item, recursive=True) if glob.has_magic(item) else [item]
+        for path in sorted(paths):
+            if os.path.isdir(path):
+                for root, dirs, names in os.walk(path):
+                    dirs.sort()
+                    for name in sorted(names):
+                        if any(fnmatch.fnmatch(name, pattern) for pattern in patterns):
+                            add(os.path.join(root, name))
+            elif os.path.isfile(path):
+                add(path)
+    return files
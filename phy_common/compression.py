@@ -0,0 +1,35 @@
+"""
+壓縮日誌與轉儲的辨識與串流解壓 (不依賴 tkinter)
+.gz/.bz2/.xz 依文件開頭的 magic bytes 辨識 (不依副檔名)，兩個工具共用同一張格式表
+"""
+
+import bz2
+import gzip
+import lzma
+
+# 壓縮格式: (magic bytes, 格式名稱, 以原始文件物件建立解壓串流的函式)
+COMPRESSION_FORMATS = (
+    (b'\x1f\x8b', 'gzip', lambda raw: gzip.GzipFile(fileobj=raw, mode='rb')),
+    (b'BZh', 'bz2', lambda raw: bz2.BZ2File(raw, mode='rb')),
+    (b'\xfd7zXZ\x00', 'xz', lambda raw: lzma.LZMAFile(raw, mode='rb')),
+)
+
+# 格式名稱 -> 解壓函式
+DECOMPRESSORS = {codec: decompressor for _, codec, decompressor in COMPRESSION_FORMATS}
+
+# 辨識格式需要的開頭位元組數
+MAGIC_LENGTH = max(len(magic) for magic, _, _ in COMPRESSION_FORMATS)
+
+
+def compression_of(head):
+    """依開頭的位元組返回壓縮格式名稱，未壓縮時返回 None"""
+    for magic, codec, _ in COMPRESSION_FORMATS:
+        if head.startswith(magic):
+            return codec
+    return None
+
+
+def detect_compression(file_path):
+    """依文件開頭的 magic bytes 返回壓縮格式名稱，未壓縮時返回 None"""
+    with open(file_path, 'rb') as f:
+        return compression_of(f.read(MAGIC_LENGTH))
@@ -0,0 +1,107 @@
+"""
+解析結果快取的共用部分: 文件指紋與以最近使用時間淘汰項目的快取目錄
+以 路徑 + 大小 + 修改時間 + 開頭/結尾內容的雜湊 辨識文件；最近使用時間以快取文件的修改時間表示
+"""
+
+import hashlib
+import os
+
+# 計算雜湊的開頭/結尾長度 (位元組)
+FINGERPRINT_BYTES = 64 * 1024
+
+
+def hash_range(f, start, length):
+    """返回文件 [start, start + length) 的 sha1"""
+    f.seek(start)
+    return hashlib.sha1(f.read(length)).hexdigest()
+
+
+def fingerprint(file_path):
+    """返回文件的指紋: 大小、修改時間、開頭與結尾 FINGERPRINT_BYTES 的雜湊，以及最後一個換行之後的位置"""
+    with open(file_path, 'rb') as f:
+        st = os.fstat(f.fileno())
+        size = st.st_size
+        head_len = min(size, FINGERPRINT_BYTES)
+        tail_start = max(size - FINGERPRINT_BYTES, 0)
+        f.seek(tail_start)
+        tail = f.read(size - tail_start)
+        return {
+            'size': size,
+            'mtime_ns': st.st_mtime_ns,
+            'head_len': head_len,
+            'head': hash_range(f, 0, head_len),
+            'tail_start': tail_start,
+            'tail': hashlib.sha1(tail).hexdigest(),
+            # 文件以換行結束時才能從結尾繼續解析追加的行
+            'line_end': size if tail.endswith(b'\n') else None,
+        }
+
+
+def same_prefix(file_path, cached):
+    """文件的前 cached['size'] 個位元組是否仍與快取時相同 (只比對開頭與結尾的雜湊)"""
+    with open(file_path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size < cached['size']:
+            return False
+        return (hash_range(f, 0, cached['head_len']) == cached['head']
+                and hash_range(f, cached['tail_start'], cached['size'] - cached['tail_start']) == cached['tail'])
+
+
+class CacheDirectory:
+    """每個鍵一個快取文件 (副檔名 suffix) 的目錄，寫入後刪除最久未使用的項目直到總大小不超過 max_bytes
+
+    子類別實作 load/save，命中時以 os.utime 更新快取文件的最近使用時間。
+    """
+
+    suffix = '.cache'
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def entry_path(self, key):
+        """key 為字串 (通常包含文件的絕對路徑)"""
+        digest = hashlib.sha1(key.encode('utf-8', errors='surrogateescape')).hexdigest()
+        return os.path.join(self.directory, digest + self.suffix)
+
+    def entries(self):
+        """返回 [(最近使用時間, 大小, 路徑)]，最久未使用的在前"""
+        entries = []
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return entries
+        for name in names:
+            if not name.endswith(self.suffix):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        entries.sort()
+        return entries
+
+    def evict(self):
+        """刪除最久未使用的項目直到總大小不超過 max_bytes，返回刪除的數量"""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self):
+        for _, _, path in self.entries():
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
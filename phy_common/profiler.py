@@ -0,0 +1,125 @@
+"""
+分階段計時 (兩個工具的 GUI 共用)
+記錄載入、解析、驗證、繪圖、表格更新等階段的耗時與匹配/未匹配行數，
+摘要顯示在狀態列，並可匯出為 JSON trace (Chrome/Perfetto 的 Trace Event 格式)；可選擇以 cProfile 收集函式層級的資料
+"""
+
+import cProfile
+import json
+import os
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+
+# trace 中最多保留的事件數 (超過時丟棄最舊的一半)
+MAX_EVENTS = 100000
+
+
+class StageProfiler:
+    """累計各階段的耗時，並保留每次計時的事件供匯出
+
+    stage_order 為狀態列摘要中各階段的顯示順序，其餘階段依首次出現的順序排在後面。
+    """
+
+    def __init__(self, stage_order=()):
+        self.stage_order = tuple(stage_order)
+        self.lock = threading.Lock()
+        self.origin = time.perf_counter()
+        self.reset()
+        self.cprofile_enabled = False
+
+    def reset(self):
+        with self.lock:
+            self.stages = {}   # 名稱 -> [次數, 總秒數, 最大秒數]
+            self.counts = {}   # 名稱 -> 數量 (例如匹配/未匹配的行數)
+            self.events = []   # (名稱, 開始秒數, 持續秒數, 執行緒 id)
+            self.profiles = []  # cProfile.Profile
+
+    def add(self, name, seconds, start=None):
+        """記錄一次計時；start 為 time.perf_counter() 的開始時間"""
+        if start is None:
+            start = time.perf_counter() - seconds
+        with self.lock:
+            stage = self.stages.get(name)
+            if stage is None:
+                self.stages[name] = [1, seconds, seconds]
+            else:
+                stage[0] += 1
+                stage[1] += seconds
+                stage[2] = max(stage[2], seconds)
+            if len(self.events) >= MAX_EVENTS:
+                del self.events[:MAX_EVENTS // 2]
+            self.events.append((name, start - self.origin, seconds, threading.get_ident()))
+
+    @contextmanager
+    def stage(self, name):
+        """以 with profiler.stage('parse'): 計時一段程式"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start, start)
+
+    def count(self, name, amount=1):
+        with self.lock:
+            self.counts[name] = self.counts.get(name, 0) + amount
+
+    def run(self, func, *args, **kwargs):
+        """執行 func；啟用 cProfile 時收集該次呼叫 (cProfile 只記錄目前的執行緒，因此各執行緒分別收集)"""
+        if not self.cprofile_enabled:
+            return func(*args, **kwargs)
+        profile = cProfile.Profile()
+        try:
+            return profile.runcall(func, *args, **kwargs)
+        finally:
+            with self.lock:
+                self.profiles.append(profile)
+
+    def total(self, name):
+        stage = self.stages.get(name)
+        return stage[1] if stage else 0.0
+
+    def summary(self):
+        """狀態列顯示的摘要"""
+        with self.lock:
+            names = [name for name in self.stage_order if name in self.stages]
+            names += [name for name in self.stages if name not in self.stage_order]
+            parts = []
+            for name in names:
+                count, total, _ = self.stages[name]
+                if total >= 1:
+                    parts.append(f"{name} {total:.2f}s")
+                else:
+                    parts.append(f"{name} {total * 1000:.1f}ms")
+                if count > 1:
+                    parts[-1] += f"/{count}"
+            parts += [f"{name} {value}" for name, value in self.counts.items()]
+        return " | ".join(parts)
+
+    def export_trace(self, path, extra=None):
+        """寫出 JSON trace；有 cProfile 資料時另外寫出 <path>.prof，返回寫出的文件列表
+
+        extra 為附加的 {名稱: 可 JSON 序列化的值} (例如流程圖的重繪統計)，寫在 trace 的最上層。
+        """
+        pid = os.getpid()
+        with self.lock:
+            events = [{'name': name, 'ph': 'X', 'ts': round(start * 1e6, 3),
+                       'dur': round(seconds * 1e6, 3), 'pid': pid, 'tid': tid}
+                      for name, start, seconds, tid in self.events]
+            stages = {name: {'count': count, 'total_s': round(total, 6), 'max_s': round(maximum, 6)}
+                      for name, (count, total, maximum) in self.stages.items()}
+            counts = dict(self.counts)
+            profiles = list(self.profiles)
+
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(dict(extra or {}, traceEvents=events, stages=stages, counts=counts),
+                      f, ensure_ascii=False, indent=1)
+        written = [path]
+        if profiles:
+            stats = pstats.Stats(profiles[0])
+            for profile in profiles[1:]:
+                stats.add(profile)
+            stats.dump_stats(path + '.prof')
+            written.append(path + '.prof')
+        return written
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+寄存器轉儲的讀取與解析 (不依賴 tkinter)
+寄存器解析器的 GUI、命令列批次解碼與計數器工具的接收伺服器共用: 壓縮格式偵測、逐行解析 RG_* 寄存器，以及把含多張板子的文件切分為各自的轉儲
+"""
+
+import io
+import re
+
+from phy_common.compression import DECOMPRESSORS, MAGIC_LENGTH, compression_of
+
+# 每隔多少行回報一次進度 (並檢查是否取消)
+PROGRESS_LINES = 5000
+
+# 寄存器行: "RG_NAME : 0x1234"
+REGISTER_LINE = re.compile(r'^\s*(\w+)\s*:\s*(0x[0-9a-fA-F]+)')
+
+# 同一文件中多張板子的分隔行: "# board N"
+BOARD_MARKER = re.compile(r'^\s*#\s*board\s+(\S+)', re.IGNORECASE)
+
+
+def open_dump_file(file_path):
+    """開啟寄存器轉儲文件，.gz/.bz2/.xz 依開頭的 magic bytes 自動串流解壓
+
+    返回 (逐行讀取的文字串流, 原始文件, 格式名稱)；原始文件的 tell() 為已讀取的壓縮位元組數，
+    兩者都需要由呼叫端關閉。
+    """
+    raw = open(file_path, 'rb')
+    codec = compression_of(raw.peek(MAGIC_LENGTH)[:MAGIC_LENGTH])
+    stream = raw if codec is None else DECOMPRESSORS[codec](raw)
+    return io.TextIOWrapper(stream, encoding='utf-8', errors='replace'), raw, codec or 'plain'
+
+
+def parse_register_lines(lines, progress=None, total=None, registers=None):
+    """逐行解析寄存器轉儲 (lines 可以是文件串流)，total 未知時為 None
+
+    progress(已處理行數, 總行數) 每 PROGRESS_LINES 行呼叫一次，可在其中拋出例外以中止解析。
+    registers 為先前解析的結果時，在其上繼續解析 (後出現的值覆蓋先前的值)。
+    返回 (registers, (匹配的行數, 未匹配的非空行數))。
+    """
+    registers = {} if registers is None else registers
+    match_line = REGISTER_LINE.match
+    line_no = -1
+    matched = 0
+    blank = 0
+
+    for line_no, line in enumerate(lines):
+        if progress is not None and line_no % PROGRESS_LINES == 0:
+            progress(line_no, total)
+        match = match_line(line)
+        if match:
+            try:
+                registers[match.group(1)] = int(match.group(2), 16)
+                matched += 1
+            except ValueError:
+                continue
+        elif not line.strip():
+            blank += 1
+    if progress is not None:
+        progress(line_no + 1, total)
+    return registers, (matched, line_no + 1 - matched - blank)
+
+
+def iter_register_dumps(lines):
+    """把含多張板子的轉儲切分為各自的寄存器，產生 (板子編號, registers, (匹配行數, 未匹配行數))
+
+    "# board N" 行開始新的一張板子 (分隔行不計入未匹配)；沒有分隔行時整個輸入為一張板子，編號為 None。
+    """
+    board = None
+    buffered = []
+    seen = False  # 是否已遇過分隔行
+    for line in lines:
+        marker = BOARD_MARKER.match(line)
+        if marker is None:
+            buffered.append(line)
+            continue
+        if seen or any(text.strip() for text in buffered):
+            registers, line_stats = parse_register_lines(buffered)
+            yield board, registers, line_stats
+        board = marker.group(1)
+        buffered = []
+        seen = True
+    if buffered or seen:
+        registers, line_stats = parse_register_lines(buffered)
+        yield board, registers, line_stats
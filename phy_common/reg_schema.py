@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+寄存器位元欄位的宣告式定義與解碼 (不依賴 tkinter)
+每個寄存器以 (名稱, 說明, 欄位) 描述，欄位為位元範圍與顯示方式；模組載入時編譯為 shift/mask 表，
+寬度不超過 TABLE_BITS 的欄位預先格式化所有可能值的文字與報告行，解碼時只需移位、遮罩與查表。
+新增寄存器或欄位只需修改 REGISTER_BLOCKS 的資料。
+"""
+
+# 欄位寬度不超過此位元數時預先格式化所有可能值
+TABLE_BITS = 8
+
+# 每個寄存器保存的「值」報告行數上限 (大量轉儲中多數寄存器的值重複出現)
+VALUE_CACHE_SIZE = 1024
+
+# 報告中區塊標題的分隔線
+SEPARATOR = "=" * 60
+
+
+def flag(bit, name, off, on):
+    """單一位元: 0 顯示 off、1 顯示 on"""
+    return {'name': name, 'bits': (bit, bit), 'enum': {0: off, 1: on}}
+
+
+def field(high, low, name, template='{value}', enum=None, unknown='未知'):
+    """位元範圍 [high:low]
+
+    template 可使用 {value} (欄位值) 與 {name} (enum 中的名稱)；不在 enum 中的值以 unknown 顯示，
+    unknown 同樣可使用 {value}。
+    """
+    return {'name': name, 'bits': (high, low), 'template': template, 'enum': enum, 'unknown': unknown}
+
+
+def gather(positions, name, enum, unknown='未知', template='{name}'):
+    """由不相鄰的位元組成的值，positions 由高位到低位 (報告中不顯示位元標籤)"""
+    return {'name': name, 'gather': tuple(positions), 'template': template, 'enum': enum, 'unknown': unknown}
+
+
+ON_OFF = ('關閉', '開啟')
+YES_NO = ('否', '是')
+SUPPORT = ('不支援', '支援')
+PRESENT = ('無', '有')
+ENABLE = ('停用', '啟用')
+
+MII_SPEEDS = {0: '10 Mbps', 1: '100 Mbps', 2: '1000 Mbps', 3: '保留'}
+
+LINK_SPEEDS = {
+    0: '10 Mbps',
+    1: '100 Mbps',
+    2: '1000 Mbps',
+    3: '2500 Mbps',
+    4: '5000 Mbps',
+    5: '10000 Mbps',
+}
+
+LINK_MODES = {
+    0: '10BASE-T 半雙工',
+    1: '10BASE-T 全雙工',
+    2: '100BASE-TX 半雙工',
+    3: '100BASE-TX 全雙工',
+    4: '1000BASE-T 半雙工',
+    5: '1000BASE-T 全雙工',
+    6: '2.5GBASE-T',
+    7: '5GBASE-T',
+}
+
+# 區塊: (標題, [(寄存器名稱, 說明, 欄位)])；沒有欄位的寄存器只顯示數值
+REGISTER_BLOCKS = (
+    ("MII 寄存器區塊分析 (IEEE 802.3 PHY 控制)", (
+        ('RG_MII_REG_00', 'Basic Control Register', (
+            flag(15, 'SW Reset', *YES_NO),
+            flag(14, 'Loopback', *ON_OFF),
+            flag(13, 'Speed Select (LSB)', *YES_NO),
+            flag(12, 'Auto-Negotiation Enable', *ON_OFF),
+            flag(11, 'Power Down', 'Normal operation', 'Power Down'),
+            flag(10, 'Isolate', 'Normal operation', '是'),
+            flag(9, 'Restart Auto-Negotiation', 'Normal operation', '是'),
+            flag(8, 'Duplex Mode', '半雙工', '全雙工'),
+            flag(7, 'Collision Test', *ON_OFF),
+            flag(6, 'Speed Select (MSB)', *YES_NO),
+            gather((6, 13), '速度設定', MII_SPEEDS),
+        )),
+        ('RG_MII_REG_01', 'Basic Status Register', (
+            flag(15, '100BASE-T4 能力', *SUPPORT),
+            flag(14, '100BASE-X 全雙工', *SUPPORT),
+            flag(13, '100BASE-X 半雙工', *SUPPORT),
+            flag(12, '10BASE-T 全雙工', *SUPPORT),
+            flag(11, '10BASE-T 半雙工', *SUPPORT),
+            flag(8, 'Extended Status', *SUPPORT),
+            flag(7, 'MF Preamble Suppression', *SUPPORT),
+            flag(6, 'Auto-Negotiation Complete', '未完成', '完成'),
+            flag(5, 'Remote Fault', *PRESENT),
+            flag(4, 'Auto-Negotiation Ability', *SUPPORT),
+            flag(3, 'Link Status', '斷開', '連接'),
+            flag(2, 'Jabber Detect', '正常', '檢測到'),
+            flag(1, 'Extended Capability', *SUPPORT),
+        )),
+        ('RG_MII_REG_02', 'PHY Identifier 1', ()),
+        ('RG_MII_REG_03', 'PHY Identifier 2', ()),
+        ('RG_MII_REG_04', 'Auto-Negotiation Advertisement', (
+            flag(15, 'Next Page', *SUPPORT),
+            flag(14, 'Remote Fault', *PRESENT),
+            flag(13, 'Asymmetric Pause', *SUPPORT),
+            flag(12, 'Pause', *SUPPORT),
+            flag(11, '100BASE-T4', *SUPPORT),
+            flag(10, '100BASE-TX 全雙工', *SUPPORT),
+            flag(9, '100BASE-TX 半雙工', *SUPPORT),
+            flag(8, '10BASE-T 全雙工', *SUPPORT),
+            flag(7, '10BASE-T 半雙工', *SUPPORT),
+            field(4, 0, '選擇器欄位', '0x{value:02x}'),
+        )),
+        ('RG_MII_REG_05', 'Auto-Negotiation Link Partner Ability', (
+            flag(15, 'Next Page', *SUPPORT),
+            flag(14, 'Acknowledge', '未確認', '確認'),
+            flag(13, 'Remote Fault', *PRESENT),
+            flag(12, 'Asymmetric Pause', *SUPPORT),
+            flag(11, 'Pause', *SUPPORT),
+            flag(10, '100BASE-T4', *SUPPORT),
+            flag(9, '100BASE-TX 全雙工', *SUPPORT),
+            flag(8, '100BASE-TX 半雙工', *SUPPORT),
+            flag(7, '10BASE-T 全雙工', *SUPPORT),
+            flag(6, '10BASE-T 半雙工', *SUPPORT),
+            field(4, 0, '選擇器欄位', '0x{value:02x}'),
+        )),
+        ('RG_MII_REG_06', 'Auto-Negotiation Expansion', ()),
+        ('RG_MII_REG_07', 'Auto-Negotiation Next Page TX', ()),
+        ('RG_MII_REG_08', 'Auto-Negotiation Link Partner Next Page RX', ()),
+        ('RG_MII_REG_09', '1000BASE-T Control Register', ()),
+        ('RG_MII_REG_0a', '1000BASE-T Status Register', ()),
+    )),
+    ("系統控制寄存器區塊分析", (
+        ('RG_ABILITY_2G5', '2.5G 能力寄存器', (
+            flag(7, '2.5G 全雙工', *SUPPORT),
+            flag(6, '2.5G 半雙工', *SUPPORT),
+            flag(5, '5G 全雙工', *SUPPORT),
+            flag(4, '5G 半雙工', *SUPPORT),
+            field(3, 0, '其他能力', '0x{value:x}'),
+        )),
+        ('RG_LINK_PARTNER_2G5', '2.5G 鏈路伙伴能力', ()),
+        ('RG_MII_REF_CLK', 'MII 參考時鐘控制', ()),
+        ('RG_PHY_ANA', 'PHY 類比控制', ()),
+        ('RG_HW_STRAP1', '硬體綁定設定 1', ()),
+        ('RG_HW_STRAP2', '硬體綁定設定 2', ()),
+        ('RG_SYS_LINK_MODE', '系統鏈路模式', (
+            field(2, 0, '鏈路模式', '{name} ({value})', LINK_MODES, '未知模式'),
+            flag(8, '自動協商啟用', *YES_NO),
+            flag(9, '強制模式', *YES_NO),
+        )),
+        ('RG_FCM_CTRL', '流量控制管理', (
+            flag(0, 'TX 流量控制', *ENABLE),
+            flag(1, 'RX 流量控制', *ENABLE),
+            flag(2, '暫停幀生成', *ENABLE),
+            flag(3, '暫停幀檢測', *ENABLE),
+            field(15, 8, '暫停時間'),
+        )),
+        ('RG_SS_PAUSE_TIME', '暫停時間設定', ()),
+        ('RG_MIN_IPG_NUM', '最小封包間隔', ()),
+        ('RG_CSR_AN0', '自動協商控制狀態 0', ()),
+        ('RG_SS_LINK_STATUS', '鏈路狀態', (
+            flag(0, '鏈路狀態', 'DOWN', 'UP'),
+            flag(1, '雙工模式', '半雙工', '全雙工'),
+            field(4, 2, '速度', '{name}', LINK_SPEEDS, '未知速度 ({value})'),
+            flag(5, '自動協商完成', *YES_NO),
+            flag(6, '遠端故障', *YES_NO),
+            flag(7, '本地故障', *YES_NO),
+        )),
+        ('RG_LINK_PARTNER_AN', '鏈路伙伴自動協商', ()),
+        ('RG_FN_PWR_CTRL_STATUS', '功率控制狀態', ()),
+        ('RG_MD32_FW_READY', 'MD32 韌體就緒', ()),
+        ('RG_RX_SYNC_CNT', '接收同步計數器', ()),
+        ('RG_WHILE_LOOP_COUNT', '迴圈計數器', ()),
+    )),
+)
+
+
+class CompiledField:
+    """編譯後的欄位: 單一位元範圍以 (shift, mask) 取值，不相鄰的位元以 parts 組合
+
+    texts / lines 為預先格式化的 文字 / 報告行 (以欄位值為索引)，欄位過寬時為 None。
+    """
+
+    __slots__ = ('name', 'label', 'shift', 'mask', 'parts', 'template', 'enum', 'unknown', 'texts', 'lines')
+
+    def __init__(self, spec):
+        self.name = spec['name']
+        self.template = spec.get('template', '{name}')
+        self.enum = spec.get('enum') or {}
+        self.unknown = spec.get('unknown', '未知')
+        if 'gather' in spec:
+            positions = spec['gather']
+            self.label = None
+            self.shift = 0
+            self.mask = (1 << len(positions)) - 1
+            # (來源位元, 在欄位值中的位置)
+            self.parts = tuple((bit, len(positions) - 1 - i) for i, bit in enumerate(positions))
+        else:
+            high, low = spec['bits']
+            self.label = f"[{high}]" if high == low else f"[{high}:{low}]"
+            self.shift = low
+            self.mask = (1 << (high - low + 1)) - 1
+            self.parts = None
+        if self.mask < (1 << TABLE_BITS):
+            self.texts = tuple(self.format(raw) for raw in range(self.mask + 1))
+            self.lines = tuple(self.format_line(raw) for raw in range(self.mask + 1))
+        else:
+            self.texts = self.lines = None
+
+    def extract(self, value):
+        """從寄存器值取出欄位值"""
+        if self.parts is None:
+            return (value >> self.shift) & self.mask
+        raw = 0
+        for bit, position in self.parts:
+            raw |= ((value >> bit) & 1) << position
+        return raw
+
+    def format(self, raw):
+        name = self.enum.get(raw)
+        if name is None:
+            name = self.unknown.format(value=raw)
+        return self.template.format(value=raw, name=name)
+
+    def format_line(self, raw):
+        text = self.format(raw) if self.texts is None else self.texts[raw]
+        if self.label is None:
+            return f"    {self.name}: {text}"
+        return f"    {self.label} {self.name}: {text}"
+
+    def text(self, raw):
+        return self.format(raw) if self.texts is None else self.texts[raw]
+
+    def line(self, raw):
+        return self.format_line(raw) if self.lines is None else self.lines[raw]
+
+
+class CompiledRegister:
+    """編譯後的寄存器: 名稱、說明、欄位，以及報告的標題行
+
+    plan 為每個欄位的 (shift, mask, 文字表, 報告行表, 欄位)；表為 None 的欄位 (不相鄰位元或過寬) 逐次計算。
+    value_lines 保存最近出現過的值的「值」報告行 (最多 VALUE_CACHE_SIZE 個)。
+    """
+
+    __slots__ = ('name', 'description', 'fields', 'title', 'plan', 'value_lines')
+
+    def __init__(self, name, description, fields):
+        self.name = name
+        self.description = description
+        self.fields = tuple(CompiledField(spec) for spec in fields)
+        self.title = f"\n{name}: {description}"
+        self.plan = tuple((compiled.shift, compiled.mask, None, None, compiled) if compiled.parts
+                          else (compiled.shift, compiled.mask, compiled.texts, compiled.lines, compiled)
+                          for compiled in self.fields)
+        self.value_lines = {}
+
+    def value_line(self, value):
+        line = self.value_lines.get(value)
+        if line is None:
+            line = f"值: 0x{value:08x} ({value})"
+            if len(self.value_lines) >= VALUE_CACHE_SIZE:
+                self.value_lines.clear()
+            self.value_lines[value] = line
+        return line
+
+    def decode(self, value):
+        fields = []
+        append = fields.append
+        for shift, mask, texts, _, compiled in self.plan:
+            if texts is None:
+                raw = compiled.extract(value)
+                append((compiled.name, compiled.label, raw, compiled.text(raw)))
+            else:
+                raw = (value >> shift) & mask
+                append((compiled.name, compiled.label, raw, texts[raw]))
+        return DecodedRegister(self.name, self.description, value, fields)
+
+
+class DecodedRegister:
+    """單一寄存器的解碼結果；fields 為 [(欄位名稱, 位元標籤, 欄位值, 文字)]"""
+
+    __slots__ = ('name', 'description', 'value', 'fields')
+
+    def __init__(self, name, description, value, fields):
+        self.name = name
+        self.description = description
+        self.value = value
+        self.fields = fields
+
+    def as_dict(self):
+        """JSON 友善的字典: {'name', 'description', 'value', 'fields': [{'name', 'bits', 'raw', 'text'}]}"""
+        return {
+            'name': self.name,
+            'description': self.description,
+            'value': self.value,
+            'fields': [{'name': name, 'bits': label, 'raw': raw, 'text': text}
+                       for name, label, raw, text in self.fields],
+        }
+
+
+class RegisterSchema:
+    """由 REGISTER_BLOCKS 格式的資料編譯的寄存器表 (建立一次，之後只查表)"""
+
+    def __init__(self, blocks=REGISTER_BLOCKS):
+        self.blocks = []      # [(標題, [CompiledRegister])]
+        self.registers = {}   # 名稱 -> CompiledRegister
+        for title, registers in blocks:
+            compiled = []
+            for name, description, fields in registers:
+                register = CompiledRegister(name, description, fields)
+                self.registers[name] = register
+                compiled.append(register)
+            self.blocks.append((title, compiled))
+
+    def decode(self, name, value):
+        """解碼單一寄存器，不在表中的名稱返回 None"""
+        register = self.registers.get(name)
+        return None if register is None else register.decode(value)
+
+    def decode_all(self, registers):
+        """依表中的順序解碼 registers ({名稱: 值}) 中存在的寄存器，返回 [(區塊標題, [DecodedRegister])]"""
+        return [(title, [register.decode(registers[register.name])
+                         for register in compiled if register.name in registers])
+                for title, compiled in self.blocks]
+
+    def block_lines(self, index, registers):
+        """第 index 個區塊的報告行"""
+        title, compiled = self.blocks[index]
+        result = [("\n" if index else "") + SEPARATOR, title, SEPARATOR]
+        append = result.append
+        for register in compiled:
+            value = registers.get(register.name)
+            if value is None:
+                continue
+            append(register.title)
+            append(register.value_line(value))
+            if register.plan:
+                append("  位元分析:")
+                for shift, mask, _, lines, compiled_field in register.plan:
+                    if lines is None:
+                        append(compiled_field.line(compiled_field.extract(value)))
+                    else:
+                        append(lines[(value >> shift) & mask])
+        return result
+
+    def report_lines(self, registers):
+        """完整的分析報告 (各區塊依序)"""
+        result = []
+        for index in range(len(self.blocks)):
+            result.extend(self.block_lines(index, registers))
+        return result
+
+
+REGISTER_SCHEMA = RegisterSchema()
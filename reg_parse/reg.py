@@ -6,8 +6,36 @@ MediaTek 網路晶片寄存器解析器 GUI 版本
 """
 
 import tkinter as tk
-from tkinter import ttk, scrolledtext, messagebox
-import re
+from tkinter import ttk, scrolledtext, messagebox, filedialog
+import io
+import os
+import queue
+import threading
+import time
+
+from phy_common.file_cache import fingerprint
+from phy_common.profiler import StageProfiler
+from phy_common.reg_dump import open_dump_file, parse_register_lines
+from phy_common.reg_schema import REGISTER_SCHEMA
+from reg_cache import RegisterCache
+
+# 背景解析的輪詢間隔 (毫秒)
+PARSE_POLL_MS = 50
+
+# 每次插入結果區域的報告行數
+REPORT_BATCH_LINES = 500
+
+
+# 快取狀態在狀態列的說明
+CACHE_STATUS_TEXT = {'hit': '命中', 'append': '命中，只解析追加的內容', 'miss': '未命中，已保存'}
+
+# 狀態列摘要中各階段的顯示順序
+STAGE_ORDER = ('load', 'parse', 'analyze', 'render')
+
+
+class ParseCancelled(Exception):
+    """使用者取消了解析"""
+
 
 class NetworkChipRegisterParserGUI:
     def __init__(self, root):
@@ -16,6 +44,19 @@ class NetworkChipRegisterParserGUI:
         self.root.geometry("1200x800")
         
         self.registers = {}
+        
+        # 背景解析
+        self.parse_thread = None
+        self.parse_messages = None
+        self.cancel_event = None
+        self.parse_job = None
+        self.report_lines = []
+        self.finish_status = ""
+        
+        # 分階段計時
+        self.timer = StageProfiler(STAGE_ORDER)
+        self.parse_cache = RegisterCache()
+        self.cprofile_var = tk.BooleanVar(value=False)
         self.setup_gui()
         
         # 預設寄存器資料
@@ -54,9 +95,19 @@ class NetworkChipRegisterParserGUI:
         button_frame.grid(row=1, column=0, pady=(5, 0))
         
         # 解析按鈕
-        parse_button = ttk.Button(button_frame, text="解析寄存器", 
-                                 command=self.parse_and_analyze)
-        parse_button.pack(side=tk.LEFT, padx=(0, 5))
+        self.parse_button = ttk.Button(button_frame, text="解析寄存器", 
+                                      command=self.parse_and_analyze)
+        self.parse_button.pack(side=tk.LEFT, padx=(0, 5))
+        
+        # 載入文件按鈕 (直接從文件解析，支援壓縮檔)
+        self.load_button = ttk.Button(button_frame, text="載入文件", 
+                                     command=self.load_file)
+        self.load_button.pack(side=tk.LEFT, padx=(0, 5))
+        
+        # 取消按鈕 (解析進行中才可用)
+        self.cancel_button = ttk.Button(button_frame, text="取消解析", 
+                                       command=self.cancel_parse, state='disabled')
+        self.cancel_button.pack(side=tk.LEFT, padx=(0, 5))
         
         # 清除按鈕
         clear_button = ttk.Button(button_frame, text="清除輸入", 
@@ -66,7 +117,13 @@ class NetworkChipRegisterParserGUI:
         # 載入範例按鈕
         example_button = ttk.Button(button_frame, text="載入範例", 
                                    command=self.load_default_data)
-        example_button.pack(side=tk.LEFT)
+        example_button.pack(side=tk.LEFT, padx=(0, 5))
+        
+        # 效能記錄: cProfile 開關與匯出
+        ttk.Checkbutton(button_frame, text="cProfile", variable=self.cprofile_var,
+                        command=self.toggle_cprofile).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(button_frame, text="匯出效能記錄",
+                   command=self.export_profile).pack(side=tk.LEFT)
         
         # 右側：結果顯示區域
         result_frame = ttk.LabelFrame(main_frame, text="解析結果", padding="5")
@@ -122,60 +179,236 @@ RG_WHILE_LOOP_COUNT : 0x00b517a8"""
         
     def clear_input(self):
         """清除輸入區域"""
+        self.cancel_parse()
         self.input_text.delete(1.0, tk.END)
         self.result_text.delete(1.0, tk.END)
         self.status_var.set("已清除")
         
-    def parse_register_dump(self, dump_text):
-        """解析寄存器轉儲文本"""
-        self.registers = {}
+    def parse_register_dump(self, dump_text, progress=None):
+        """解析寄存器轉儲文本
+
+        progress(已處理行數, 總行數) 每 PROGRESS_LINES 行呼叫一次，可在其中拋出例外以中止解析。
+        """
         lines = dump_text.strip().split('\n')
-        
-        for line in lines:
-            # 使用正規表達式匹配寄存器名稱和值
-            match = re.match(r'^\s*(\w+)\s*:\s*(0x[0-9a-fA-F]+)', line)
-            if match:
-                reg_name = match.group(1)
-                reg_value = match.group(2)
-                try:
-                    self.registers[reg_name] = int(reg_value, 16)
-                except ValueError:
-                    continue
-        
+        return self.parse_register_lines(lines, progress, len(lines))
+    
+    def parse_register_lines(self, lines, progress=None, total=None, registers=None):
+        """逐行解析寄存器轉儲 (lines 可以是文件串流)，total 未知時為 None
+
+        registers 為先前解析的結果時，在其上繼續解析 (用於文件被追加的部分)。
+        """
+        # (匹配的行數, 未匹配的非空行數)
+        self.registers, self.line_stats = parse_register_lines(lines, progress, total, registers)
         return len(self.registers)
     
     def parse_and_analyze(self):
-        """解析並分析寄存器"""
-        try:
-            # 獲取輸入文本
+        """解析並分析寄存器 (在背景執行緒進行，結果由 poll_parse 分批顯示)"""
+        # 獲取輸入文本
+        self.timer.reset()
+        with self.timer.stage('load'):
             input_data = self.input_text.get(1.0, tk.END).strip()
-            
-            if not input_data:
-                messagebox.showwarning("警告", "請先輸入寄存器資料")
+        
+        if not input_data:
+            messagebox.showwarning("警告", "請先輸入寄存器資料")
+            return
+        
+        self.start_parse(input_data, None)
+    
+    def load_file(self):
+        """選擇寄存器轉儲文件並直接解析 (不載入輸入區域，壓縮檔邊解壓邊解析)"""
+        file_path = filedialog.askopenfilename(
+            title="選擇寄存器轉儲文件",
+            filetypes=[("Text files", "*.txt"), ("Log files", "*.log"),
+                       ("Compressed logs", "*.gz *.bz2 *.xz"), ("All files", "*.*")]
+        )
+        if file_path:
+            self.timer.reset()
+            self.start_parse(None, file_path)
+    
+    def start_parse(self, input_data, file_path):
+        """在背景執行緒解析輸入文本或文件"""
+        self.cancel_parse()
+        self.result_text.delete(1.0, tk.END)
+        self.report_lines = []
+        self.timer.cprofile_enabled = self.cprofile_var.get()
+        self.parse_messages = queue.Queue()
+        self.cancel_event = threading.Event()
+        self.parse_thread = threading.Thread(
+            target=self._parse_worker,
+            args=(input_data, file_path, self.cancel_event, self.parse_messages),
+            daemon=True)
+        self.parse_button.configure(state='disabled')
+        self.cancel_button.configure(state='normal')
+        self.status_var.set("解析中...")
+        self.parse_thread.start()
+        self.parse_job = self.root.after(PARSE_POLL_MS, self.poll_parse)
+    
+    def _parse_worker(self, input_data, file_path, cancel_event, messages):
+        """背景執行緒: 解析寄存器 (文本或文件) 並產生報告，訊息放入 messages"""
+        start = time.perf_counter()
+        source = {'raw': None, 'size': 0, 'codec': None, 'cache': None}
+        
+        def progress(done, total):
+            if cancel_event.is_set():
+                raise ParseCancelled()
+            elapsed = time.perf_counter() - start
+            rate = done / elapsed if elapsed > 0 else 0.0
+            if total is not None:
+                read = f"{done}/{total} 行"
+            else:
+                read = (f"{done} 行, {source['raw'].tell() / 1e6:.1f}/{source['size'] / 1e6:.1f} MB "
+                        f"({source['codec']})")
+            messages.put(('progress', f"解析中... {read}, {rate:,.0f} 行/秒"))
+        
+        timer = self.timer
+        try:
+            # 文件邊讀取邊解析，讀取與解壓的時間計入 parse
+            with timer.stage('parse'):
+                if file_path is None:
+                    reg_count = timer.run(self.parse_register_dump, input_data, progress)
+                else:
+                    reg_count = timer.run(self._parse_dump_file, file_path, source, progress)
+            matched, unmatched = self.line_stats
+            timer.count('lines_matched', matched)
+            timer.count('lines_unmatched', unmatched)
+            if reg_count == 0:
+                messages.put(('empty', None))
                 return
+            with timer.stage('analyze'):
+                result = timer.run(self.analyze_all_registers)
+            if cancel_event.is_set():
+                raise ParseCancelled()
+            elapsed = time.perf_counter() - start
+            summary = f"{elapsed:.2f} s"
+            if source['cache'] is not None:
+                summary += f", 快取{CACHE_STATUS_TEXT[source['cache']]}"
+            if file_path is not None and elapsed > 0:
+                # 各壓縮格式的讀取速度 (壓縮檔大小 / 時間)
+                summary += f", {source['codec']} {source['size'] / elapsed / 1e6:.1f} MB/s"
+            messages.put(('report', (result.split('\n'), reg_count, summary)))
+        except ParseCancelled:
+            messages.put(('cancelled', None))
+        except Exception as e:
+            messages.put(('error', str(e)))
+    
+    def _parse_dump_file(self, file_path, source, progress):
+        """解析寄存器轉儲文件，可用時使用快取 (在背景執行緒呼叫)；source 記錄讀取位置、格式與快取狀態"""
+        source['size'] = os.path.getsize(file_path)
+        stream, source['raw'], source['codec'] = open_dump_file(file_path)
+        try:
+            file_fingerprint = fingerprint(file_path)
+            entry, source['cache'] = self.parse_cache.load(file_path, source['codec'])
+            if source['cache'] == 'hit':
+                self.registers = entry['registers']
+                self.line_stats = tuple(entry['line_stats'])
+                return len(self.registers)
             
-            # 解析寄存器
-            reg_count = self.parse_register_dump(input_data)
-            
-            if reg_count == 0:
+            registers = None
+            if source['cache'] == 'append':
+                # 只解析快取之後追加的行
+                stream.detach()
+                source['raw'].seek(entry['fingerprint']['line_end'])
+                stream = io.TextIOWrapper(source['raw'], encoding='utf-8', errors='replace')
+                registers = entry['registers']
+            reg_count = self.parse_register_lines(stream, progress, registers=registers)
+            if entry is not None:
+                matched, unmatched = entry['line_stats']
+                self.line_stats = (self.line_stats[0] + matched, self.line_stats[1] + unmatched)
+        finally:
+            stream.close()
+            source['raw'].close()
+        
+        # 只保存解析時已存在的內容 (之後追加的行會在下次開啟時再解析)
+        if file_fingerprint['size'] == os.path.getsize(file_path):
+            self.parse_cache.save(file_path, file_fingerprint, self.registers, self.line_stats)
+        return reg_count
+    
+    def poll_parse(self):
+        """取出背景解析的訊息，報告每次最多插入 REPORT_BATCH_LINES 行"""
+        self.parse_job = None
+        if self.parse_messages is None:
+            return
+        
+        # 報告分批插入結果區域
+        if self.report_lines:
+            with self.timer.stage('render'):
+                batch = self.report_lines[:REPORT_BATCH_LINES]
+                del self.report_lines[:REPORT_BATCH_LINES]
+                self.result_text.insert(tk.END, '\n'.join(batch) + ('\n' if self.report_lines else ''))
+            if not self.report_lines:
+                self._finish_parse(f"{self.finish_status}  [{self.timer.summary()}]")
+                return
+            self.parse_job = self.root.after(1, self.poll_parse)
+            return
+        
+        status = None
+        while True:
+            try:
+                kind, payload = self.parse_messages.get_nowait()
+            except queue.Empty:
+                break
+            if kind == 'progress':
+                status = payload
+            elif kind == 'report':
+                lines, reg_count, summary = payload
+                self.report_lines = lines
+                self.finish_status = f"解析完成，共處理 {reg_count} 個寄存器 ({summary})"
+                self.parse_job = self.root.after(1, self.poll_parse)
+                return
+            elif kind == 'empty':
+                self._finish_parse("解析失敗")
                 messagebox.showerror("錯誤", "無法解析寄存器資料，請檢查格式")
                 return
-            
-            # 清除結果區域
-            self.result_text.delete(1.0, tk.END)
-            
-            # 執行分析
-            result = self.analyze_all_registers()
-            
-            # 顯示結果
-            self.result_text.insert(tk.END, result)
-            
-            # 更新狀態
-            self.status_var.set(f"解析完成，共處理 {reg_count} 個寄存器")
-            
+            elif kind == 'error':
+                self._finish_parse("解析失敗")
+                messagebox.showerror("錯誤", f"解析過程中發生錯誤：{payload}")
+                return
+            elif kind == 'cancelled':
+                self._finish_parse("解析已取消")
+                return
+        
+        if status is not None:
+            self.status_var.set(status)
+        self.parse_job = self.root.after(PARSE_POLL_MS, self.poll_parse)
+    
+    def _finish_parse(self, status):
+        self.parse_thread = None
+        self.parse_messages = None
+        self.cancel_event = None
+        self.report_lines = []
+        self.parse_button.configure(state='normal')
+        self.cancel_button.configure(state='disabled')
+        self.status_var.set(status)
+    
+    def toggle_cprofile(self):
+        self.timer.cprofile_enabled = self.cprofile_var.get()
+    
+    def export_profile(self):
+        """把最近一次解析的各階段計時匯出為 JSON trace (可用 chrome://tracing 或 Perfetto 開啟)"""
+        file_path = filedialog.asksaveasfilename(
+            title="匯出效能記錄",
+            defaultextension=".json",
+            filetypes=[("JSON trace", "*.json"), ("All files", "*.*")]
+        )
+        if not file_path:
+            return
+        try:
+            written = self.timer.export_trace(file_path)
+            messagebox.showinfo("成功", "效能記錄已匯出：\n" + "\n".join(written))
         except Exception as e:
-            messagebox.showerror("錯誤", f"解析過程中發生錯誤：{str(e)}")
-            self.status_var.set("解析失敗")
+            messagebox.showerror("錯誤", f"匯出效能記錄失敗：{str(e)}")
+    
+    def cancel_parse(self):
+        """取消進行中的背景解析"""
+        if self.parse_messages is None:
+            return
+        self.cancel_event.set()
+        if self.parse_job is not None:
+            self.root.after_cancel(self.parse_job)
+            self.parse_job = None
+        # 等待執行緒結束，避免它之後覆寫 self.registers
+        self.parse_thread.join(timeout=1.0)
+        self._finish_parse("解析已取消")
     
     def analyze_all_registers(self):
         """分析所有寄存器並返回結果字串"""
@@ -184,13 +417,8 @@ RG_WHILE_LOOP_COUNT : 0x00b517a8"""
         result.append("=" * 60)
         result.append("")
         
-        # 分析 MII 寄存器
-        mii_result = self.analyze_mii_registers()
-        result.extend(mii_result)
-        
-        # 分析系統寄存器
-        sys_result = self.analyze_system_registers()
-        result.extend(sys_result)
+        # 各區塊的位元欄位由 reg_schema 的寄存器表解碼
+        result.extend(REGISTER_SCHEMA.report_lines(self.registers))
         
         result.append("")
         result.append("=" * 60)
@@ -201,232 +429,11 @@ RG_WHILE_LOOP_COUNT : 0x00b517a8"""
     
     def analyze_mii_registers(self):
         """分析 MII 寄存器區塊"""
-        result = []
-        result.append("=" * 60)
-        result.append("MII 寄存器區塊分析 (IEEE 802.3 PHY 控制)")
-        result.append("=" * 60)
-        
-        mii_regs = {
-            'RG_MII_REG_00': 'Basic Control Register',
-            'RG_MII_REG_01': 'Basic Status Register', 
-            'RG_MII_REG_02': 'PHY Identifier 1',
-            'RG_MII_REG_03': 'PHY Identifier 2',
-            'RG_MII_REG_04': 'Auto-Negotiation Advertisement',
-            'RG_MII_REG_05': 'Auto-Negotiation Link Partner Ability',
-            'RG_MII_REG_06': 'Auto-Negotiation Expansion',
-            'RG_MII_REG_07': 'Auto-Negotiation Next Page TX',
-            'RG_MII_REG_08': 'Auto-Negotiation Link Partner Next Page RX',
-            'RG_MII_REG_09': '1000BASE-T Control Register',
-            'RG_MII_REG_0a': '1000BASE-T Status Register'
-        }
-        
-        for reg_name, description in mii_regs.items():
-            if reg_name in self.registers:
-                value = self.registers[reg_name]
-                result.append(f"\n{reg_name}: {description}")
-                result.append(f"值: 0x{value:08x} ({value})")
-                
-                if reg_name == 'RG_MII_REG_00':
-                    result.extend(self._analyze_mii_control_reg(value))
-                elif reg_name == 'RG_MII_REG_01':
-                    result.extend(self._analyze_mii_status_reg(value))
-                elif reg_name == 'RG_MII_REG_04':
-                    result.extend(self._analyze_mii_advertisement_reg(value))
-                elif reg_name == 'RG_MII_REG_05':
-                    result.extend(self._analyze_mii_link_partner_reg(value))
-        
-        return result
-    
-    def _analyze_mii_control_reg(self, value):
-        """分析 MII 控制寄存器 (REG_00)"""
-        result = []
-        result.append("  位元分析:")
-        result.append(f"    [15] SW Reset: {'是' if value & (1<<15) else '否'}")
-        result.append(f"    [14] Loopback: {'開啟' if value & (1<<14) else '關閉'}")
-        result.append(f"    [13] Speed Select (LSB): {'是' if value & (1<<13) else '否'}")
-        result.append(f"    [12] Auto-Negotiation Enable: {'開啟' if value & (1<<12) else '關閉'}")
-        result.append(f"    [11] Power Down: {'Power Down' if value & (1<<11) else 'Normal operation'}")
-        result.append(f"    [10] Isolate: {'是' if value & (1<<10) else 'Normal operation'}")
-        result.append(f"    [9] Restart Auto-Negotiation: {'是' if value & (1<<9) else 'Normal operation'}")
-        result.append(f"    [8] Duplex Mode: {'全雙工' if value & (1<<8) else '半雙工'}")
-        result.append(f"    [7] Collision Test: {'開啟' if value & (1<<7) else '關閉'}")
-        result.append(f"    [6] Speed Select (MSB): {'是' if value & (1<<6) else '否'}")
-        
-        # 速度判斷
-        speed_bits = ((value >> 6) & 1) << 1 | ((value >> 13) & 1)
-        speeds = {0: '10 Mbps', 1: '100 Mbps', 2: '1000 Mbps', 3: '保留'}
-        result.append(f"    速度設定: {speeds.get(speed_bits, '未知')}")
-        
-        return result
-    
-    def _analyze_mii_status_reg(self, value):
-        """分析 MII 狀態寄存器 (REG_01)"""
-        result = []
-        result.append("  位元分析:")
-        result.append(f"    [15] 100BASE-T4 能力: {'支援' if value & (1<<15) else '不支援'}")
-        result.append(f"    [14] 100BASE-X 全雙工: {'支援' if value & (1<<14) else '不支援'}")
-        result.append(f"    [13] 100BASE-X 半雙工: {'支援' if value & (1<<13) else '不支援'}")
-        result.append(f"    [12] 10BASE-T 全雙工: {'支援' if value & (1<<12) else '不支援'}")
-        result.append(f"    [11] 10BASE-T 半雙工: {'支援' if value & (1<<11) else '不支援'}")
-        result.append(f"    [8] Extended Status: {'支援' if value & (1<<8) else '不支援'}")
-        result.append(f"    [7] MF Preamble Suppression: {'支援' if value & (1<<7) else '不支援'}")
-        result.append(f"    [6] Auto-Negotiation Complete: {'完成' if value & (1<<6) else '未完成'}")
-        result.append(f"    [5] Remote Fault: {'有' if value & (1<<5) else '無'}")
-        result.append(f"    [4] Auto-Negotiation Ability: {'支援' if value & (1<<4) else '不支援'}")
-        result.append(f"    [3] Link Status: {'連接' if value & (1<<3) else '斷開'}")
-        result.append(f"    [2] Jabber Detect: {'檢測到' if value & (1<<2) else '正常'}")
-        result.append(f"    [1] Extended Capability: {'支援' if value & (1<<1) else '不支援'}")
-        
-        return result
-    
-    def _analyze_mii_advertisement_reg(self, value):
-        """分析自動協商廣告寄存器 (REG_04)"""
-        result = []
-        result.append("  位元分析:")
-        result.append(f"    [15] Next Page: {'支援' if value & (1<<15) else '不支援'}")
-        result.append(f"    [14] Remote Fault: {'有' if value & (1<<14) else '無'}")
-        result.append(f"    [13] Asymmetric Pause: {'支援' if value & (1<<13) else '不支援'}")
-        result.append(f"    [12] Pause: {'支援' if value & (1<<12) else '不支援'}")
-        result.append(f"    [11] 100BASE-T4: {'支援' if value & (1<<11) else '不支援'}")
-        result.append(f"    [10] 100BASE-TX 全雙工: {'支援' if value & (1<<10) else '不支援'}")
-        result.append(f"    [9] 100BASE-TX 半雙工: {'支援' if value & (1<<9) else '不支援'}")
-        result.append(f"    [8] 10BASE-T 全雙工: {'支援' if value & (1<<8) else '不支援'}")
-        result.append(f"    [7] 10BASE-T 半雙工: {'支援' if value & (1<<7) else '不支援'}")
-        result.append(f"    [4:0] 選擇器欄位: 0x{value & 0x1F:02x}")
-        
-        return result
-    
-    def _analyze_mii_link_partner_reg(self, value):
-        """分析鏈路伙伴能力寄存器 (REG_05)"""
-        result = []
-        result.append("  位元分析:")
-        result.append(f"    [15] Next Page: {'支援' if value & (1<<15) else '不支援'}")
-        result.append(f"    [14] Acknowledge: {'確認' if value & (1<<14) else '未確認'}")
-        result.append(f"    [13] Remote Fault: {'有' if value & (1<<13) else '無'}")
-        result.append(f"    [12] Asymmetric Pause: {'支援' if value & (1<<12) else '不支援'}")
-        result.append(f"    [11] Pause: {'支援' if value & (1<<11) else '不支援'}")
-        result.append(f"    [10] 100BASE-T4: {'支援' if value & (1<<10) else '不支援'}")
-        result.append(f"    [9] 100BASE-TX 全雙工: {'支援' if value & (1<<9) else '不支援'}")
-        result.append(f"    [8] 100BASE-TX 半雙工: {'支援' if value & (1<<8) else '不支援'}")
-        result.append(f"    [7] 10BASE-T 全雙工: {'支援' if value & (1<<7) else '不支援'}")
-        result.append(f"    [6] 10BASE-T 半雙工: {'支援' if value & (1<<6) else '不支援'}")
-        result.append(f"    [4:0] 選擇器欄位: 0x{value & 0x1F:02x}")
-        
-        return result
+        return REGISTER_SCHEMA.block_lines(0, self.registers)
     
     def analyze_system_registers(self):
         """分析系統控制寄存器區塊"""
-        result = []
-        result.append("\n" + "=" * 60)
-        result.append("系統控制寄存器區塊分析")
-        result.append("=" * 60)
-        
-        system_regs = {
-            'RG_ABILITY_2G5': '2.5G 能力寄存器',
-            'RG_LINK_PARTNER_2G5': '2.5G 鏈路伙伴能力',
-            'RG_MII_REF_CLK': 'MII 參考時鐘控制',
-            'RG_PHY_ANA': 'PHY 類比控制',
-            'RG_HW_STRAP1': '硬體綁定設定 1',
-            'RG_HW_STRAP2': '硬體綁定設定 2',
-            'RG_SYS_LINK_MODE': '系統鏈路模式',
-            'RG_FCM_CTRL': '流量控制管理',
-            'RG_SS_PAUSE_TIME': '暫停時間設定',
-            'RG_MIN_IPG_NUM': '最小封包間隔',
-            'RG_CSR_AN0': '自動協商控制狀態 0',
-            'RG_SS_LINK_STATUS': '鏈路狀態',
-            'RG_LINK_PARTNER_AN': '鏈路伙伴自動協商',
-            'RG_FN_PWR_CTRL_STATUS': '功率控制狀態',
-            'RG_MD32_FW_READY': 'MD32 韌體就緒',
-            'RG_RX_SYNC_CNT': '接收同步計數器',
-            'RG_WHILE_LOOP_COUNT': '迴圈計數器'
-        }
-        
-        for reg_name, description in system_regs.items():
-            if reg_name in self.registers:
-                value = self.registers[reg_name]
-                result.append(f"\n{reg_name}: {description}")
-                result.append(f"值: 0x{value:08x} ({value})")
-                
-                if reg_name == 'RG_ABILITY_2G5':
-                    result.extend(self._analyze_2g5_ability_reg(value))
-                elif reg_name == 'RG_SYS_LINK_MODE':
-                    result.extend(self._analyze_link_mode_reg(value))
-                elif reg_name == 'RG_SS_LINK_STATUS':
-                    result.extend(self._analyze_link_status_reg(value))
-                elif reg_name == 'RG_FCM_CTRL':
-                    result.extend(self._analyze_fcm_ctrl_reg(value))
-        
-        return result
-    
-    def _analyze_2g5_ability_reg(self, value):
-        """分析 2.5G 能力寄存器"""
-        result = []
-        result.append("  位元分析:")
-        result.append(f"    [7] 2.5G 全雙工: {'支援' if value & (1<<7) else '不支援'}")
-        result.append(f"    [6] 2.5G 半雙工: {'支援' if value & (1<<6) else '不支援'}")
-        result.append(f"    [5] 5G 全雙工: {'支援' if value & (1<<5) else '不支援'}")
-        result.append(f"    [4] 5G 半雙工: {'支援' if value & (1<<4) else '不支援'}")
-        result.append(f"    [3:0] 其他能力: 0x{value & 0xF:x}")
-        
-        return result
-    
-    def _analyze_link_mode_reg(self, value):
-        """分析鏈路模式寄存器"""
-        result = []
-        result.append("  位元分析:")
-        link_modes = {
-            0: '10BASE-T 半雙工',
-            1: '10BASE-T 全雙工', 
-            2: '100BASE-TX 半雙工',
-            3: '100BASE-TX 全雙工',
-            4: '1000BASE-T 半雙工',
-            5: '1000BASE-T 全雙工',
-            6: '2.5GBASE-T',
-            7: '5GBASE-T'
-        }
-        mode = value & 0x7
-        result.append(f"    [2:0] 鏈路模式: {link_modes.get(mode, '未知模式')} ({mode})")
-        result.append(f"    [8] 自動協商啟用: {'是' if value & (1<<8) else '否'}")
-        result.append(f"    [9] 強制模式: {'是' if value & (1<<9) else '否'}")
-        
-        return result
-    
-    def _analyze_link_status_reg(self, value):
-        """分析鏈路狀態寄存器"""
-        result = []
-        result.append("  位元分析:")
-        result.append(f"    [0] 鏈路狀態: {'UP' if value & 1 else 'DOWN'}")
-        result.append(f"    [1] 雙工模式: {'全雙工' if value & (1<<1) else '半雙工'}")
-        result.append(f"    [4:2] 速度: {self._decode_speed((value >> 2) & 0x7)}")
-        result.append(f"    [5] 自動協商完成: {'是' if value & (1<<5) else '否'}")
-        result.append(f"    [6] 遠端故障: {'是' if value & (1<<6) else '否'}")
-        result.append(f"    [7] 本地故障: {'是' if value & (1<<7) else '否'}")
-        
-        return result
-    
-    def _analyze_fcm_ctrl_reg(self, value):
-        """分析流量控制管理寄存器"""
-        result = []
-        result.append("  位元分析:")
-        result.append(f"    [0] TX 流量控制: {'啟用' if value & 1 else '停用'}")
-        result.append(f"    [1] RX 流量控制: {'啟用' if value & (1<<1) else '停用'}")
-        result.append(f"    [2] 暫停幀生成: {'啟用' if value & (1<<2) else '停用'}")
-        result.append(f"    [3] 暫停幀檢測: {'啟用' if value & (1<<3) else '停用'}")
-        result.append(f"    [15:8] 暫停時間: {(value >> 8) & 0xFF}")
-        
-        return result
-    
-    def _decode_speed(self, speed_code):
-        """解碼速度值"""
-        speeds = {
-            0: '10 Mbps',
-            1: '100 Mbps', 
-            2: '1000 Mbps',
-            3: '2500 Mbps',
-            4: '5000 Mbps',
-            5: '10000 Mbps'
-        }
-        return speeds.get(speed_code, f'未知速度 ({speed_code})')
+        return REGISTER_SCHEMA.block_lines(1, self.registers)
 
 def main():
     """主程序"""
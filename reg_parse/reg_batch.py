@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+寄存器轉儲批次解碼 (命令列，不需要 tkinter)
+對目錄或萬用字元匹配到的所有轉儲文件，以進程池解析並依 reg_schema 的寄存器表解碼，
+每張板子輸出一行 JSON (JSON Lines)，最後報告每秒處理的轉儲數。
+一個文件可以包含多張板子 ("# board N" 分隔)，沒有分隔行時整個文件為一張板子。
+
+用法: python reg_batch.py dumps/ "nightly/*.txt" --out decoded.jsonl --workers 8
+"""
+
+import argparse
+import json
+import lzma
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from phy_common.batch_files import DEFAULT_PATTERNS, PATTERN_HELP, collect_files
+from phy_common.reg_dump import iter_register_dumps, open_dump_file
+from phy_common.reg_schema import REGISTER_SCHEMA
+
+# 每個進程保存的寄存器 JSON 片段數上限 (大量板子中多數寄存器的值相同)
+FRAGMENT_CACHE_SIZE = 4096
+
+_fragments = {}  # (寄存器名稱, 值) -> JSON 片段
+
+
+def register_fragment(register, value):
+    """寄存器的 JSON 片段 '"名稱": {"value": 值, "fields": {欄位名稱: 文字}}' (最近出現過的值不重新解碼與編碼)"""
+    key = (register.name, value)
+    fragment = _fragments.get(key)
+    if fragment is None:
+        decoded = register.decode(value)
+        fragment = json.dumps(register.name, ensure_ascii=False) + ': ' + json.dumps(
+            {'value': value, 'fields': {name: text for name, _, _, text in decoded.fields}}, ensure_ascii=False)
+        if len(_fragments) >= FRAGMENT_CACHE_SIZE:
+            _fragments.clear()
+        _fragments[key] = fragment
+    return fragment
+
+
+def encode_board(meta, registers, report=False, schema=REGISTER_SCHEMA):
+    """把一張板子編碼為一行 JSON
+
+    欄位依序為 meta 的內容、registers (寄存器表中的寄存器，依表中的順序)、unknown (不在表中的 {名稱: 值})，
+    report 為 True 時另有與 GUI 相同的文字報告行 report。
+    """
+    fragments = []
+    for name, register in schema.registers.items():
+        value = registers.get(name)
+        if value is not None:
+            fragments.append(register_fragment(register, value))
+    tail = {'unknown': {name: value for name, value in registers.items() if name not in schema.registers}}
+    if report:
+        tail['report'] = schema.report_lines(registers)
+    return (json.dumps(meta, ensure_ascii=False)[:-1] + ', "registers": {' + ', '.join(fragments) + '}, '
+            + json.dumps(tail, ensure_ascii=False)[1:])
+
+
+def decode_file(file_path, report=False):
+    """解碼單一文件中的所有板子，返回 (JSON Lines 的各行, 轉儲數, 秒數, 錯誤訊息)
+
+    report 為 True 時每筆記錄另外包含文字報告 (見 encode_board)。
+    """
+    start = time.perf_counter()
+    records = []
+    error = ''
+    try:
+        stream, raw, codec = open_dump_file(file_path)
+        try:
+            for board, registers, (matched, unmatched) in iter_register_dumps(stream):
+                meta = {'file': file_path, 'board': board, 'codec': codec,
+                        'lines_matched': matched, 'lines_unmatched': unmatched}
+                records.append(encode_board(meta, registers, report))
+        finally:
+            stream.close()
+            raw.close()
+    except (OSError, ValueError, EOFError, lzma.LZMAError) as e:
+        error = str(e)
+    except Exception as e:
+        # 任何單一文件的錯誤都只記錄為該文件的錯誤，不中斷整批處理
+        error = f"{type(e).__name__}: {e}"
+    return records, len(records), time.perf_counter() - start, error
+
+
+def _decode_job(job):
+    return decode_file(*job)
+
+
+def run_batch(files, out, report=False, workers=None):
+    """以進程池解碼所有文件，依文件順序把結果寫入 out；返回 (轉儲數, 錯誤列表)"""
+    jobs = [(path, report) for path in files]
+    if workers == 1 or len(files) <= 1:
+        results = map(_decode_job, jobs)
+        executor = None
+    else:
+        executor = ProcessPoolExecutor(max_workers=workers)
+        results = executor.map(_decode_job, jobs)
+
+    dumps = 0
+    errors = []
+    try:
+        for path, (records, count, _, error) in zip(files, results):
+            if error:
+                errors.append((path, error))
+            for record in records:
+                out.write(record)
+                out.write('\n')
+            dumps += count
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return dumps, errors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="寄存器轉儲批次解碼 (JSON Lines 輸出)")
+    parser.add_argument('inputs', nargs='+', help="轉儲文件、目錄或萬用字元")
+    parser.add_argument('--pattern', action='append', dest='patterns', help=PATTERN_HELP)
+    parser.add_argument('--out', default='-', help="JSON Lines 輸出文件 (預設為標準輸出)")
+    parser.add_argument('--report', action='store_true', help="每筆記錄另外包含文字報告")
+    parser.add_argument('--workers', type=int, default=None, help="進程數 (預設為 CPU 數)")
+    args = parser.parse_args(argv)
+
+    files = collect_files(args.inputs, args.patterns or DEFAULT_PATTERNS)
+    if not files:
+        print("找不到任何轉儲文件", file=sys.stderr)
+        return 2
+
+    start = time.perf_counter()
+    if args.out == '-':
+        dumps, errors = run_batch(files, sys.stdout, args.report, args.workers)
+    else:
+        with open(args.out, 'w', encoding='utf-8') as out:
+            dumps, errors = run_batch(files, out, args.report, args.workers)
+    elapsed = time.perf_counter() - start
+
+    for path, error in errors:
+        print(f"錯誤 {path}: {error}", file=sys.stderr)
+    rate = dumps / elapsed if elapsed > 0 else 0.0
+    print(f"{len(files)} 個文件, {dumps} 個轉儲, {elapsed:.2f} s, {rate:,.0f} 轉儲/秒", file=sys.stderr)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+寄存器轉儲的解析結果快取 (不需要 tkinter)
+每個文件一個 JSON 文件 (~/.cache/reg_parse)，文件指紋與最近使用時間的淘汰與 parse_counter_tool 的快取共用 phy_common.file_cache
+"""
+
+import json
+import os
+
+from phy_common.file_cache import CacheDirectory, fingerprint, same_prefix
+
+# 快取目錄的預設總大小上限
+CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+
+class RegisterCache(CacheDirectory):
+    """寄存器轉儲的解析結果快取
+
+    文件被追加時只解析追加的行 (後出現的值覆蓋先前的值，與完整解析相同)；總大小超過上限時刪除最久未使用的項目。
+    """
+
+    suffix = '.json'
+
+    def __init__(self, directory=None, max_bytes=CACHE_MAX_BYTES):
+        super().__init__(directory or os.path.join(os.path.expanduser('~'), '.cache', 'reg_parse'), max_bytes)
+
+    def entry_path(self, file_path):
+        return super().entry_path(os.path.abspath(file_path))
+
+    def load(self, file_path, codec):
+        """返回 (快取項目, 狀態)；狀態為 'hit'、'append' (從 entry['fingerprint']['line_end'] 繼續) 或 'miss'"""
+        path = self.entry_path(file_path)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            cached = entry['fingerprint']
+            if entry['path'] != os.path.abspath(file_path):
+                return None, 'miss'
+            current = fingerprint(file_path)
+            if current == cached:
+                status = 'hit'
+            elif (codec != 'plain' or cached['line_end'] is None or current['size'] <= cached['size']
+                    or not same_prefix(file_path, cached)):
+                return None, 'miss'
+            else:
+                status = 'append'
+            os.utime(path)
+            return entry, status
+        except (OSError, ValueError, KeyError, TypeError):
+            return None, 'miss'
+
+    def save(self, file_path, file_fingerprint, registers, line_stats):
+        """保存 file_path 的解析結果 (file_fingerprint 為解析前取得的指紋) 並刪除超出大小上限的舊項目"""
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            path = self.entry_path(file_path)
+            with open(path + '.tmp', 'w', encoding='utf-8') as f:
+                json.dump({'path': os.path.abspath(file_path), 'fingerprint': file_fingerprint,
+                           'registers': registers, 'line_stats': list(line_stats)}, f)
+            os.replace(path + '.tmp', path)
+        except OSError:
+            return
+        self.evict()
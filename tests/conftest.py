@@ -0,0 +1,28 @@
+"""
+測試共用設定
+與 benchmarks 的腳本相同，把儲存庫根目錄 (共用的 phy_common)、兩個工具與測試日誌產生器 (benchmarks/loggen.py)
+的目錄加入 sys.path
+"""
+
+import itertools
+import os
+import sys
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in [ROOT_DIR] + [os.path.join(ROOT_DIR, name) for name in ('parse_counter_tool', 'reg_parse', 'benchmarks')]:
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from loggen import counter_blocks  # noqa: E402
+
+
+@pytest.fixture
+def counter_log(tmp_path):
+    """寫出 loggen 產生的計數器日誌，返回文件路徑: counter_log(區塊數, ports=4, **counter_blocks 的參數)"""
+    def write(blocks, ports=4, name='counter.log', **options):
+        path = tmp_path / name
+        path.write_text(''.join(itertools.islice(counter_blocks(ports, **options), blocks)), encoding='utf-8')
+        return str(path)
+    return write
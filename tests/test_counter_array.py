@@ -0,0 +1,104 @@
+"""CounterArray 的差值、速率與計數器溢位回繞"""
+
+import math
+
+import numpy as np
+
+from counter_array import CounterArray
+from counter_parser import iter_counter_blocks
+from counter_store import CounterTimeSeries
+
+
+def make_store(snapshots):
+    """snapshots: [(介面, 時間字串或 None, {SS 計數器名稱: 值})]"""
+    lines = []
+    for interface, timestamp, counters in snapshots:
+        if timestamp:
+            lines.append(timestamp)
+        lines.append(f"==========PHY[{interface}] COUNTER===========")
+        lines.append("| <<SS Counter>>")
+        lines.extend(f"| {name:<27}:{value:09d} |" for name, value in counters.items())
+    store = CounterTimeSeries()
+    store.extend(iter_counter_blocks('\n'.join(lines) + '\n'))
+    return store
+
+
+def column(counter_array, interface, name):
+    return counter_array.column_index(interface, 'SS', name)
+
+
+def test_rows_are_per_interface_snapshots():
+    store = make_store([('eth0', None, {'Rx Start': 1}), ('eth1', None, {'Rx Start': 10}),
+                        ('eth0', None, {'Rx Start': 2, 'Tx Start': 7})])
+    counter_array = CounterArray.from_time_series(store)
+    assert len(counter_array) == 2
+    assert counter_array.values[:, column(counter_array, 'eth0', 'Rx Start')].tolist() == [1, 2]
+    assert counter_array.values[:, column(counter_array, 'eth1', 'Rx Start')].tolist() == [10, 0]
+    assert counter_array.present[:, column(counter_array, 'eth1', 'Rx Start')].tolist() == [True, False]
+    assert counter_array.present[:, column(counter_array, 'eth0', 'Tx Start')].tolist() == [False, True]
+
+
+def test_deltas_wrap_at_inferred_width():
+    store = make_store([('eth0', None, {'Rx Start': (1 << 32) - 10, 'Tx Start': (1 << 36) - 1}),
+                        ('eth0', None, {'Rx Start': 5, 'Tx Start': 1})])
+    counter_array = CounterArray.from_time_series(store)
+    rx = column(counter_array, 'eth0', 'Rx Start')
+    tx = column(counter_array, 'eth0', 'Tx Start')
+    assert counter_array.column_bits()[[rx, tx]].tolist() == [32, 36]
+
+    deltas = counter_array.deltas()
+    assert deltas[0, rx] == 15
+    assert deltas[0, tx] == 2
+    assert counter_array.deltas(wrap=False)[0, rx] == 5 - ((1 << 32) - 10)
+    assert counter_array.deltas(counter_bits=64)[0, rx] == (1 << 64) - (1 << 32) + 15
+
+
+def test_full_range_64_bit_values():
+    top = (1 << 64) - 1
+    store = make_store([('eth0', None, {'Rx Start': top - 4, 'Tx Start': 1 << 63}),
+                        ('eth0', None, {'Rx Start': 5, 'Tx Start': top})])
+    counter_array = CounterArray.from_time_series(store)
+    rx = column(counter_array, 'eth0', 'Rx Start')
+    tx = column(counter_array, 'eth0', 'Tx Start')
+    assert counter_array.values[:, rx].tolist() == [top - 4, 5]
+    assert counter_array.present.all()
+    assert counter_array.column_bits()[[rx, tx]].tolist() == [64, 64]
+
+    deltas = counter_array.deltas()
+    assert deltas[0, rx] == 10
+    assert deltas[0, tx] == float((1 << 63) - 1)
+    assert counter_array.deltas(wrap=False)[0, rx] == -float(top - 9)
+
+
+def test_missing_values_give_nan():
+    store = make_store([('eth0', None, {'Rx Start': 1}), ('eth0', None, {'Tx Start': 2}),
+                        ('eth0', None, {'Rx Start': 4, 'Tx Start': 3})])
+    counter_array = CounterArray.from_time_series(store)
+    deltas = counter_array.deltas()
+    rx = column(counter_array, 'eth0', 'Rx Start')
+    tx = column(counter_array, 'eth0', 'Tx Start')
+    assert np.isnan(deltas[:, rx]).all()
+    assert math.isnan(deltas[0, tx]) and deltas[1, tx] == 1
+
+
+def test_rates_use_timestamps():
+    store = make_store([('eth0', '2024-01-01 00:00:00', {'Rx Start': 100}),
+                        ('eth0', '2024-01-01 00:00:04', {'Rx Start': 500}),
+                        ('eth0', None, {'Rx Start': 600})])
+    counter_array = CounterArray.from_time_series(store)
+    rx = column(counter_array, 'eth0', 'Rx Start')
+    rates = counter_array.rates()
+    assert rates[0, rx] == 100
+    assert math.isnan(rates[1, rx])
+    assert counter_array.rates(default_interval=2.0)[1, rx] == 50
+
+
+def test_save_and_load_memory_map(tmp_path):
+    store = make_store([('eth0', None, {'Rx Start': 1}), ('eth1', None, {'Rx Start': 2})])
+    counter_array = CounterArray.from_time_series(store)
+    counter_array.save(str(tmp_path))
+    loaded = CounterArray.load(str(tmp_path))
+    assert isinstance(loaded.values, np.memmap)
+    assert loaded.columns == counter_array.columns
+    assert np.array_equal(loaded.values, counter_array.values)
+    assert np.array_equal(loaded.present, counter_array.present)
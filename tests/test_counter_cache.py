@@ -0,0 +1,60 @@
+"""解析結果的快取: 命中、追加後只解析新內容，以及與完整解析相同的結果"""
+
+import pytest
+
+from counter_cache import CounterCache, parse_file_cached
+from counter_parser import iter_counter_file
+from counter_store import CounterTimeSeries
+
+
+def block(index, layout):
+    """第 index 個區塊的文字；layout 為時間戳相對於標頭的位置"""
+    stamp = f"2024-01-01 00:00:{index:02d}"
+    header = f"===== PHY[eth{index % 2}] COUNTER ====="
+    lines = [header, "| <<SS Counter>>", f"| Rx Start                   :{index:09d} |"]
+    if layout == 'before':
+        lines.insert(0, stamp)
+    elif layout == 'after':
+        lines.insert(1, stamp)
+    elif layout == 'both':
+        lines[:1] = [stamp, header, f"2024-01-01 00:01:{index:02d}"]
+    return '\n'.join(lines) + '\n'
+
+
+def signature(store):
+    return {name: (list(series.block_indexes), list(map(repr, series.timestamps)),
+                   {key: (list(column), list(series.present[key])) for key, column in series.columns.items()})
+            for name, series in store.interfaces.items()}
+
+
+@pytest.mark.parametrize('layout, status', [('none', 'append'), ('before', 'append'),
+                                            ('after', 'append'), ('both', 'miss')])
+def test_append_matches_full_parse(tmp_path, layout, status):
+    path = tmp_path / 'run.log'
+    cache = CounterCache(str(tmp_path / 'cache'))
+    path.write_text(''.join(block(i, layout) for i in range(4)), encoding='utf-8')
+    assert parse_file_cached(str(path), cache)[1] == 'miss'
+    assert parse_file_cached(str(path), cache)[1] == 'hit'
+
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(''.join(block(i, layout) for i in range(4, 7)))
+    store, actual = parse_file_cached(str(path), cache)
+    # 標頭前後都有時間戳時無法從標頭繼續，改為完整解析
+    assert actual == status
+
+    full = CounterTimeSeries()
+    full.extend(iter_counter_file(str(path)))
+    assert len(store) == 7
+    assert signature(store) == signature(full)
+    assert signature(parse_file_cached(str(path), cache)[0]) == signature(full)
+
+
+def test_rewritten_file_is_a_miss(tmp_path):
+    path = tmp_path / 'run.log'
+    cache = CounterCache(str(tmp_path / 'cache'))
+    path.write_text(''.join(block(i, 'before') for i in range(4)), encoding='utf-8')
+    parse_file_cached(str(path), cache)
+    path.write_text(''.join(block(i + 1, 'before') for i in range(5)), encoding='utf-8')
+    store, status = parse_file_cached(str(path), cache)
+    assert status == 'miss'
+    assert store.interfaces['eth1'].columns[('SS', 'Rx Start')].tolist() == [1, 3, 5]
@@ -0,0 +1,64 @@
+"""計數器日誌批次檢查: 壓縮文件與未壓縮的結果相同，壞的文件成為該文件的錯誤"""
+
+import bz2
+import gzip
+import lzma
+
+import counter_cli
+from counter_cli import run_batch, summarize_file
+
+COMPRESSORS = (('gzip', '.gz', gzip.compress), ('bz2', '.bz2', bz2.compress), ('xz', '.xz', lzma.compress))
+
+
+def without(summary, *keys):
+    return {key: value for key, value in summary.items() if key not in keys}
+
+
+def test_compressed_logs_summarize_the_same(tmp_path, counter_log):
+    path = counter_log(120, ports=3, error_rate=0.2, seed=2)
+    expected = summarize_file(path)
+    assert (expected['blocks'], expected['interfaces'], expected['error']) == (120, 3, '')
+    assert expected['failed_blocks'] and expected['failures']
+
+    with open(path, 'rb') as f:
+        data = f.read()
+    for codec, suffix, compress in COMPRESSORS:
+        compressed = tmp_path / ('counter.log' + suffix)
+        compressed.write_bytes(compress(data))
+        summary = summarize_file(str(compressed))
+        assert summary['codec'] == codec
+        assert without(summary, 'file', 'codec', 'size', 'seconds') == without(
+            expected, 'file', 'codec', 'size', 'seconds')
+
+
+def test_bad_archives_are_per_file_errors(tmp_path, counter_log):
+    good = counter_log(40)
+    with open(good, 'rb') as f:
+        raw = f.read()
+    data = lzma.compress(raw)
+    truncated = tmp_path / 'truncated.log.xz'
+    truncated.write_bytes(data[:len(data) // 2])
+    corrupt = tmp_path / 'corrupt.log.xz'
+    corrupt.write_bytes(data[:12] + bytes(200))
+    truncated_gzip = tmp_path / 'truncated.log.gz'
+    truncated_gzip.write_bytes(gzip.compress(raw)[:100])
+
+    summaries = run_batch([good, str(truncated), str(corrupt), str(truncated_gzip)], workers=1)
+    assert [bool(summary['error']) for summary in summaries] == [False, True, True, True]
+    assert summaries[0]['blocks'] == 40
+
+
+def test_unexpected_errors_do_not_stop_the_batch(counter_log, monkeypatch):
+    good = counter_log(10, name='good.log')
+    bad = counter_log(10, name='bad.log')
+    iter_blocks = counter_cli.iter_counter_file_mmap
+
+    def iter_counter_file_mmap(path):
+        if path == bad:
+            raise OverflowError("value too large")
+        return iter_blocks(path)
+
+    monkeypatch.setattr(counter_cli, 'iter_counter_file_mmap', iter_counter_file_mmap)
+    summaries = run_batch([good, bad, good], workers=1)
+    assert [summary['error'] for summary in summaries] == ['', 'OverflowError: value too large', '']
+    assert [summary['blocks'] for summary in summaries] == [10, 0, 10]
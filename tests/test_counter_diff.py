@@ -0,0 +1,84 @@
+"""SnapshotDiff: 兩側對齊、計數器溢位回繞的增量與守恆規則的違反"""
+
+import itertools
+
+from counter_diff import SORT_DELTA, SnapshotDiff
+from counter_parser import iter_counter_blocks
+from counter_store import CounterTimeSeries
+from loggen import COUNTER_LINES, counter_blocks
+
+
+def make_store(*texts):
+    store = CounterTimeSeries()
+    store.extend(iter_counter_blocks(''.join(texts)))
+    return store
+
+
+def set_first(text, name, value):
+    """把區塊文字中第一個名稱為 name 的計數器改為 value"""
+    lines = text.split('\n')
+    for i, line in enumerate(lines):
+        if line.startswith(f"| {name} ") and ':' in line:
+            lines[i] = f"| {name:<27}:{value:09d} |"
+            return '\n'.join(lines)
+    raise AssertionError(name)
+
+
+def find(diff, interface, counter_type, name):
+    for position in diff.select():
+        row = diff.row(position)
+        if row[:3] == (interface, counter_type, name):
+            return row
+    return None
+
+
+def test_consecutive_clean_snapshots_conserve():
+    store = make_store(*itertools.islice(counter_blocks(2), 6))
+    diff = SnapshotDiff(store, store, 0, -1)
+    compared, changed, broken, interfaces = diff.summary()
+    assert diff.interfaces == ['eth0.0', 'eth0.1']
+    assert compared == 2 * len(COUNTER_LINES) and changed and not broken and not interfaces
+
+
+def test_wrap_around_delta():
+    text = "==========PHY[eth0.0] COUNTER===========\n| <<SS Counter>>\n"
+    before = make_store(text + f"| Rx Start :{(1 << 32) - 5} |\n| Tx Start :{(1 << 36) - 1} |\n")
+    after = make_store(text + "| Rx Start :000000010 |\n| Tx Start :000000001 |\n")
+    diff = SnapshotDiff(before, after)
+    assert find(diff, 'eth0.0', 'SS', 'Rx Start')[3:6] == ((1 << 32) - 5, 10, 15)
+    assert find(diff, 'eth0.0', 'SS', 'Tx Start')[5] == 2
+    assert find(SnapshotDiff(before, after, wrap=False), 'eth0.0', 'SS', 'Rx Start')[5] == 15 - (1 << 32)
+
+
+def test_64_bit_values_and_wrap():
+    text = "==========PHY[eth0.0] COUNTER===========\n| <<SS Counter>>\n"
+    before = make_store(text + f"| Rx Start :{(1 << 64) - 5} |\n| Tx Start :{1 << 63} |\n")
+    after = make_store(text + "| Rx Start :000000010 |\n" + f"| Tx Start :{(1 << 64) - 1} |\n")
+    diff = SnapshotDiff(before, after)
+    assert find(diff, 'eth0.0', 'SS', 'Rx Start')[3:6] == ((1 << 64) - 5, 10, 15)
+    assert find(diff, 'eth0.0', 'SS', 'Tx Start')[3:6] == (1 << 63, (1 << 64) - 1, (1 << 63) - 1)
+
+
+def test_drop_breaks_conservation_downstream():
+    first, second = itertools.islice(counter_blocks(1), 2)
+    value = next(iter_counter_blocks(second)).data['FCM']['Tx to Line side_S']
+    before = make_store(first)
+    after = make_store(set_first(second, 'Tx to Line side_S', value - 7))
+    diff = SnapshotDiff(before, after)
+
+    broken = {diff.row(position)[1:3] for position in diff.select(only_broken=True)}
+    # 少算的階段與其下一階段的增量都不再等於上游的增量
+    assert broken == {('FCM', 'Tx to Line side_S'), ('FCM', 'Tx to Line side_T')}
+    assert diff.summary()[2:] == (2, 1)
+
+
+def test_select_filters_and_sorts():
+    store = make_store(*itertools.islice(counter_blocks(2), 4))
+    diff = SnapshotDiff(store, store, 0, -1)
+    rows = [diff.row(position) for position in diff.select(interface_filter='0.1', counter_filter='pause')]
+    assert {row[0] for row in rows} == {'eth0.1'}
+    assert {row[2] for row in rows} == {'Pause from Line side', 'Pause to System side',
+                                        'Pause from System side', 'Pause to Line side'}
+
+    deltas = [abs(diff.row(position)[5]) for position in diff.select(only_changed=True, sort=SORT_DELTA)]
+    assert deltas == sorted(deltas, reverse=True) and 0 not in deltas
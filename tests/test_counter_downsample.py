@@ -0,0 +1,75 @@
+"""降採樣: 增量的溢位與清除、min-max 金字塔的查詢與 LTTB"""
+
+from array import array
+
+import numpy as np
+import pytest
+
+from counter_downsample import DELTA, LTTB, SeriesPyramid, lttb, series_values
+
+
+def column(values):
+    present = bytearray(value is not None for value in values)
+    return array('Q', [value or 0 for value in values]), present
+
+
+def test_delta_reset_is_not_a_wrap():
+    delta = series_values(*column([10, 20, None, 30, 5]), kind=DELTA)
+    assert np.isnan(delta[1:3]).all()
+    assert delta[[0, 3]].tolist() == [10.0, 5.0]
+
+
+@pytest.mark.parametrize('bits', [32, 36])
+def test_delta_wrap_near_width_limit(bits):
+    top = (1 << bits) - 5
+    delta = series_values(*column([top - 10, top, 3]), kind=DELTA)
+    assert delta.tolist() == [10.0, 8.0]
+
+
+def test_delta_full_64_bit_range():
+    delta = series_values(*column([(1 << 64) - 2, 1, 1 << 62, 4]), kind=DELTA)
+    assert delta.tolist() == [3.0, float((1 << 62) - 1), 4.0]
+
+
+def test_values_mark_missing_as_nan():
+    values = series_values(*column([1, None, (1 << 64) - 1]))
+    assert values[0] == 1.0 and np.isnan(values[1]) and values[2] == float((1 << 64) - 1)
+
+
+def test_pyramid_keeps_range_extremes():
+    rng = np.random.default_rng(3)
+    values = rng.normal(size=1000)
+    values[rng.choice(1000, 50, replace=False)] = np.nan
+    pyramid = SeriesPyramid(values)
+    start, end, buckets = 37, 911, 20
+    index = pyramid.minmax(start, end, buckets)
+    assert np.all(np.diff(index) > 0) and index[0] == start and index[-1] == end - 1
+    assert 2 * buckets <= len(index) <= 4 * buckets + 2
+    # 範圍內的最小值與最大值一定被選入
+    window = values[start:end]
+    assert start + np.nanargmin(window) in index and start + np.nanargmax(window) in index
+
+    x, y = pyramid.points(start, end, buckets)
+    assert not np.isnan(y).any() and np.array_equal(y, values[x])
+
+
+def test_pyramid_returns_every_point_for_short_ranges():
+    pyramid = SeriesPyramid(np.arange(10, dtype=np.float64))
+    assert pyramid.minmax(2, 8, 5).tolist() == list(range(2, 8))
+    assert len(pyramid.minmax(8, 8, 5)) == 0
+
+
+def test_lttb_keeps_endpoints_and_spike():
+    x = np.arange(500)
+    y = np.zeros(500)
+    y[250] = 100.0
+    xs, ys = lttb(x, y, 20)
+    assert len(xs) == 20 and xs[0] == 0 and xs[-1] == 499
+    assert 250 in xs and ys.max() == 100.0
+    assert len(lttb(x[:10], y[:10], 20)[0]) == 10
+
+
+def test_lttb_points_from_pyramid():
+    values = np.sin(np.linspace(0, 20, 5000))
+    x, y = SeriesPyramid(values).points(0, 5000, 50, LTTB)
+    assert len(x) == 50 and np.all(np.diff(x) > 0) and np.array_equal(y, values[x])
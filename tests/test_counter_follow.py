@@ -0,0 +1,83 @@
+"""持續追蹤: 追加 (包括不完整的行)、檢查點續讀、截斷與輪替"""
+
+import os
+
+from counter_follow import CounterLogFollower
+
+
+def block(interface, value):
+    return f"===== PHY[{interface}] COUNTER =====\n| <<SS Counter>>\n| Rx Start :{value} |\n"
+
+
+def values(blocks):
+    return [(b.interface, b.data['SS'].get('Rx Start')) for b in blocks]
+
+
+def append(path, text):
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(text)
+
+
+def test_append_waits_for_complete_lines_and_blocks(tmp_path):
+    path = str(tmp_path / 'live.log')
+    append(path, block('eth0', 1) + block('eth1', 2))
+    follower = CounterLogFollower(path)
+    # 最後一個區塊要等到下一個標頭出現才算完成
+    assert values(follower.poll()) == [('eth0', 1)]
+
+    append(path, "| Rx End :3")
+    assert follower.poll() == [] and follower.pending_bytes == len("| Rx End :3")
+    append(path, " |\n" + block('eth0', 4))
+    blocks = follower.poll()
+    assert values(blocks) == [('eth1', 2)] and blocks[0].data['SS']['Rx End'] == 3
+    assert blocks[0].offset == len(block('eth0', 1))
+    follower.close()
+
+
+def test_checkpoint_resumes_at_open_block(tmp_path):
+    path = str(tmp_path / 'live.log')
+    checkpoint_path = str(tmp_path / 'checkpoint.json')
+    append(path, block('eth0', 1) + block('eth1', 2))
+    follower = CounterLogFollower(path)
+    follower.poll()
+    follower.save_checkpoint(checkpoint_path)
+    follower.close()
+
+    append(path, block('eth0', 3))
+    resumed = CounterLogFollower.load_checkpoint(checkpoint_path)
+    blocks = resumed.poll()
+    assert values(blocks) == [('eth1', 2)] and blocks[0].index == 1
+    resumed.close()
+
+
+def test_truncate_restarts_from_beginning(tmp_path):
+    path = str(tmp_path / 'live.log')
+    append(path, block('eth0', 1) + block('eth1', 2))
+    follower = CounterLogFollower(path)
+    follower.poll()
+
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(block('eth2', 5))
+    # 截斷時結束未完成的區塊，新內容的最後一個區塊仍在等待
+    assert values(follower.poll()) == [('eth1', 2)]
+    append(path, block('eth3', 6))
+    blocks = follower.poll()
+    assert values(blocks) == [('eth2', 5)] and blocks[0].offset == 0
+    follower.close()
+
+
+def test_rotate_drains_old_file_then_reads_new_one(tmp_path):
+    path = str(tmp_path / 'live.log')
+    append(path, block('eth0', 1) + block('eth1', 2))
+    follower = CounterLogFollower(path)
+    follower.poll()
+
+    # 輪替前寫入的最後一行沒有換行，輪替後舊文件中的內容仍要讀完
+    append(path, "| Rx End :3")
+    os.rename(path, path + '.1')
+    append(path, block('eth2', 4) + block('eth3', 5))
+    blocks = follower.poll()
+    assert values(blocks) == [('eth1', 2), ('eth2', 4)]
+    assert blocks[0].data['SS']['Rx End'] == 3
+    assert follower.checkpoint()['inode'] == os.stat(path).st_ino
+    follower.close()
@@ -0,0 +1,81 @@
+"""歷史資料庫: 計數器與寄存器的寫入、時間範圍與每日時段查詢"""
+
+import gzip
+import lzma
+
+from counter_history import HistoryStore, ingest_counter_file, iter_register_samples, parse_daily
+from counter_io import iter_counter_file_mmap
+from counter_parser import iter_counter_blocks
+from counter_store import CounterTimeSeries
+
+DUMP = "RG_FCM_CTRL         : 0x00000007\nnot a register\nRG_SS_LINK_STATUS   : 0x0800b231\n"
+
+
+def test_register_dumps_are_decompressed(tmp_path):
+    (tmp_path / 'dump.txt').write_text(DUMP, encoding='utf-8')
+    with gzip.open(tmp_path / 'dump.txt.gz', 'wt', encoding='utf-8') as f:
+        f.write(DUMP)
+    with lzma.open(tmp_path / 'dump.txt.xz', 'wt', encoding='utf-8') as f:
+        f.write(DUMP)
+    expected = [('RG_FCM_CTRL', 5.0, 7), ('RG_SS_LINK_STATUS', 5.0, 0x0800b231)]
+    for name in ('dump.txt', 'dump.txt.gz', 'dump.txt.xz'):
+        assert list(iter_register_samples(str(tmp_path / name), 5.0)) == expected
+
+
+def test_register_samples_query(tmp_path):
+    path = tmp_path / 'dump.txt.gz'
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        f.write(DUMP)
+    with HistoryStore(str(tmp_path / 'history.db')) as history:
+        assert history.ingest_registers(iter_register_samples(str(path), 100.0), 'board1')[1] == 2
+        assert history.query('register', 'RG_FCM_CTRL') == [('board1', '', '', 'RG_FCM_CTRL', 100.0, 7)]
+        assert history.query('register', 'RG_MISSING') == []
+
+
+def test_counter_time_range_and_daily_window(tmp_path, counter_log):
+    # 每輪 (2 個介面) 增加一秒，從 2024-01-01 00:00:00 開始
+    path = counter_log(20, ports=2, timestamps=True)
+    with HistoryStore(str(tmp_path / 'history.db')) as history:
+        assert ingest_counter_file(history, path, 'dut') == 20 * 30
+        start = 1704067200
+        rows = history.query('counter', 'Rx Start', 'SS', interface='eth0.1', start=start + 2, end=start + 5)
+        assert [row[4] for row in rows] == [start + 2, start + 3, start + 4]
+        assert {row[:4] for row in rows} == {('dut', 'eth0.1', 'SS', 'Rx Start')}
+
+        count, low, high, first, last = history.aggregate('counter', 'Rx Start', 'SS', device='dut')
+        assert (count, first, last) == (20, start, start + 9)
+        assert low <= high
+
+        # 跨越午夜的每日時段 23:59:58 ~ 00:00:03: 前三輪
+        assert history.aggregate('counter', 'Rx Start', 'SS', daily=(86400 - 2, 3))[0] == 6
+
+
+def test_parse_daily():
+    assert parse_daily('02:00-04:00') == (7200, 14400)
+    assert parse_daily('23:30 - 01:00') == (84600, 3600)
+    assert parse_daily('') is None
+
+
+def test_ingest_into_existing_run(tmp_path, counter_log):
+    # 接收伺服器分批寫入同一次執行
+    path = counter_log(4, ports=2)
+    with HistoryStore(str(tmp_path / 'history.db')) as history:
+        run = history.start_run('dut', 'counter', 'server')
+        store = CounterTimeSeries()
+        store.extend(iter_counter_file_mmap(path))
+        history.ingest_store(store, 'dut', run=run)
+        history.ingest_store(store, 'dut', run=run)
+        assert history.conn.execute('SELECT COUNT(*), SUM(rows) FROM runs').fetchone() == (1, 2 * 4 * 30)
+
+
+def test_full_range_64_bit_counters(tmp_path):
+    top = (1 << 64) - 1
+    lines = []
+    for value in (5, 1 << 63, top):
+        lines += ["==========PHY[eth0] COUNTER===========", "| <<SS Counter>>", f"| Tx Start :{value} |"]
+    store = CounterTimeSeries()
+    store.extend(iter_counter_blocks('\n'.join(lines) + '\n'))
+    with HistoryStore(str(tmp_path / 'history.db')) as history:
+        history.ingest_store(store, 'dut')
+        assert [row[5] for row in history.query('counter', 'Tx Start', 'SS')] == [5, 1 << 63, top]
+        assert history.aggregate('counter', 'Tx Start', 'SS')[:3] == (3, 5, top)
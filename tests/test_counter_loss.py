@@ -0,0 +1,51 @@
+"""封包遺失定位: 階段表、逐窗口分析與一次分析整個日誌一致、前 K 名與壞的壓縮文件"""
+
+import lzma
+
+import pytest
+
+from counter_io import iter_counter_file_mmap
+from counter_loss import DELTA, LOSS_STAGES, SNAPSHOT, LossRanking, analyze_file, analyze_store, stage_label
+from counter_store import CounterTimeSeries
+
+
+def test_stages_include_line_side_tx():
+    labels = [stage_label(stage) for stage in LOSS_STAGES]
+    assert 'TX LS [Before EF] Tx to Line side_S → LS [After EF] Tx to Line side_S' in labels
+    assert 'RX LS [Before EF] Rx from Line side_S → LS [After EF] Rx from Line side_S' in labels
+    assert len(labels) == len(set(labels))
+
+
+def test_ranking_keeps_top_k():
+    ranking = LossRanking(3)
+    for loss in (5, 1, 9, 7, 3, 9):
+        ranking.push(loss, {'loss': loss})
+    assert [item['loss'] for item in ranking.results()] == [9, 9, 7]
+
+
+@pytest.mark.parametrize('mode', [SNAPSHOT, DELTA])
+def test_windows_match_whole_log(counter_log, mode):
+    path = counter_log(300, ports=3, error_rate=0.2, seed=5)
+    store = CounterTimeSeries()
+    store.extend(iter_counter_file_mmap(path))
+    ranking = LossRanking(10)
+    totals = analyze_store(store, path, ranking, mode)
+
+    for window in (7, 100, 1000):
+        items, stats, snapshots, _, error = analyze_file(path, 10, mode, window=window)
+        assert (snapshots, error) == (300, '')
+        assert items == ranking.results()
+        assert dict(stats) == totals
+    assert totals
+
+
+def test_bad_archive_is_an_error(tmp_path, counter_log):
+    with open(counter_log(50), 'rb') as f:
+        data = lzma.compress(f.read())
+    truncated = tmp_path / 'truncated.log.xz'
+    truncated.write_bytes(data[:len(data) // 2])
+    corrupt = tmp_path / 'corrupt.log.xz'
+    corrupt.write_bytes(data[:12] + bytes(200))
+    # EOFError 與 lzma.LZMAError 成為該文件的錯誤訊息，不中止整個報告
+    assert analyze_file(str(truncated))[4]
+    assert analyze_file(str(corrupt))[4]
@@ -0,0 +1,102 @@
+"""counter_parser 的串流解析與原本 parse_data 的解析結果一致，mmap 與平行解析與依序解析一致"""
+
+import itertools
+
+from bench_counter_tokenizer import legacy_parse
+from counter_io import iter_counter_file_mmap
+from counter_parallel import parse_file_parallel
+from counter_parser import iter_counter_blocks, iter_counter_file
+from counter_store import CounterTimeSeries
+from loggen import counter_blocks
+
+
+def block_signature(block):
+    return block.interface, block.index, block.timestamp, block.data, block.unmatched
+
+
+def store_signature(store):
+    return {name: (list(series.block_indexes), list(map(repr, series.timestamps)),
+                   {key: (list(column), list(series.present[key])) for key, column in series.columns.items()})
+            for name, series in store.interfaces.items()}
+
+
+def test_blocks_match_legacy_parse():
+    # 含掉包與無法解析的行
+    for text in itertools.islice(counter_blocks(3, error_rate=0.5), 60):
+        blocks = list(iter_counter_blocks(text))
+        assert len(blocks) == 1
+        assert blocks[0].data == legacy_parse(text)
+
+
+def test_unmatched_lines_are_kept():
+    text = "==========PHY[eth0.0] COUNTER===========\n| <<SS Counter>>\n| Rx Start   :  ???????? |\n"
+    block, = iter_counter_blocks(text)
+    assert block.unmatched == [('SS', '| Rx Start   :  ???????? |')]
+    assert block.is_empty()
+
+
+def test_timestamp_before_or_after_header():
+    header = "==========PHY[eth0.0] COUNTER===========\n| <<SS Counter>>\n| Rx Start :000000001 |\n"
+    before, = iter_counter_blocks("2024-01-01 00:00:05\n" + header)
+    after, = iter_counter_blocks(header.replace("\n", "\n2024-01-01 00:00:05\n", 1))
+    assert before.timestamp == after.timestamp == 1704067205.0
+
+
+def test_mmap_matches_text_parse(counter_log):
+    path = counter_log(200, error_rate=0.1, timestamps=True)
+    expected = [block_signature(block) for block in iter_counter_file(path)]
+    # 很小的讀取塊，區塊會跨越多個塊
+    blocks = list(iter_counter_file_mmap(path, chunk_size=4096))
+    assert [block_signature(block) for block in blocks] == expected
+    with open(path, 'rb') as f:
+        content = f.read()
+    assert all(content.startswith(b'==', block.offset) for block in blocks)
+
+
+def test_parallel_matches_serial(counter_log):
+    path = counter_log(400, ports=6, error_rate=0.1, timestamps=True)
+    serial = CounterTimeSeries()
+    serial.extend(iter_counter_file(path))
+    parallel = parse_file_parallel(path, workers=3, min_parallel_bytes=0)
+    assert len(parallel) == 400
+    assert store_signature(parallel) == store_signature(serial)
+
+
+def test_full_range_64_bit_values():
+    text = ("==========PHY[eth0.0] COUNTER===========\n| <<SS Counter>>\n"
+            "| Tx Start :18446744073709551615 |\n| Rx Start :0 |\n| Tx End :18446744073709551616 |\n"
+            "| Rx End : 99999999999999999999\n")
+    block, = iter_counter_blocks(text)
+    assert block.data['SS'] == {'Tx Start': (1 << 64) - 1, 'Rx Start': 0}
+    # 超出 64 位元的值不是計數器
+    assert [line for _, line in block.unmatched] == ['| Tx End :18446744073709551616 |',
+                                                     '| Rx End : 99999999999999999999']
+
+
+def test_store_keeps_full_range_values_and_presence():
+    text = "==========PHY[eth0.0] COUNTER===========\n| <<SS Counter>>\n| Tx Start :18446744073709551615 |\n"
+    store = CounterTimeSeries()
+    store.extend(iter_counter_blocks(text))
+    assert store.snapshot('eth0.0')['SS'] == {'Tx Start': (1 << 64) - 1}
+    store.extend(iter_counter_blocks(text.replace('Tx Start', 'Tx Other')))
+    series = store.interfaces['eth0.0']
+    assert list(series.present[('SS', 'Tx Start')]) == [1, 0]
+    assert store.snapshot('eth0.0')['SS'] == {'Tx Other': (1 << 64) - 1}
+    # 移除最後一個快照時，只在該快照出現的欄位一併移除
+    store.pop_block()
+    assert ('SS', 'Tx Other') not in series.columns
+    assert list(series.columns[('SS', 'Tx Start')]) == [(1 << 64) - 1]
+
+
+def test_series_version_changes_when_last_snapshot_is_replaced():
+    text = "==========PHY[eth0.0] COUNTER===========\n| <<SS Counter>>\n| Tx Start :1 |\n"
+    store = CounterTimeSeries()
+    store.extend(iter_counter_blocks(text * 2))
+    series = store.interfaces['eth0.0']
+    column = series.columns[('SS', 'Tx Start')]
+    version = series.version
+    # 重新解析最後一個區塊: 長度與欄位物件不變，內容改變
+    store.pop_block()
+    store.extend(iter_counter_blocks(text.replace(':1 |', ':2 |')))
+    assert series.columns[('SS', 'Tx Start')] is column and len(column) == 2
+    assert list(column) == [1, 2] and series.version > version
@@ -0,0 +1,61 @@
+"""驗證規則表: 單一快照的求值、check 與 CounterArray 向量化求值一致"""
+
+from counter_array import CounterArray
+from counter_io import iter_counter_file_mmap
+from counter_parser import iter_counter_blocks
+from counter_rules import DEFAULT_RULES, check_rx_validation_rules, check_tx_validation_rules, find_violations
+from counter_store import CounterTimeSeries
+from loggen import counter_blocks
+
+
+def clean_snapshot():
+    block, = iter_counter_blocks(next(counter_blocks(1)))
+    return block.data
+
+
+def test_clean_snapshot_has_no_violations():
+    assert find_violations(clean_snapshot()) == []
+
+
+def test_equals_rule_breaks_downstream_of_a_drop():
+    parsed_data = clean_snapshot()
+    parsed_data['FCM']['Tx to Line side_S'] -= 3
+    failures = DEFAULT_RULES.evaluate(parsed_data)
+    value = parsed_data['FCM']['Tx to Line side_S']
+    # 少算的計數器不等於上游，下一階段 (_T) 也不等於它
+    assert failures == {('TX', 'FCM', 'Tx to Line side_S'): value,
+                        ('TX', 'FCM', 'Tx to Line side_T'): value + 3}
+    assert check_tx_validation_rules(parsed_data, 'FCM', 'Tx to Line side_S', value)
+    assert not check_tx_validation_rules(parsed_data, 'FCM', 'Rx from System side_S',
+                                         parsed_data['FCM']['Rx from System side_S'])
+
+
+def test_zero_rule_and_missing_reference():
+    parsed_data = clean_snapshot()
+    parsed_data['FCM']['Pause from Line side'] = 2
+    assert ('RX', 'FCM', 'Pause from Line side', 2) in find_violations(parsed_data)
+    assert check_rx_validation_rules(parsed_data, 'FCM', 'Pause from Line side', 2)
+
+    # 參考計數器不存在時視為 0
+    del parsed_data['SS']['Rx Start']
+    value = parsed_data['SS']['Rx Terminal']
+    assert DEFAULT_RULES.evaluate(parsed_data)[('TX', 'SS', 'Rx Terminal')] == value
+    parsed_data['SS']['Rx Terminal'] = 0
+    assert ('TX', 'SS', 'Rx Terminal') not in DEFAULT_RULES.evaluate(parsed_data)
+
+
+def test_evaluate_array_matches_per_snapshot(counter_log):
+    path = counter_log(240, ports=3, error_rate=0.3, seed=7)
+    store = CounterTimeSeries()
+    store.extend(iter_counter_file_mmap(path))
+    labels, failed = DEFAULT_RULES.evaluate_array(CounterArray.from_time_series(store))
+
+    broken = 0
+    for interface, series in store.interfaces.items():
+        for row in range(len(series)):
+            expected = {(interface,) + key for key in DEFAULT_RULES.evaluate(series.snapshot(row))}
+            # CounterArray 的第 row 列包含所有介面的第 row 個快照
+            actual = {label for label, flag in zip(labels, failed[row]) if flag and label[0] == interface}
+            assert actual == expected
+            broken += len(expected)
+    assert broken
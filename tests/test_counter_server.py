@@ -0,0 +1,87 @@
+"""接收伺服器: 跨讀取的行切分、計數器與寄存器訊息交錯、佇列已滿時的背壓 (以 bench_server 的模擬裝置送出)"""
+
+import asyncio
+import io
+import queue
+
+from bench_server import device_payloads, tcp_device
+from counter_parser import iter_counter_blocks
+from counter_server import IngestServer
+from counter_store import CounterTimeSeries
+from phy_common.reg_dump import iter_register_dumps
+
+
+def signature(store):
+    return {name: {key: (list(column), list(series.present[key])) for key, column in series.columns.items()}
+            for name, series in store.interfaces.items()}
+
+
+async def send_split(port, data, size):
+    """每次只送出 size 個位元組，讓行與區塊跨越伺服器的多次讀取"""
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    for start in range(0, len(data), size):
+        writer.write(data[start:start + size])
+        await writer.drain()
+        await asyncio.sleep(0)
+    writer.close()
+    await writer.wait_closed()
+
+
+def test_devices_interleave_counters_and_registers():
+    payloads = [device_payloads(device, 25, ports=2) for device in range(4)]
+
+    async def run():
+        server = IngestServer(keep_stores=True)
+        port, _ = await server.start('127.0.0.1', 0)
+        await asyncio.gather(
+            *(send_split(port, ''.join(chunks).encode('utf-8'), 37 + 50 * device)
+              for device, (chunks, _) in enumerate(payloads[:2])),
+            *(tcp_device(port, chunks, []) for chunks, _ in payloads[2:]))
+        while server.stats.active:
+            await asyncio.sleep(0.01)
+        await server.stop()
+        return server
+
+    server = asyncio.run(run())
+    stats = server.stats
+    assert stats.messages == sum(count for _, count in payloads)
+    assert stats.dumps == 4 * 2 and stats.errors == 0 and stats.dropped == 0
+    for device, (chunks, _) in enumerate(payloads):
+        expected = CounterTimeSeries()
+        expected.extend(iter_counter_blocks(''.join(chunk for chunk in chunks[1:] if 'RG_' not in chunk)))
+        assert signature(server.stores[f"dut-{device}"]) == signature(expected)
+        registers = {}
+        for chunk in chunks:
+            if 'RG_' in chunk:
+                for _, values, _ in iter_register_dumps(io.StringIO(chunk)):
+                    registers.update(values)
+        assert server.registers[f"dut-{device}"] == registers
+
+
+def test_full_sink_pauses_reading():
+    chunks, count = device_payloads(0, 400, ports=2)
+    data = ''.join(chunks).encode('utf-8')
+    sink = queue.Queue(4)
+
+    async def run():
+        server = IngestServer(queue_size=8, keep_stores=True, sink=sink)
+        port, _ = await server.start('127.0.0.1', 0)
+        client = asyncio.ensure_future(send_split(port, data, 4096))
+        await asyncio.sleep(0.3)
+        # sink 與佇列都已滿: 伺服器停止讀取，訊息沒有被丟棄
+        assert sink.full() and server.messages.full()
+        assert server.stats.bytes < len(data)
+
+        received = []
+        while len(received) < count:
+            try:
+                received.append(sink.get_nowait())
+            except queue.Empty:
+                await asyncio.sleep(0.005)
+        await client
+        await server.stop()
+        return server, received
+
+    server, received = asyncio.run(run())
+    assert server.stats.messages == count and server.stats.dropped == 0
+    assert [kind for kind, _, _ in received].count('register') == server.stats.dumps
@@ -0,0 +1,68 @@
+"""計數器表格的資料模型 (不建立視窗): 追加、欄位被移除後的重建與目前快照的值"""
+
+from counter_parser import iter_counter_blocks
+from counter_store import CounterTimeSeries
+from counter_table import SORT_COUNTER, CounterTableModel
+
+
+def block(interface, **counters):
+    lines = [f"==========PHY[{interface}] COUNTER===========", "| <<SS Counter>>"]
+    lines.extend(f"| {name.replace('_', ' ')} :{value} |" for name, value in counters.items())
+    return '\n'.join(lines) + '\n'
+
+
+def add(store, *texts):
+    """依序加入區塊，區塊順序接在存儲中已有的區塊之後"""
+    series, row = store.last_block()
+    first = series.block_indexes[row] + 1 if series is not None else 0
+    for index, parsed in enumerate(iter_counter_blocks(''.join(texts)), first):
+        parsed.index = index
+        store.add_block(parsed)
+
+
+def rows(model):
+    return [model.row(position) for position in range(len(model))]
+
+
+def test_sync_appends_new_counters():
+    store = CounterTimeSeries()
+    add(store, block('eth0', Tx_Start=1))
+    model = CounterTableModel('SS')
+    model.set_store(store)
+    assert model.sync() == 0
+    model.apply()
+    assert rows(model) == [('eth0', 'Tx Start', 1)]
+
+    add(store, block('eth0', Tx_Start=2, Rx_Start=3), block('eth1', Tx_Start=4))
+    start = model.sync()
+    assert start == 1
+    model.apply(start)
+    assert rows(model) == [('eth0', 'Tx Start', 2), ('eth0', 'Rx Start', 3), ('eth1', 'Tx Start', 4)]
+    model.current_rows = {'eth0': 0}
+    assert rows(model)[:2] == [('eth0', 'Tx Start', 1), ('eth0', 'Rx Start', None)]
+
+
+def test_sync_rebuilds_when_columns_are_removed():
+    store = CounterTimeSeries()
+    add(store, block('eth0', Tx_Start=1), block('eth0', Tx_Start=2, Tx_Other=5))
+    model = CounterTableModel('SS')
+    model.set_store(store)
+    model.sync()
+    model.set_sort(SORT_COUNTER)
+    model.apply()
+    assert rows(model) == [('eth0', 'Tx Other', 5), ('eth0', 'Tx Start', 2)]
+
+    # 重新解析最後一個區塊: Tx Other 被移除，同樣數量的新欄位出現
+    store.pop_block()
+    add(store, block('eth0', Tx_Start=3, Rx_Start=6))
+    assert model.sync() == 0
+    model.apply()
+    assert rows(model) == [('eth0', 'Rx Start', 6), ('eth0', 'Tx Start', 3)]
+
+    # 介面只有一個快照時整個介面被移除
+    add(store, block('eth1', Tx_Start=7))
+    model.sync()
+    store.pop_block()
+    assert model.sync() == 0
+    model.apply()
+    assert [row[0] for row in rows(model)] == ['eth0', 'eth0']
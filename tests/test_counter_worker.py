@@ -0,0 +1,15 @@
+"""背景解析執行緒: 匹配/未匹配行數的計數"""
+
+from counter_worker import ParseWorker
+from phy_common.profiler import StageProfiler
+
+
+def test_counts_every_matched_line():
+    text = ("==========PHY[eth0] COUNTER===========\n| <<SS Counter>>\n"
+            "| Tx Start :1 |\n| Tx Start :2 |\n| Rx Start :3 |\n| Rx End : ???? |\n")
+    profiler = StageProfiler()
+    worker = ParseWorker(content=text, profiler=profiler)
+    worker.run()
+    # 同一區塊中重複的計數器行也是匹配的行
+    assert profiler.counts['lines_matched'] == 3
+    assert profiler.counts['lines_unmatched'] == 1
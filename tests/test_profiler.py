@@ -0,0 +1,32 @@
+"""StageProfiler: 各工具自己的階段顯示順序、計數與 JSON trace 匯出"""
+
+import json
+
+from phy_common.profiler import StageProfiler
+
+
+def test_summary_follows_stage_order():
+    profiler = StageProfiler(('load', 'parse', 'render'))
+    profiler.add('render', 0.002)
+    profiler.add('extra', 0.001)
+    profiler.add('parse', 1.5)
+    profiler.add('parse', 0.5)
+    with profiler.stage('load'):
+        pass
+    profiler.count('lines_matched', 10)
+    names = [part.split()[0] for part in profiler.summary().split(' | ')]
+    assert names == ['load', 'parse', 'render', 'extra', 'lines_matched']
+    assert 'parse 2.00s/2' in profiler.summary()
+
+
+def test_export_trace(tmp_path):
+    profiler = StageProfiler()
+    profiler.cprofile_enabled = True
+    with profiler.stage('parse'):
+        assert profiler.run(sum, [1, 2, 3]) == 6
+    path = str(tmp_path / 'trace.json')
+    assert profiler.export_trace(path, {'flow_chart': {'redraws': 1}}) == [path, path + '.prof']
+    with open(path, encoding='utf-8') as f:
+        trace = json.load(f)
+    assert [event['name'] for event in trace['traceEvents']] == ['parse']
+    assert trace['stages']['parse']['count'] == 1 and trace['flow_chart'] == {'redraws': 1}
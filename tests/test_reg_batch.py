@@ -0,0 +1,109 @@
+"""寄存器轉儲批次解碼: 多張板子的切分、壓縮文件、錯誤與進程池的輸出"""
+
+import io
+import itertools
+import json
+import lzma
+import os
+
+import pytest
+
+import reg_batch
+from loggen import COMPRESSORS, register_dumps
+from phy_common.batch_files import collect_files
+from phy_common.reg_dump import iter_register_dumps
+from phy_common.reg_schema import REGISTER_SCHEMA
+from reg_batch import decode_file, run_batch
+
+
+def write_dumps(path, boards, compress=None, seed=1, error_rate=0.0):
+    text = ''.join(itertools.islice(register_dumps(seed, error_rate), boards))
+    opener = COMPRESSORS[compress].open if compress else open
+    with opener(path, 'wt', encoding='utf-8') as f:
+        f.write(text)
+    return str(path)
+
+
+def test_boards_are_split_by_marker():
+    text = "RG_FCM_CTRL : 0x1\n# board 7\nRG_FCM_CTRL : 0x2\nbad line\n# board 8\n\nRG_FCM_CTRL : 0x3\n"
+    assert list(iter_register_dumps(io.StringIO(text))) == [
+        (None, {'RG_FCM_CTRL': 1}, (1, 0)),
+        ('7', {'RG_FCM_CTRL': 2}, (1, 1)),
+        ('8', {'RG_FCM_CTRL': 3}, (1, 0)),
+    ]
+    # 沒有分隔行時整個文件為一張板子
+    assert [board for board, _, _ in iter_register_dumps(io.StringIO("RG_A : 0x1\n"))] == [None]
+
+
+def test_decode_file_records(tmp_path):
+    path = write_dumps(tmp_path / 'dumps.txt', 3)
+    records, count, _, error = decode_file(path, report=True)
+    assert (count, error) == (3, '')
+    record = json.loads(records[1])
+    assert (record['file'], record['board'], record['codec']) == (path, '1', 'plain')
+    assert record['lines_unmatched'] == 0
+    assert list(record['registers']) == [name for name in REGISTER_SCHEMA.registers if name in record['registers']]
+    assert record['registers']['RG_SS_LINK_STATUS']['fields']['鏈路狀態'] == 'DOWN'
+    assert record['unknown'] == {}
+    registers = {name: item['value'] for name, item in record['registers'].items()}
+    assert record['report'] == REGISTER_SCHEMA.report_lines(registers)
+
+
+def test_compressed_files_decode_the_same(tmp_path):
+    expected = [json.loads(line) for line in decode_file(write_dumps(tmp_path / 'plain.txt', 5))[0]]
+    for codec, suffix in (('gzip', 'gz'), ('bz2', 'bz2'), ('xz', 'xz')):
+        path = write_dumps(tmp_path / f'dumps.txt.{suffix}', 5, compress=suffix)
+        records = [json.loads(line) for line in decode_file(path)[0]]
+        assert {record['codec'] for record in records} == {codec}
+        strip = ('file', 'codec')
+        assert ([{k: v for k, v in record.items() if k not in strip} for record in records]
+                == [{k: v for k, v in record.items() if k not in strip} for record in expected])
+
+
+def test_corrupt_archives_become_errors(tmp_path):
+    good = write_dumps(tmp_path / 'good.txt.xz', 20, compress='xz')
+    with open(good, 'rb') as f:
+        data = f.read()
+    truncated = tmp_path / 'truncated.txt.xz'
+    truncated.write_bytes(data[:len(data) // 2])
+    corrupt = tmp_path / 'corrupt.txt.xz'
+    corrupt.write_bytes(data[:12] + bytes(200))
+
+    assert decode_file(str(truncated))[3]
+    corrupt_records, count, _, error = decode_file(str(corrupt))
+    assert (corrupt_records, count) == ([], 0)
+    with pytest.raises(lzma.LZMAError) as expected:
+        lzma.decompress(corrupt.read_bytes())
+    assert error == str(expected.value)
+
+
+
+def test_unexpected_errors_do_not_stop_the_batch(tmp_path, monkeypatch):
+    good = write_dumps(tmp_path / 'good.txt', 2)
+    bad = write_dumps(tmp_path / 'bad.txt', 2)
+    encode = reg_batch.encode_board
+
+    def encode_board(meta, registers, report=False):
+        if meta['file'] == bad:
+            raise KeyError('RG_FCM_CTRL')
+        return encode(meta, registers, report)
+
+    monkeypatch.setattr(reg_batch, 'encode_board', encode_board)
+    out = io.StringIO()
+    dumps, errors = run_batch([good, bad, good], out, workers=1)
+    assert dumps == 4 and errors == [(bad, "KeyError: 'RG_FCM_CTRL'")]
+    assert len(out.getvalue().splitlines()) == 4
+
+
+def test_pool_output_matches_serial(tmp_path):
+    for i in range(4):
+        write_dumps(tmp_path / f'run{i}.txt', 6, seed=i, error_rate=0.3)
+    (tmp_path / 'notes.md').write_text('RG_A : 0x1\n', encoding='utf-8')
+    files = collect_files([str(tmp_path)])
+    assert [os.path.basename(path) for path in files] == [f'run{i}.txt' for i in range(4)]
+
+    serial = io.StringIO()
+    pooled = io.StringIO()
+    assert run_batch(files, serial, workers=1) == (24, [])
+    assert run_batch(files, pooled, workers=2) == (24, [])
+    assert pooled.getvalue() == serial.getvalue()
@@ -0,0 +1,59 @@
+"""寄存器轉儲的解析結果快取: 命中、追加、內容改變與最近使用時間的淘汰"""
+
+import os
+
+from phy_common.file_cache import fingerprint
+from reg_cache import RegisterCache
+
+
+def save(cache, path, registers):
+    cache.save(str(path), fingerprint(str(path)), registers, (len(registers), 0))
+
+
+def test_hit_append_and_miss(tmp_path):
+    path = tmp_path / 'dump.txt'
+    cache = RegisterCache(str(tmp_path / 'cache'))
+    path.write_text("RG_FCM_CTRL : 0x1\n", encoding='utf-8')
+    assert cache.load(str(path), 'plain') == (None, 'miss')
+    save(cache, path, {'RG_FCM_CTRL': 1})
+
+    entry, status = cache.load(str(path), 'plain')
+    assert status == 'hit' and entry['registers'] == {'RG_FCM_CTRL': 1}
+
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write("RG_FCM_CTRL : 0x2\n")
+    entry, status = cache.load(str(path), 'plain')
+    assert status == 'append' and entry['fingerprint']['line_end'] == len("RG_FCM_CTRL : 0x1\n")
+    assert cache.load(str(path), 'gzip') == (None, 'miss')
+
+    # 已快取的部分被改寫
+    path.write_text("RG_FCM_CTRL : 0x3\nRG_FCM_CTRL : 0x2\n", encoding='utf-8')
+    assert cache.load(str(path), 'plain') == (None, 'miss')
+
+
+def test_no_append_without_trailing_newline(tmp_path):
+    path = tmp_path / 'dump.txt'
+    cache = RegisterCache(str(tmp_path / 'cache'))
+    path.write_text("RG_FCM_CTRL : 0x1", encoding='utf-8')
+    save(cache, path, {'RG_FCM_CTRL': 1})
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write("0\n")
+    assert cache.load(str(path), 'plain') == (None, 'miss')
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = RegisterCache(str(tmp_path / 'cache'))
+    paths = []
+    for i in range(3):
+        path = tmp_path / f'dump{i}.txt'
+        path.write_text(f"RG_FCM_CTRL : 0x{i}\n", encoding='utf-8')
+        save(cache, path, {'RG_FCM_CTRL': i})
+        os.utime(cache.entry_path(str(path)), (i, i))
+        paths.append(path)
+    # 命中的項目成為最近使用
+    assert cache.load(str(paths[0]), 'plain')[1] == 'hit'
+
+    cache.max_bytes = sum(size for _, size, _ in cache.entries()) - 1
+    assert cache.evict() == 1
+    assert not os.path.exists(cache.entry_path(str(paths[1])))
+    assert [cache.load(str(paths[i]), 'plain')[1] for i in (0, 2)] == ['hit', 'hit']
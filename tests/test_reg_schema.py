@@ -0,0 +1,78 @@
+"""寄存器表的位元欄位解碼與文字報告"""
+
+import random
+
+from phy_common.reg_schema import REGISTER_BLOCKS, REGISTER_SCHEMA, SEPARATOR, RegisterSchema, field, flag
+
+
+def texts(decoded):
+    return {name: text for name, _, _, text in decoded.fields}
+
+
+def reference_raw(spec, value):
+    """不經過編譯表、逐位元計算的欄位值"""
+    if 'gather' in spec:
+        bits = spec['gather']
+    else:
+        high, low = spec['bits']
+        bits = range(high, low - 1, -1)
+    raw = 0
+    for bit in bits:
+        raw = (raw << 1) | ((value >> bit) & 1)
+    return raw
+
+
+def test_compiled_fields_match_reference():
+    rng = random.Random(3)
+    values = [0, 0xffffffff] + [rng.getrandbits(32) for _ in range(200)]
+    for _, registers in REGISTER_BLOCKS:
+        for name, _, fields in registers:
+            register = REGISTER_SCHEMA.registers[name]
+            for value in values:
+                decoded = register.decode(value)
+                assert [raw for _, _, raw, _ in decoded.fields] == [reference_raw(spec, value) for spec in fields]
+
+
+def test_decode_known_values():
+    mii = REGISTER_SCHEMA.decode('RG_MII_REG_00', 0x1140)
+    assert mii.description == 'Basic Control Register'
+    decoded = texts(mii)
+    assert decoded['Auto-Negotiation Enable'] == '開啟'
+    assert decoded['Duplex Mode'] == '全雙工'
+    # 速度由位元 6 (MSB) 與 13 (LSB) 組成
+    assert decoded['速度設定'] == '1000 Mbps'
+
+    status = texts(REGISTER_SCHEMA.decode('RG_SS_LINK_STATUS', 0b0001101))
+    assert (status['鏈路狀態'], status['雙工模式'], status['速度']) == ('UP', '半雙工', '2500 Mbps')
+    assert texts(REGISTER_SCHEMA.decode('RG_SS_LINK_STATUS', 0b11100))['速度'] == '未知速度 (7)'
+    assert texts(REGISTER_SCHEMA.decode('RG_SYS_LINK_MODE', 0x893))['鏈路模式'] == '100BASE-TX 全雙工 (3)'
+
+
+def test_unknown_register_and_wide_fields():
+    assert REGISTER_SCHEMA.decode('RG_NOT_IN_TABLE', 1) is None
+    schema = RegisterSchema((("測試", (('RG_TEST', '測試寄存器', (
+        field(31, 16, '高位', '0x{value:04x}'),
+        flag(0, '啟用', '否', '是'),
+    )),)),))
+    wide = schema.registers['RG_TEST'].fields[0]
+    assert wide.texts is None
+    decoded = schema.decode('RG_TEST', 0xbeef0001)
+    assert decoded.fields == [('高位', '[31:16]', 0xbeef, '0xbeef'), ('啟用', '[0]', 1, '是')]
+    assert decoded.as_dict()['fields'][0] == {'name': '高位', 'bits': '[31:16]', 'raw': 0xbeef, 'text': '0xbeef'}
+
+
+def test_report_lines():
+    registers = {'RG_FCM_CTRL': 0x0a05, 'RG_MII_REG_02': 0x3a2, 'RG_UNKNOWN': 5}
+    lines = REGISTER_SCHEMA.report_lines(registers)
+    assert lines[:3] == [SEPARATOR, REGISTER_BLOCKS[0][0], SEPARATOR]
+    assert "\nRG_MII_REG_02: PHY Identifier 1" in lines
+    assert "值: 0x00000a05 (2565)" in lines
+    assert "    [15:8] 暫停時間: 10" in lines
+    assert "    [1] RX 流量控制: 停用" in lines
+    assert not any('RG_UNKNOWN' in line for line in lines)
+    # 沒有欄位的寄存器不顯示位元分析
+    index = lines.index("\nRG_MII_REG_02: PHY Identifier 1")
+    assert lines[index + 2] != "  位元分析:"
+
+    decoded = REGISTER_SCHEMA.decode_all(registers)
+    assert [[register.name for register in block] for _, block in decoded] == [['RG_MII_REG_02'], ['RG_FCM_CTRL']]